@@ -0,0 +1,107 @@
+"""Measure the CPU overhead the bandwidth limiter adds to the chunk loop."""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from questdrive_syncer.bandwidth import TokenBucket
+
+CHUNK_SIZE = 64 * 1024
+GB = 1000**3
+REPEATS = 15
+ROOT = Path(__file__).parent.parent
+
+
+def chunk_loop(
+    chunk_count: int,
+    chunk_size: int,
+    limiter: TokenBucket | None,
+) -> float:
+    """Return the CPU seconds of copying each chunk - as writing it would - consuming it from the limiter if any."""
+    chunk = bytes(chunk_size)
+    buffer = bytearray(chunk_size)
+    started = time.process_time()
+    for _ in range(chunk_count):
+        buffer[:] = chunk
+        if limiter:
+            limiter.consume(chunk_size)
+    return time.process_time() - started
+
+
+def measure(
+    chunk_count: int,
+    chunk_size: int = CHUNK_SIZE,
+    repeats: int = REPEATS,
+) -> tuple[float, float]:
+    """Return the fastest CPU seconds of the chunk loop without and with a limiter, out of the repeats.
+
+    The loops take turns, so both see the same drift in clock speed and load.
+    """
+    # A limit high enough to never sleep, so only the accounting is measured.
+    limiter = TokenBucket(float(10**12))
+    baselines = []
+    limiteds = []
+    for _ in range(repeats):
+        baselines.append(chunk_loop(chunk_count, chunk_size, None))
+        limiteds.append(chunk_loop(chunk_count, chunk_size, limiter))
+    return min(baselines), min(limiteds)
+
+
+def measure_isolated(
+    chunk_count: int,
+    chunk_size: int = CHUNK_SIZE,
+) -> tuple[float, float]:
+    """Return what measure() returns in a fresh interpreter, where neither coverage nor type checking instrument the loops."""
+    environment = {
+        name: value
+        for name, value in os.environ.items()
+        if not name.startswith(("COV_CORE_", "COVERAGE_"))
+    }
+    completed = subprocess.run(
+        [  # noqa: S603
+            sys.executable,
+            "-c",
+            "from benchmarks.bandwidth import measure; "
+            f"print(*measure({chunk_count}, {chunk_size}))",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+        cwd=ROOT,
+        env=environment,
+    )
+    baseline, limited = map(float, completed.stdout.split())
+    return baseline, limited
+
+
+def overhead_per_gb(
+    baseline: float,
+    limited: float,
+    chunk_count: int,
+    chunk_size: int,
+) -> float:
+    """Return the CPU seconds the limiter adds per GB transferred."""
+    return (limited - baseline) / (chunk_count * chunk_size / GB)
+
+
+def relative_overhead(chunk_count: int, chunk_size: int = CHUNK_SIZE) -> float:
+    """Return the CPU the limiter adds, relative to that of the unlimited chunk loop, measured in a fresh interpreter."""
+    baseline, limited = measure_isolated(chunk_count, chunk_size)
+    return (limited - baseline) / baseline
+
+
+def main() -> None:
+    """Print the limiter overhead for a range of chunk sizes."""
+    for chunk_size in (4 * 1024, 16 * 1024, CHUNK_SIZE):
+        chunk_count = GB // chunk_size
+        baseline, limited = measure(chunk_count, chunk_size)
+        print(
+            f"{chunk_size // 1024:>3} KiB chunks: {overhead_per_gb(baseline, limited, chunk_count, chunk_size) * 1000:.1f} ms CPU per GB, {(limited - baseline) / baseline:.0%} of the unlimited loop",
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,148 @@
+"""Measure the CPU of transferring a video as events, against the previous per-chunk protocol."""
+from __future__ import annotations
+
+import itertools
+import os
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import httpx
+
+from benchmarks.progress import make_display
+from questdrive_syncer.concurrency import AIMDController
+from questdrive_syncer.config import Config
+from questdrive_syncer.download import transfer_video
+from questdrive_syncer.events import ControllerSink, Event, Kind
+from questdrive_syncer.progress import RichSink, TransferProgress
+from questdrive_syncer.session import SyncSession
+from questdrive_syncer.structures import Video
+
+CHUNK_SIZE = 64 * 1024
+GB = 1000**3
+
+
+class ChunkStream(httpx.SyncByteStream):
+    """A response body of identical chunks."""
+
+    def __init__(self: ChunkStream, chunk_count: int, chunk_size: int) -> None:
+        """Initialize the stream with the number & size of its chunks."""
+        self.chunk_count = chunk_count
+        self.chunk = b"\0" * chunk_size
+
+    def __iter__(self: ChunkStream) -> Iterator[bytes]:
+        """Yield each chunk."""
+        for _ in range(self.chunk_count):
+            yield self.chunk
+
+
+def make_session(output_path: str, chunk_count: int, chunk_size: int) -> SyncSession:
+    """Make a session whose downloads respond with the chunks, without a network."""
+
+    def respond(_: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"Content-Length": str(chunk_count * chunk_size)},
+            stream=ChunkStream(chunk_count, chunk_size),
+        )
+
+    return SyncSession(
+        Config(questdrive_url="http://questdrive/", output_path=output_path),
+        client=httpx.Client(transport=httpx.MockTransport(respond)),
+    )
+
+
+def previous_transfer(
+    video: Video,
+    session: SyncSession,
+    download_url: httpx.URL,
+    video_output_filepath: Path,
+) -> Iterator[float | int | str]:
+    """Download the video, yielding the total then each chunk length, as download_and_delete_video() did before events."""
+    limiter = session.limiter
+    with session.stream(download_url) as response, video_output_filepath.open(
+        "wb",
+    ) as file:
+        yield float(response.headers.get("Content-Length", 0))
+        for chunk in response.iter_bytes():
+            file.write(chunk)
+            chunk_length = len(chunk)
+            if limiter:
+                limiter.consume(chunk_length)
+            yield chunk_length
+    os.utime(
+        video_output_filepath,
+        (video.created_at.timestamp(), video.modified_at.timestamp()),
+    )
+
+
+def measure(chunk_count: int, chunk_size: int = CHUNK_SIZE) -> tuple[float, float]:
+    """Return the CPU seconds of a transfer consumed per chunk as before, and as events through the sinks."""
+    total = chunk_count * chunk_size
+    video = Video("path", "video.mp4", datetime.now(), datetime.now(), total / 1000**2)
+    # Not adaptive, so only the accounting of the controller is measured.
+    controller = AIMDController(8, adaptive=False)
+
+    with tempfile.TemporaryDirectory() as output_path, make_session(
+        output_path,
+        chunk_count,
+        chunk_size,
+    ) as session:
+        download_url = session.url("download/video.mp4")
+        video_output_filepath = Path(output_path) / video.filename
+
+        with make_display() as progress:
+            started = time.process_time()
+            transfers = TransferProgress(progress, total, 1)
+            task = transfers.start(video)
+            for value in previous_transfer(
+                video,
+                session,
+                download_url,
+                video_output_filepath,
+            ):
+                if isinstance(value, float):
+                    transfers.set_total(task, value)
+                elif isinstance(value, int):
+                    transfers.advance(task, value)
+                    controller.record_bytes(value)
+            transfers.finish(task)
+            previous = time.process_time() - started
+
+        # So the second transfer doesn't pay for truncating the first.
+        video_output_filepath.unlink()
+        with make_display() as progress:
+            started = time.process_time()
+            sinks = [RichSink(progress, [video]), ControllerSink(controller)]
+            for event in itertools.chain(
+                [Event(Kind.STARTED, video, at=time.monotonic())],
+                transfer_video(video, session, download_url, video_output_filepath, []),
+                [Event(Kind.FINISHED, video, at=time.monotonic())],
+            ):
+                for sink in sinks:
+                    sink.handle(event)
+            evented = time.process_time() - started
+
+    return previous, evented
+
+
+def cpu_per_gb(chunk_count: int, chunk_size: int = CHUNK_SIZE) -> tuple[float, float]:
+    """Return the CPU seconds per GB transferred of the previous protocol, and of events."""
+    gb = chunk_count * chunk_size / GB
+    previous, evented = measure(chunk_count, chunk_size)
+    return previous / gb, evented / gb
+
+
+def main() -> None:
+    """Print the CPU per GB of both protocols for a range of chunk sizes."""
+    for chunk_size in (4 * 1024, 16 * 1024, CHUNK_SIZE):
+        previous, evented = cpu_per_gb(GB // chunk_size, chunk_size)
+        print(
+            f"{chunk_size // 1024:>3} KiB chunks: {previous * 1000:.1f} ms CPU per GB with the previous protocol, {evented * 1000:.1f} ms with events",
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,323 @@
+"""Stand-in QuestDrive server, serving synthetic videos."""
+from __future__ import annotations
+
+import argparse
+import enum
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator, NamedTuple, TypeVar
+from urllib.parse import quote
+
+from questdrive_syncer.bandwidth import TokenBucket
+from questdrive_syncer.constants import VIDEO_SHOTS_PATH
+
+VIDEO_COUNT = 10
+VIDEO_BYTES = 10 * 1000**2
+WRITE_SIZE = 64 * 1024
+SYNTHETIC_BLOCK = bytes(range(256)) * (WRITE_SIZE // 256)
+FIRST_CREATED_AT = datetime(2024, 1, 1, 12, 0, 0)
+ServerT = TypeVar("ServerT", bound="LoopbackServer")
+APPLICATION_NAMES = ("com.beatgames.beatsaber", "com.oculus.vrshell", "Supernatural")
+
+
+class Fault(enum.Enum):
+    """Fault injected halfway through the body of a download."""
+
+    STALL = "stall"
+    RESET = "reset"
+    SHORT_BODY = "short body"
+
+
+class Shaping(NamedTuple):
+    """Network conditions to serve under, each fault striking downloads at random."""
+
+    latency: float = 0
+    mb_per_second: float = float("inf")
+    stall_probability: float = 0
+    stall_seconds: float = 0
+    reset_probability: float = 0
+    short_body_probability: float = 0
+    seed: int = 0
+
+
+class FakeVideo(NamedTuple):
+    """Synthetic video served by the fake."""
+
+    filename: str
+    byte_count: int
+    modified_at: datetime
+
+
+def make_videos(count: int, byte_count: int) -> dict[str, FakeVideo]:
+    """Return synthetic videos by their URL-encoded path, each a minute after the previous."""
+    videos = {}
+    for i in range(count):
+        created_at = FIRST_CREATED_AT + timedelta(minutes=i)
+        filename = f"{APPLICATION_NAMES[i % len(APPLICATION_NAMES)]}-{created_at:%Y%m%d-%H%M%S}.mp4"
+        filepath = quote(f"/storage/emulated/0/Oculus/VideoShots/{filename}", safe="")
+        videos[filepath] = FakeVideo(
+            filename,
+            byte_count,
+            created_at + timedelta(seconds=30),
+        )
+    return videos
+
+
+class FakeQuestDriveHandler(BaseHTTPRequestHandler):
+    """Serves the homepage, the video list, and downloads & deletes of the videos."""
+
+    protocol_version = "HTTP/1.1"
+    server: FakeQuestDrive
+
+    def do_HEAD(self: FakeQuestDriveHandler) -> None:  # noqa: N802
+        """Respond with the headers of the path."""
+        self.respond(send_body=False)
+
+    def do_GET(self: FakeQuestDriveHandler) -> None:  # noqa: N802
+        """Respond with the path."""
+        self.respond(send_body=True)
+
+    def respond(self: FakeQuestDriveHandler, *, send_body: bool) -> None:
+        """Respond with the page, video or deletion of the path."""
+        self.server.count_request(self.command)
+        time.sleep(self.server.shaping.latency)
+        path = self.path
+        if path == "/":
+            self.send_html(self.server.homepage_html(), send_body=send_body)
+        elif path == f"/{VIDEO_SHOTS_PATH}":
+            self.send_html(self.server.listing_html(), send_body=send_body)
+        elif path.startswith("/download/") and (
+            video := self.server.videos.get(path.removeprefix("/download/"))
+        ):
+            self.send_video(video, send_body=send_body)
+        elif path.startswith("/delete/") and self.server.delete(
+            path.removeprefix("/delete/"),
+        ):
+            self.send_html("Deleted", send_body=send_body)
+        else:
+            self.send_html("Not found", status=404, send_body=send_body)
+
+    def send_html(
+        self: FakeQuestDriveHandler,
+        html: str,
+        *,
+        status: int = 200,
+        send_body: bool,
+    ) -> None:
+        """Send the HTML."""
+        body = html.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_video(
+        self: FakeQuestDriveHandler,
+        video: FakeVideo,
+        *,
+        send_body: bool,
+    ) -> None:
+        """Send the synthetic bytes of the video."""
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(video.byte_count))
+        self.end_headers()
+        if not send_body:
+            return
+
+        fault = self.server.choose_fault()
+        self.write_bytes(video.byte_count // 2)
+        if fault is Fault.STALL:
+            time.sleep(self.server.shaping.stall_seconds)
+        elif fault is Fault.RESET:
+            # Lingering for no time makes closing send a RST, rather than a FIN.
+            self.connection.setsockopt(
+                socket.SOL_SOCKET,
+                socket.SO_LINGER,
+                struct.pack("ii", 1, 0),
+            )
+            self.connection.close()
+            self.close_connection = True
+            return
+        elif fault is Fault.SHORT_BODY:
+            self.close_connection = True
+            return
+        self.write_bytes(video.byte_count - video.byte_count // 2)
+
+    def write_bytes(self: FakeQuestDriveHandler, byte_count: int) -> None:
+        """Write synthetic bytes, at the bandwidth of the server."""
+        remaining = byte_count
+        while remaining > 0:
+            size = min(remaining, WRITE_SIZE)
+            self.server.limiter.consume(size)
+            self.wfile.write(SYNTHETIC_BLOCK[:size])
+            remaining -= size
+
+    def log_message(self: FakeQuestDriveHandler, *_: object) -> None:
+        """Don't log requests."""
+
+
+class LoopbackServer(ThreadingHTTPServer):
+    """Server on the loopback interface, counting requests & ignoring clients disconnecting."""
+
+    daemon_threads = True
+
+    def __init__(
+        self: LoopbackServer,
+        address: tuple[str, int],
+        handler: type[BaseHTTPRequestHandler],
+    ) -> None:
+        """Initialize the server, without serving yet."""
+        super().__init__(address, handler)
+        self.requests: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self: LoopbackServer) -> str:
+        """Return the URL of the server."""
+        host, port = self.socket.getsockname()[:2]
+        return f"http://{host}:{port}/"
+
+    def count_request(self: LoopbackServer, method: str) -> None:
+        """Count a request of the method."""
+        with self._lock:
+            self.requests[method] += 1
+
+    def handle_error(
+        self: LoopbackServer,
+        request: socket.socket | tuple[bytes, socket.socket],
+        client_address: tuple[str, int] | str,
+    ) -> None:
+        """Ignore clients disconnecting, as real clients do mid-download."""
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeQuestDrive(LoopbackServer):
+    """Stand-in QuestDrive, serving synthetic videos from memory."""
+
+    def __init__(
+        self: FakeQuestDrive,
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        *,
+        video_count: int = VIDEO_COUNT,
+        video_bytes: int = VIDEO_BYTES,
+        battery_percentage: int = 100,
+        free_space_gb: float = 50,
+        shaping: Shaping = Shaping(),  # noqa: B008
+    ) -> None:
+        """Initialize the server with the synthetic videos, shaping the network as configured."""
+        super().__init__(address, FakeQuestDriveHandler)
+        self.shaping = shaping
+        # Shared by every connection, as the Wi-Fi of a Quest is.
+        self.limiter = TokenBucket(shaping.mb_per_second, burst_seconds=0.1)
+        self.videos = make_videos(video_count, video_bytes)
+        self.battery_percentage = battery_percentage
+        self.free_space_gb = free_space_gb
+        self._random = random.Random(shaping.seed)
+
+    def choose_fault(self: FakeQuestDrive) -> Fault | None:
+        """Choose the fault to inject into a download, if any, reproducibly for the seed."""
+        with self._lock:
+            roll = self._random.random()
+        for fault, probability in (
+            (Fault.STALL, self.shaping.stall_probability),
+            (Fault.RESET, self.shaping.reset_probability),
+            (Fault.SHORT_BODY, self.shaping.short_body_probability),
+        ):
+            if roll < probability:
+                return fault
+            roll -= probability
+        return None
+
+    def delete(self: FakeQuestDrive, filepath: str) -> bool:
+        """Delete the video, returning whether it existed."""
+        with self._lock:
+            return self.videos.pop(filepath, None) is not None
+
+    def homepage_html(self: FakeQuestDrive) -> str:
+        """Return the homepage, with the battery & free space."""
+        return f"<html><body><p>Battery: <b>{self.battery_percentage}%</b></p><p>Free Space: <b>{self.free_space_gb:.2f} GB</b></p></body></html>"
+
+    def listing_html(self: FakeQuestDrive) -> str:
+        """Return the video list, in the format of QuestDrive."""
+        with self._lock:
+            videos = list(self.videos.items())
+        rows = "".join(
+            f"<tr><td><a></a>&nbsp; {video.filename}</td><td>{video.modified_at:%m/%d/%Y %H:%M:%S}</td><td>{video.byte_count / 1024**2:.2f} MB</td><td><a href='/download/{filepath}'></a></td></tr>"
+            for filepath, video in videos
+        )
+        return (
+            f"<html><body><table><tbody><tr></tr>{rows}</tbody></table></body></html>"
+        )
+
+
+@contextmanager
+def serve(server: ServerT) -> Iterator[ServerT]:
+    """Serve in the background, yielding the server."""
+    with server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield server
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def main(*args: str) -> None:
+    """Serve synthetic videos until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7123)
+    parser.add_argument("--videos", type=int, default=VIDEO_COUNT)
+    parser.add_argument("--video-mb", type=float, default=VIDEO_BYTES / 1000**2)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0,
+        help="Seconds before every response",
+    )
+    parser.add_argument(
+        "--mb-per-second",
+        type=float,
+        default=float("inf"),
+        help="Bandwidth shared by every connection",
+    )
+    parser.add_argument("--stall-probability", type=float, default=0)
+    parser.add_argument("--stall-seconds", type=float, default=0)
+    parser.add_argument("--reset-probability", type=float, default=0)
+    parser.add_argument("--short-body-probability", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the faults chosen")
+    options = parser.parse_args(args)
+
+    with FakeQuestDrive(
+        (options.host, options.port),
+        video_count=options.videos,
+        video_bytes=int(options.video_mb * 1000**2),
+        shaping=Shaping(
+            options.latency,
+            options.mb_per_second,
+            options.stall_probability,
+            options.stall_seconds,
+            options.reset_probability,
+            options.short_body_probability,
+            options.seed,
+        ),
+    ) as server:
+        print(f'Serving {options.videos} videos at "{server.url}"')
+        server.serve_forever()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main(*sys.argv[1:])
@@ -0,0 +1,98 @@
+"""Measure the time importing the syncer takes before it can parse its arguments, with -X importtime."""
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from typing import NamedTuple
+
+ENTRY_MODULES = (
+    "questdrive_syncer.config",
+    "questdrive_syncer.main",
+    "questdrive_syncer.profiling",
+)
+# Only needed once videos are synced, shown or help is asked for.
+LAZY_MODULES = ("httpx", "rich.progress", "rich_argparse", "importlib.metadata")
+BUDGET_SECONDS = 0.2
+# The syncer takes one to two times as long to import as the interpreter's own startup,
+# while importing httpx & rich eagerly takes over five.
+STARTUP_BUDGET = 4
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+class ImportTimes(NamedTuple):
+    """Seconds importing the entry modules took, and the seconds each module took by itself."""
+
+    seconds: float
+    self_seconds: dict[str, float]
+
+
+def report(code: str) -> str:
+    """Run the code in a fresh interpreter without coverage, returning the import times it reports."""
+    environment = {
+        name: value
+        for name, value in os.environ.items()
+        if not name.startswith(("COV_CORE_", "COVERAGE_"))
+    }
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],  # noqa: S603
+        capture_output=True,
+        check=True,
+        text=True,
+        env=environment,
+    ).stderr
+
+
+def measure(*modules: str) -> ImportTimes:
+    """Import the modules in a fresh interpreter, returning the times it reports."""
+    seconds = 0.0
+    self_seconds: dict[str, float] = {}
+    for match in IMPORT_TIME.finditer(report(f"import {', '.join(modules)}")):
+        self_us, cumulative_us, indent, name = match.groups()
+        self_seconds[name] = int(self_us) / 1000**2
+        if not indent and name in modules:
+            seconds += int(cumulative_us) / 1000**2
+    return ImportTimes(seconds, self_seconds)
+
+
+def startup_seconds() -> float:
+    """Return the seconds the imports of the interpreter's own startup take, measured in the same way."""
+    return sum(
+        int(cumulative_us) / 1000**2
+        for _, cumulative_us, indent, _ in IMPORT_TIME.findall(report("pass"))
+        if not indent
+    )
+
+
+def main() -> None:
+    """Print the import time of the entry modules against the budgets, and the slowest modules, exiting with an error if it's over either budget or a lazy module was imported eagerly."""
+    times = measure(*ENTRY_MODULES)
+    startup_multiple = times.seconds / startup_seconds()
+    eager_modules = [
+        name for name in sorted(LAZY_MODULES) if name in times.self_seconds
+    ]
+    print(
+        f"{times.seconds * 1000:.1f} ms importing the syncer, with a budget of {BUDGET_SECONDS * 1000:.0f} ms",
+    )
+    print(
+        f"{startup_multiple:.1f} times the interpreter's startup, with a budget of {STARTUP_BUDGET}",
+    )
+    for name in eager_modules:
+        print(f"{name} imported eagerly")
+    for name, seconds in sorted(
+        times.self_seconds.items(),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:10]:
+        print(f"{seconds * 1000:>6.1f} ms {name}")
+    if (
+        times.seconds > BUDGET_SECONDS
+        or startup_multiple > STARTUP_BUDGET
+        or eager_modules
+    ):
+        sys.exit("Importing the syncer is over budget")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,70 @@
+"""Measure the CPU the progress accounting adds to the chunk loop."""
+from __future__ import annotations
+
+import io
+import time
+from datetime import datetime
+
+import rich.console
+import rich.progress
+
+from questdrive_syncer.download import make_progress
+from questdrive_syncer.progress import TransferProgress
+from questdrive_syncer.structures import Video
+
+CHUNK_SIZE = 64 * 1024
+GB = 1000**3
+
+
+def make_display() -> rich.progress.Progress:
+    """Make a progress display rendering to memory."""
+    return rich.progress.Progress(
+        *make_progress().columns,
+        console=rich.console.Console(file=io.StringIO()),
+    )
+
+
+def measure(chunk_count: int, chunk_size: int = CHUNK_SIZE) -> tuple[float, float]:
+    """Return the CPU seconds of the chunk loop updating the display per chunk, and through TransferProgress."""
+    total = chunk_count * chunk_size
+    video = Video("path", "video.mp4", datetime.now(), datetime.now(), total / 1000**2)
+
+    with make_display() as progress:
+        task = progress.add_task("Download", total=total, filename="video.mp4")
+        summary = progress.add_task("Total", total=total, filename="Total")
+        started = time.process_time()
+        for _ in range(chunk_count):
+            progress.update(task, advance=chunk_size)
+            progress.update(summary, advance=chunk_size)
+        per_chunk = time.process_time() - started
+
+    with make_display() as progress:
+        started = time.process_time()
+        transfers = TransferProgress(progress, total, 1)
+        task = transfers.start(video)
+        for _ in range(chunk_count):
+            transfers.advance(task, chunk_size)
+        transfers.finish(task)
+        aggregated = time.process_time() - started
+
+    return per_chunk, aggregated
+
+
+def cpu_per_gb(chunk_count: int, chunk_size: int = CHUNK_SIZE) -> tuple[float, float]:
+    """Return the CPU seconds per GB transferred of updating per chunk, and through TransferProgress."""
+    gb = chunk_count * chunk_size / GB
+    per_chunk, aggregated = measure(chunk_count, chunk_size)
+    return per_chunk / gb, aggregated / gb
+
+
+def main() -> None:
+    """Print the CPU per GB of both approaches for a range of chunk sizes."""
+    for chunk_size in (4 * 1024, 16 * 1024, CHUNK_SIZE):
+        per_chunk, aggregated = cpu_per_gb(GB // chunk_size, chunk_size)
+        print(
+            f"{chunk_size // 1024:>3} KiB chunks: {per_chunk * 1000:.1f} ms CPU per GB updating per chunk, {aggregated * 1000:.1f} ms aggregated",
+        )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
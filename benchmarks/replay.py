@@ -0,0 +1,197 @@
+"""Replay QuestDrive traffic recorded with --record, with its original timing, and measure syncs against it."""
+from __future__ import annotations
+
+import argparse
+import base64
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler
+from typing import NamedTuple
+
+from benchmarks.fake_questdrive import (
+    SYNTHETIC_BLOCK,
+    WRITE_SIZE,
+    LoopbackServer,
+    serve,
+)
+from benchmarks.sync import peak_rss_mb, sync_process
+from questdrive_syncer.cassette import Interaction, read_cassette
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Replays the next recorded response to each request."""
+
+    protocol_version = "HTTP/1.1"
+    server: ReplayServer
+
+    def do_HEAD(self: ReplayHandler) -> None:  # noqa: N802
+        """Replay the response to the request."""
+        self.replay()
+
+    def do_GET(self: ReplayHandler) -> None:  # noqa: N802
+        """Replay the response to the request."""
+        self.replay()
+
+    def replay(self: ReplayHandler) -> None:
+        """Replay the response after its recorded delay, spreading the body over its recorded duration.
+
+        Bodies cut short when recorded are cut short again, and videos are synthetic.
+        Responses recorded without a length are sent with the length of their body, so
+        the connection can be kept alive.
+        """
+        self.server.count_request(self.command)
+        interaction = self.server.next_interaction(self.command, self.path)
+        if interaction is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(interaction.first_byte_seconds)
+        self.send_response(interaction.status)
+        for name, value in interaction.headers.items():
+            self.send_header(name, value)
+        if self.command == "HEAD":
+            self.end_headers()
+            return
+        if "Content-Length" not in interaction.headers:
+            self.send_header("Content-Length", str(interaction.byte_count))
+        self.end_headers()
+
+        body = base64.b64decode(interaction.body or "")
+        started = time.monotonic()
+        written = 0
+        while written < interaction.byte_count:
+            size = min(interaction.byte_count - written, WRITE_SIZE)
+            # Each piece is sent when it finished arriving in the recording.
+            delay = (
+                started
+                + interaction.body_seconds * (written + size) / interaction.byte_count
+                - time.monotonic()
+            )
+            if delay > 0:
+                time.sleep(delay)
+            self.wfile.write(
+                SYNTHETIC_BLOCK[:size]
+                if interaction.body is None
+                else body[written : written + size],
+            )
+            written += size
+        if written < int(interaction.headers.get("Content-Length", written)):
+            self.close_connection = True
+
+    def log_message(self: ReplayHandler, *_: object) -> None:
+        """Don't log requests."""
+
+
+class ReplayServer(LoopbackServer):
+    """Serves the recorded responses of a device, in the order they were recorded.
+
+    Once every response to a request has been replayed, the last one is repeated.
+    """
+
+    def __init__(
+        self: ReplayServer,
+        interactions: list[Interaction],
+        address: tuple[str, int] = ("127.0.0.1", 0),
+        *,
+        device: str | None = None,
+    ) -> None:
+        """Initialize the server with the interactions of the device - the first recorded by default."""
+        super().__init__(address, ReplayHandler)
+        if device is None and interactions:
+            device = interactions[0].device
+        self.interactions = [
+            interaction for interaction in interactions if interaction.device == device
+        ]
+        self._queues: defaultdict[tuple[str, str], deque[Interaction]] = defaultdict(
+            deque,
+        )
+        for interaction in sorted(self.interactions, key=lambda i: i.started):
+            self._queues[interaction.method, interaction.path].append(interaction)
+
+    def next_interaction(
+        self: ReplayServer,
+        method: str,
+        path: str,
+    ) -> Interaction | None:
+        """Return the next recorded response to the request, if there's any."""
+        with self._lock:
+            queue = self._queues.get((method, path))
+            if not queue:
+                return None
+            return queue.popleft() if len(queue) > 1 else queue[0]
+
+    @property
+    def recorded_seconds(self: ReplayServer) -> float:
+        """Return the seconds from the first request to the last response recorded."""
+        if not self.interactions:
+            return 0
+        return max(
+            i.started + i.first_byte_seconds + i.body_seconds for i in self.interactions
+        ) - min(i.started for i in self.interactions)
+
+
+class Result(NamedTuple):
+    """Measurements of a sync against a replay."""
+
+    seconds: float
+    recorded_seconds: float
+    requests: int
+    recorded_requests: int
+    cpu_seconds: float
+    peak_rss_mb: float
+
+
+def run(path: str, *args: str, device: str | None = None) -> Result:
+    """Sync against a replay of the cassette in a separate process, so only the syncer's CPU & memory are measured."""
+    with serve(
+        ReplayServer(read_cassette(path), device=device),
+    ) as server, tempfile.TemporaryDirectory() as output_path:
+        seconds, usage = sync_process(server.url, output_path, *args)
+        return Result(
+            seconds,
+            server.recorded_seconds,
+            sum(server.requests.values()),
+            len(server.interactions),
+            usage.ru_utime + usage.ru_stime,
+            peak_rss_mb(usage),
+        )
+
+
+def main(*args: str) -> None:
+    """Measure a sync against a replay of the cassette, or serve the replay until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("cassette")
+    parser.add_argument(
+        "--device",
+        help="URL of the recorded device to replay - the first recorded by default",
+    )
+    parser.add_argument(
+        "--serve",
+        type=int,
+        metavar="PORT",
+        help="Serve the replay at the port until interrupted, rather than measuring a sync",
+    )
+    options, sync_args = parser.parse_known_args(args)
+
+    if options.serve is not None:
+        with ReplayServer(
+            read_cassette(options.cassette),
+            ("127.0.0.1", options.serve),
+            device=options.device,
+        ) as server:
+            print(f'Replaying {len(server.interactions)} responses at "{server.url}"')
+            server.serve_forever()
+        return
+
+    result = run(options.cassette, *sync_args, device=options.device)
+    print(
+        f"{result.seconds:.2f} s wall against {result.recorded_seconds:.2f} s recorded, {result.requests} requests against {result.recorded_requests} recorded, {result.cpu_seconds:.2f} s CPU, {result.peak_rss_mb:,.1f} MB peak RSS",
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main(*sys.argv[1:])
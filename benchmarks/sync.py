@@ -0,0 +1,151 @@
+"""Measure whole syncs against the stand-in QuestDrive, from the command line to the last delete."""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, NamedTuple
+
+from benchmarks.fake_questdrive import FakeQuestDrive, Shaping, serve
+
+if TYPE_CHECKING:  # pragma: no cover
+    import resource
+
+VIDEO_COUNT = 20
+VIDEO_BYTES = 25 * 1000**2
+
+
+class Mode(NamedTuple):
+    """Way of running the syncer, rerunning it up to the attempts while videos are left."""
+
+    name: str
+    args: tuple[str, ...]
+    attempts: int = 1
+
+
+MODES = (
+    Mode("serial", ("--max-concurrency=1",)),
+    Mode("concurrent", ("--max-concurrency=4",)),
+    # Failed videos are left on the Quest, for the next sync to retry.
+    Mode("retrying", ("--max-concurrency=4",), attempts=5),
+    Mode("watchdog", ("--max-concurrency=4", "--stall-timeout=1"), attempts=5),
+)
+CONDITIONS = {
+    "loopback": Shaping(),
+    "flaky Wi-Fi": Shaping(
+        latency=0.02,
+        mb_per_second=40,
+        stall_probability=0.1,
+        stall_seconds=3,
+        reset_probability=0.05,
+        short_body_probability=0.05,
+    ),
+}
+
+
+class Result(NamedTuple):
+    """Measurements of a sync, summed over every attempt."""
+
+    seconds: float
+    megabytes_per_second: float
+    requests_per_video: float
+    cpu_seconds: float
+    peak_rss_mb: float
+    attempts: int
+    videos_left: int
+
+
+def sync_process(
+    url: str,
+    output_path: str,
+    *args: str,
+) -> tuple[float, resource.struct_rusage]:
+    """Sync in a separate process, returning its wall-clock seconds & resource usage."""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [  # noqa: S603
+            sys.executable,
+            "-m",
+            "questdrive_syncer",
+            f"--questdrive-url={url}",
+            f"--output={output_path}",
+            "--simple-output",
+            "--minimum-free-space=0",
+            *args,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        # Lockfiles are kept with the output, so they're removed along with it.
+        env={**os.environ, "XDG_STATE_HOME": output_path},
+    )
+    _, _, usage = os.wait4(process.pid, 0)
+    return time.perf_counter() - started, usage
+
+
+def peak_rss_mb(usage: resource.struct_rusage) -> float:
+    """Return the peak RSS of the usage in MB."""
+    # Kibibytes on Linux.
+    return usage.ru_maxrss * 1024 / 1000**2
+
+
+def run(
+    video_count: int,
+    video_bytes: int,
+    *args: str,
+    shaping: Shaping = Shaping(),  # noqa: B008
+    attempts: int = 1,
+) -> Result:
+    """Sync the synthetic videos in a separate process, so only the syncer's CPU & memory are measured.
+
+    The sync is rerun while any videos are left, up to the attempts.
+    """
+    with serve(
+        FakeQuestDrive(
+            video_count=video_count,
+            video_bytes=video_bytes,
+            shaping=shaping,
+        ),
+    ) as server, tempfile.TemporaryDirectory() as output_path:
+        seconds = cpu_seconds = peak_rss = 0.0
+        attempt = 0
+        while server.videos and attempt < attempts:
+            attempt += 1
+            attempt_seconds, usage = sync_process(server.url, output_path, *args)
+            seconds += attempt_seconds
+            cpu_seconds += usage.ru_utime + usage.ru_stime
+            peak_rss = max(peak_rss, peak_rss_mb(usage))
+
+        # Videos are only deleted once they're verified.
+        synced_count = video_count - len(server.videos)
+        return Result(
+            seconds,
+            synced_count * video_bytes / 1000**2 / seconds,
+            sum(server.requests.values()) / video_count,
+            cpu_seconds,
+            peak_rss,
+            attempt,
+            len(server.videos),
+        )
+
+
+def main() -> None:
+    """Print the measurements of each mode under each network condition."""
+    for condition, shaping in CONDITIONS.items():
+        print(f"{condition}:")
+        for mode in MODES:
+            result = run(
+                VIDEO_COUNT,
+                VIDEO_BYTES,
+                *mode.args,
+                shaping=shaping,
+                attempts=mode.attempts,
+            )
+            print(
+                f"  {mode.name:>10}: {result.seconds:6.2f} s wall over {result.attempts} attempts, {result.videos_left} of {VIDEO_COUNT} videos left, {result.megabytes_per_second:,.1f} MB/s, {result.requests_per_video:.1f} requests per video, {result.cpu_seconds:.2f} s CPU, {result.peak_rss_mb:,.1f} MB peak RSS",
+            )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,61 @@
+"""Tests for the bandwidth benchmark."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from benchmarks.bandwidth import (
+    main,
+    measure,
+    measure_isolated,
+    overhead_per_gb,
+    relative_overhead,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pytest
+    from pytest_mock import MockerFixture
+
+# Measured at around a quarter to two fifths, so doubling the cost of the limiter fails.
+MAX_RELATIVE_OVERHEAD = 0.5
+
+
+def test_measure_returns_cpu_times() -> None:
+    """measure() returns non-negative CPU times for both loops."""
+    baseline, limited = measure(100)
+
+    assert baseline >= 0
+    assert limited >= 0
+
+
+def test_measure_isolated_returns_cpu_times() -> None:
+    """measure_isolated() returns non-negative CPU times for both loops from a fresh interpreter."""
+    baseline, limited = measure_isolated(100)
+
+    assert baseline >= 0
+    assert limited >= 0
+
+
+def test_overhead_per_gb() -> None:
+    """overhead_per_gb() spreads the CPU the limiter adds over the GB transferred."""
+    assert overhead_per_gb(1, 1.5, 1000, 1000**2) == 0.5  # noqa: PLR2004
+
+
+def test_relative_overhead_is_small() -> None:
+    """The limiter adds less than half the CPU of copying each 64 KiB chunk, measured in the same uninstrumented run."""
+    assert relative_overhead(16_000) < MAX_RELATIVE_OVERHEAD
+
+
+def test_main_prints_each_chunk_size(
+    mocker: MockerFixture,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """main() prints the overhead of each chunk size."""
+    mocker.patch("benchmarks.bandwidth.GB", 1024**2)
+
+    main()
+
+    out = capsys.readouterr().out
+    assert "  4 KiB chunks:" in out
+    assert " 16 KiB chunks:" in out
+    assert " 64 KiB chunks:" in out
+    assert "of the unlimited loop" in out
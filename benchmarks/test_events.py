@@ -0,0 +1,79 @@
+"""Tests for the events benchmark."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from benchmarks.events import (
+    cpu_per_gb,
+    main,
+    make_session,
+    measure,
+    previous_transfer,
+)
+from questdrive_syncer.bandwidth import TokenBucket
+from questdrive_syncer.structures import Video
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    import pytest
+    from pytest_mock import MockerFixture
+
+
+def test_measure_returns_cpu_times() -> None:
+    """measure() returns non-negative CPU times for both protocols."""
+    previous, evented = measure(100, 1000)
+
+    assert previous >= 0
+    assert evented >= 0
+
+
+def test_previous_transfer_consumes_the_limiter(
+    tmp_path: Path,
+    mocker: MockerFixture,
+) -> None:
+    """previous_transfer() yields the total then each chunk, consuming the limiter."""
+    video = Video("path", "video.mp4", datetime.now(), datetime.now(), 0.003)
+    limiter = TokenBucket(1)
+    consume = mocker.spy(limiter, "consume")
+    with make_session(str(tmp_path), 3, 1000) as session:
+        session.limiter = limiter
+
+        values = list(
+            previous_transfer(
+                video,
+                session,
+                session.url("download/video.mp4"),
+                tmp_path / video.filename,
+            ),
+        )
+
+    assert values == [3000.0, 1000, 1000, 1000]
+    assert (tmp_path / video.filename).stat().st_size == 3000  # noqa: PLR2004
+    assert consume.call_args_list == [mocker.call(1000)] * 3
+
+
+def test_events_use_no_more_cpu() -> None:
+    """Transferring with events uses no more CPU per GB of 4 KiB chunks than the previous protocol.
+
+    Small chunks keep the comparison meaningful under the runtime type checking of tests.
+    """
+    previous, evented = cpu_per_gb(16_000, 4 * 1024)
+
+    assert evented <= previous
+
+
+def test_main_prints_each_chunk_size(
+    mocker: MockerFixture,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """main() prints the CPU per GB of each chunk size."""
+    mocker.patch("benchmarks.events.GB", 1024**2)
+
+    main()
+
+    out = capsys.readouterr().out
+    assert "  4 KiB chunks:" in out
+    assert " 16 KiB chunks:" in out
+    assert " 64 KiB chunks:" in out
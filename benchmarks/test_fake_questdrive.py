@@ -0,0 +1,172 @@
+"""Tests for the stand-in QuestDrive server."""
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+import pytest
+
+from benchmarks.fake_questdrive import (
+    FakeQuestDrive,
+    Fault,
+    Shaping,
+    main,
+    make_videos,
+    serve,
+)
+from questdrive_syncer.constants import VIDEO_SHOTS_PATH
+from questdrive_syncer.parsers import parse_homepage_html, parse_video_list_html
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_mock import MockerFixture
+
+
+def test_make_videos() -> None:
+    """make_videos() names each video after an application & when it was created, a minute apart."""
+    videos = list(make_videos(2, 1000).values())
+
+    assert [video.filename for video in videos] == [
+        "com.beatgames.beatsaber-20240101-120000.mp4",
+        "com.oculus.vrshell-20240101-120100.mp4",
+    ]
+    assert {video.byte_count for video in videos} == {1000}
+
+
+@pytest.mark.usefixtures("enable_network")
+class TestFakeQuestDrive:
+    """Tests for the FakeQuestDrive class."""
+
+    @staticmethod
+    def test_pages_parse() -> None:
+        """Serves a homepage & video list that parse as QuestDrive's do."""
+        with serve(
+            FakeQuestDrive(video_count=2, video_bytes=3 * 1024**2, free_space_gb=12.5),
+        ) as server:
+            homepage = httpx.get(server.url).text
+            listing = httpx.get(f"{server.url}{VIDEO_SHOTS_PATH}").text
+
+        battery_percentage, free_space_mb = parse_homepage_html(homepage)
+        assert battery_percentage == 100  # noqa: PLR2004
+        assert free_space_mb == pytest.approx(12500 * 1.048576)
+        videos = parse_video_list_html(listing)
+        assert [video.filepath for video in videos] == list(make_videos(2, 0))
+        assert [video.mb_size for video in videos] == pytest.approx([3 * 1.048576] * 2)
+
+    @staticmethod
+    def test_downloads_and_deletes() -> None:
+        """Serves the length & bytes of videos, until they're deleted."""
+        with serve(FakeQuestDrive(video_count=1, video_bytes=100_000)) as server:
+            filepath = next(iter(server.videos))
+            head = httpx.head(f"{server.url}download/{filepath}")
+            download = httpx.get(f"{server.url}download/{filepath}")
+            delete = httpx.get(f"{server.url}delete/{filepath}")
+            missing = httpx.get(f"{server.url}download/{filepath}")
+
+        assert head.headers["Content-Length"] == "100000"
+        assert len(download.content) == 100_000  # noqa: PLR2004
+        assert delete.status_code == 200  # noqa: PLR2004
+        assert missing.status_code == 404  # noqa: PLR2004
+        assert server.videos == {}
+        assert server.requests == {"HEAD": 1, "GET": 3}
+
+    @staticmethod
+    def test_latency_and_bandwidth() -> None:
+        """Delays every response, and caps the bandwidth of downloads."""
+        with serve(
+            FakeQuestDrive(
+                video_count=1,
+                video_bytes=200_000,
+                shaping=Shaping(latency=0.05, mb_per_second=1),
+            ),
+        ) as server:
+            started = time.monotonic()
+            httpx.head(server.url)
+            head_seconds = time.monotonic() - started
+            httpx.get(f"{server.url}download/{next(iter(server.videos))}")
+            download_seconds = time.monotonic() - started - head_seconds
+
+        assert head_seconds >= 0.05  # noqa: PLR2004
+        # A tenth of a second of burst, then 100 KB at 1 MB/s.
+        assert download_seconds >= 0.05 + 0.1
+
+    @staticmethod
+    def test_stall() -> None:
+        """Pauses halfway through the body of downloads."""
+        with serve(
+            FakeQuestDrive(
+                video_count=1,
+                video_bytes=1000,
+                shaping=Shaping(stall_probability=1, stall_seconds=0.1),
+            ),
+        ) as server:
+            started = time.monotonic()
+            response = httpx.get(f"{server.url}download/{next(iter(server.videos))}")
+
+        assert time.monotonic() - started >= 0.1  # noqa: PLR2004
+        assert len(response.content) == 1000  # noqa: PLR2004
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        ("shaping", "error"),
+        [
+            (Shaping(reset_probability=1), httpx.ReadError),
+            (Shaping(short_body_probability=1), httpx.RemoteProtocolError),
+        ],
+    )
+    def test_cut_off(shaping: Shaping, error: type[httpx.HTTPError]) -> None:
+        """Resets the connection, or closes it early, halfway through the body of downloads."""
+        with serve(
+            FakeQuestDrive(video_count=1, video_bytes=1000, shaping=shaping),
+        ) as server, pytest.raises(error):
+            httpx.get(f"{server.url}download/{next(iter(server.videos))}")
+
+    @staticmethod
+    def test_choose_fault() -> None:
+        """Chooses faults in proportion to their probability, reproducibly for the seed."""
+        shaping = Shaping(
+            stall_probability=0.2,
+            reset_probability=0.3,
+            short_body_probability=0.1,
+            seed=1,
+        )
+        with FakeQuestDrive(shaping=shaping) as left, FakeQuestDrive(
+            shaping=shaping,
+        ) as right:
+            faults = [left.choose_fault() for _ in range(1000)]
+            assert faults[:10] == [right.choose_fault() for _ in range(10)]
+
+        assert 150 < faults.count(Fault.STALL) < 250  # noqa: PLR2004
+        assert 250 < faults.count(Fault.RESET) < 350  # noqa: PLR2004
+        assert 50 < faults.count(Fault.SHORT_BODY) < 150  # noqa: PLR2004
+        assert 350 < faults.count(None) < 450  # noqa: PLR2004
+
+    @staticmethod
+    def test_handle_error(mocker: MockerFixture) -> None:
+        """Ignores clients disconnecting, but reports other errors."""
+        handle_error = mocker.patch("socketserver.BaseServer.handle_error")
+        mocker.patch(
+            "benchmarks.fake_questdrive.sys.exc_info",
+            side_effect=[
+                (ConnectionResetError, ConnectionResetError(), None),
+                (ValueError, ValueError(), None),
+            ],
+        )
+
+        with FakeQuestDrive() as server:
+            server.handle_error(mocker.Mock(), ("127.0.0.1", 1))
+            server.handle_error(mocker.Mock(), ("127.0.0.1", 1))
+
+        handle_error.assert_called_once()
+
+
+def test_main(mocker: MockerFixture, capsys: pytest.CaptureFixture[str]) -> None:
+    """main() serves the synthetic videos under the network conditions until interrupted."""
+    serve_forever = mocker.patch.object(FakeQuestDrive, "serve_forever")
+    fake_questdrive = mocker.spy(FakeQuestDrive, "__init__")
+
+    main("--port=0", "--videos=3", "--video-mb=0.5", "--latency=0.1", "--seed=2")
+
+    serve_forever.assert_called_once_with()
+    assert fake_questdrive.call_args.kwargs["shaping"] == Shaping(latency=0.1, seed=2)
+    assert "Serving 3 videos at " in capsys.readouterr().out
@@ -0,0 +1,94 @@
+"""Tests for the import time benchmark."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from benchmarks.importtime import (
+    ENTRY_MODULES,
+    LAZY_MODULES,
+    STARTUP_BUDGET,
+    ImportTimes,
+    main,
+    measure,
+    startup_seconds,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_mock import MockerFixture
+
+
+class TestMeasure:
+    """Tests for the measure() function."""
+
+    @staticmethod
+    def test_measures_entry_modules() -> None:
+        """Measures the time importing the entry modules took."""
+        times = measure(*ENTRY_MODULES)
+
+        assert times.seconds > 0
+        assert set(ENTRY_MODULES) <= set(times.self_seconds)
+
+    @staticmethod
+    def test_within_startup_budget() -> None:
+        """Imports the syncer within the budget relative to the interpreter's startup, measured alike."""
+        times = measure(*ENTRY_MODULES)
+
+        assert times.seconds < STARTUP_BUDGET * startup_seconds()
+
+    @staticmethod
+    def test_defers_lazy_modules() -> None:
+        """Doesn't import the modules only needed later."""
+        times = measure(*ENTRY_MODULES)
+
+        assert not set(LAZY_MODULES) & set(times.self_seconds)
+
+
+def test_main(mocker: MockerFixture, capsys: pytest.CaptureFixture[str]) -> None:
+    """main() prints the import time within the budgets and the slowest modules."""
+    mocker.patch(
+        "benchmarks.importtime.measure",
+        return_value=ImportTimes(
+            0.1,
+            {"questdrive_syncer.main": 0.05, "questdrive_syncer.config": 0.01},
+        ),
+    )
+    mocker.patch("benchmarks.importtime.startup_seconds", return_value=0.04)
+
+    main()
+
+    assert capsys.readouterr().out.splitlines() == [
+        "100.0 ms importing the syncer, with a budget of 200 ms",
+        "2.5 times the interpreter's startup, with a budget of 4",
+        "  50.0 ms questdrive_syncer.main",
+        "  10.0 ms questdrive_syncer.config",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("seconds", "self_seconds"),
+    [
+        (0.3, {}),
+        (0.19, {}),
+        (0.1, {"httpx": 0.05}),
+    ],
+)
+def test_main_exits_over_budget(
+    mocker: MockerFixture,
+    capsys: pytest.CaptureFixture[str],
+    seconds: float,
+    self_seconds: dict[str, float],
+) -> None:
+    """main() exits with an error over either budget, or when a lazy module is imported eagerly."""
+    mocker.patch(
+        "benchmarks.importtime.measure",
+        return_value=ImportTimes(seconds, self_seconds),
+    )
+    mocker.patch("benchmarks.importtime.startup_seconds", return_value=0.04)
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+
+    assert exc_info.value.code == "Importing the syncer is over budget"
+    assert capsys.readouterr().out
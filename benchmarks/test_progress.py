@@ -0,0 +1,40 @@
+"""Tests for the progress benchmark."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from benchmarks.progress import cpu_per_gb, main, measure
+
+if TYPE_CHECKING:  # pragma: no cover
+    import pytest
+    from pytest_mock import MockerFixture
+
+
+def test_measure_returns_cpu_times() -> None:
+    """measure() returns non-negative CPU times for both approaches."""
+    per_chunk, aggregated = measure(100)
+
+    assert per_chunk >= 0
+    assert aggregated >= 0
+
+
+def test_aggregating_uses_less_cpu() -> None:
+    """Aggregating uses less CPU per GB than updating the display every chunk."""
+    per_chunk, aggregated = cpu_per_gb(16_000)
+
+    assert aggregated < per_chunk
+
+
+def test_main_prints_each_chunk_size(
+    mocker: MockerFixture,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """main() prints the CPU per GB of each chunk size."""
+    mocker.patch("benchmarks.progress.GB", 1024**2)
+
+    main()
+
+    out = capsys.readouterr().out
+    assert "  4 KiB chunks:" in out
+    assert " 16 KiB chunks:" in out
+    assert " 64 KiB chunks:" in out
@@ -0,0 +1,240 @@
+"""Tests for the replay benchmark."""
+from __future__ import annotations
+
+import base64
+import gzip
+import time
+from typing import TYPE_CHECKING
+
+import httpx
+import pytest
+
+from benchmarks.fake_questdrive import FakeQuestDrive, serve
+from benchmarks.replay import ReplayServer, Result, main, run
+from benchmarks.sync import sync_process
+from questdrive_syncer.cassette import Interaction, read_cassette
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+
+def make_interaction(
+    method: str = "GET",
+    path: str = "/",
+    *,
+    device: str = "http://quest/",
+    started: float = 0,
+    first_byte_seconds: float = 0,
+    body_seconds: float = 0,
+    byte_count: int | None = None,
+    content_length: int | None = None,
+    body: bytes | None = b"page",
+    headers: dict[str, str] | None = None,
+) -> Interaction:
+    """Create a recorded interaction, of the length of its body unless given."""
+    if byte_count is None:
+        byte_count = len(body or b"")
+    return Interaction(
+        device,
+        method,
+        path,
+        200,
+        {
+            "Content-Length": str(
+                byte_count if content_length is None else content_length,
+            ),
+        }
+        if headers is None
+        else headers,
+        started,
+        first_byte_seconds,
+        body_seconds,
+        byte_count,
+        None if body is None else base64.b64encode(body).decode(),
+    )
+
+
+class TestReplayServer:
+    """Tests for the ReplayServer class."""
+
+    @staticmethod
+    def test_replays_first_device_by_default() -> None:
+        """Replays the interactions of the first device recorded, unless told otherwise."""
+        left = make_interaction(device="http://left/")
+        right = make_interaction(device="http://right/")
+
+        with ReplayServer([left, right]) as first, ReplayServer(
+            [left, right],
+            device="http://right/",
+        ) as chosen, ReplayServer([]) as empty:
+            assert first.interactions == [left]
+            assert chosen.interactions == [right]
+            assert empty.interactions == []
+            assert empty.recorded_seconds == 0
+
+    @staticmethod
+    def test_recorded_seconds() -> None:
+        """Spans the first request to the last response recorded."""
+        with ReplayServer(
+            [
+                make_interaction(started=1, first_byte_seconds=1, body_seconds=1),
+                make_interaction(started=2, first_byte_seconds=2, body_seconds=2),
+            ],
+        ) as server:
+            assert server.recorded_seconds == 5  # noqa: PLR2004
+
+    @staticmethod
+    @pytest.mark.usefixtures("enable_network")
+    def test_replays_in_order_with_timing() -> None:
+        """Replays the responses to each request in order, after their delay & over their duration, repeating the last."""
+        with serve(
+            ReplayServer(
+                [
+                    make_interaction(started=1, body=b"last"),
+                    make_interaction(
+                        started=0,
+                        first_byte_seconds=0.05,
+                        body_seconds=0.05,
+                        body=b"page",
+                    ),
+                ],
+            ),
+        ) as server:
+            started = time.monotonic()
+            first = httpx.get(server.url).text
+            seconds = time.monotonic() - started
+            rest = [httpx.get(server.url).text for _ in range(2)]
+            missing = httpx.get(f"{server.url}missing")
+
+        assert first == "page"
+        assert seconds >= 0.1  # noqa: PLR2004
+        assert rest == ["last", "last"]
+        assert missing.status_code == 404  # noqa: PLR2004
+        assert server.requests == {"GET": 4}
+
+    @staticmethod
+    @pytest.mark.usefixtures("enable_network")
+    def test_replays_videos_synthetically() -> None:
+        """Replays videos as synthetic bytes of their recorded size, and their headers alone to HEAD requests."""
+        with serve(
+            ReplayServer(
+                [
+                    make_interaction("GET", byte_count=100_000, body=None),
+                    make_interaction("HEAD", byte_count=0, content_length=100_000),
+                ],
+            ),
+        ) as server:
+            video = httpx.get(server.url)
+            head = httpx.head(server.url)
+
+        assert len(video.content) == 100_000  # noqa: PLR2004
+        assert head.headers["Content-Length"] == "100000"
+
+    @staticmethod
+    @pytest.mark.usefixtures("enable_network")
+    def test_replays_bodies_as_recorded() -> None:
+        """Replays bodies byte for byte, still compressed if they were, and with their length if it wasn't recorded."""
+        compressed = gzip.compress(b"<html>page</html>")
+        with serve(
+            ReplayServer(
+                [
+                    make_interaction(
+                        body=compressed,
+                        headers={
+                            "Content-Encoding": "gzip",
+                            "Content-Length": str(len(compressed)),
+                        },
+                    ),
+                    make_interaction("GET", "/binary", body=b"caf\xe9", headers={}),
+                ],
+            ),
+        ) as server, httpx.Client() as client:
+            page = client.get(server.url)
+            binary = client.get(f"{server.url}binary")
+            again = client.get(f"{server.url}binary")
+
+        assert page.text == "<html>page</html>"
+        assert binary.content == again.content == b"caf\xe9"
+        assert binary.headers["Content-Length"] == "4"
+
+    @staticmethod
+    @pytest.mark.usefixtures("enable_network")
+    def test_cuts_short_bodies_short() -> None:
+        """Cuts bodies short again when they were cut short when recorded."""
+        with serve(
+            ReplayServer(
+                [make_interaction(byte_count=500, content_length=1000, body=None)],
+            ),
+        ) as server, pytest.raises(httpx.RemoteProtocolError):
+            httpx.get(server.url)
+
+
+@pytest.mark.usefixtures("enable_network")
+def test_run_replays_recorded_sync(tmp_path: Path) -> None:
+    """run() syncs against a replay of a recorded sync, making the same requests."""
+    path = tmp_path / "cassette.json"
+    with serve(FakeQuestDrive(video_count=2, video_bytes=1000)) as server:
+        sync_process(
+            server.url,
+            str(tmp_path),
+            f"--record={path}",
+            "--recording-window=0.01",
+        )
+    recorded = read_cassette(str(path))
+
+    result = run(str(path), "--recording-window=0.01")
+
+    assert {interaction.path for interaction in recorded} >= {
+        "/",
+        "/list/storage/emulated/0/Oculus/VideoShots/",
+    }
+    assert result.recorded_requests == len(recorded)
+    assert result.requests == len(recorded)
+    assert result.seconds > 0
+    assert result.recorded_seconds > 0
+    assert result.cpu_seconds > 0
+    assert result.peak_rss_mb > 0
+
+
+class TestMain:
+    """Tests for the main() function."""
+
+    @staticmethod
+    def test_measures(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Measures a sync against the replay, passing on the arguments it doesn't know."""
+        measure = mocker.patch(
+            "benchmarks.replay.run",
+            return_value=Result(1, 2, 3, 4, 5, 6),
+        )
+
+        main("cassette.json", "--max-concurrency=2")
+
+        measure.assert_called_once_with(
+            "cassette.json",
+            "--max-concurrency=2",
+            device=None,
+        )
+        assert "1.00 s wall against 2.00 s recorded, 3 requests against 4 recorded" in (
+            capsys.readouterr().out
+        )
+
+    @staticmethod
+    def test_serves(
+        mocker: MockerFixture,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Serves the replay until interrupted."""
+        path = tmp_path / "cassette.json"
+        path.write_text('{"interactions": []}')
+        serve_forever = mocker.patch.object(ReplayServer, "serve_forever")
+
+        main(str(path), "--serve=0")
+
+        serve_forever.assert_called_once_with()
+        assert "Replaying 0 responses at " in capsys.readouterr().out
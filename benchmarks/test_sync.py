@@ -0,0 +1,63 @@
+"""Tests for the sync benchmark."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from benchmarks.fake_questdrive import Shaping
+from benchmarks.sync import MODES, main, run
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_mock import MockerFixture
+
+
+@pytest.mark.usefixtures("enable_network")
+class TestRun:
+    """Tests for the run() function."""
+
+    @staticmethod
+    def test_measures_sync() -> None:
+        """Syncs & deletes every video, measuring the syncer's process."""
+        result = run(3, 100_000, "--recording-window=0.01")
+
+        assert result.seconds > 0
+        assert result.megabytes_per_second > 0
+        assert result.requests_per_video >= 3  # noqa: PLR2004
+        assert result.cpu_seconds > 0
+        assert result.peak_rss_mb > 0
+        assert result.attempts == 1
+        assert result.videos_left == 0
+
+    @staticmethod
+    def test_retries_while_videos_are_left() -> None:
+        """Reruns the sync while any videos are left, up to the attempts."""
+        result = run(
+            2,
+            1000,
+            "--recording-window=0.01",
+            shaping=Shaping(reset_probability=1),
+            attempts=2,
+        )
+
+        assert result.attempts == 2  # noqa: PLR2004
+        assert result.videos_left == 2  # noqa: PLR2004
+        assert result.megabytes_per_second == 0
+
+
+def test_main(mocker: MockerFixture, capsys: pytest.CaptureFixture[str]) -> None:
+    """main() prints the measurements of each concurrency."""
+    mocker.patch("benchmarks.sync.VIDEO_COUNT", 2)
+    mocker.patch("benchmarks.sync.VIDEO_BYTES", 1000)
+    mocker.patch("benchmarks.sync.CONDITIONS", {"fast": Shaping()})
+    measure = mocker.patch("benchmarks.sync.run", wraps=run)
+
+    main()
+
+    assert [call.args[2:] for call in measure.call_args_list] == [
+        mode.args for mode in MODES
+    ]
+    out = capsys.readouterr().out
+    assert "fast:\n" in out
+    assert "    serial: " in out
+    assert "  watchdog: " in out
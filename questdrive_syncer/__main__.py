@@ -3,7 +3,13 @@ import sys
 
 from questdrive_syncer.config import init_config
 from questdrive_syncer.main import main
+from questdrive_syncer.profiling import profiling
 
 if __name__ == "__main__":
-    init_config(*sys.argv[1:])
-    main()
+    config = init_config(*sys.argv[1:])
+    with profiling(
+        config.profile,
+        mode=config.profile_mode,
+        memory=config.profile_memory,
+    ):
+        main(config)
@@ -1,49 +1,72 @@
 """Interactions with QuestDrive."""
 from __future__ import annotations
 
-import httpx
+import random
+import socket
+from typing import TYPE_CHECKING, Iterator
 
-from questdrive_syncer.config import CONFIG
 from questdrive_syncer.constants import (
+    PROBE_JITTER,
     VIDEO_SHOTS_PATH,
 )
-from questdrive_syncer.structures import MissingVideoError, Video
+from questdrive_syncer.helpers import lazy_import
 
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
 
-def is_online() -> bool:
-    """Check if QuestDrive is online."""
+    from questdrive_syncer.session import SyncSession
+else:
+    httpx = lazy_import("httpx")
+
+
+def probe_delays(minimum: float, maximum: float) -> Iterator[float]:
+    """Yield delays doubling from the minimum up to the maximum, with jitter."""
+    delay = minimum
+    while True:
+        yield delay * random.uniform(1 - PROBE_JITTER, 1 + PROBE_JITTER)  # noqa: S311
+        delay = min(delay * 2, maximum)
+
+
+def is_reachable(session: SyncSession) -> bool:
+    """Check if the QuestDrive host accepts connections, without a HTTP request."""
+    url = session.url()
     try:
-        response = httpx.get(CONFIG.questdrive_url)
-    except httpx.ConnectError:
+        with socket.create_connection(
+            (url.host, url.port or (443 if url.scheme == "https" else 80)),
+            timeout=session.config.probe_timeout,
+        ):
+            return True
+    except OSError:
         return False
-    else:
-        return response.status_code == httpx.codes.OK
 
 
-def fetch_video_list_html() -> str:
-    """Fetch the URL and HTML of the video list."""
-    return httpx.get(httpx.URL(CONFIG.questdrive_url).join(VIDEO_SHOTS_PATH)).text
+def is_online(session: SyncSession) -> bool:
+    """Check if QuestDrive is online, keeping the homepage HTML for fetch_homepage_html()."""
+    try:
+        with session.timings.time("probe"):
+            response = session.get(
+                session.url(),
+                timeout=session.config.probe_timeout,
+            )
+    except httpx.TransportError:
+        return False
+
+    if response.status_code != httpx.codes.OK:
+        return False
+    session.homepage_html = response.text
+    return True
 
 
-def fetch_homepage_html() -> str:
+def fetch_video_list_html(session: SyncSession) -> str:
     """Fetch the URL and HTML of the video list."""
-    return httpx.get(CONFIG.questdrive_url).text
-
-
-def update_actively_recording(videos: list[Video], latest_videos: list[Video]) -> None:
-    """Update the actively_recording attribute of the videos if the modified_at has changed."""
-    for video in videos:
-        latest_video = next(
-            (
-                latest_video
-                for latest_video in latest_videos
-                if latest_video.filepath == video.filepath
-            ),
-            None,
-        )
-
-        if latest_video is None:
-            raise MissingVideoError(video.filepath)
-
-        if latest_video.modified_at != video.modified_at:
-            video.actively_recording = True
+    with session.timings.time("listing"):
+        return session.get(session.url(VIDEO_SHOTS_PATH)).text
+
+
+def fetch_homepage_html(session: SyncSession) -> str:
+    """Fetch the HTML of the homepage, reusing it from is_online() if available."""
+    if session.homepage_html is not None:
+        homepage_html, session.homepage_html = session.homepage_html, None
+        return homepage_html
+    with session.timings.time("homepage"):
+        return session.get(session.url()).text
@@ -0,0 +1,91 @@
+"""Bandwidth limiting for downloads."""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import time as time_of_day
+
+SCHEDULE_RECHECK_SECONDS = 1
+
+
+@dataclass(frozen=True)
+class RateWindow:
+    """Bandwidth limit to apply between two times of the day."""
+
+    start: time_of_day
+    end: time_of_day
+    mb_per_second: float
+
+    def __contains__(self: RateWindow, moment: time_of_day) -> bool:
+        """Return if the moment is within the window, wrapping around midnight."""
+        if self.start <= self.end:
+            return self.start <= moment < self.end
+        return moment >= self.start or moment < self.end
+
+
+class TokenBucket:
+    """Thread-safe token bucket, shared by every download it's passed to."""
+
+    def __init__(
+        self: TokenBucket,
+        mb_per_second: float,
+        schedule: list[RateWindow] | None = None,
+        *,
+        burst_seconds: float = 1,
+    ) -> None:
+        """Initialize the bucket as full."""
+        self.mb_per_second = mb_per_second
+        self.schedule = schedule or []
+        self.burst_seconds = burst_seconds
+        self._lock = threading.Lock()
+        self._rate = 0.0
+        self._rate_checked_at = float("-inf")
+        self._updated_at = time.monotonic()
+        self._refresh_rate(self._updated_at)
+        self._tokens = self._rate * burst_seconds
+
+    def current_mb_per_second(self: TokenBucket) -> float:
+        """Return the limit for the current time of the day."""
+        now = datetime.now().time()
+        return next(
+            (window.mb_per_second for window in self.schedule if now in window),
+            self.mb_per_second,
+        )
+
+    def _refresh_rate(self: TokenBucket, now: float) -> None:
+        """Refresh the rate in bytes per second from the schedule."""
+        self._rate = self.current_mb_per_second() * 1000**2
+        self._rate_checked_at = now
+
+    def consume(self: TokenBucket, byte_count: int) -> None:
+        """Block until byte_count bytes are allowed to be transferred."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._rate_checked_at >= SCHEDULE_RECHECK_SECONDS:
+                self._refresh_rate(now)
+            if self._rate == float("inf"):
+                return
+
+            self._tokens = min(
+                self._rate * self.burst_seconds,
+                self._tokens + (now - self._updated_at) * self._rate,
+            )
+            self._updated_at = now
+            self._tokens -= byte_count
+            if self._tokens >= 0:
+                return
+            delay = -self._tokens / self._rate
+
+        time.sleep(delay)
+
+
+def make_limiter(
+    mb_per_second: float,
+    schedule: list[RateWindow],
+) -> TokenBucket | None:
+    """Return a token bucket if any limit is configured."""
+    if mb_per_second == float("inf") and not schedule:
+        return None
+    return TokenBucket(mb_per_second, schedule)
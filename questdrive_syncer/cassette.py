@@ -0,0 +1,81 @@
+"""Recordings of QuestDrive traffic, to replay without the headset."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple
+
+
+class Interaction(NamedTuple):
+    """Request & response, with the body of pages but only the size of videos.
+
+    Bodies are base64-encoded as they were received - still compressed if they were
+    sent with a content encoding. Times are seconds, from the start of the recording to
+    the request, then from the request to the response headers, then from the headers
+    to the end of the body.
+    """
+
+    device: str
+    method: str
+    path: str
+    status: int
+    headers: dict[str, str]
+    started: float
+    first_byte_seconds: float
+    body_seconds: float
+    byte_count: int
+    body: str | None
+
+
+class Cassette:
+    """Interactions of every recorded session, in the order their responses finished."""
+
+    def __init__(self: Cassette) -> None:
+        """Initialize the cassette with no interactions, starting the recording now."""
+        self.interactions: list[Interaction] = []
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self: Cassette, interaction: Interaction) -> None:
+        """Add the interaction."""
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def write(self: Cassette, path: str) -> None:
+        """Write the interactions as JSON."""
+        with self._lock:
+            Path(path).write_text(
+                json.dumps(
+                    {
+                        "interactions": [
+                            interaction._asdict() for interaction in self.interactions
+                        ],
+                    },
+                ),
+            )
+
+
+def read_cassette(path: str) -> list[Interaction]:
+    """Read the interactions of a cassette."""
+    interactions: list[dict[str, Any]] = json.loads(Path(path).read_text())[
+        "interactions"
+    ]
+    return [Interaction(**interaction) for interaction in interactions]
+
+
+@contextmanager
+def recording(path: str | None) -> Iterator[Cassette | None]:
+    """Yield a cassette if there's a path, writing it there afterwards - even on failure."""
+    if path is None:
+        yield None
+        return
+
+    cassette = Cassette()
+    try:
+        yield cassette
+    finally:
+        cassette.write(path)
+        print(f'Cassette written to "{path}"')
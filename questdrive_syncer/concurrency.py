@@ -0,0 +1,142 @@
+"""Concurrency control for downloads."""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+WINDOW_SECONDS = 5
+TOLERANCE = 0.1
+
+
+class AIMDController:
+    """Additive-increase/multiplicative-decrease limit on concurrent downloads.
+
+    Every window the total throughput is compared to the previous window: if it rose
+    the limit is increased by one, if there were errors or the per-download throughput
+    fell the limit is halved.
+    """
+
+    def __init__(
+        self: AIMDController,
+        maximum: int,
+        *,
+        adaptive: bool = True,
+        window_seconds: float = WINDOW_SECONDS,
+    ) -> None:
+        """Initialize the controller, starting at one download if adaptive."""
+        self.maximum = maximum
+        self.adaptive = adaptive
+        self.window_seconds = window_seconds
+        self.limit = 1 if adaptive else maximum
+        self.active = 0
+        self._condition = threading.Condition()
+        self._window_started = time.monotonic()
+        self._window_bytes = 0
+        self._window_errors = 0
+        self._previous_throughput = 0.0
+        self._previous_stream_throughput = 0.0
+
+    def acquire(self: AIMDController) -> None:
+        """Block until another download is allowed to start."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    def release(self: AIMDController) -> None:
+        """Mark a download as finished."""
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def run(
+        self: AIMDController,
+        worker: Callable[[int, T], None],
+        i: int,
+        item: T,
+    ) -> None:
+        """Run the worker in an acquired slot, releasing it once finished."""
+        try:
+            worker(i, item)
+        finally:
+            self.release()
+
+    def record_bytes(self: AIMDController, byte_count: int) -> None:
+        """Record transferred bytes, adjusting the limit at the end of each window."""
+        with self._condition:
+            self._window_bytes += byte_count
+            self._maybe_adjust()
+
+    def record_error(self: AIMDController) -> None:
+        """Record a failed download."""
+        with self._condition:
+            self._window_errors += 1
+            self._maybe_adjust()
+
+    def _maybe_adjust(self: AIMDController) -> None:
+        """Adjust the limit if the current window has ended."""
+        now = time.monotonic()
+        elapsed = now - self._window_started
+        if not self.adaptive or elapsed < self.window_seconds:
+            return
+
+        throughput = self._window_bytes / elapsed
+        stream_throughput = throughput / max(self.active, 1)
+        if self._window_errors:
+            reason = f"{self._window_errors} failed downloads"
+            self._set_limit(self.limit // 2, reason, throughput)
+        elif throughput > self._previous_throughput * (1 + TOLERANCE):
+            self._set_limit(self.limit + 1, "total throughput rose", throughput)
+        elif stream_throughput < self._previous_stream_throughput * (1 - TOLERANCE):
+            reason = "per-download throughput fell"
+            self._set_limit(self.limit // 2, reason, throughput)
+
+        self._previous_throughput = throughput
+        self._previous_stream_throughput = stream_throughput
+        self._window_started = now
+        self._window_bytes = 0
+        self._window_errors = 0
+
+    def _set_limit(
+        self: AIMDController,
+        limit: int,
+        reason: str,
+        throughput: float,
+    ) -> None:
+        """Set the limit within the bounds, logging the decision."""
+        limit = min(max(limit, 1), self.maximum)
+        if limit == self.limit:
+            return
+
+        print(
+            f"Concurrency {self.limit} -> {limit}: {reason}, {throughput / 1000**2:,.2f} MB/s total",
+        )
+        self.limit = limit
+        self._condition.notify_all()
+
+
+def run_concurrently(
+    items: Iterable[T],
+    worker: Callable[[int, T], None],
+    controller: AIMDController,
+) -> None:
+    """Run the worker for each item & index, as concurrently as the controller allows.
+
+    Each item is only taken once the controller allows another worker to start, so
+    an iterator can choose the next item as late as possible.
+    """
+    indexed_items = enumerate(items)
+    with ThreadPoolExecutor(max_workers=controller.maximum) as executor:
+        futures = []
+        while True:
+            controller.acquire()
+            if (indexed_item := next(indexed_items, None)) is None:
+                controller.release()
+                break
+            i, item = indexed_item
+            futures.append(executor.submit(controller.run, worker, i, item))
+        for future in futures:
+            future.result()
@@ -2,13 +2,21 @@
 from __future__ import annotations
 
 import argparse
-import importlib.metadata
+import ipaddress
 import sys
 import time
-from dataclasses import dataclass
-from typing import Literal
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Literal
+from urllib.parse import urlsplit
 
-from rich_argparse import HelpPreviewAction, RichHelpFormatter
+from questdrive_syncer.bandwidth import RateWindow
+from questdrive_syncer.constants import HTTP_TIMEOUT
+from questdrive_syncer.layout import LAYOUT_FIELDS, SAMPLE_VIDEO, render_shard
+from questdrive_syncer.structures import FleetDevice
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Sequence
 
 
 @dataclass
@@ -17,6 +25,12 @@ class Config:
 
     questdrive_url: str
     output_path: str = "output/"
+    output_roots: list[str] = field(default_factory=list)
+    placement: Literal["headroom" | "round-robin"] = "headroom"
+    layout: str = ""
+    mirror_paths: list[str] = field(default_factory=list)
+    staging_path: str | None = None
+    max_moves: int = 2
     minimum_free_space_mb: float = 1024
     wait_for_questdrive: bool = False
     run_while_actively_recording: bool = True
@@ -34,9 +48,24 @@ class Config:
         | "duration"
     ] = "mb_size"
     sort_order: Literal["ascending" | "descending"] = "ascending"
-
-
-CONFIG = Config(questdrive_url="https://example.com/")
+    max_bandwidth_mb: float = float("inf")
+    bandwidth_schedule: list[RateWindow] = field(default_factory=list)
+    max_concurrency: int = 1
+    adaptive_concurrency: bool = False
+    fleet: list[FleetDevice] = field(default_factory=list)
+    daemon: bool = False
+    probe_timeout: float = 0.8
+    stall_timeout: float = HTTP_TIMEOUT
+    discover_network: ipaddress.IPv4Network | None = None
+    force: bool = False
+    recording_window: float = 1.0
+    event_log: str | None = None
+    metrics_textfile: str | None = None
+    trace: str | None = None
+    record: str | None = None
+    profile: str | None = None
+    profile_mode: Literal["deterministic" | "sampling"] = "deterministic"
+    profile_memory: bool = False
 
 
 def float_gte_zero(value: str) -> float:
@@ -50,13 +79,88 @@ def float_gte_zero(value: str) -> float:
     return float_value
 
 
+def float_gt_zero(value: str) -> float:
+    """Return a float greater than 0."""
+    float_value = float(value)
+    if float_value <= 0:
+        message = "must be greater then 0"
+        raise argparse.ArgumentTypeError(
+            message,
+        )
+    return float_value
+
+
+def rate_window(value: str) -> RateWindow:
+    """Return a RateWindow from a "HH:MM-HH:MM=MB" string."""
+    try:
+        times, mb_per_second = value.split("=")
+        start, end = (
+            datetime.strptime(raw_time, "%H:%M").time() for raw_time in times.split("-")
+        )
+    except ValueError:
+        message = 'must be in the format "HH:MM-HH:MM=MB"'
+        raise argparse.ArgumentTypeError(
+            message,
+        ) from None
+    return RateWindow(start, end, float_gt_zero(mb_per_second))
+
+
+def int_gte_one(value: str) -> int:
+    """Return an int greater than or equal to 1."""
+    int_value = int(value)
+    if int_value < 1:
+        message = "can't be less then 1"
+        raise argparse.ArgumentTypeError(
+            message,
+        )
+    return int_value
+
+
 def str_with_trailing_forward_slash(value: str) -> str:
-    """Return a string with a trailing forward slash."""
-    if not value.endswith("/"):
+    """Return a string with a trailing forward slash, unless empty."""
+    if value and not value.endswith("/"):
         value += "/"
     return value
 
 
+def layout_template(value: str) -> str:
+    """Return a layout template built only from video fields."""
+    try:
+        render_shard(value, SAMPLE_VIDEO)
+    except (KeyError, IndexError, AttributeError, ValueError):
+        message = f"must be built from the video fields {', '.join(LAYOUT_FIELDS)}"
+        raise argparse.ArgumentTypeError(
+            message,
+        ) from None
+    return value
+
+
+def fleet_device(value: str) -> FleetDevice:
+    """Return a FleetDevice from a "URL[=SUBDIRECTORY]" string, the URL having a scheme & host to name the subdirectory after by default."""
+    questdrive_url, _, subdirectory = value.partition("=")
+    url = urlsplit(questdrive_url)
+    if not url.scheme or not url.netloc:
+        message = "must be a URL with a scheme & host, such as http://192.168.0.2:7123/"
+        raise argparse.ArgumentTypeError(
+            message,
+        )
+    return FleetDevice(
+        str_with_trailing_forward_slash(questdrive_url),
+        subdirectory or url.netloc.replace(":", "_"),
+    )
+
+
+def ipv4_network(value: str) -> ipaddress.IPv4Network:
+    """Return an IPv4 network from a CIDR range."""
+    try:
+        return ipaddress.IPv4Network(value, strict=False)
+    except ValueError:
+        message = "must be a CIDR range, such as 192.168.0.0/24"
+        raise argparse.ArgumentTypeError(
+            message,
+        ) from None
+
+
 def percentage(value: str) -> int:
     """Return a int between 0 and 100."""
     int_value = int(value)
@@ -68,11 +172,143 @@ def percentage(value: str) -> int:
     return int_value
 
 
+def rich_help_formatter(prog: str) -> argparse.HelpFormatter:
+    """Return a rich help formatter, importing rich only once help or an error is shown."""
+    from rich_argparse import RichHelpFormatter
+
+    return RichHelpFormatter(prog)
+
+
+class HelpPreviewAction(argparse.Action):
+    """Render the help to the path and exit, importing rich only when requested."""
+
+    def __init__(
+        self: HelpPreviewAction,
+        option_strings: Sequence[str],
+        dest: str,
+        *,
+        path: str,
+    ) -> None:
+        """Initialize the action, hidden from the help."""
+        super().__init__(
+            option_strings,
+            dest,
+            nargs="?",
+            const=path,
+            default=argparse.SUPPRESS,
+            help=argparse.SUPPRESS,
+        )
+
+    def __call__(
+        self: HelpPreviewAction,
+        parser: argparse.ArgumentParser,
+        namespace: argparse.Namespace,
+        values: str | Sequence[Any] | None,
+        option_string: str | None = None,
+    ) -> None:
+        """Render the help to the path."""
+        from rich_argparse import HelpPreviewAction
+
+        HelpPreviewAction(self.option_strings, self.dest, path=self.const)(
+            parser,
+            namespace,
+            values,
+            option_string,
+        )
+
+
+class VersionAction(argparse.Action):
+    """Print the version and exit, looking it up only when requested."""
+
+    def __init__(
+        self: VersionAction,
+        option_strings: Sequence[str],
+        dest: str,
+    ) -> None:
+        """Initialize the action."""
+        super().__init__(
+            option_strings,
+            dest,
+            nargs=0,
+            default=argparse.SUPPRESS,
+            help="show program's version number and exit",
+        )
+
+    def __call__(
+        self: VersionAction,
+        parser: argparse.ArgumentParser,
+        *_: object,
+    ) -> None:
+        """Print the version."""
+        import importlib.metadata
+
+        formatter = parser.formatter_class(prog=parser.prog)
+        formatter.add_text(
+            f"[argparse.prog]%(prog)s[/] version [i]{importlib.metadata.version('questdrive-syncer')}[/]",
+        )
+        print(formatter.format_help(), end="")
+        parser.exit()
+
+
+def add_output_arguments(
+    parser: argparse.ArgumentParser,
+    default_config: Config,
+) -> None:
+    """Add the arguments for where videos are saved to the parser."""
+    parser.add_argument(
+        "--output",
+        type=str_with_trailing_forward_slash,
+        default=default_config.output_path,
+        help="Directory to save videos to",
+        dest="output_path",
+    )
+    parser.add_argument(
+        "--output-root",
+        type=str_with_trailing_forward_slash,
+        action="append",
+        default=default_config.output_roots,
+        help="Another directory - on its own disk - to save videos to alongside --output, which keeps the index of where each went - can be provided multiple times",
+        dest="output_roots",
+    )
+    parser.add_argument(
+        "--placement",
+        choices=["headroom", "round-robin"],
+        default=default_config.placement,
+        help="How to choose the directory each video is saved to with --output-root: the one with the most free space, or each in turn",
+    )
+    parser.add_argument(
+        "--layout",
+        type=layout_template,
+        default=default_config.layout,
+        help="Subdirectories to save each video to, built from its fields, such as {application_name}/{created_at:%%Y}/{created_at:%%m} - --output keeps the index of where each went",
+    )
+    parser.add_argument(
+        "--mirror",
+        type=str_with_trailing_forward_slash,
+        action="append",
+        default=default_config.mirror_paths,
+        help="Directory to write another copy of every video to as it downloads, only deleting it from the Quest once every copy is complete - can be provided multiple times",
+        dest="mirror_paths",
+    )
+    parser.add_argument(
+        "--staging-path",
+        type=str_with_trailing_forward_slash,
+        default=default_config.staging_path,
+        help="Directory on a faster disk to download videos to, so they're deleted from the Quest sooner - a background mover then copies them to --output",
+    )
+    parser.add_argument(
+        "--max-moves",
+        type=int_gte_one,
+        default=default_config.max_moves,
+        help="Maximum number of videos to move from --staging-path to --output at the same time",
+    )
+
+
 def parse_args(*args: str) -> Config:
     """Parse the command-line arguments."""
     parser = argparse.ArgumentParser(
         description="Sync your Quest's recordings to your computer via QuestDrive",
-        formatter_class=RichHelpFormatter,
+        formatter_class=rich_help_formatter,
     )
 
     default_config = Config(questdrive_url="")
@@ -84,22 +320,23 @@ def parse_args(*args: str) -> Config:
     )
     parser.add_argument(
         "--version",
-        action="version",
-        version=f"[argparse.prog]%(prog)s[/] version [i]{importlib.metadata.version('questdrive-syncer')}[/]",
+        action=VersionAction,
     )
     parser.add_argument(
         "--questdrive-url",
         type=str_with_trailing_forward_slash,
-        required=True,
+        default=default_config.questdrive_url,
         help="URL of running QuestDrive instance",
     )
     parser.add_argument(
-        "--output",
-        type=str_with_trailing_forward_slash,
-        default=default_config.output_path,
-        help="Directory to save videos to",
-        dest="output_path",
+        "--fleet-device",
+        type=fleet_device,
+        action="append",
+        default=default_config.fleet,
+        help='URL of a running QuestDrive instance to sync concurrently with the others, as "URL=SUBDIRECTORY" of the output directory - can be provided multiple times instead of --questdrive-url',
+        dest="fleet",
     )
+    add_output_arguments(parser, default_config)
     parser.add_argument(
         "--minimum-free-space",
         type=float_gte_zero,
@@ -152,6 +389,12 @@ def parse_args(*args: str) -> Config:
         default=default_config.only_run_if_battery_above,
         help="Only run if QuestDrive reports a battery percentage above this value",
     )
+    parser.add_argument(
+        "--recording-window",
+        type=float_gt_zero,
+        default=default_config.recording_window,
+        help="Seconds to watch the newest videos for growth, to detect if the Quest is actively recording",
+    )
     parser.add_argument(
         "--sort-by",
         choices=[
@@ -171,9 +414,112 @@ def parse_args(*args: str) -> Config:
         default=default_config.sort_order,
         help="Order to sort videos by",
     )
+    parser.add_argument(
+        "--max-bandwidth",
+        type=float_gt_zero,
+        default=default_config.max_bandwidth_mb,
+        help="Maximum total download speed in MB/s, shared by all downloads",
+        dest="max_bandwidth_mb",
+    )
+    parser.add_argument(
+        "--bandwidth-schedule",
+        type=rate_window,
+        action="append",
+        default=default_config.bandwidth_schedule,
+        help='Maximum total download speed in MB/s during a time of day, as "HH:MM-HH:MM=MB" - can be provided multiple times',
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int_gte_one,
+        default=default_config.max_concurrency,
+        help="Maximum number of videos to download at the same time",
+    )
+    parser.add_argument(
+        "--adaptive-concurrency",
+        action="store_true",
+        default=default_config.adaptive_concurrency,
+        help="Start with one download at a time, adapting up to --max-concurrency based on the observed throughput",
+    )
+    parser.add_argument(
+        "--probe-timeout",
+        type=float_gt_zero,
+        default=default_config.probe_timeout,
+        help="Seconds to wait for QuestDrive to connect & respond when checking if it's online",
+    )
+    parser.add_argument(
+        "--stall-timeout",
+        type=float_gt_zero,
+        default=default_config.stall_timeout,
+        help="Seconds without receiving any bytes before abandoning a request - a stalled video is left on the Quest",
+    )
+    parser.add_argument(
+        "--discover",
+        type=ipv4_network,
+        default=default_config.discover_network,
+        help="CIDR range to scan for QuestDrive - at the scheme & port of --questdrive-url - when it's not found at the last discovered or configured URL",
+        dest="discover_network",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        default=default_config.force,
+        help="Sync even if the video list is unchanged since the last complete sync",
+    )
+    parser.add_argument(
+        "--event-log",
+        default=default_config.event_log,
+        help="File to append a JSON line to for every phase of syncing each video",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        default=default_config.metrics_textfile,
+        help="Prometheus node-exporter textfile to write the timing of each phase & the counts to after every sync",
+    )
+    parser.add_argument(
+        "--trace",
+        default=default_config.trace,
+        help="File to write a Chrome trace event timeline of every phase to on exit, for chrome://tracing or Perfetto",
+    )
+    parser.add_argument(
+        "--record",
+        default=default_config.record,
+        help="File to record the QuestDrive traffic to on exit - pages, and the size & timing of every response - to replay with benchmarks.replay",
+    )
+    parser.add_argument(
+        "--profile",
+        default=default_config.profile,
+        help="File to write a CPU profile of the run to on exit, printing the top functions",
+    )
+    parser.add_argument(
+        "--profile-mode",
+        choices=["deterministic", "sampling"],
+        default=default_config.profile_mode,
+        help="Profile every call as pstats, or sample the stacks of every thread as collapsed stacks - with low enough overhead for production runs",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        default=default_config.profile_memory,
+        help="Trace memory allocations, printing the peak & the lines allocating the most on exit",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        default=default_config.daemon,
+        help="Keep running, syncing as soon as QuestDrive comes online instead of exiting after a single sync",
+    )
 
     config = Config(**vars(parser.parse_args(args)))
 
+    if not config.questdrive_url and not config.fleet:
+        parser.error(
+            "the following arguments are required: --questdrive-url or --fleet-device",
+        )
+    if config.questdrive_url and config.fleet:
+        parser.error("--questdrive-url can't be used with --fleet-device")
+    if config.discover_network and not config.questdrive_url:
+        parser.error("--discover requires --questdrive-url")
+
     if config.delete_videos and not config.download_videos:
         print(
             "Current configuration will delete videos without downloading.\nIf this is really what you want, simply wait 15 seconds and the program will continue.",
@@ -183,6 +529,6 @@ def parse_args(*args: str) -> Config:
     return config
 
 
-def init_config(*args: str) -> None:
-    """Initialize the global configuration."""
-    CONFIG.__dict__.update(parse_args(*args).__dict__)
+def init_config(*args: str) -> Config:
+    """Initialize the configuration from the arguments."""
+    return parse_args(*args)
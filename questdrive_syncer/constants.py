@@ -6,3 +6,21 @@ ACTIVELY_RECORDING_EXIT_CODE = 4
 TOO_MUCH_SPACE_EXIT_CODE = 5
 NOT_ENOUGH_BATTERY_EXIT_CODE = 6
 QUESTDRIVE_POLL_RATE_MINUTES = 5
+MIN_PROBE_SECONDS = 5
+PROBE_JITTER = 0.2
+HTTP_TIMEOUT = 5.0
+NEIGHBOR_TABLE_PATH = "/proc/net/arp"
+NEIGHBOR_POLL_SECONDS = 1
+DISCOVERY_CONCURRENCY = 128
+DISCOVERY_CACHE_FILENAME = ".questdrive_url"
+LISTING_FINGERPRINT_FILENAME = ".questdrive_listing"
+RECORDING_CANDIDATES = 2
+RECORDING_CHECKS = 4
+LISTED_SIZE_TOLERANCE_MB = 1.1
+PROGRESS_REFRESH_SECONDS = 0.1
+BYTES_EVENT_SIZE = 256 * 1024
+PROFILE_TOP_COUNT = 20
+PROFILE_SAMPLE_SECONDS = 0.01
+MOVE_CHUNK_SIZE = 8 * 1024**2
+PLACEMENT_INDEX_FILENAME = ".questdrive_index"
+MIRROR_QUEUE_CHUNKS = 256
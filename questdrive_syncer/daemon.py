@@ -0,0 +1,103 @@
+"""Keep syncing a QuestDrive instance whenever it's online."""
+from __future__ import annotations
+
+import threading
+import time
+import traceback
+from typing import TYPE_CHECKING, Callable
+
+from questdrive_syncer.api import is_reachable, probe_delays
+from questdrive_syncer.constants import (
+    MIN_PROBE_SECONDS,
+    QUESTDRIVE_POLL_RATE_MINUTES,
+)
+from questdrive_syncer.helpers import lazy_import
+from questdrive_syncer.presence import make_watcher
+from questdrive_syncer.session import SyncMetrics
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+    import rich.progress
+
+    from questdrive_syncer.presence import NeighborWatcher
+    from questdrive_syncer.session import SyncSession
+else:
+    httpx = lazy_import("httpx")
+
+
+def wait_to_probe(
+    stop: threading.Event,
+    delay: float,
+    watcher: NeighborWatcher | None,
+) -> bool:
+    """Wait the delay - or until the watcher sees QuestDrive join - returning if stopped."""
+    if watcher is None:
+        return stop.wait(delay)
+
+    deadline = time.monotonic() + delay
+    while (remaining := deadline - time.monotonic()) > 0:
+        if stop.wait(min(watcher.interval, remaining)):
+            return True
+        if watcher.joined():
+            print(f"{watcher.ip_address} joined the network, probing now...")
+            return False
+    return False
+
+
+def sync_once(
+    session: SyncSession,
+    sync: Callable[[SyncSession, rich.progress.Progress | None], None],
+    progress: rich.progress.Progress | None,
+) -> None:
+    """Sync with fresh metrics, reporting - instead of raising - why the sync stopped.
+
+    Unexpected errors - such as a full or unplugged disk, or a listing that can't be
+    parsed - are reported with their traceback, so the next sync is still attempted.
+    The lock is held for as long as the daemon runs, so it's never taken here.
+    """
+    session.metrics = SyncMetrics()
+    try:
+        sync(session, progress)
+    except SystemExit as error:
+        print(
+            f'Sync of "{session.config.questdrive_url}" stopped with exit code {error.code}',
+        )
+    except httpx.HTTPError as error:
+        print(f'Failed to sync "{session.config.questdrive_url}": {error}')
+    except Exception:  # noqa: BLE001
+        print(f'Failed to sync "{session.config.questdrive_url}":')
+        traceback.print_exc()
+
+
+def run_daemon(
+    session: SyncSession,
+    progress: rich.progress.Progress | None = None,
+    *,
+    sync: Callable[[SyncSession, rich.progress.Progress | None], None],
+    stop: threading.Event | None = None,
+    min_probe_seconds: float = MIN_PROBE_SECONDS,
+    max_probe_seconds: float = QUESTDRIVE_POLL_RATE_MINUTES * 60,
+) -> None:
+    """Sync whenever QuestDrive is online until stopped, reusing the session's client.
+
+    While offline QuestDrive is probed with a backoff from the minimum to the maximum,
+    so it's noticed soon after coming online, and while online it's synced again every
+    maximum. When QuestDrive is at an IP address on the local network it's probed as
+    soon as it appears in the neighbor table, with the backoff as a fallback.
+    """
+    stop = stop or threading.Event()
+    watcher = make_watcher(session.config.questdrive_url)
+    delays = probe_delays(min_probe_seconds, max_probe_seconds)
+    while True:
+        if is_reachable(session):
+            sync_once(session, sync, progress)
+            delays = probe_delays(min_probe_seconds, max_probe_seconds)
+            delay = max_probe_seconds
+        else:
+            delay = next(delays)
+            print(
+                f'Waiting for QuestDrive at "{session.config.questdrive_url}", probing again in {delay:,.0f} seconds...',
+            )
+
+        if wait_to_probe(stop, delay, watcher):
+            return
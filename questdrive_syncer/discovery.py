@@ -0,0 +1,84 @@
+"""Discover QuestDrive on the local network."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.constants import DISCOVERY_CACHE_FILENAME, DISCOVERY_CONCURRENCY
+from questdrive_syncer.helpers import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ipaddress import IPv4Network
+
+    import httpx
+
+    from questdrive_syncer.config import Config
+else:
+    httpx = lazy_import("httpx")
+
+
+def is_questdrive(client: httpx.Client, url: str, timeout: float) -> bool:
+    """Check if the URL serves the QuestDrive homepage."""
+    try:
+        response = client.get(url, timeout=timeout)
+    except httpx.TransportError:
+        return False
+    return (
+        response.status_code == httpx.codes.OK
+        and "Battery:" in response.text
+        and "Free Space:" in response.text
+    )
+
+
+def host_urls(questdrive_url: str, network: IPv4Network) -> list[str]:
+    """Return the URL of each host in the network, with the scheme & port of the QuestDrive URL."""
+    url = httpx.URL(questdrive_url)
+    return [str(url.copy_with(host=str(host))) for host in network.hosts()]
+
+
+def scan(
+    client: httpx.Client,
+    urls: list[str],
+    timeout: float,
+    max_workers: int = DISCOVERY_CONCURRENCY,
+) -> str | None:
+    """Return the first of the URLs to respond as QuestDrive, checking them concurrently."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(is_questdrive, client, url, timeout): url for url in urls
+        }
+        for future in as_completed(futures):
+            if future.result():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return futures[future]
+    return None
+
+
+def discover(config: Config, network: IPv4Network) -> str | None:
+    """Return the URL of QuestDrive, trying the last found & configured URLs before scanning the network."""
+    cache_file = Path(config.output_path) / DISCOVERY_CACHE_FILENAME
+    known_urls = [config.questdrive_url]
+    if cache_file.exists():
+        known_urls.insert(0, cache_file.read_text().strip())
+
+    with httpx.Client(
+        limits=httpx.Limits(max_connections=DISCOVERY_CONCURRENCY),
+    ) as client:
+        questdrive_url = next(
+            (
+                url
+                for url in dict.fromkeys(known_urls)
+                if is_questdrive(client, url, config.probe_timeout)
+            ),
+            None,
+        ) or scan(
+            client,
+            host_urls(config.questdrive_url, network),
+            config.probe_timeout,
+        )
+
+    if questdrive_url:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(questdrive_url)
+    return questdrive_url
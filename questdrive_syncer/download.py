@@ -1,44 +1,134 @@
 """Download and delete videos from QuestDrive."""
 from __future__ import annotations
 
+import functools
 import os
+import time
+from contextlib import ExitStack, nullcontext
 from pathlib import Path
-from typing import TYPE_CHECKING, Iterator
+from typing import TYPE_CHECKING, Callable, Generator, Iterable, Iterator
 
-import httpx
-import rich.progress
-
-from questdrive_syncer.config import CONFIG
-from questdrive_syncer.helpers import has_enough_free_space
+from questdrive_syncer.concurrency import AIMDController, run_concurrently
+from questdrive_syncer.constants import BYTES_EVENT_SIZE
+from questdrive_syncer.events import (
+    ControllerSink,
+    Event,
+    Kind,
+    MetricsSink,
+    Phase,
+    SimpleSink,
+    Sink,
+)
+from questdrive_syncer.helpers import SPACE_RESERVATIONS, lazy_import, lock_key
+from questdrive_syncer.mirror import mirroring
+from questdrive_syncer.progress import RichSink
+from questdrive_syncer.staging import Mover
+from questdrive_syncer.timing import TimingSink
+from questdrive_syncer.tracing import TraceSink
 
 if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+    import rich.progress
+
+    from questdrive_syncer.mirror import MirrorWriter
+    from questdrive_syncer.placement import IndexEntry
+    from questdrive_syncer.session import SyncSession
     from questdrive_syncer.structures import Video
+else:
+    httpx = lazy_import("httpx")
 
 
-def download_and_delete_videos(
-    videos: list[Video],
-    *,
-    simple_output: bool = False,
-    delete: bool = True,
-    download: bool = True,
+def for_each_video(
+    videos: Iterable[Video],
+    process: Callable[[int, Video], None],
+    controller: AIMDController | None,
 ) -> None:
-    """Download and delete the videos."""
-    if simple_output:
-        for video in videos:
-            print("Starting", video, "...")
-            for value in download_and_delete_video(
-                video,
-                delete=delete,
-                download=download,
-            ):
-                if isinstance(value, str):
-                    print(value)
-            print("Finished", video)
+    """Process each video in order, or concurrently if there's a controller."""
+    if controller is None:
+        for i, video in enumerate(videos):
+            process(i, video)
         return
 
-    sizes = [video.mb_size * 1000**2 for video in videos]
-    total_size = sum(sizes)
-    with rich.progress.Progress(
+    run_concurrently(videos, process, controller)
+
+
+def reserve_space(video: Video, session: SyncSession, reservations: ExitStack) -> bool:
+    """Reserve space for the video in the staging directory & mirrors if any, then on the first output root with enough, choosing it.
+
+    Reservations are held until the stack is closed. Videos that aren't downloaded
+    need no space, so they're never placed.
+    """
+    config = session.config
+    if not config.download_videos:
+        return True
+    if config.staging_path and not reservations.enter_context(
+        SPACE_RESERVATIONS.reserve(video.mb_size, config, config.staging_path),
+    ):
+        return False
+    for mirror_path in config.mirror_paths:
+        if not reservations.enter_context(
+            SPACE_RESERVATIONS.reserve(video.mb_size, config, mirror_path),
+        ):
+            return False
+    for root in session.placement.candidates(video.filename):
+        if reservations.enter_context(
+            SPACE_RESERVATIONS.reserve(video.mb_size, config, root),
+        ):
+            session.placement.choose(video, root)
+            return True
+    return False
+
+
+def sync_videos(
+    videos: Iterable[Video],
+    sync_video: Callable[[Video], Iterator[Event]],
+    controller: AIMDController | None,
+    session: SyncSession,
+    sinks: list[Sink],
+) -> None:
+    """Sync the videos, sending every event to each of the sinks.
+
+    Failures only stop the sync when downloading one video at a time, otherwise the
+    failed video is left on the Quest.
+    """
+
+    def emit(event: Event) -> None:
+        for sink in sinks:
+            sink.handle(event)
+
+    def sync_one(_: int, video: Video) -> None:
+        with ExitStack() as reservations:
+            reserved = reserve_space(video, session, reservations)
+            if not reserved:
+                emit(Event(Kind.SKIPPED, video, value="there is not enough free space"))
+                return
+
+            emit(Event(Kind.STARTED, video, at=time.monotonic()))
+            try:
+                for event in sync_video(video):
+                    emit(event)
+            except httpx.HTTPError as error:
+                if controller is None:
+                    raise
+                emit(
+                    Event(
+                        Kind.FAILED,
+                        video,
+                        value=f'Failed to sync "{video.filename}", leaving it on the Quest: {error}',
+                        at=time.monotonic(),
+                    ),
+                )
+            finally:
+                emit(Event(Kind.FINISHED, video, at=time.monotonic()))
+
+    for_each_video(videos, sync_one, controller)
+
+
+def make_progress() -> rich.progress.Progress:
+    """Make a download progress display."""
+    import rich.progress
+
+    return rich.progress.Progress(
         rich.progress.TextColumn(
             "[bold blue]{task.fields[filename]}",
             justify="right",
@@ -48,112 +138,306 @@ def download_and_delete_videos(
         rich.progress.DownloadColumn(),
         rich.progress.TransferSpeedColumn(),
         rich.progress.TimeRemainingColumn(),
-    ) as progress:
-        tasks = [
-            *(
-                progress.add_task(
-                    "Download",
-                    total=video.mb_size * 1000**2,
-                    filename=video.filename,
-                )
-                for video in videos
-            ),
-            progress.add_task(
-                "Total",
-                total=total_size,
-                filename="Total",
-            ),
-        ]
+    )
 
-        for i, video in enumerate(videos):
-            if not has_enough_free_space(video.mb_size):
-                print(
-                    f'Skipping download of "{video.filename}" because there is not enough free space',
-                )
-                progress.update(tasks[i], advance=sizes[i])
-                progress.update(tasks[-1], advance=sizes[i])
-                continue
 
-            for value in download_and_delete_video(
-                video,
-                delete=delete,
-                download=download,
-            ):
-                if isinstance(value, float):
-                    progress.update(tasks[i], total=value)
-                    sizes[i] = value
-                    total_size = sum(sizes)
-                    progress.update(tasks[-1], total=total_size)
-                elif isinstance(value, int):
-                    progress.update(tasks[i], advance=value)
-                    progress.update(tasks[-1], advance=value)
-                else:
-                    print(value)
+def download_and_delete_videos(
+    videos: list[Video],
+    session: SyncSession,
+    *,
+    progress: rich.progress.Progress | None = None,
+    order: Callable[[list[Video]], Iterable[Video]] = iter,
+) -> None:
+    """Download and delete the videos, sharing the limiter of the session between all of them.
+
+    Progress bars are rendered to the provided progress if any, which is then left to
+    the caller to display, removing them once the videos are synced. Videos are staged
+    if configured, returning once every staged video is moved. The order decides which
+    video is synced next as each one starts.
+    """
+    # Syncs that can run at the same time stage to their own subdirectory, so they
+    # never move each other's videos.
+    mover = (
+        Mover(session, Path(session.config.staging_path) / lock_key(session.config))
+        if session.config.staging_path and session.config.download_videos
+        else None
+    )
+    sync_video = functools.partial(
+        download_and_delete_video,
+        session=session,
+        mover=mover,
+    )
+    controller = (
+        AIMDController(
+            session.config.max_concurrency,
+            adaptive=session.config.adaptive_concurrency,
+        )
+        if session.config.max_concurrency > 1
+        else None
+    )
+    sinks: list[Sink] = [
+        MetricsSink(session.metrics),
+        TimingSink(session.timings),
+        *session.sinks,
+    ]
+    if controller:
+        sinks.append(ControllerSink(controller))
+    if session.tracer:
+        sinks.append(TraceSink(session.tracer))
+
+    with mover or nullcontext():
+        if session.config.simple_output:
+            sync_videos(
+                order(videos),
+                sync_video,
+                controller,
+                session,
+                [SimpleSink(), *sinks],
+            )
+            return
+
+        provided_progress = progress is not None
+        with ExitStack() as stack:
+            if progress is None:
+                progress = stack.enter_context(make_progress())
+            rich_sink = RichSink(progress, videos)
+            sinks.insert(0, rich_sink)
+            try:
+                sync_videos(order(videos), sync_video, controller, session, sinks)
+            finally:
+                # A provided progress outlives the sync, so it's left without its tasks.
+                if provided_progress:
+                    rich_sink.transfers.close()
+
+
+def describe_difference(
+    action: str,
+    difference: int,
+    reference: str,
+    filename: str,
+) -> str:
+    """Describe how many bytes more or less than the reference were actioned."""
+    return f'{action} {abs(difference)} bytes {"more" if difference > 0 else "less"} than {reference} during the download of "{filename}"'
+
+
+def video_times(video: Video) -> tuple[float, float]:
+    """Return the access & modified times of the saved video - when it was created & last modified."""
+    return video.created_at.timestamp(), video.modified_at.timestamp()
+
+
+def verify_mirrors(
+    video: Video,
+    mirrors: list[MirrorWriter],
+    downloaded_byte_count: int,
+) -> str | None:
+    """Return why a mirror isn't a complete copy of the download, if any isn't."""
+    for mirror in mirrors:
+        if mirror.error:
+            return f'Failed to mirror "{video.filename}" to "{mirror.path}": {mirror.error}'
+        if mirrored_length_diff := (
+            mirror.partial_path.stat().st_size - downloaded_byte_count
+        ):
+            return f'{describe_difference("Mirrored", mirrored_length_diff, "received", video.filename)} to "{mirror.path}"'
+    return None
+
+
+def keep_mirrors(mirrors: list[MirrorWriter]) -> None:
+    """Rename each verified mirror into place."""
+    for mirror in mirrors:
+        mirror.keep()
+
+
+def transfer_video(
+    video: Video,
+    session: SyncSession,
+    download_url: httpx.URL,
+    video_output_filepath: Path,
+    mirrors: list[MirrorWriter],
+) -> Generator[Event, None, tuple[int, int]]:
+    """Download the video to the file & mirrors, yielding the events of the transfer & returning the expected & downloaded byte counts.
+
+    Transferred bytes are batched into events of at least BYTES_EVENT_SIZE, so
+    consumers only do per-chunk work for a fraction of the chunks. Each chunk is only
+    read once, being handed to the writer of each mirror.
+    """
+    limiter = session.limiter
+    yield Event(Kind.STARTED, video, Phase.TRANSFER, at=time.monotonic())
+    with session.stream(download_url) as response, video_output_filepath.open(
+        "wb",
+    ) as file:
+        expected_byte_count = int(response.headers.get("Content-Length", 0))
+        yield Event(Kind.TOTAL, video, Phase.TRANSFER, expected_byte_count)
+
+        downloaded_byte_count = 0
+        unreported_byte_count = 0
+        for chunk in response.iter_bytes():
+            file.write(chunk)
+            for mirror in mirrors:
+                mirror.write(chunk)
+            chunk_length = len(chunk)
+            if limiter:
+                limiter.consume(chunk_length)
+            downloaded_byte_count += chunk_length
+            unreported_byte_count += chunk_length
+            if unreported_byte_count >= BYTES_EVENT_SIZE:
+                yield Event(Kind.BYTES, video, Phase.TRANSFER, unreported_byte_count)
+                unreported_byte_count = 0
+        if unreported_byte_count:
+            yield Event(Kind.BYTES, video, Phase.TRANSFER, unreported_byte_count)
+
+    for mirror in mirrors:
+        mirror.close()
+    os.utime(video_output_filepath, video_times(video))
+    yield Event(
+        Kind.FINISHED,
+        video,
+        Phase.TRANSFER,
+        downloaded_byte_count,
+        time.monotonic(),
+    )
+    return expected_byte_count, downloaded_byte_count
+
+
+def keep_download(
+    video: Video,
+    session: SyncSession,
+    entry: IndexEntry,
+    mover: Mover | None,
+) -> None:
+    """Move the downloaded video to where it's placed in the background with a mover, otherwise index it where it was written."""
+    if mover:
+        mover.stage(video, entry)
+    else:
+        session.placement.record(video.filename, entry)
+
+
+def keep_recording(
+    video: Video,
+    session: SyncSession,
+    entry: IndexEntry | None,
+    mover: Mover | None,
+    mirrors: list[MirrorWriter],
+    downloaded_byte_count: int,
+) -> Iterator[Event]:
+    """Keep the download of the actively recording video without verifying it, along with its mirrors if they're complete copies."""
+    if entry:
+        keep_download(video, session, entry, mover)
+    if mirror_failure := verify_mirrors(video, mirrors, downloaded_byte_count):
+        yield Event(Kind.MESSAGE, video, value=mirror_failure)
+    else:
+        keep_mirrors(mirrors)
+    yield Event(
+        Kind.MESSAGE,
+        video,
+        value=f'"{video.filename}" is actively recording, not deleting',
+    )
 
 
 def download_and_delete_video(
     video: Video,
-    *,
-    delete: bool = True,
-    download: bool = True,
-) -> Iterator[float | int | str]:
-    """Download and delete the video."""
-    download_url = httpx.URL(CONFIG.questdrive_url).join(
-        str(Path("download") / video.filepath),
+    session: SyncSession,
+    mover: Mover | None = None,
+) -> Iterator[Event]:
+    """Download and delete the video, as configured by the session, yielding the events of each phase.
+
+    With a mover, the video is downloaded to its staging directory, then moved to the
+    output directory in the background - once verified - while it's deleted. Videos
+    are only deleted once every mirror has been written in full, and mirrors are only
+    renamed into place once verified, being removed otherwise.
+    """
+    download_url = session.url(str(Path("download") / video.filepath))
+    # Videos are only placed when they're downloaded, so the index only has videos on disk.
+    entry = session.placement.entry(video) if session.config.download_videos else None
+    video_output_filepath = (
+        (mover.partial_path(video) if mover else entry.path(video.filename))
+        if entry
+        else None
     )
-    video_output_filepath = Path(CONFIG.output_path) / video.filename
 
-    head_response = httpx.head(download_url)
+    yield Event(Kind.STARTED, video, Phase.HEAD, at=time.monotonic())
+    head_response = session.head(download_url)
     expected_byte_count = int(head_response.headers.get("Content-Length", 0))
-    downloaded_byte_count = expected_byte_count
-    if download:
-        with httpx.stream("GET", download_url) as response, Path(
-            video_output_filepath,
-        ).open("wb") as file:
-            expected_byte_count = int(response.headers.get("Content-Length", 0))
-            yield float(expected_byte_count)
-
-            downloaded_byte_count = 0
-            for chunk in response.iter_bytes():
-                file.write(chunk)
-                chunk_length = len(chunk)
-                downloaded_byte_count += chunk_length
-                yield chunk_length
-
-        os.utime(
-            video_output_filepath,
-            (video.created_at.timestamp(), video.modified_at.timestamp()),
-        )
-
-    if video.actively_recording:
-        yield f'"{video.filename}" is actively recording, not deleting'
-        return
+    yield Event(Kind.FINISHED, video, Phase.HEAD, at=time.monotonic())
 
-    if content_length_diff := downloaded_byte_count - expected_byte_count:
-        if content_length_diff > 0:
-            yield f'Received {content_length_diff} bytes more than expected during the download of "{video.filename}"'
+    downloaded_byte_count = expected_byte_count
+    mirror_filepaths = [
+        Path(mirror_path) / entry.shard / video.filename
+        for mirror_path in session.config.mirror_paths
+        if entry
+    ]
+    with mirroring(mirror_filepaths, video_times(video)) as mirrors:
+        if video_output_filepath:
+            video_output_filepath.parent.mkdir(parents=True, exist_ok=True)
+            expected_byte_count, downloaded_byte_count = yield from transfer_video(
+                video,
+                session,
+                download_url,
+                video_output_filepath,
+                mirrors,
+            )
 
-        else:
-            yield f'Received {-content_length_diff} bytes less than expected during the download of "{video.filename}"'
+        if video.actively_recording:
+            yield from keep_recording(
+                video,
+                session,
+                entry,
+                mover,
+                mirrors,
+                downloaded_byte_count,
+            )
+            return
 
-        return
+        yield Event(Kind.STARTED, video, Phase.VERIFY, at=time.monotonic())
+        if content_length_diff := downloaded_byte_count - expected_byte_count:
+            yield Event(
+                Kind.FAILED,
+                video,
+                Phase.VERIFY,
+                describe_difference(
+                    "Received",
+                    content_length_diff,
+                    "expected",
+                    video.filename,
+                ),
+                at=time.monotonic(),
+            )
+            return
 
-    written_length = downloaded_byte_count
-    if download:
-        written_length = Path(video_output_filepath).stat().st_size
+        written_length = downloaded_byte_count
+        if video_output_filepath:
+            written_length = video_output_filepath.stat().st_size
 
-    if written_length_diff := downloaded_byte_count - written_length:
-        if written_length_diff > 0:
-            yield f'Wrote {written_length_diff} bytes more than received during the download of "{video.filename}"'
+        if written_length_diff := downloaded_byte_count - written_length:
+            yield Event(
+                Kind.FAILED,
+                video,
+                Phase.VERIFY,
+                describe_difference(
+                    "Wrote",
+                    written_length_diff,
+                    "received",
+                    video.filename,
+                ),
+                at=time.monotonic(),
+            )
+            return
 
-        else:
-            yield f'Wrote {-written_length_diff} bytes less than received during the download of "{video.filename}"'
+        if mirror_failure := verify_mirrors(video, mirrors, downloaded_byte_count):
+            yield Event(
+                Kind.FAILED,
+                video,
+                Phase.VERIFY,
+                mirror_failure,
+                at=time.monotonic(),
+            )
+            return
+        yield Event(Kind.FINISHED, video, Phase.VERIFY, at=time.monotonic())
 
-        return
+        keep_mirrors(mirrors)
+        if entry:
+            keep_download(video, session, entry, mover)
 
-    if delete:
-        httpx.get(
-            httpx.URL(CONFIG.questdrive_url).join(
-                str(Path("delete") / video.filepath),
-            ),
-        )
+    if session.config.delete_videos:
+        yield Event(Kind.STARTED, video, Phase.DELETE, at=time.monotonic())
+        session.get(session.url(str(Path("delete") / video.filepath)))
+        yield Event(Kind.FINISHED, video, Phase.DELETE, at=time.monotonic())
@@ -0,0 +1,190 @@
+"""Events of syncing videos, and the sinks that consume them."""
+from __future__ import annotations
+
+import enum
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Iterator, NamedTuple, cast
+
+if TYPE_CHECKING:  # pragma: no cover
+    from questdrive_syncer.concurrency import AIMDController
+    from questdrive_syncer.session import SyncMetrics
+    from questdrive_syncer.structures import Video
+
+
+class Phase(enum.Enum):
+    """Phase of syncing a video."""
+
+    HEAD = "head"
+    TRANSFER = "transfer"
+    VERIFY = "verify"
+    DELETE = "delete"
+
+
+class Kind(enum.Enum):
+    """Kind of event."""
+
+    STARTED = "started"
+    TOTAL = "total"
+    BYTES = "bytes"
+    MESSAGE = "message"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+    FINISHED = "finished"
+
+
+class Event(NamedTuple):
+    """Something that happened while syncing a video.
+
+    Events without a phase are of the video as a whole. The value is the total bytes of
+    TOTAL, the transferred bytes of BYTES & of a finished transfer, and the reason of
+    MESSAGE, SKIPPED & FAILED. Only started, finished & failed events are timed.
+    """
+
+    kind: Kind
+    video: Video
+    phase: Phase | None = None
+    value: float | str = 0
+    at: float = 0.0
+
+
+def skip_message(event: Event) -> str:
+    """Return the message of a skipped video."""
+    return f'Skipping download of "{event.video.filename}" because {event.value}'
+
+
+class Sink:
+    """Consumer of events, ignoring every one of them unless overridden."""
+
+    def handle(self: Sink, event: Event) -> None:
+        """Handle the event."""
+
+
+class SimpleSink(Sink):
+    """Prints simple output."""
+
+    def __init__(self: SimpleSink) -> None:
+        """Initialize the sink with no failed videos."""
+        self._failed: set[str] = set()
+        self._lock = threading.Lock()
+
+    def handle(self: SimpleSink, event: Event) -> None:
+        """Print the start & finish of each video that didn't fail, and every message."""
+        kind = event.kind
+        filepath = event.video.filepath
+        if kind is Kind.MESSAGE or kind is Kind.FAILED:
+            if kind is Kind.FAILED:
+                with self._lock:
+                    self._failed.add(filepath)
+            print(event.value)
+        elif kind is Kind.SKIPPED:
+            print(skip_message(event))
+        elif event.phase is None and kind is Kind.STARTED:
+            print("Starting", event.video, "...")
+        elif event.phase is None and kind is Kind.FINISHED:
+            with self._lock:
+                failed = filepath in self._failed
+                self._failed.discard(filepath)
+            if not failed:
+                print("Finished", event.video)
+
+
+class MetricsSink(Sink):
+    """Counts the videos & bytes in the session's metrics.
+
+    Downloads are only counted once verified, so the bytes of each finished transfer
+    are held until then - and dropped if the video finishes without being verified.
+    Actively recording videos are kept without being verified, so they're counted as
+    soon as their transfer finishes.
+    """
+
+    def __init__(self: MetricsSink, metrics: SyncMetrics) -> None:
+        """Initialize the sink with no unverified transfers."""
+        self.metrics = metrics
+        self._transferred: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def handle(self: MetricsSink, event: Event) -> None:
+        """Count verified downloads, finished deletes, skipped & failed videos."""
+        kind = event.kind
+        filepath = event.video.filepath
+        if kind is Kind.FINISHED and event.phase is Phase.TRANSFER:
+            byte_count = int(cast(float, event.value))
+            if event.video.actively_recording:
+                self.metrics.add(videos_downloaded=1, bytes_downloaded=byte_count)
+                return
+            with self._lock:
+                self._transferred[filepath] = byte_count
+        elif kind is Kind.FINISHED and event.phase is Phase.VERIFY:
+            with self._lock:
+                verified = self._transferred.pop(filepath, None)
+            if verified is not None:
+                self.metrics.add(videos_downloaded=1, bytes_downloaded=verified)
+        elif kind is Kind.FINISHED and event.phase is None:
+            with self._lock:
+                self._transferred.pop(filepath, None)
+        elif kind is Kind.FINISHED and event.phase is Phase.DELETE:
+            self.metrics.add(videos_deleted=1)
+        elif kind is Kind.SKIPPED:
+            self.metrics.add(videos_skipped=1)
+        elif kind is Kind.FAILED:
+            self.metrics.add(videos_failed=1)
+
+
+class ControllerSink(Sink):
+    """Feeds the transferred bytes & failures to the concurrency controller."""
+
+    def __init__(self: ControllerSink, controller: AIMDController) -> None:
+        """Initialize the sink."""
+        self.controller = controller
+
+    def handle(self: ControllerSink, event: Event) -> None:
+        """Record transferred bytes & failed videos."""
+        if event.kind is Kind.BYTES:
+            self.controller.record_bytes(int(cast(float, event.value)))
+        elif event.kind is Kind.FAILED:
+            self.controller.record_error()
+
+
+class JsonLinesSink(Sink):
+    """Writes a JSON line per event, except for the transferred bytes.
+
+    The bytes are instead the value of the finished transfer, keeping the log small.
+    """
+
+    def __init__(self: JsonLinesSink, file: IO[str]) -> None:
+        """Initialize the sink, writing to the file."""
+        self.file = file
+        self._lock = threading.Lock()
+
+    def handle(self: JsonLinesSink, event: Event) -> None:
+        """Write the event as a JSON line."""
+        if event.kind is Kind.BYTES:
+            return
+
+        line = json.dumps(
+            {
+                "time": time.time(),
+                "kind": event.kind.value,
+                "phase": event.phase and event.phase.value,
+                "video": event.video.filename,
+                "value": event.value,
+            },
+        )
+        with self._lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+
+@contextmanager
+def event_log_sinks(path: str | None) -> Iterator[list[Sink]]:
+    """Open the JSON lines event log, if any, yielding the sinks to share between sessions."""
+    if path is None:
+        yield []
+        return
+
+    with Path(path).open("a") as file:
+        yield [JsonLinesSink(file)]
@@ -0,0 +1,41 @@
+"""Fingerprints of the video list, to skip syncs when nothing has changed."""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from questdrive_syncer.constants import LISTING_FINGERPRINT_FILENAME
+
+
+def listing_fingerprint(
+    video_list_html: str,
+    *,
+    download_videos: bool = True,
+    delete_videos: bool = True,
+) -> str:
+    """Return the fingerprint of the video list HTML synced with the download & delete settings.
+
+    A sync that left videos on the Quest or didn't download them isn't complete for
+    runs configured otherwise, so the settings are part of the fingerprint. The whole
+    listing is hashed, as it's a single page without an ETag or Last-Modified, that's
+    fetched alongside the probe anyway - and hashing it costs a small fraction of
+    parsing it.
+    """
+    fingerprint = hashlib.blake2b(video_list_html.encode(), digest_size=16)
+    fingerprint.update(f"\0{download_videos:d}{delete_videos:d}".encode())
+    return fingerprint.hexdigest()
+
+
+def read_fingerprint(output_path: str) -> str | None:
+    """Return the fingerprint of the last completely synced video list, if any."""
+    fingerprint_file = Path(output_path) / LISTING_FINGERPRINT_FILENAME
+    if not fingerprint_file.exists():
+        return None
+    return fingerprint_file.read_text().strip()
+
+
+def write_fingerprint(output_path: str, fingerprint: str) -> None:
+    """Save the fingerprint of a completely synced video list."""
+    fingerprint_file = Path(output_path) / LISTING_FINGERPRINT_FILENAME
+    fingerprint_file.parent.mkdir(parents=True, exist_ok=True)
+    fingerprint_file.write_text(fingerprint)
@@ -0,0 +1,118 @@
+"""Sync multiple QuestDrive instances concurrently."""
+from __future__ import annotations
+
+import dataclasses
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, ContextManager
+
+from questdrive_syncer.constants import FAILURE_EXIT_CODE
+from questdrive_syncer.download import make_progress
+from questdrive_syncer.helpers import LockError, lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+    import rich.progress
+
+    from questdrive_syncer.config import Config
+    from questdrive_syncer.session import SyncSession
+else:
+    httpx = lazy_import("httpx")
+
+
+def device_configs(config: Config) -> list[Config]:
+    """Return the configuration of each fleet device, outputting - staging & mirroring - to its own subdirectory."""
+    return [
+        dataclasses.replace(
+            config,
+            questdrive_url=device.questdrive_url,
+            output_path=f"{Path(config.output_path) / device.subdirectory}/",
+            output_roots=[
+                f"{Path(root) / device.subdirectory}/" for root in config.output_roots
+            ],
+            mirror_paths=[
+                f"{Path(mirror_path) / device.subdirectory}/"
+                for mirror_path in config.mirror_paths
+            ],
+            staging_path=f"{Path(config.staging_path) / device.subdirectory}/"
+            if config.staging_path
+            else None,
+            fleet=[],
+        )
+        for device in config.fleet
+    ]
+
+
+def sync_device(
+    sync: Callable[[SyncSession, rich.progress.Progress | None], None],
+    session: SyncSession,
+    progress: rich.progress.Progress | None,
+) -> int:
+    """Sync a single device within its session, returning its exit code.
+
+    Unexpected errors - such as a full or unplugged disk - are reported with their
+    traceback, so they only stop the sync of their own device.
+    """
+    try:
+        with session:
+            sync(session, progress)
+    except SystemExit as error:
+        return int(error.code or 0)
+    except LockError as error:
+        print(f'Skipped "{session.config.questdrive_url}": {error}')
+        return FAILURE_EXIT_CODE
+    except httpx.HTTPError as error:
+        print(f'Failed to sync "{session.config.questdrive_url}": {error}')
+        return FAILURE_EXIT_CODE
+    except Exception:  # noqa: BLE001
+        print(f'Failed to sync "{session.config.questdrive_url}":')
+        traceback.print_exc()
+        return FAILURE_EXIT_CODE
+    return 0
+
+
+def sync_fleet(
+    sessions: list[SyncSession],
+    sync: Callable[[SyncSession, rich.progress.Progress | None], None],
+    *,
+    simple_output: bool = False,
+) -> None:
+    """Sync every device concurrently, each in its own progress group, exiting with the first failed exit code."""
+    import rich.console
+    import rich.live
+    import rich.panel
+
+    progresses = [None if simple_output else make_progress() for _ in sessions]
+    display: ContextManager[object] = nullcontext()
+    if not simple_output:
+        display = rich.live.Live(
+            rich.console.Group(
+                *(
+                    rich.panel.Panel(progress, title=session.config.questdrive_url)
+                    for session, progress in zip(sessions, progresses)
+                    if progress
+                ),
+            ),
+        )
+
+    with display, ThreadPoolExecutor(max_workers=len(sessions)) as executor:
+        exit_codes = list(
+            executor.map(
+                sync_device,
+                [sync] * len(sessions),
+                sessions,
+                progresses,
+            ),
+        )
+
+    for session, exit_code in zip(sessions, exit_codes):
+        if exit_code:
+            print(
+                f'Sync of "{session.config.questdrive_url}" stopped with exit code {exit_code}',
+            )
+
+    if failed_exit_code := next((code for code in exit_codes if code), 0):
+        sys.exit(failed_exit_code)
@@ -1,56 +1,216 @@
 """Collection of helper functions."""
 from __future__ import annotations
 
+import fcntl
+import hashlib
+import importlib.util
 import os
-import time
+import sys
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Callable, Literal
+from typing import TYPE_CHECKING, Iterator, Literal
 
-from questdrive_syncer.config import CONFIG
+if TYPE_CHECKING:  # pragma: no cover
+    from types import ModuleType
 
+    from questdrive_syncer.config import Config
 
-def has_enough_free_space(mb_size: float) -> bool:
-    """Return if there is enough free space to download the video."""
-    Path(CONFIG.output_path).mkdir(parents=True, exist_ok=True)
-    statvfs = os.statvfs(CONFIG.output_path)
+
+def lazy_import(name: str) -> ModuleType:
+    """Return the module, only executing it once one of its attributes is first used.
+
+    For modules too slow to import on runs that exit before needing them.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def has_enough_free_space(
+    mb_size: float,
+    config: Config,
+    path: str | None = None,
+) -> bool:
+    """Return if there is enough free space to download the video, to the output directory unless another path is provided."""
+    path = path or config.output_path
+    Path(path).mkdir(parents=True, exist_ok=True)
+    statvfs = os.statvfs(path)
     free_space = statvfs.f_frsize * statvfs.f_bavail
     free_space_after_download = free_space - mb_size * 1024**2
-    return free_space_after_download >= CONFIG.minimum_free_space_mb * 1024**2
+    return free_space_after_download >= config.minimum_free_space_mb * 1024**2
+
+
+class SpaceReservations:
+    """Free space reserved by in-progress downloads, per device."""
+
+    def __init__(self: SpaceReservations) -> None:
+        """Initialize without any reservations."""
+        self.reserved_mb: defaultdict[int, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def reserve(
+        self: SpaceReservations,
+        mb_size: float,
+        config: Config,
+        path: str | None = None,
+    ) -> Iterator[bool]:
+        """Reserve space for the video while within the context, if there's enough free space after all other reservations.
+
+        Space is reserved in the output directory unless another path is provided.
+        """
+        path = path or config.output_path
+        Path(path).mkdir(parents=True, exist_ok=True)
+        device = Path(path).stat().st_dev
+        with self._lock:
+            reserved = has_enough_free_space(
+                mb_size + self.reserved_mb[device],
+                config,
+                path,
+            )
+            if reserved:
+                self.reserved_mb[device] += mb_size
+
+        try:
+            yield reserved
+        finally:
+            if reserved:
+                with self._lock:
+                    self.reserved_mb[device] -= mb_size
+
+    def free_mb(self: SpaceReservations, path: str) -> float:
+        """Return the free space of the path in MB, less what's reserved on its device."""
+        Path(path).mkdir(parents=True, exist_ok=True)
+        statvfs = os.statvfs(path)
+        device = Path(path).stat().st_dev
+        with self._lock:
+            reserved_mb = self.reserved_mb[device]
+        return statvfs.f_frsize * statvfs.f_bavail / 1024**2 - reserved_mb
+
+
+SPACE_RESERVATIONS = SpaceReservations()
 
 
 class LockError(Exception):
     """Raised when a lock is already in place."""
 
-    def __init__(self: LockError, pid: int, lock_file_path: str) -> None:
-        """Initialize the error."""
+    def __init__(self: LockError, pid: int | None, lock_file_path: str) -> None:
+        """Initialize the error, noting if the process holding the lock is no longer running."""
+        if pid is None:
+            holder = "Another process"
+        elif is_running(pid):
+            holder = f"Another process ({pid})"
+        else:
+            holder = f"A child of process {pid}, which is no longer running,"
         super().__init__(
-            f'Another process ({pid}) is already running according to "{lock_file_path}" lockfile.',
+            f'{holder} is already running according to "{lock_file_path}" lockfile.',
         )
 
 
-def lock(
-    mode: Literal["fail", "wait"] = "fail",
-) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
-    """Lock the function so that it can only be run once at a time."""
-    lock_file = Path("/".join(__file__.split("/")[:-1])) / "questdrive_syncer.lock"
-
-    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
-        def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
-            if lock_file.exists():
-                if mode == "fail":
-                    with lock_file.open("r") as f:
-                        raise LockError(int(f.read()), str(lock_file.absolute()))
-                elif mode == "wait":
-                    while lock_file.exists():
-                        time.sleep(1)
-
-            with lock_file.open("w") as f:
-                f.write(str(os.getpid()))
-            try:
-                return func(*args, **kwargs)
-            finally:
-                lock_file.unlink()
-
-        return wrapper
-
-    return decorator
+def is_running(pid: int) -> bool:
+    """Return if a process with the PID is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProcessLock:
+    """Lockfile that can only be held by one process at a time.
+
+    The lock is held by the kernel, so it's released whenever the process exits - even
+    if it's killed - and waiting for it blocks rather than polling. The PID of the holder
+    is written to the file, and cleared on release, so one left behind is stale.
+    """
+
+    def __init__(
+        self: ProcessLock,
+        lock_file: Path,
+        mode: Literal["fail", "wait"] = "fail",
+    ) -> None:
+        """Initialize the lock without acquiring it."""
+        self.lock_file = lock_file
+        self.mode = mode
+        self._fd: int | None = None
+
+    def __enter__(self: ProcessLock) -> ProcessLock:  # noqa: PYI034
+        """Acquire the lock, failing or waiting if it's already held."""
+        self.lock_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # A symlink planted in a shared directory would otherwise redirect the write,
+        # and only the user may open the lockfile, so no one else can hold the lock.
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT | os.O_NOFOLLOW, 0o600)
+        try:
+            fcntl.flock(
+                fd,
+                fcntl.LOCK_EX | (fcntl.LOCK_NB if self.mode == "fail" else 0),
+            )
+        except BlockingIOError:
+            pid = read_pid(fd)
+            os.close(fd)
+            raise LockError(pid, str(self.lock_file.absolute())) from None
+
+        if (stale_pid := read_pid(fd)) is not None:
+            print(
+                f'Recovered "{self.lock_file.absolute()}" lockfile from process {stale_pid}, which exited without releasing it',
+            )
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, str(os.getpid()).encode(), 0)
+        self._fd = fd
+        return self
+
+    def __exit__(self: ProcessLock, *_: object) -> None:
+        """Release the lock, clearing the PID."""
+        if self._fd is None:
+            return
+        os.ftruncate(self._fd, 0)
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+def read_pid(fd: int) -> int | None:
+    """Return the PID written to the lockfile, if any."""
+    content = os.pread(fd, 32, 0).strip()
+    return int(content) if content.isdigit() else None
+
+
+def lock_key(config: Config) -> str:
+    """Return the key of syncing the QuestDrive instance to the output directory, shared by syncs that can't run at the same time."""
+    key = f"{config.questdrive_url}\0{Path(config.output_path).resolve()}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def lock_directory() -> Path:
+    """Return the directory of the lockfiles - the state directory of the user, or beside the package if the user has no home.
+
+    Unlike the runtime directory, the state directory doesn't depend on whether the run
+    is from a login session, so scheduled & manual runs share their lockfiles.
+    """
+    if state_home := os.environ.get("XDG_STATE_HOME"):
+        return Path(state_home) / "questdrive_syncer"
+    try:
+        return Path("~/.local/state/questdrive_syncer").expanduser()
+    except RuntimeError:
+        return Path(__file__).parent
+
+
+def lock_file_path(config: Config) -> Path:
+    """Return the path of the lockfile for syncing the QuestDrive instance to the output directory.
+
+    Syncs of other instances, or to other directories, have their own lockfile so they can
+    run at the same time.
+    """
+    return lock_directory() / f"questdrive_syncer-{lock_key(config)}.lock"
@@ -0,0 +1,30 @@
+"""Layout of the output directories, sharding videos into subdirectories built from their fields."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from questdrive_syncer.structures import Video
+
+LAYOUT_FIELDS = (
+    "application_name",
+    "created_at",
+    "modified_at",
+    "duration",
+    "mb_size",
+    "filename",
+)
+SAMPLE_VIDEO = Video(
+    "sample.mp4",
+    "sample-20240101-000000.mp4",
+    datetime(2024, 1, 1),
+    datetime(2024, 1, 1),
+    0,
+)
+
+
+def render_shard(layout: str, video: Video) -> str:
+    """Return the subdirectory of the video under the layout, without empty, current or parent components."""
+    if not layout:
+        return ""
+    shard = layout.format(**{name: getattr(video, name) for name in LAYOUT_FIELDS})
+    return "/".join(part for part in shard.split("/") if part not in {"", ".", ".."})
@@ -1,77 +1,243 @@
 """Main function."""
+from __future__ import annotations
+
+import dataclasses
+import functools
 import sys
-import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
 
 from questdrive_syncer.api import (
     fetch_homepage_html,
     fetch_video_list_html,
     is_online,
-    update_actively_recording,
+    probe_delays,
 )
-from questdrive_syncer.config import CONFIG
+from questdrive_syncer.bandwidth import make_limiter
+from questdrive_syncer.cassette import recording
 from questdrive_syncer.constants import (
     ACTIVELY_RECORDING_EXIT_CODE,
     FAILURE_EXIT_CODE,
+    MIN_PROBE_SECONDS,
     NOT_ENOUGH_BATTERY_EXIT_CODE,
     QUESTDRIVE_POLL_RATE_MINUTES,
     TOO_MUCH_SPACE_EXIT_CODE,
 )
+from questdrive_syncer.daemon import run_daemon, wait_to_probe
+from questdrive_syncer.discovery import discover
 from questdrive_syncer.download import download_and_delete_videos
-from questdrive_syncer.helpers import lock
+from questdrive_syncer.events import event_log_sinks
+from questdrive_syncer.fingerprint import (
+    listing_fingerprint,
+    read_fingerprint,
+    write_fingerprint,
+)
+from questdrive_syncer.fleet import device_configs, sync_fleet
+from questdrive_syncer.helpers import ProcessLock, lock_file_path
 from questdrive_syncer.parsers import parse_homepage_html, parse_video_list_html
+from questdrive_syncer.presence import make_watcher
+from questdrive_syncer.recording import (
+    detect_recording,
+    hold_back,
+    recording_candidates,
+)
+from questdrive_syncer.session import SyncSession
+from questdrive_syncer.timing import write_textfile
+from questdrive_syncer.tracing import tracing
 
+if TYPE_CHECKING:  # pragma: no cover
+    from ipaddress import IPv4Network
 
-@lock(mode="fail")
-def main() -> None:
-    """Perform all actions."""
-    if CONFIG.wait_for_questdrive:
-        while not is_online():
-            print(f'Waiting for QuestDrive at "{CONFIG.questdrive_url}"...')
-            time.sleep(QUESTDRIVE_POLL_RATE_MINUTES * 60)
-    elif not is_online():
-        print(f'QuestDrive not found at "{CONFIG.questdrive_url}"')
-        sys.exit(FAILURE_EXIT_CODE)
+    import rich.progress
+
+    from questdrive_syncer.config import Config
+    from questdrive_syncer.structures import Video
 
-    print(f'QuestDrive found running at "{CONFIG.questdrive_url}"')
 
+def check_homepage(session: SyncSession) -> None:
+    """Exit if the free space or battery reported on the homepage are outside the configured limits."""
+    config = session.config
     if (
-        CONFIG.only_run_if_space_less != float("inf")
-        or CONFIG.only_run_if_battery_above > 0
+        config.only_run_if_space_less == float("inf")
+        and config.only_run_if_battery_above <= 0
     ):
-        homepage_html = fetch_homepage_html()
-        battery_percentage, free_space = parse_homepage_html(homepage_html)
-        if free_space > CONFIG.only_run_if_space_less:
-            print(
-                f"QuestDrive reports {free_space:,} MB free space, which is more than the configured limit of {CONFIG.only_run_if_space_less:,} MB. Exiting.",
-            )
-            sys.exit(TOO_MUCH_SPACE_EXIT_CODE)
-        if battery_percentage < CONFIG.only_run_if_battery_above:
-            print(
-                f"QuestDrive reports {battery_percentage}% battery remaining, which is less than the configured minimum of {CONFIG.only_run_if_battery_above}%. Exiting.",
-            )
-            sys.exit(NOT_ENOUGH_BATTERY_EXIT_CODE)
+        return
+
+    homepage_html = fetch_homepage_html(session)
+    battery_percentage, free_space = parse_homepage_html(homepage_html)
+    if free_space > config.only_run_if_space_less:
+        print(
+            f"QuestDrive reports {free_space:,} MB free space, which is more than the configured limit of {config.only_run_if_space_less:,} MB. Exiting.",
+        )
+        sys.exit(TOO_MUCH_SPACE_EXIT_CODE)
+    if battery_percentage < config.only_run_if_battery_above:
+        print(
+            f"QuestDrive reports {battery_percentage}% battery remaining, which is less than the configured minimum of {config.only_run_if_battery_above}%. Exiting.",
+        )
+        sys.exit(NOT_ENOUGH_BATTERY_EXIT_CODE)
 
-    videos = parse_video_list_html(fetch_video_list_html())
-    time.sleep(1)
-    print(f"Found {len(videos)} video{'' if len(videos) == 1 else 's'}:")
 
-    update_actively_recording(videos, parse_video_list_html(fetch_video_list_html()))
+def fetch_in_background(session: SyncSession) -> Future[str]:
+    """Fetch the video list on a daemon thread, so exiting abandons the fetch rather than waiting for it."""
+    video_list_html: Future[str] = Future()
 
-    videos = sorted(
+    def fetch() -> None:
+        try:
+            video_list_html.set_result(fetch_video_list_html(session))
+        except Exception as error:  # noqa: BLE001
+            video_list_html.set_exception(error)
+
+    threading.Thread(target=fetch, name="listing", daemon=True).start()
+    return video_list_html
+
+
+def sort_videos(videos: list[Video], config: Config) -> list[Video]:
+    """Sort the videos as configured."""
+    return sorted(
         videos,
-        key=lambda video: getattr(video, CONFIG.sort_by),
-        reverse=CONFIG.sort_order == "descending",
+        key=lambda video: getattr(video, config.sort_by),
+        reverse=config.sort_order == "descending",
     )
 
-    if not CONFIG.run_while_actively_recording and any(
-        video.actively_recording for video in videos
-    ):
-        print("Quest is actively recording, exiting.")
-        sys.exit(ACTIVELY_RECORDING_EXIT_CODE)
 
-    download_and_delete_videos(
-        videos,
-        delete=CONFIG.delete_videos,
-        download=CONFIG.download_videos,
-        simple_output=CONFIG.simple_output,
+def sync(
+    session: SyncSession,
+    progress: rich.progress.Progress | None = None,
+) -> None:
+    """Sync the QuestDrive instance of the session."""
+    config = session.config
+    if config.wait_for_questdrive:
+        # QuestDrive is probed as soon as it joins the network, if it can be watched,
+        # with the backoff as a fallback.
+        delays = probe_delays(MIN_PROBE_SECONDS, QUESTDRIVE_POLL_RATE_MINUTES * 60)
+        watcher = make_watcher(config.questdrive_url)
+        never_stopped = threading.Event()
+        while not is_online(session):
+            print(f'Waiting for QuestDrive at "{config.questdrive_url}"...')
+            wait_to_probe(never_stopped, next(delays), watcher)
+
+    # The listing is fetched while checking QuestDrive is online & within the limits,
+    # being abandoned if it isn't.
+    video_list_html = fetch_in_background(session)
+    if not config.wait_for_questdrive and not is_online(session):
+        print(f'QuestDrive not found at "{config.questdrive_url}"')
+        sys.exit(FAILURE_EXIT_CODE)
+
+    print(f'QuestDrive found running at "{config.questdrive_url}"')
+
+    check_homepage(session)
+
+    fingerprint = listing_fingerprint(
+        video_list_html.result(),
+        download_videos=config.download_videos,
+        delete_videos=config.delete_videos,
     )
+    if not config.force and fingerprint == read_fingerprint(config.output_path):
+        print("Video list unchanged since the last complete sync, exiting.")
+        return
+
+    with session.timings.time("parse"):
+        videos = parse_video_list_html(video_list_html.result())
+    print(f"Found {len(videos)} video{'' if len(videos) == 1 else 's'}:")
+
+    candidates = recording_candidates(videos)
+    if not config.run_while_actively_recording:
+        detect_recording(session, candidates, config.recording_window)
+        if any(video.actively_recording for video in candidates):
+            print("Quest is actively recording, exiting.")
+            sys.exit(ACTIVELY_RECORDING_EXIT_CODE)
+        download_and_delete_videos(
+            sort_videos(videos, config),
+            session,
+            progress=progress,
+        )
+    else:
+        # Older videos can't be recording, so are synced while the newest are watched,
+        # which are only held back until they've been watched.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            detection = executor.submit(
+                detect_recording,
+                session,
+                candidates,
+                config.recording_window,
+            )
+            download_and_delete_videos(
+                sort_videos(videos, config),
+                session,
+                progress=progress,
+                order=functools.partial(
+                    hold_back,
+                    candidates=candidates,
+                    detection=detection,
+                ),
+            )
+
+    if not session.metrics.videos_skipped and not session.metrics.videos_failed:
+        write_fingerprint(config.output_path, fingerprint)
+    print(f'Finished syncing "{config.questdrive_url}": {session.metrics}')
+
+
+def discovered_config(config: Config, network: IPv4Network) -> Config:
+    """Return the configuration with the discovered QuestDrive URL, if found."""
+    questdrive_url = discover(config, network)
+    if questdrive_url is None:
+        print(f'QuestDrive not found in "{network}"')
+        return config
+    print(f'QuestDrive discovered at "{questdrive_url}"')
+    return dataclasses.replace(config, questdrive_url=questdrive_url)
+
+
+def sync_and_export(
+    session: SyncSession,
+    progress: rich.progress.Progress | None = None,
+    *,
+    sessions: list[SyncSession],
+) -> None:
+    """Sync the session, timing the whole sync, then write the Prometheus textfile of every session if configured."""
+    try:
+        with session.timings.time("sync"):
+            sync(session, progress)
+    finally:
+        if session.config.metrics_textfile:
+            write_textfile(session.config.metrics_textfile, sessions)
+
+
+def main(config: Config) -> None:
+    """Perform all actions, as configured."""
+    limiter = make_limiter(config.max_bandwidth_mb, config.bandwidth_schedule)
+    with event_log_sinks(config.event_log) as sinks, tracing(
+        config.trace,
+    ) as log, recording(config.record) as cassette:
+
+        def make_session(session_config: Config) -> SyncSession:
+            return SyncSession(
+                session_config,
+                limiter=limiter,
+                lock=ProcessLock(lock_file_path(session_config)),
+                sinks=sinks,
+                tracer=log.tracer(session_config.questdrive_url) if log else None,
+                cassette=cassette,
+            )
+
+        if config.fleet:
+            sessions = [make_session(device) for device in device_configs(config)]
+        elif config.discover_network:
+            sessions = [
+                make_session(discovered_config(config, config.discover_network)),
+            ]
+        else:
+            sessions = [make_session(config)]
+
+        run: Callable[
+            [SyncSession, rich.progress.Progress | None],
+            None,
+        ] = functools.partial(sync_and_export, sessions=sessions)
+        if config.daemon:
+            run = functools.partial(run_daemon, sync=run)
+        if config.fleet:
+            sync_fleet(sessions, run, simple_output=config.simple_output)
+            return
+
+        with sessions[0] as session:
+            run(session, None)
@@ -0,0 +1,91 @@
+"""Mirrors of videos, written from the same chunks as they download."""
+from __future__ import annotations
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+
+from questdrive_syncer.constants import MIRROR_QUEUE_CHUNKS
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+
+class MirrorWriter:
+    """Writes the chunks of a video to a mirror on its own thread, so a slow mirror doesn't hold up the download.
+
+    Up to MIRROR_QUEUE_CHUNKS chunks are queued, beyond which the download waits for
+    the mirror rather than buffering the whole video in memory. The mirror is written
+    to a hidden partial file, which is only renamed into place once kept, so a failed
+    transfer never leaves what looks like a finished copy.
+    """
+
+    def __init__(self: MirrorWriter, path: Path, times: tuple[float, float]) -> None:
+        """Initialize the writer, starting its thread - the mirror is given the access & modified times once written."""
+        self.path = path
+        self.partial_path = path.with_name(f".{path.name}.part")
+        self.times = times
+        self.byte_count = 0
+        self.error: OSError | None = None
+        self._queue: queue.Queue[bytes | None] = queue.Queue(MIRROR_QUEUE_CHUNKS)
+        self._closed = False
+        self._created = False
+        self._thread = threading.Thread(
+            target=self._write,
+            name=f'mirror "{path}"',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def write(self: MirrorWriter, chunk: bytes) -> None:
+        """Queue the chunk to be written."""
+        self._queue.put(chunk)
+
+    def close(self: MirrorWriter) -> None:
+        """Wait for every queued chunk to be written, closing the mirror if it isn't already."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def keep(self: MirrorWriter) -> None:
+        """Rename the closed mirror into place."""
+        self.partial_path.replace(self.path)
+
+    def discard(self: MirrorWriter) -> None:
+        """Remove the closed mirror if it was created, unless it was kept."""
+        if self._created:
+            self.partial_path.unlink(missing_ok=True)
+
+    def _write(self: MirrorWriter) -> None:
+        """Write the queued chunks until closed, only draining the queue after an error."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.partial_path.open("wb") as file:
+                self._created = True
+                while (chunk := self._queue.get()) is not None:
+                    file.write(chunk)
+                    self.byte_count += len(chunk)
+            os.utime(self.partial_path, self.times)
+        except OSError as error:
+            self.error = error
+            while self._queue.get() is not None:
+                pass
+
+
+@contextmanager
+def mirroring(
+    paths: list[Path],
+    times: tuple[float, float],
+) -> Iterator[list[MirrorWriter]]:
+    """Yield a writer for each mirror, closing them all afterwards & removing those that weren't kept - even on failure."""
+    writers = [MirrorWriter(path, times) for path in paths]
+    try:
+        yield writers
+    finally:
+        for writer in writers:
+            writer.close()
+            writer.discard()
@@ -0,0 +1,143 @@
+"""Placement of videos across the output roots & layout subdirectories, with an index of where each went."""
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from questdrive_syncer.constants import PLACEMENT_INDEX_FILENAME
+from questdrive_syncer.helpers import SPACE_RESERVATIONS, SpaceReservations
+from questdrive_syncer.layout import render_shard
+
+if TYPE_CHECKING:  # pragma: no cover
+    from questdrive_syncer.config import Config
+    from questdrive_syncer.structures import Video
+
+
+class IndexEntry(NamedTuple):
+    """Output root & subdirectory a video was placed in."""
+
+    root: str
+    shard: str = ""
+
+    def path(self: IndexEntry, filename: str) -> Path:
+        """Return the path of the video in the placement."""
+        return Path(self.root) / self.shard / filename
+
+
+def index_line(filename: str, entry: IndexEntry) -> str:
+    """Return the index line of the video, leaving out an empty subdirectory."""
+    return "\t".join((filename, *filter(None, entry))) + "\n"
+
+
+def read_index(output_path: str) -> dict[str, IndexEntry]:
+    """Return where each video in the index was placed, the last entry of a video winning."""
+    index_file = Path(output_path) / PLACEMENT_INDEX_FILENAME
+    if not index_file.exists():
+        return {}
+    index = {}
+    for line in index_file.read_text().splitlines():
+        filename, _, placed = line.partition("\t")
+        root, _, shard = placed.partition("\t")
+        if root:
+            index[filename] = IndexEntry(root, shard)
+    return index
+
+
+def write_index(output_path: str, index: dict[str, IndexEntry]) -> None:
+    """Replace the index with one entry per video."""
+    index_file = Path(output_path) / PLACEMENT_INDEX_FILENAME
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    partial = index_file.with_name(f"{index_file.name}.part")
+    partial.write_text(
+        "".join(
+            index_line(filename, entry) for filename, entry in sorted(index.items())
+        ),
+    )
+    partial.replace(index_file)
+
+
+class Placement:
+    """Chooses the output root & subdirectory each video is saved to, remembering each choice for the rest of the run.
+
+    With several roots or a layout, written videos are appended to an index in the
+    output directory, merged with those of previous runs when first read, so a video
+    downloaded again replaces itself rather than ending up on two disks, without
+    walking the output directories.
+    """
+
+    def __init__(
+        self: Placement,
+        config: Config,
+        reservations: SpaceReservations = SPACE_RESERVATIONS,
+    ) -> None:
+        """Initialize the placement without reading the index."""
+        self.config = config
+        self.roots = [config.output_path, *config.output_roots]
+        self.indexed = len(self.roots) > 1 or bool(config.layout)
+        self.reservations = reservations
+        self._placed: dict[str, IndexEntry] | None = None
+        self._chosen: dict[str, IndexEntry] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def placed(self: Placement) -> dict[str, IndexEntry]:
+        """Return where each written video is, reading and compacting the index the first time."""
+        if self._placed is None:
+            self._placed = {}
+            if self.indexed:
+                self._placed = {
+                    filename: entry
+                    for filename, entry in read_index(self.config.output_path).items()
+                    if entry.root in self.roots
+                }
+                write_index(self.config.output_path, self._placed)
+        return self._placed
+
+    def candidates(self: Placement, filename: str) -> list[str]:
+        """Return the output roots to try for the video, in order of preference.
+
+        Placed & chosen videos only have their root, otherwise roots are preferred by
+        their free space after reservations, or in turn.
+        """
+        with self._lock:
+            if entry := self._chosen.get(filename) or self.placed.get(filename):
+                return [entry.root]
+            if len(self.roots) == 1:
+                return self.roots
+            if self.config.placement == "round-robin":
+                start = self._next
+                self._next = (self._next + 1) % len(self.roots)
+                return self.roots[start:] + self.roots[:start]
+        return sorted(self.roots, key=self.reservations.free_mb, reverse=True)
+
+    def choose(self: Placement, video: Video, root: str) -> IndexEntry:
+        """Choose the output root of the video for the rest of the run, without indexing it until it's written.
+
+        A video already placed on the root keeps its subdirectory, even if the layout changed.
+        """
+        with self._lock:
+            entry = self.placed.get(video.filename)
+            if not entry or entry.root != root:
+                entry = IndexEntry(root, render_shard(self.config.layout, video))
+            self._chosen[video.filename] = entry
+            return entry
+
+    def entry(self: Placement, video: Video) -> IndexEntry:
+        """Return where the video is to be written, choosing the preferred root if it's not chosen yet."""
+        if entry := self._chosen.get(video.filename):
+            return entry
+        return self.choose(video, self.candidates(video.filename)[0])
+
+    def record(self: Placement, filename: str, entry: IndexEntry) -> None:
+        """Remember where the video was written, adding it to the index if it's new."""
+        with self._lock:
+            if self.placed.get(filename) == entry:
+                return
+            self.placed[filename] = entry
+            if self.indexed:
+                with (Path(self.config.output_path) / PLACEMENT_INDEX_FILENAME).open(
+                    "a",
+                ) as index_file:
+                    index_file.write(index_line(filename, entry))
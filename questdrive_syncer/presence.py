@@ -0,0 +1,70 @@
+"""Detect QuestDrive joining the network from the neighbor table."""
+from __future__ import annotations
+
+import ipaddress
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.constants import NEIGHBOR_POLL_SECONDS, NEIGHBOR_TABLE_PATH
+from questdrive_syncer.helpers import lazy_import
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+else:
+    httpx = lazy_import("httpx")
+
+# Flag of neighbor table entries with a resolved hardware address.
+ATF_COM = 0x2
+
+
+def read_neighbors(path: Path) -> set[str]:
+    """Return the IP addresses with a resolved hardware address in the neighbor table."""
+    neighbors = set()
+    for line in path.read_text().splitlines()[1:]:
+        ip_address, _, flags, *_ = line.split()
+        if int(flags, 16) & ATF_COM:
+            neighbors.add(ip_address)
+    return neighbors
+
+
+class NeighborWatcher:
+    """Watches the neighbor table for an IP address joining the network."""
+
+    def __init__(
+        self: NeighborWatcher,
+        ip_address: str,
+        *,
+        path: Path = Path(NEIGHBOR_TABLE_PATH),
+        interval: float = NEIGHBOR_POLL_SECONDS,
+    ) -> None:
+        """Initialize the watcher with the current presence of the IP address."""
+        self.ip_address = ip_address
+        self.path = path
+        self.interval = interval
+        self._present = self.is_present()
+
+    def is_present(self: NeighborWatcher) -> bool:
+        """Return if the IP address is currently in the neighbor table."""
+        return self.ip_address in read_neighbors(self.path)
+
+    def joined(self: NeighborWatcher) -> bool:
+        """Return if the IP address has appeared since last checked."""
+        present = self.is_present()
+        joined = present and not self._present
+        self._present = present
+        return joined
+
+
+def make_watcher(
+    questdrive_url: str,
+    path: Path = Path(NEIGHBOR_TABLE_PATH),
+) -> NeighborWatcher | None:
+    """Return a watcher of the QuestDrive host, or None if it can't be watched."""
+    host = httpx.URL(questdrive_url).host
+    try:
+        ipaddress.IPv4Address(host)
+    except ValueError:
+        return None
+    if not path.exists():
+        return None
+    return NeighborWatcher(host, path=path)
@@ -0,0 +1,145 @@
+"""Profiling of CPU & memory, reported on exit."""
+from __future__ import annotations
+
+import cProfile
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Literal
+
+from questdrive_syncer.constants import PROFILE_SAMPLE_SECONDS, PROFILE_TOP_COUNT
+
+if TYPE_CHECKING:  # pragma: no cover
+    from types import CodeType, FrameType
+
+
+def function_name(code: CodeType) -> str:
+    """Return the name of the function of the code, along with where it's defined."""
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stacks of every other thread at an interval.
+
+    The overhead depends on the interval rather than how many calls are made, so it
+    can be left running on production syncs.
+    """
+
+    def __init__(
+        self: StackSampler,
+        interval: float = PROFILE_SAMPLE_SECONDS,
+    ) -> None:
+        """Initialize the sampler, without starting it."""
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+
+    def start(self: StackSampler) -> None:
+        """Start sampling in the background."""
+        self._thread.start()
+
+    def stop(self: StackSampler) -> None:
+        """Stop sampling, waiting for the last sample."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self: StackSampler) -> None:
+        """Sample until stopped."""
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self: StackSampler) -> None:
+        """Count the current stack of every thread but the current one."""
+        current_thread = threading.get_ident()
+        for thread, frame in sys._current_frames().items():  # noqa: SLF001
+            if thread == current_thread:
+                continue
+            stack = []
+            caller: FrameType | None = frame
+            while caller is not None:
+                stack.append(function_name(caller.f_code))
+                caller = caller.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def write(self: StackSampler, path: str) -> None:
+        """Write the samples as collapsed stacks, as read by flamegraph.pl & speedscope."""
+        Path(path).write_text(
+            "".join(
+                f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items()
+            ),
+        )
+
+    def top(self: StackSampler, count: int) -> list[tuple[str, int, int]]:
+        """Return the functions in the most samples, with how many they were running in & on top of."""
+        inclusive: Counter[str] = Counter()
+        own: Counter[str] = Counter()
+        for stack, samples in self.stacks.items():
+            for function in set(stack):
+                inclusive[function] += samples
+            own[stack[-1]] += samples
+        return [
+            (function, samples, own[function])
+            for function, samples in inclusive.most_common(count)
+        ]
+
+
+def print_samples(sampler: StackSampler, count: int) -> None:
+    """Print the functions in the most samples."""
+    total = sum(sampler.stacks.values())
+    print(f"{total} samples, every {sampler.interval * 1000:g} ms:")
+    for function, samples, own in sampler.top(count):
+        print(f"{samples:>8} {own:>8}  {function}")
+
+
+def print_allocations(snapshot: tracemalloc.Snapshot, peak: int, count: int) -> None:
+    """Print the peak memory traced, and the lines with the most memory allocated."""
+    print(f"Peak traced memory: {peak / 1000**2:,.2f} MB, allocated by:")
+    for statistic in snapshot.statistics("lineno")[:count]:
+        print(statistic)
+
+
+@contextmanager
+def profiling(
+    path: str | None,
+    *,
+    mode: Literal["deterministic", "sampling"] = "deterministic",
+    memory: bool = False,
+    count: int = PROFILE_TOP_COUNT,
+) -> Iterator[None]:
+    """Profile the block if there's a path, and trace its memory if configured, reporting both afterwards.
+
+    Deterministic profiles are written as pstats, and sampled profiles as collapsed
+    stacks. Below Python 3.12 deterministic profiles only cover the current thread.
+    """
+    if memory:
+        tracemalloc.start()
+    profiler = sampler = None
+    if path and mode == "deterministic":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    elif path:
+        sampler = StackSampler()
+        sampler.start()
+
+    try:
+        yield
+    finally:
+        if profiler and path:
+            profiler.disable()
+            profiler.dump_stats(path)
+            stats = pstats.Stats(profiler, stream=sys.stdout)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(count)
+        if sampler and path:
+            sampler.stop()
+            sampler.write(path)
+            print_samples(sampler, count)
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print_allocations(snapshot, peak, count)
@@ -0,0 +1,175 @@
+"""Progress of transfers, rendered at a fixed rate."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, cast
+
+from questdrive_syncer.constants import PROGRESS_REFRESH_SECONDS
+from questdrive_syncer.events import Event, Kind, Sink, skip_message
+
+if TYPE_CHECKING:  # pragma: no cover
+    import rich.progress
+
+    from questdrive_syncer.structures import Video
+
+
+class Transfer:
+    """Byte counts of a single transfer."""
+
+    __slots__ = ("completed", "total")
+
+    def __init__(self: Transfer, total: float) -> None:
+        """Initialize the transfer with nothing completed."""
+        self.completed = 0.0
+        self.total = total
+
+
+class TransferProgress:
+    """Aggregates the progress of transfers, pushing it to the display at a fixed rate.
+
+    Only active transfers have a task, along with a summary task of every transfer.
+    """
+
+    def __init__(
+        self: TransferProgress,
+        progress: rich.progress.Progress,
+        total: float,
+        count: int,
+        *,
+        refresh_seconds: float = PROGRESS_REFRESH_SECONDS,
+    ) -> None:
+        """Initialize the progress, adding the summary task."""
+        self.progress = progress
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._transfers: dict[rich.progress.TaskID, Transfer] = {}
+        self._summary = Transfer(total)
+        self._count = count
+        self._finished = 0
+        self._pushed_at = 0.0
+        self._summary_task = progress.add_task(
+            "Total",
+            total=total,
+            filename=self._summary_name(),
+        )
+
+    def _summary_name(self: TransferProgress) -> str:
+        """Return the name of the summary task."""
+        return f"Total ({self._finished}/{self._count})"
+
+    def start(self: TransferProgress, video: Video) -> rich.progress.TaskID:
+        """Add a task for the transfer of the video."""
+        total = video.mb_size * 1000**2
+        with self._lock:
+            task = self.progress.add_task(
+                "Download",
+                total=total,
+                filename=video.filename,
+            )
+            self._transfers[task] = Transfer(total)
+        return task
+
+    def set_total(
+        self: TransferProgress,
+        task: rich.progress.TaskID,
+        total: float,
+    ) -> None:
+        """Set the total bytes of the transfer."""
+        with self._lock:
+            transfer = self._transfers[task]
+            self._summary.total += total - transfer.total
+            transfer.total = total
+
+    def advance(
+        self: TransferProgress,
+        task: rich.progress.TaskID,
+        byte_count: float,
+    ) -> None:
+        """Add transferred bytes, pushing to the display if it's time to."""
+        with self._lock:
+            self._transfers[task].completed += byte_count
+            self._summary.completed += byte_count
+            if time.monotonic() - self._pushed_at >= self.refresh_seconds:
+                self._push()
+
+    def finish(self: TransferProgress, task: rich.progress.TaskID) -> None:
+        """Remove the task of the finished transfer, counting all of its bytes as done."""
+        with self._lock:
+            transfer = self._transfers.pop(task)
+            self._summary.completed += transfer.total - transfer.completed
+            self._finished += 1
+            self.progress.remove_task(task)
+            self._push()
+
+    def skip(self: TransferProgress, total: float) -> None:
+        """Count a transfer that was never started as done."""
+        with self._lock:
+            self._summary.completed += total
+            self._finished += 1
+            self._push()
+
+    def close(self: TransferProgress) -> None:
+        """Remove the summary task & those of unfinished transfers from the display."""
+        with self._lock:
+            for task in self._transfers:
+                self.progress.remove_task(task)
+            self._transfers.clear()
+            self.progress.remove_task(self._summary_task)
+
+    def _push(self: TransferProgress) -> None:
+        """Push the byte counts to the display."""
+        for task, transfer in self._transfers.items():
+            self.progress.update(
+                task,
+                completed=transfer.completed,
+                total=transfer.total,
+            )
+        self.progress.update(
+            self._summary_task,
+            completed=self._summary.completed,
+            total=self._summary.total,
+            filename=self._summary_name(),
+        )
+        self._pushed_at = time.monotonic()
+
+
+class RichSink(Sink):
+    """Renders the transfers as progress bars."""
+
+    def __init__(
+        self: RichSink,
+        progress: rich.progress.Progress,
+        videos: list[Video],
+    ) -> None:
+        """Initialize the sink, adding the summary task of the videos."""
+        self.transfers = TransferProgress(
+            progress,
+            sum(video.mb_size * 1000**2 for video in videos),
+            len(videos),
+        )
+        self._tasks: dict[str, rich.progress.TaskID] = {}
+
+    def handle(self: RichSink, event: Event) -> None:
+        """Progress the transfer of the video, printing every message."""
+        kind = event.kind
+        video = event.video
+        if kind is Kind.BYTES:
+            self.transfers.advance(
+                self._tasks[video.filepath],
+                cast(float, event.value),
+            )
+        elif kind is Kind.TOTAL:
+            self.transfers.set_total(
+                self._tasks[video.filepath],
+                cast(float, event.value),
+            )
+        elif kind is Kind.MESSAGE or kind is Kind.FAILED:
+            print(event.value)
+        elif kind is Kind.SKIPPED:
+            print(skip_message(event))
+            self.transfers.skip(video.mb_size * 1000**2)
+        elif event.phase is None and kind is Kind.STARTED:
+            self._tasks[video.filepath] = self.transfers.start(video)
+        elif event.phase is None and kind is Kind.FINISHED:
+            self.transfers.finish(self._tasks.pop(video.filepath))
@@ -0,0 +1,88 @@
+"""Detect videos the Quest is actively recording."""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from questdrive_syncer.constants import (
+    LISTED_SIZE_TOLERANCE_MB,
+    RECORDING_CANDIDATES,
+    RECORDING_CHECKS,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Future
+
+    from questdrive_syncer.session import SyncSession
+    from questdrive_syncer.structures import Video
+
+
+def recording_candidates(
+    videos: list[Video],
+    count: int = RECORDING_CANDIDATES,
+) -> list[Video]:
+    """Return the most recently modified videos, the only ones that could be recording."""
+    return sorted(videos, key=lambda video: video.modified_at, reverse=True)[:count]
+
+
+def video_byte_count(session: SyncSession, video: Video) -> int:
+    """Return the current size of the video in bytes."""
+    response = session.head(session.url(str(Path("download") / video.filepath)))
+    return int(response.headers.get("Content-Length", 0))
+
+
+def detect_recording(
+    session: SyncSession,
+    videos: list[Video],
+    window: float,
+    checks: int = RECORDING_CHECKS,
+) -> None:
+    """Mark the videos that grow within the window as actively recording.
+
+    The size of each video is first compared to the size in the video list, then
+    re-checked a number of times throughout the window, finishing early once every
+    video is known to be recording.
+    """
+    with session.timings.time("recording"):
+        byte_counts = {}
+        for video in videos:
+            byte_counts[video.filepath] = video_byte_count(session, video)
+            if (
+                byte_counts[video.filepath] / 1000**2
+                > video.mb_size + LISTED_SIZE_TOLERANCE_MB
+            ):
+                video.actively_recording = True
+
+        for _ in range(checks):
+            pending = [video for video in videos if not video.actively_recording]
+            if not pending:
+                return
+
+            time.sleep(window / checks)
+            for video in pending:
+                if video_byte_count(session, video) != byte_counts[video.filepath]:
+                    video.actively_recording = True
+
+
+def hold_back(
+    videos: Iterable[Video],
+    candidates: list[Video],
+    detection: Future[None],
+) -> Iterator[Video]:
+    """Yield the videos in order, holding back the candidates while detection is running.
+
+    Once detection finishes the held back candidates are yielded before any later
+    video, so only the candidates reached while detecting are synced out of order.
+    """
+    held: list[Video] = []
+    for video in videos:
+        if not (detected := detection.done()) and video in candidates:
+            held.append(video)
+            continue
+        if detected:
+            yield from held
+            held.clear()
+        yield video
+    detection.result()
+    yield from held
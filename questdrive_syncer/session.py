@@ -0,0 +1,139 @@
+"""Sessions of syncing a single QuestDrive instance."""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, ContextManager
+
+from questdrive_syncer.constants import HTTP_TIMEOUT
+from questdrive_syncer.helpers import lazy_import
+from questdrive_syncer.placement import Placement
+from questdrive_syncer.timing import PhaseTimings
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+
+    from questdrive_syncer.bandwidth import TokenBucket
+    from questdrive_syncer.cassette import Cassette
+    from questdrive_syncer.config import Config
+    from questdrive_syncer.events import Sink
+    from questdrive_syncer.helpers import ProcessLock
+    from questdrive_syncer.tracing import Tracer
+else:
+    httpx = lazy_import("httpx")
+
+
+@dataclass
+class SyncMetrics:
+    """Counts of what a session has done."""
+
+    requests: int = 0
+    videos_downloaded: int = 0
+    bytes_downloaded: int = 0
+    videos_deleted: int = 0
+    videos_skipped: int = 0
+    videos_failed: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self: SyncMetrics, **counts: int) -> None:
+        """Add to the counts."""
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+    def __str__(self: SyncMetrics) -> str:
+        """Return a summary of the counts."""
+        return f"Downloaded {self.videos_downloaded} videos ({round(self.bytes_downloaded / 1000**2, 2):,} MB), deleted {self.videos_deleted}, skipped {self.videos_skipped} & failed {self.videos_failed} using {self.requests} requests"
+
+
+class SyncSession:
+    """Configuration, HTTP client, lock, metrics, timings, placement & sinks for syncing a single QuestDrive instance.
+
+    Sessions only share what's passed to them - such as the limiter - so any number of
+    them can be run concurrently, and each can be entered again once exited.
+    """
+
+    def __init__(
+        self: SyncSession,
+        config: Config,
+        *,
+        limiter: TokenBucket | None = None,
+        lock: ProcessLock | None = None,
+        client: httpx.Client | None = None,
+        sinks: list[Sink] | None = None,
+        tracer: Tracer | None = None,
+        cassette: Cassette | None = None,
+    ) -> None:
+        """Initialize the session, creating a HTTP client if not provided - abandoning requests that stall.
+
+        The sinks receive the events of every video synced, alongside those of the output,
+        the tracer - if any - receives spans of every phase, and the cassette - if any -
+        every response of the created client.
+        """
+        self.config = config
+        self.limiter = limiter
+        self.lock = lock
+        self.metrics = SyncMetrics()
+        self.placement = Placement(config)
+        self.tracer = tracer
+        self.timings = PhaseTimings(tracer)
+        self.homepage_html: str | None = None
+        self.sinks = sinks or []
+        self._owns_client = client is None
+        self._cassette = cassette
+        self.client = client or self._make_client()
+
+    def _make_client(self: SyncSession) -> httpx.Client:
+        """Create a HTTP client abandoning stalled requests, recording to the cassette if any."""
+        from questdrive_syncer.transport import RecordingTransport
+
+        return httpx.Client(
+            timeout=httpx.Timeout(HTTP_TIMEOUT, read=self.config.stall_timeout),
+            transport=RecordingTransport(httpx.HTTPTransport(), self._cassette)
+            if self._cassette
+            else None,
+        )
+
+    def __enter__(self: SyncSession) -> SyncSession:  # noqa: PYI034
+        """Acquire the lock, if any, recreating the HTTP client if the session created it and closed it when last exited."""
+        if self._owns_client and self.client.is_closed:
+            self.client = self._make_client()
+        if self.lock:
+            self.lock.__enter__()
+        return self
+
+    def __exit__(self: SyncSession, *_: object) -> None:
+        """Close the HTTP client if created by the session, and release the lock."""
+        if self._owns_client:
+            self.client.close()
+        if self.lock:
+            self.lock.__exit__()
+
+    def url(self: SyncSession, path: str = "") -> httpx.URL:
+        """Return the URL of the path on the QuestDrive instance."""
+        return httpx.URL(self.config.questdrive_url).join(path)
+
+    def get(
+        self: SyncSession,
+        url: httpx.URL | str,
+        *,
+        timeout: float | None = None,
+    ) -> httpx.Response:
+        """Send a GET request, with the client's timeout if none is provided."""
+        self.metrics.add(requests=1)
+        if timeout is None:
+            return self.client.get(url)
+        return self.client.get(url, timeout=timeout)
+
+    def head(self: SyncSession, url: httpx.URL | str) -> httpx.Response:
+        """Send a HEAD request."""
+        self.metrics.add(requests=1)
+        return self.client.head(url)
+
+    def stream(
+        self: SyncSession,
+        url: httpx.URL | str,
+    ) -> ContextManager[httpx.Response]:
+        """Send a streaming GET request."""
+        self.metrics.add(requests=1)
+        return self.client.stream("GET", url)
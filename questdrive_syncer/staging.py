@@ -0,0 +1,203 @@
+"""Stage downloads on a faster disk, moving them to the output directory in the background."""
+from __future__ import annotations
+
+import errno
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.constants import MOVE_CHUNK_SIZE
+from questdrive_syncer.helpers import SPACE_RESERVATIONS
+from questdrive_syncer.placement import IndexEntry
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from questdrive_syncer.session import SyncSession
+    from questdrive_syncer.structures import Video
+
+# Errors of copy_file_range between files it can't copy between, such as across
+# filesystems before Linux 5.3, which sendfile can.
+COPY_FILE_RANGE_FALLBACK_ERRNOS = frozenset(
+    {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP},
+)
+
+
+def copy_bytes(source_fd: int, destination_fd: int, byte_count: int) -> int:
+    """Copy the bytes from the position of the source to that of the destination within the kernel, returning how many were copied.
+
+    copy_file_range lets the filesystem share or offload the copy, falling back to
+    sendfile where it can't.
+    """
+    copied = 0
+    copy_file_range = hasattr(os, "copy_file_range")
+    while copied < byte_count:
+        count = min(byte_count - copied, MOVE_CHUNK_SIZE)
+        if copy_file_range:
+            try:
+                sent = os.copy_file_range(source_fd, destination_fd, count)
+            except OSError as error:
+                if error.errno not in COPY_FILE_RANGE_FALLBACK_ERRNOS:
+                    raise
+                copy_file_range = False
+                continue
+        else:
+            sent = os.sendfile(destination_fd, source_fd, None, count)
+        if not sent:
+            break
+        copied += sent
+    return copied
+
+
+def same_filesystem(source: Path, directory: Path) -> bool:
+    """Return if the file is on the same filesystem as the directory."""
+    return source.stat().st_dev == directory.stat().st_dev
+
+
+def move_file(source: Path, destination: Path) -> None:
+    """Move the file, renaming it within a filesystem, otherwise copying it next to the destination then renaming it into place.
+
+    Copies are only renamed into place - and the source removed - once they're synced
+    to disk with the size of the source, so a failed move leaves the source as it was.
+    """
+    if same_filesystem(source, destination.parent):
+        source.replace(destination)
+        return
+
+    stat = source.stat()
+    partial = destination.with_name(f".{destination.name}.moving")
+    try:
+        with source.open("rb") as source_file, partial.open("wb") as partial_file:
+            copy_bytes(source_file.fileno(), partial_file.fileno(), stat.st_size)
+            os.fsync(partial_file.fileno())
+    except OSError:
+        partial.unlink(missing_ok=True)
+        raise
+    if (copied := partial.stat().st_size) != stat.st_size:
+        partial.unlink()
+        message = f'Copied {copied} of {stat.st_size} bytes of "{source}"'
+        raise OSError(message)
+
+    os.utime(partial, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    partial.replace(destination)
+    source.unlink()
+
+
+class Mover:
+    """Moves staged videos to the output directory in the background, a bounded number at a time.
+
+    Videos are downloaded to a hidden partial file, only staged under their own name
+    once verified, so staged videos left by a previous run are moved too - and failed
+    moves are left staged for the next. Where each video was placed is kept next to it
+    until it's moved, as its subdirectory can't be rendered from its name alone. A
+    video is only staged again once any move of its previously staged copy has
+    finished, so that move can't take the new copy.
+    """
+
+    def __init__(self: Mover, session: SyncSession, staging_path: Path) -> None:
+        """Initialize the mover without moving anything."""
+        self.session = session
+        self.staging_path = staging_path
+        self._executor = ThreadPoolExecutor(
+            max_workers=session.config.max_moves,
+            thread_name_prefix="mover",
+        )
+        self._moves: dict[str, Future[None]] = {}
+        self._moves_lock = threading.Lock()
+
+    def __enter__(self: Mover) -> Mover:  # noqa: PYI034
+        """Start moving the videos staged by previous runs, to where they were placed when staged or indexed, or else the preferred output root."""
+        self.staging_path.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.staging_path.iterdir()):
+            if path.is_file() and not path.name.startswith("."):
+                self.submit(
+                    path,
+                    self.staged_entry(path)
+                    or self.session.placement.placed.get(path.name)
+                    or IndexEntry(self.session.placement.candidates(path.name)[0]),
+                )
+        return self
+
+    def __exit__(self: Mover, *_: object) -> None:
+        """Wait for every move to finish."""
+        self._executor.shutdown(wait=True)
+
+    def partial_path(self: Mover, video: Video) -> Path:
+        """Return the path to download the video to before it's verified."""
+        return self.staging_path / f".{video.filename}.part"
+
+    @staticmethod
+    def entry_path(staged: Path) -> Path:
+        """Return the path keeping where the staged video is placed."""
+        return staged.with_name(f".{staged.name}.entry")
+
+    def staged_entry(self: Mover, staged: Path) -> IndexEntry | None:
+        """Return where the staged video was placed when staged, if that's kept & still one of the output roots."""
+        entry_path = self.entry_path(staged)
+        if not entry_path.exists():
+            return None
+        root, _, shard = entry_path.read_text().partition("\t")
+        if root not in self.session.placement.roots:
+            return None
+        return IndexEntry(root, shard)
+
+    def stage(self: Mover, video: Video, entry: IndexEntry) -> None:
+        """Stage the downloaded video under its own name, then move it to where it's placed in the background."""
+        staged = self.staging_path / video.filename
+        with self._moves_lock:
+            previous_move = self._moves.get(video.filename)
+        if previous_move:
+            previous_move.result()
+        self.entry_path(staged).write_text("\t".join(entry))
+        self.partial_path(video).replace(staged)
+        self.submit(staged, entry)
+
+    def submit(self: Mover, staged: Path, entry: IndexEntry) -> None:
+        """Move the staged video in the background, reserving its space at its destination until it's moved.
+
+        Without enough space the video is left staged for the next run, counted as skipped.
+        """
+        destination = entry.path(staged.name)
+        reservation = ExitStack()
+        if not reservation.enter_context(
+            SPACE_RESERVATIONS.reserve(
+                staged.stat().st_size / 1024**2,
+                self.session.config,
+                str(destination.parent),
+            ),
+        ):
+            reservation.close()
+            self.session.metrics.add(videos_skipped=1)
+            print(
+                f'Not enough free space to move "{staged}" to "{destination}", leaving it staged',
+            )
+            return
+        with self._moves_lock:
+            self._moves[staged.name] = self._executor.submit(
+                self.move,
+                staged,
+                entry,
+                reservation,
+            )
+
+    def move(
+        self: Mover,
+        staged: Path,
+        entry: IndexEntry,
+        reservation: ExitStack,
+    ) -> None:
+        """Move the staged video to its destination, then index it, leaving it staged - along with where it's placed - if that fails."""
+        destination = entry.path(staged.name)
+        with reservation, self.session.timings.time("move"):
+            try:
+                move_file(staged, destination)
+            except OSError as error:
+                self.session.metrics.add(videos_failed=1)
+                print(
+                    f'Failed to move "{staged}" to "{destination}", leaving it staged: {error}',
+                )
+                return
+            self.session.placement.record(staged.name, entry)
+            self.entry_path(staged).unlink(missing_ok=True)
@@ -32,9 +32,9 @@ class Video:
         return self.filename.split("-")[0]
 
 
-class MissingVideoError(Exception):
-    """Raised when a video is missing."""
+@dataclass(frozen=True)
+class FleetDevice:
+    """QuestDrive instance synced as part of a fleet."""
 
-    def __init__(self: "MissingVideoError", video_filepath: str) -> None:
-        """Initialize the exception."""
-        super().__init__(f'Video "{video_filepath}" is missing.')
+    questdrive_url: str
+    subdirectory: str
@@ -1,7 +1,8 @@
 """Tests for the API module."""
 from __future__ import annotations
 
-from datetime import datetime
+import itertools
+import socket
 from typing import TYPE_CHECKING
 
 import httpx
@@ -11,12 +12,15 @@ from questdrive_syncer.api import (
     fetch_homepage_html,
     fetch_video_list_html,
     is_online,
-    update_actively_recording,
+    is_reachable,
+    probe_delays,
 )
-from questdrive_syncer.structures import MissingVideoError, Video
+from questdrive_syncer.config import Config
+from questdrive_syncer.session import SyncSession
 
 if TYPE_CHECKING:  # pragma: no cover
     from pytest_httpx import HTTPXMock
+    from pytest_mock import MockerFixture
 
 
 @pytest.fixture()
@@ -25,97 +29,122 @@ def assert_all_responses_were_requested() -> bool:
     return True
 
 
-class TestIsOnline:
-    """Tests for the is_online() function."""
+@pytest.fixture()
+def session() -> SyncSession:
+    """Session for the example QuestDrive instance."""
+    return SyncSession(Config(questdrive_url="https://example.com/"))
 
-    @staticmethod
-    def test_normal(httpx_mock: HTTPXMock) -> None:
-        """Returns True when the server is online."""
-        httpx_mock.add_response()
-        assert is_online() is True
 
-    @staticmethod
-    def test_error(httpx_mock: HTTPXMock) -> None:
-        """Returns False when the server is offline."""
-        httpx_mock.add_exception(httpx.ConnectError(""))
-        assert is_online() is False
+def test_probe_delays(mocker: MockerFixture) -> None:
+    """probe_delays() doubles from the minimum up to the maximum, with jitter."""
+    mock_uniform = mocker.patch("random.uniform", return_value=1.1)
 
-    @staticmethod
-    def test_non_200(httpx_mock: HTTPXMock) -> None:
-        """Returns False when the server responds with a non-200 status code."""
-        httpx_mock.add_response(status_code=404)
-        assert is_online() is False
+    assert list(itertools.islice(probe_delays(1, 10), 6)) == pytest.approx(
+        [1.1, 2.2, 4.4, 8.8, 11, 11],
+    )
+    mock_uniform.assert_called_with(0.8, 1.2)
 
 
-class TestUpdateActivelyRecording:
-    """Tests for the update_actively_recording() function."""
+class TestIsReachable:
+    """Tests for the is_reachable() function."""
 
     @staticmethod
-    def test_handles_unchanged() -> None:
-        """Leaves unchanged videos alone."""
-        video = Video(
-            "full%2Fpathtofile.mp4",
-            "filename-20240101-111213.mp4",
-            datetime(2024, 1, 1, 11, 12, 13),
-            datetime(2024, 1, 1, 12, 13, 14),
-            2345,
-        )
-        update_actively_recording(
-            [video],
-            [video],
-        )
-        assert video.actively_recording is False
+    @pytest.mark.usefixtures("enable_network")
+    def test_listening() -> None:
+        """Returns True when the host accepts connections."""
+        with socket.create_server(("127.0.0.1", 0)) as server:
+            port = server.getsockname()[1]
+            session = SyncSession(Config(questdrive_url=f"http://127.0.0.1:{port}/"))
+
+            assert is_reachable(session) is True
 
     @staticmethod
-    def test_updates() -> None:
-        """Updates changed videos."""
-        video = Video(
-            "full%2Fpathtofile.mp4",
-            "filename-20240101-111213.mp4",
-            datetime(2024, 1, 1, 11, 12, 13),
-            datetime(2024, 1, 1, 12, 13, 14),
-            2345,
+    def test_refused(mocker: MockerFixture, session: SyncSession) -> None:
+        """Returns False when the connection fails, using the probe timeout."""
+        mock_create_connection = mocker.patch(
+            "socket.create_connection",
+            side_effect=ConnectionRefusedError,
         )
-        update_actively_recording(
-            [video],
-            [
-                Video(
-                    "full%2Fpathtofile.mp4",
-                    "filename-20240101-111213.mp4",
-                    datetime(2024, 1, 1, 11, 12, 13),
-                    datetime(2024, 1, 1, 12, 13, 15),
-                    2345,
-                ),
-            ],
+
+        assert is_reachable(session) is False
+        mock_create_connection.assert_called_once_with(
+            ("example.com", 443),
+            timeout=0.8,
         )
-        assert video.actively_recording is True
 
     @staticmethod
-    def test_throws_if_video_missing() -> None:
-        """Throws if a video is missing."""
-        video = Video(
-            "full%2Fpathtofile.mp4",
-            "filename-20240101-111213.mp4",
-            datetime(2024, 1, 1, 11, 12, 13),
-            datetime(2024, 1, 1, 12, 13, 14),
-            2345,
+    def test_default_http_port(mocker: MockerFixture) -> None:
+        """Connects to port 80 for HTTP URLs without a port."""
+        mock_create_connection = mocker.patch(
+            "socket.create_connection",
+            side_effect=TimeoutError,
         )
-        with pytest.raises(MissingVideoError) as exc_info:
-            update_actively_recording([video], [])
-        assert exc_info.value.args[0] == 'Video "full%2Fpathtofile.mp4" is missing.'
+
+        is_reachable(SyncSession(Config(questdrive_url="http://example.com/")))
+
+        assert mock_create_connection.mock_calls[0].args[0] == ("example.com", 80)
+
+
+class TestIsOnline:
+    """Tests for the is_online() function."""
+
+    @staticmethod
+    def test_normal(httpx_mock: HTTPXMock, session: SyncSession) -> None:
+        """Returns True when the server is online, keeping the homepage HTML."""
+        httpx_mock.add_response(text="html")
+        assert is_online(session) is True
+        assert session.homepage_html == "html"
+
+    @staticmethod
+    def test_error(httpx_mock: HTTPXMock, session: SyncSession) -> None:
+        """Returns False when the server is offline."""
+        httpx_mock.add_exception(httpx.ConnectError(""))
+        assert is_online(session) is False
+
+    @staticmethod
+    def test_timeout(httpx_mock: HTTPXMock, session: SyncSession) -> None:
+        """Returns False when the server doesn't respond within the probe timeout."""
+        httpx_mock.add_exception(httpx.ReadTimeout(""))
+        assert is_online(session) is False
+        assert httpx_mock.get_requests()[0].extensions["timeout"] == {
+            "connect": 0.8,
+            "read": 0.8,
+            "write": 0.8,
+            "pool": 0.8,
+        }
+
+    @staticmethod
+    def test_non_200(httpx_mock: HTTPXMock, session: SyncSession) -> None:
+        """Returns False when the server responds with a non-200 status code."""
+        httpx_mock.add_response(status_code=404)
+        assert is_online(session) is False
 
 
-def test_fetch_video_list_html(httpx_mock: HTTPXMock) -> None:
+def test_fetch_video_list_html(httpx_mock: HTTPXMock, session: SyncSession) -> None:
     """fetch_video_list_html() returns the URL & HTML."""
     httpx_mock.add_response(text="html")
 
-    assert fetch_video_list_html() == "html"
+    assert fetch_video_list_html(session) == "html"
 
 
-def test_fetch_homepage_html(httpx_mock: HTTPXMock) -> None:
+def test_fetch_homepage_html(httpx_mock: HTTPXMock, session: SyncSession) -> None:
     """fetch_homepage_html() calls the correct URL & returns the HTML."""
     httpx_mock.add_response(text="html")
 
-    assert fetch_homepage_html() == "html"
+    assert fetch_homepage_html(session) == "html"
+
+
+def test_fetch_homepage_html_reuses_is_online(
+    httpx_mock: HTTPXMock,
+    session: SyncSession,
+) -> None:
+    """fetch_homepage_html() reuses the HTML from is_online() once."""
+    httpx_mock.add_response(text="probed")
+    httpx_mock.add_response(text="fetched")
+
+    is_online(session)
+
+    assert fetch_homepage_html(session) == "probed"
+    assert fetch_homepage_html(session) == "fetched"
 
     assert httpx_mock.get_requests()[0].url == "https://example.com/"
@@ -0,0 +1,159 @@
+"""Tests for the bandwidth module."""
+from __future__ import annotations
+
+from datetime import datetime
+from datetime import time as time_of_day
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.bandwidth import RateWindow, TokenBucket, make_limiter
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_mock import MockerFixture
+
+
+class TestRateWindow:
+    """Tests for the RateWindow class."""
+
+    @staticmethod
+    def test_contains() -> None:
+        """Contains times between the start and end."""
+        window = RateWindow(time_of_day(8), time_of_day(18), 1)
+
+        assert time_of_day(8) in window
+        assert time_of_day(12) in window
+        assert time_of_day(18) not in window
+        assert time_of_day(7, 59) not in window
+
+    @staticmethod
+    def test_contains_wrapping_midnight() -> None:
+        """Contains times across midnight when the end is before the start."""
+        window = RateWindow(time_of_day(22), time_of_day(6), 1)
+
+        assert time_of_day(23) in window
+        assert time_of_day(1) in window
+        assert time_of_day(6) not in window
+        assert time_of_day(12) not in window
+
+
+class TestTokenBucket:
+    """Tests for the TokenBucket class."""
+
+    @staticmethod
+    def make_clock(mocker: MockerFixture, now: float = 100) -> list[float]:
+        """Mock the monotonic clock & sleep, returning the mutable current time."""
+        clock = [now]
+        mocker.patch("time.monotonic", side_effect=lambda: clock[0])
+        mocker.patch(
+            "time.sleep",
+            side_effect=lambda seconds: clock.__setitem__(0, clock[0] + seconds),
+        )
+        return clock
+
+    @staticmethod
+    def test_does_not_sleep_within_burst(mocker: MockerFixture) -> None:
+        """Doesn't sleep while there are enough tokens."""
+        clock = TestTokenBucket.make_clock(mocker)
+        bucket = TokenBucket(1)
+
+        bucket.consume(1000**2)
+
+        assert clock[0] == 100  # noqa: PLR2004
+
+    @staticmethod
+    def test_sleeps_for_deficit(mocker: MockerFixture) -> None:
+        """Sleeps long enough to pay back the consumed tokens."""
+        clock = TestTokenBucket.make_clock(mocker)
+        bucket = TokenBucket(1)
+
+        bucket.consume(1000**2)
+        bucket.consume(500_000)
+
+        assert clock[0] == 100.5  # noqa: PLR2004
+
+    @staticmethod
+    def test_refills_over_time(mocker: MockerFixture) -> None:
+        """Refills tokens as time passes, without exceeding the burst."""
+        clock = TestTokenBucket.make_clock(mocker)
+        bucket = TokenBucket(1)
+
+        bucket.consume(1000**2)
+        clock[0] += 10
+        bucket.consume(1000**2)
+        bucket.consume(1000**2)
+
+        assert clock[0] == 111  # noqa: PLR2004
+
+    @staticmethod
+    def test_unlimited(mocker: MockerFixture) -> None:
+        """Never sleeps when the current limit is infinite."""
+        TestTokenBucket.make_clock(mocker)
+        mock_sleep = mocker.patch("time.sleep")
+        bucket = TokenBucket(float("inf"))
+
+        bucket.consume(1000**4)
+
+        mock_sleep.assert_not_called()
+
+    @staticmethod
+    def test_uses_schedule(mocker: MockerFixture) -> None:
+        """Uses the limit of the window containing the current time."""
+        mock_datetime = mocker.patch("questdrive_syncer.bandwidth.datetime")
+        mock_datetime.now.return_value = datetime(2024, 1, 1, 12)
+        bucket = TokenBucket(
+            float("inf"),
+            [
+                RateWindow(time_of_day(0), time_of_day(8), 1),
+                RateWindow(time_of_day(8), time_of_day(18), 2),
+            ],
+        )
+
+        assert bucket.current_mb_per_second() == 2  # noqa: PLR2004
+
+        mock_datetime.now.return_value = datetime(2024, 1, 1, 20)
+
+        assert bucket.current_mb_per_second() == float("inf")
+
+    @staticmethod
+    def test_rechecks_schedule_once_a_second(mocker: MockerFixture) -> None:
+        """Only rechecks the schedule once a second."""
+        clock = TestTokenBucket.make_clock(mocker)
+        bucket = TokenBucket(float("inf"))
+        mock_current = mocker.patch.object(
+            bucket,
+            "current_mb_per_second",
+            return_value=float("inf"),
+        )
+
+        bucket.consume(1)
+        bucket.consume(1)
+        clock[0] += 1
+        bucket.consume(1)
+
+        assert mock_current.call_count == 1
+
+
+class TestMakeLimiter:
+    """Tests for the make_limiter() function."""
+
+    @staticmethod
+    def test_none_when_unlimited() -> None:
+        """Returns None when there is no limit."""
+        assert make_limiter(float("inf"), []) is None
+
+    @staticmethod
+    def test_bucket_when_limited() -> None:
+        """Returns a bucket when there is a limit."""
+        limiter = make_limiter(5, [])
+
+        assert isinstance(limiter, TokenBucket)
+        assert limiter.mb_per_second == 5  # noqa: PLR2004
+
+    @staticmethod
+    def test_bucket_when_scheduled() -> None:
+        """Returns a bucket when there is only a schedule."""
+        schedule = [RateWindow(time_of_day(0), time_of_day(8), 1)]
+
+        limiter = make_limiter(float("inf"), schedule)
+
+        assert isinstance(limiter, TokenBucket)
+        assert limiter.schedule == schedule
@@ -0,0 +1,72 @@
+"""Tests for the cassette module."""
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+
+from questdrive_syncer.cassette import (
+    Cassette,
+    Interaction,
+    read_cassette,
+    recording,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+INTERACTION = Interaction(
+    "http://quest/",
+    "GET",
+    "/",
+    200,
+    {"Content-Length": "4"},
+    1.5,
+    0.25,
+    0.125,
+    4,
+    "cGFnZQ==",
+)
+
+
+def test_write_and_read(tmp_path: Path) -> None:
+    """Cassettes are written as JSON, and read back as interactions."""
+    path = tmp_path / "cassette.json"
+    cassette = Cassette()
+    cassette.add(INTERACTION)
+
+    cassette.write(str(path))
+
+    assert json.loads(path.read_text())["interactions"][0]["body"] == "cGFnZQ=="
+    assert read_cassette(str(path)) == [INTERACTION]
+
+
+class TestRecording:
+    """Tests for the recording() function."""
+
+    @staticmethod
+    def test_no_path() -> None:
+        """Yields no cassette without a path."""
+        with recording(None) as cassette:
+            assert cassette is None
+
+    @staticmethod
+    def test_writes_even_on_failure(
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Writes the cassette to the path, even when the block fails."""
+        path = tmp_path / "cassette.json"
+
+        def record() -> None:
+            with recording(str(path)) as cassette:
+                assert cassette
+                cassette.add(INTERACTION)
+                raise SystemExit
+
+        with pytest.raises(SystemExit):
+            record()
+
+        assert read_cassette(str(path)) == [INTERACTION]
+        assert f'Cassette written to "{path}"' in capsys.readouterr().out
@@ -0,0 +1,215 @@
+"""Tests for the concurrency module."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Iterator
+
+import pytest
+
+from questdrive_syncer.concurrency import AIMDController, run_concurrently
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_mock import MockerFixture
+
+
+class TestAIMDController:
+    """Tests for the AIMDController class."""
+
+    @staticmethod
+    def make_controller(
+        mocker: MockerFixture,
+        maximum: int = 8,
+        *,
+        adaptive: bool = True,
+    ) -> tuple[AIMDController, list[float]]:
+        """Create a controller with a mocked clock, returning the mutable current time."""
+        clock = [100.0]
+        mocker.patch("time.monotonic", side_effect=lambda: clock[0])
+        return AIMDController(maximum, adaptive=adaptive, window_seconds=1), clock
+
+    @staticmethod
+    def test_starts_at_one_when_adaptive(mocker: MockerFixture) -> None:
+        """Starts with a single download when adaptive."""
+        controller, _ = TestAIMDController.make_controller(mocker)
+
+        assert controller.limit == 1
+
+    @staticmethod
+    def test_starts_at_maximum_when_not_adaptive(mocker: MockerFixture) -> None:
+        """Starts - and stays - at the maximum when not adaptive."""
+        controller, clock = TestAIMDController.make_controller(mocker, adaptive=False)
+
+        clock[0] += 1
+        controller.record_error()
+
+        assert controller.limit == 8  # noqa: PLR2004
+
+    @staticmethod
+    def test_increases_while_throughput_rises(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Increases by one while the total throughput rises, logging the decision."""
+        controller, clock = TestAIMDController.make_controller(mocker)
+
+        for byte_count in (1000**2, 2 * 1000**2, 4 * 1000**2):
+            clock[0] += 1
+            controller.record_bytes(byte_count)
+
+        assert controller.limit == 4  # noqa: PLR2004
+        assert (
+            "Concurrency 3 -> 4: total throughput rose, 4.00 MB/s total"
+            in capsys.readouterr().out
+        )
+
+    @staticmethod
+    def test_does_not_exceed_maximum(mocker: MockerFixture) -> None:
+        """Never increases beyond the maximum."""
+        controller, clock = TestAIMDController.make_controller(mocker, maximum=2)
+
+        for byte_count in (1, 2, 3, 4):
+            clock[0] += 1
+            controller.record_bytes(byte_count)
+
+        assert controller.limit == 2  # noqa: PLR2004
+
+    @staticmethod
+    def test_halves_on_errors(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Halves the limit when downloads failed during the window."""
+        controller, clock = TestAIMDController.make_controller(mocker)
+        controller.limit = 6
+
+        controller.record_error()
+        clock[0] += 1
+        controller.record_bytes(0)
+
+        assert controller.limit == 3  # noqa: PLR2004
+        assert "Concurrency 6 -> 3: 1 failed downloads" in capsys.readouterr().out
+
+    @staticmethod
+    def test_halves_when_per_download_throughput_falls(mocker: MockerFixture) -> None:
+        """Halves the limit when the throughput of each download falls."""
+        controller, clock = TestAIMDController.make_controller(mocker)
+        controller.limit = 4
+        controller.active = 1
+
+        clock[0] += 1
+        controller.record_bytes(10)
+        controller.active = 4
+        clock[0] += 1
+        controller.record_bytes(10)
+
+        assert controller.limit == 2  # noqa: PLR2004
+
+    @staticmethod
+    def test_holds_when_steady(mocker: MockerFixture) -> None:
+        """Keeps the limit while the throughput is steady."""
+        controller, clock = TestAIMDController.make_controller(mocker)
+
+        clock[0] += 1
+        controller.record_bytes(10)
+        limit = controller.limit
+        clock[0] += 1
+        controller.record_bytes(10)
+
+        assert controller.limit == limit
+
+    @staticmethod
+    def test_waits_within_window(mocker: MockerFixture) -> None:
+        """Doesn't adjust before the window has ended."""
+        controller, _ = TestAIMDController.make_controller(mocker)
+
+        controller.record_bytes(10)
+
+        assert controller.limit == 1
+
+    @staticmethod
+    def test_acquire_blocks_at_limit(mocker: MockerFixture) -> None:
+        """Blocks acquiring until a download is released."""
+        controller, _ = TestAIMDController.make_controller(mocker)
+        controller.acquire()
+        acquired = threading.Event()
+
+        def acquire() -> None:
+            controller.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        assert not acquired.wait(0.05)
+
+        controller.release()
+        thread.join()
+
+        assert acquired.is_set()
+        assert controller.active == 1
+
+
+def test_run_concurrently_runs_each_item(mocker: MockerFixture) -> None:
+    """run_concurrently() runs the worker once for each item & index."""
+    worker = mocker.Mock()
+
+    run_concurrently(["a", "b", "c"], worker, AIMDController(2, adaptive=False))
+
+    assert sorted(call.args for call in worker.mock_calls) == [
+        (0, "a"),
+        (1, "b"),
+        (2, "c"),
+    ]
+
+
+def test_run_concurrently_respects_limit() -> None:
+    """run_concurrently() never runs more workers than the limit at once."""
+    controller = AIMDController(3, adaptive=False)
+    running: list[int] = []
+    peak: list[int] = []
+    lock = threading.Lock()
+
+    def worker(i: int, _: None) -> None:
+        with lock:
+            running.append(i)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(i)
+
+    run_concurrently([None] * 9, worker, controller)
+
+    assert max(peak) <= 3  # noqa: PLR2004
+    assert controller.active == 0
+
+
+def test_run_concurrently_takes_items_once_allowed() -> None:
+    """run_concurrently() only takes the next item once another worker is allowed to start."""
+    finished: list[int] = []
+    finished_when_taken: list[int] = []
+
+    def items() -> Iterator[None]:
+        for _ in range(3):
+            finished_when_taken.append(len(finished))
+            yield None
+
+    def worker(i: int, _: None) -> None:
+        time.sleep(0.01)
+        finished.append(i)
+
+    run_concurrently(items(), worker, AIMDController(1, adaptive=False))
+
+    assert finished_when_taken == [0, 1, 2]
+
+
+def test_run_concurrently_raises_worker_errors() -> None:
+    """run_concurrently() re-raises errors from workers, releasing their slot."""
+    controller = AIMDController(2, adaptive=False)
+
+    def worker(_: int, __: None) -> None:
+        raise ValueError
+
+    with pytest.raises(ValueError):  # noqa: PT011
+        run_concurrently([None], worker, controller)
+
+    assert controller.active == 0
@@ -1,28 +1,19 @@
 """Tests for the config module."""
-from typing import Generator
+from datetime import time
+from ipaddress import IPv4Network
+from pathlib import Path
 
 import pytest
 from pytest_mock import MockerFixture
 
-from questdrive_syncer.config import CONFIG, Config, init_config, parse_args
+from questdrive_syncer.bandwidth import RateWindow
+from questdrive_syncer.config import init_config, parse_args
+from questdrive_syncer.structures import FleetDevice
 
 
-@pytest.fixture()
-def _reset_config() -> Generator[None, None, None]:
-    """Reset the global configuration."""
-    old_config = Config(**CONFIG.__dict__)
-    yield
-    CONFIG.__dict__.update(old_config.__dict__)
-
-
-@pytest.mark.usefixtures("_reset_config")
-def test_init_config_updates_global_config() -> None:
-    """init_config() updates the global configuration."""
-    assert CONFIG.questdrive_url == "https://example.com/"
-
-    init_config("--questdrive-url=url")
-
-    assert CONFIG.questdrive_url == "url/"
+def test_init_config_returns_config() -> None:
+    """init_config() returns the configuration of the arguments."""
+    assert init_config("--questdrive-url=url").questdrive_url == "url/"
 
 
 class TestParseArgs:
@@ -42,6 +33,16 @@ class TestParseArgs:
         assert "1.0.0" in capsys.readouterr().out
         mock_version.assert_called_once_with("questdrive-syncer")
 
+    @staticmethod
+    def test_generates_help_preview(tmp_path: Path) -> None:
+        """Renders the help to the path and exits."""
+        path = tmp_path / "help-preview.svg"
+        with pytest.raises(SystemExit) as exec_info:
+            parse_args(f"--generate-help-preview={path}")
+
+        assert exec_info.value.code == 0
+        assert "--questdrive-url" in path.read_text()
+
     @staticmethod
     def test_default_questdrive_url(
         capsys: pytest.CaptureFixture[str],
@@ -73,6 +74,107 @@ class TestParseArgs:
 
         assert config.output_path == "./wherever/"
 
+    @staticmethod
+    def test_default_output_roots() -> None:
+        """Returns no output_roots by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.output_roots == []
+
+    @staticmethod
+    def test_custom_output_roots() -> None:
+        """Returns every provided output root."""
+        config = parse_args(
+            "--questdrive-url=url",
+            "--output-root=/mnt/a",
+            "--output-root=/mnt/b/",
+        )
+
+        assert config.output_roots == ["/mnt/a/", "/mnt/b/"]
+
+    @staticmethod
+    def test_default_placement() -> None:
+        """Returns a placement of "headroom" by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.placement == "headroom"
+
+    @staticmethod
+    def test_custom_placement() -> None:
+        """Returns the provided placement."""
+        config = parse_args("--questdrive-url=url", "--placement=round-robin")
+
+        assert config.placement == "round-robin"
+
+    @staticmethod
+    def test_default_layout() -> None:
+        """Returns no layout by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.layout == ""
+
+    @staticmethod
+    def test_custom_layout() -> None:
+        """Returns the provided layout."""
+        config = parse_args(
+            "--questdrive-url=url",
+            "--layout={application_name}/{created_at:%Y}/{created_at:%m}",
+        )
+
+        assert config.layout == "{application_name}/{created_at:%Y}/{created_at:%m}"
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "layout",
+        ["{unknown}", "{filename.missing}", "{created_at!z}", "{", "{0}"],
+    )
+    def test_invalid_layout(layout: str) -> None:
+        """Exits if the layout uses anything but video fields."""
+        with pytest.raises(SystemExit):
+            parse_args("--questdrive-url=url", f"--layout={layout}")
+
+    @staticmethod
+    def test_default_mirror_paths() -> None:
+        """Returns no mirror_paths by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.mirror_paths == []
+
+    @staticmethod
+    def test_custom_mirror_paths() -> None:
+        """Returns every provided mirror."""
+        config = parse_args("--questdrive-url=url", "--mirror=/mnt/a", "--mirror=b/")
+
+        assert config.mirror_paths == ["/mnt/a/", "b/"]
+
+    @staticmethod
+    def test_default_staging_path() -> None:
+        """Returns no staging_path by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.staging_path is None
+
+    @staticmethod
+    def test_custom_staging_path() -> None:
+        """Returns the provided staging_path."""
+        config = parse_args("--questdrive-url=url", "--staging-path=./staging")
+
+        assert config.staging_path == "./staging/"
+
+    @staticmethod
+    def test_default_max_moves() -> None:
+        """Returns a max_moves of 2 by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.max_moves == 2  # noqa: PLR2004
+
+    @staticmethod
+    def test_custom_max_moves() -> None:
+        """Returns the provided max_moves."""
+        config = parse_args("--questdrive-url=url", "--max-moves=1")
+
+        assert config.max_moves == 1
+
     @staticmethod
     def test_default_wait_for_questdrive() -> None:
         """Returns False for wait_for_questdrive by default."""
@@ -335,3 +437,359 @@ class TestParseArgs:
             in mock_print.mock_calls[0].args[0]
         )
         mock_sleep.assert_called_once_with(15)
+
+    @staticmethod
+    def test_default_max_bandwidth() -> None:
+        """Returns an unlimited max_bandwidth_mb by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.max_bandwidth_mb == float("inf")
+
+    @staticmethod
+    def test_custom_max_bandwidth() -> None:
+        """Returns the provided max_bandwidth_mb."""
+        config = parse_args("--questdrive-url=url", "--max-bandwidth=2.5")
+
+        assert config.max_bandwidth_mb == 2.5  # noqa: PLR2004
+
+    @staticmethod
+    def test_max_bandwidth_must_be_greater_then_0(
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints an error message if --max-bandwidth is not greater than 0."""
+        with pytest.raises(SystemExit):
+            parse_args("--questdrive-url=url", "--max-bandwidth=0")
+
+        assert (
+            "argument --max-bandwidth: must be greater then 0"
+            in capsys.readouterr().err
+        )
+
+    @staticmethod
+    def test_default_bandwidth_schedule() -> None:
+        """Returns an empty bandwidth_schedule by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.bandwidth_schedule == []
+
+    @staticmethod
+    def test_custom_bandwidth_schedule() -> None:
+        """Returns every provided bandwidth_schedule window."""
+        config = parse_args(
+            "--questdrive-url=url",
+            "--bandwidth-schedule=08:00-18:00=1.5",
+            "--bandwidth-schedule=22:30-06:00=10",
+        )
+
+        assert config.bandwidth_schedule == [
+            RateWindow(time(8), time(18), 1.5),
+            RateWindow(time(22, 30), time(6), 10),
+        ]
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "window",
+        ["08:00-18:00", "8-18=1", "08:00=1"],
+    )
+    def test_bandwidth_schedule_must_be_valid(
+        window: str,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints an error message if --bandwidth-schedule is malformed."""
+        with pytest.raises(SystemExit):
+            parse_args("--questdrive-url=url", f"--bandwidth-schedule={window}")
+
+        assert (
+            'argument --bandwidth-schedule: must be in the format "HH:MM-HH:MM=MB"'
+            in capsys.readouterr().err
+        )
+
+    @staticmethod
+    def test_bandwidth_schedule_must_be_greater_then_0(
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints an error message if a --bandwidth-schedule limit is not greater than 0."""
+        with pytest.raises(SystemExit):
+            parse_args("--questdrive-url=url", "--bandwidth-schedule=08:00-18:00=0")
+
+        assert (
+            "argument --bandwidth-schedule: must be greater then 0"
+            in capsys.readouterr().err
+        )
+
+    @staticmethod
+    def test_default_max_concurrency() -> None:
+        """Returns a max_concurrency of 1 by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.max_concurrency == 1
+
+    @staticmethod
+    def test_custom_max_concurrency() -> None:
+        """Returns the provided max_concurrency."""
+        config = parse_args("--questdrive-url=url", "--max-concurrency=4")
+
+        assert config.max_concurrency == 4  # noqa: PLR2004
+
+    @staticmethod
+    def test_max_concurrency_must_be_at_least_1(
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints an error message if --max-concurrency is less than 1."""
+        with pytest.raises(SystemExit):
+            parse_args("--questdrive-url=url", "--max-concurrency=0")
+
+        assert (
+            "argument --max-concurrency: can't be less then 1"
+            in capsys.readouterr().err
+        )
+
+    @staticmethod
+    def test_default_adaptive_concurrency() -> None:
+        """Returns False for adaptive_concurrency by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.adaptive_concurrency is False
+
+    @staticmethod
+    def test_provided_adaptive_concurrency() -> None:
+        """Returns True if --adaptive-concurrency is provided."""
+        config = parse_args("--questdrive-url=url", "--adaptive-concurrency")
+
+        assert config.adaptive_concurrency is True
+
+    @staticmethod
+    def test_default_probe_timeout() -> None:
+        """Returns 0.8 for probe_timeout by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.probe_timeout == 0.8  # noqa: PLR2004
+
+    @staticmethod
+    def test_custom_probe_timeout() -> None:
+        """Returns the provided probe_timeout."""
+        config = parse_args("--questdrive-url=url", "--probe-timeout=0.25")
+
+        assert config.probe_timeout == 0.25  # noqa: PLR2004
+
+    @staticmethod
+    def test_default_stall_timeout() -> None:
+        """Returns 5 for stall_timeout by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.stall_timeout == 5  # noqa: PLR2004
+
+    @staticmethod
+    def test_custom_stall_timeout() -> None:
+        """Returns the provided stall_timeout."""
+        config = parse_args("--questdrive-url=url", "--stall-timeout=1.5")
+
+        assert config.stall_timeout == 1.5  # noqa: PLR2004
+
+    @staticmethod
+    def test_default_discover() -> None:
+        """Returns None for discover_network by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.discover_network is None
+
+    @staticmethod
+    def test_custom_discover() -> None:
+        """Returns the network of the provided CIDR range."""
+        config = parse_args("--questdrive-url=url", "--discover=192.168.0.7/24")
+
+        assert config.discover_network == IPv4Network("192.168.0.0/24")
+
+    @staticmethod
+    def test_invalid_discover(capsys: pytest.CaptureFixture[str]) -> None:
+        """Prints an error message if --discover isn't a CIDR range."""
+        with pytest.raises(SystemExit):
+            parse_args("--questdrive-url=url", "--discover=192.168.0")
+
+        assert (
+            "argument --discover: must be a CIDR range, such as 192.168.0.0/24"
+            in capsys.readouterr().err
+        )
+
+    @staticmethod
+    def test_discover_requires_questdrive_url(
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints an error message if --discover is provided without --questdrive-url."""
+        with pytest.raises(SystemExit):
+            parse_args("--fleet-device=http://url", "--discover=192.168.0.0/24")
+
+        assert "--discover requires --questdrive-url" in capsys.readouterr().err
+
+    @staticmethod
+    def test_default_force() -> None:
+        """Returns False for force by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.force is False
+
+    @staticmethod
+    def test_provided_force() -> None:
+        """Returns True if --force is provided."""
+        config = parse_args("--questdrive-url=url", "--force")
+
+        assert config.force is True
+
+    @staticmethod
+    def test_default_recording_window() -> None:
+        """Returns 1 for recording_window by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.recording_window == 1
+
+    @staticmethod
+    def test_custom_recording_window() -> None:
+        """Returns the provided recording_window."""
+        config = parse_args("--questdrive-url=url", "--recording-window=5.5")
+
+        assert config.recording_window == 5.5  # noqa: PLR2004
+
+    @staticmethod
+    def test_default_event_log() -> None:
+        """Returns None for event_log by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.event_log is None
+
+    @staticmethod
+    def test_custom_event_log() -> None:
+        """Returns the provided event_log."""
+        config = parse_args("--questdrive-url=url", "--event-log=events.jsonl")
+
+        assert config.event_log == "events.jsonl"
+
+    @staticmethod
+    def test_default_metrics_textfile() -> None:
+        """Returns None for metrics_textfile by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.metrics_textfile is None
+
+    @staticmethod
+    def test_custom_metrics_textfile() -> None:
+        """Returns the provided metrics_textfile."""
+        config = parse_args("--questdrive-url=url", "--metrics-textfile=sync.prom")
+
+        assert config.metrics_textfile == "sync.prom"
+
+    @staticmethod
+    def test_default_trace() -> None:
+        """Returns None for trace by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.trace is None
+
+    @staticmethod
+    def test_custom_trace() -> None:
+        """Returns the provided trace."""
+        config = parse_args("--questdrive-url=url", "--trace=trace.json")
+
+        assert config.trace == "trace.json"
+
+    @staticmethod
+    def test_default_record() -> None:
+        """Returns None for record by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.record is None
+
+    @staticmethod
+    def test_custom_record() -> None:
+        """Returns the provided record."""
+        config = parse_args("--questdrive-url=url", "--record=cassette.json")
+
+        assert config.record == "cassette.json"
+
+    @staticmethod
+    def test_default_profile() -> None:
+        """Doesn't profile by default, deterministically & without memory if asked to."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.profile is None
+        assert config.profile_mode == "deterministic"
+        assert config.profile_memory is False
+
+    @staticmethod
+    def test_custom_profile() -> None:
+        """Returns the provided profile options."""
+        config = parse_args(
+            "--questdrive-url=url",
+            "--profile=profile.folded",
+            "--profile-mode=sampling",
+            "--profile-memory",
+        )
+
+        assert config.profile == "profile.folded"
+        assert config.profile_mode == "sampling"
+        assert config.profile_memory is True
+
+    @staticmethod
+    def test_default_daemon() -> None:
+        """Returns False for daemon by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.daemon is False
+
+    @staticmethod
+    def test_provided_daemon() -> None:
+        """Returns True if --daemon is provided."""
+        config = parse_args("--questdrive-url=url", "--daemon")
+
+        assert config.daemon is True
+
+    @staticmethod
+    def test_default_fleet() -> None:
+        """Returns an empty fleet by default."""
+        config = parse_args("--questdrive-url=url")
+
+        assert config.fleet == []
+
+    @staticmethod
+    def test_custom_fleet() -> None:
+        """Returns every provided fleet device, defaulting the subdirectory to the host."""
+        config = parse_args(
+            "--fleet-device=http://192.168.1.2:8080=left",
+            "--fleet-device=http://192.168.1.3:8080",
+        )
+
+        assert config.questdrive_url == ""
+        assert config.fleet == [
+            FleetDevice("http://192.168.1.2:8080/", "left"),
+            FleetDevice("http://192.168.1.3:8080/", "192.168.1.3_8080"),
+        ]
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "fleet_device",
+        ["192.168.1.2:8080", "192.168.1.2=left", "questdrive:8080", "http://"],
+    )
+    def test_fleet_device_requires_scheme_and_host(
+        capsys: pytest.CaptureFixture[str],
+        fleet_device: str,
+    ) -> None:
+        """Prints an error message if a --fleet-device URL has no scheme or host."""
+        with pytest.raises(SystemExit):
+            parse_args(f"--fleet-device={fleet_device}")
+
+        assert (
+            "argument --fleet-device: must be a URL with a scheme & host, such as http://192.168.0.2:7123/"
+            in capsys.readouterr().err
+        )
+
+    @staticmethod
+    def test_fleet_cant_be_used_with_questdrive_url(
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints an error message if both --questdrive-url and --fleet-device are provided."""
+        with pytest.raises(SystemExit):
+            parse_args("--questdrive-url=url", "--fleet-device=http://url")
+
+        assert (
+            "--questdrive-url can't be used with --fleet-device"
+            in capsys.readouterr().err
+        )
@@ -0,0 +1,237 @@
+"""Tests for the daemon module."""
+from __future__ import annotations
+
+import errno
+import sys
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any
+
+import httpx
+import pytest
+
+from questdrive_syncer.config import Config
+from questdrive_syncer.constants import FAILURE_EXIT_CODE
+from questdrive_syncer.daemon import (
+    run_daemon,
+    sync_once,
+    wait_to_probe,
+)
+from questdrive_syncer.session import SyncSession
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_mock import MockerFixture
+
+
+class TestWaitToProbe:
+    """Tests for the wait_to_probe() function."""
+
+    @staticmethod
+    def test_without_watcher(mocker: MockerFixture) -> None:
+        """Waits the whole delay without a watcher."""
+        stop = mocker.Mock(wait=mocker.Mock(return_value=False))
+
+        assert wait_to_probe(stop, 30, None) is False
+        stop.wait.assert_called_once_with(30)
+
+    @staticmethod
+    def test_until_joined(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Stops waiting as soon as the watcher sees QuestDrive join."""
+        stop = mocker.Mock(wait=mocker.Mock(return_value=False))
+        watcher = mocker.Mock(
+            ip_address="192.168.0.2",
+            interval=1,
+            joined=mocker.Mock(side_effect=[False, True]),
+        )
+
+        assert wait_to_probe(stop, 30, watcher) is False
+        assert stop.wait.call_count == 2  # noqa: PLR2004
+        assert "192.168.0.2 joined the network" in capsys.readouterr().out
+
+    @staticmethod
+    def test_until_delay(mocker: MockerFixture) -> None:
+        """Waits no longer than the delay."""
+        clock = [0.0]
+        mocker.patch("time.monotonic", side_effect=lambda: clock[0])
+
+        def wait(seconds: float) -> bool:
+            clock[0] += seconds
+            return False
+
+        stop = mocker.Mock(wait=mocker.Mock(side_effect=wait))
+        watcher = mocker.Mock(interval=1, joined=mocker.Mock(return_value=False))
+
+        assert wait_to_probe(stop, 2.5, watcher) is False
+        assert [call.args[0] for call in stop.wait.mock_calls] == [1, 1, 0.5]
+
+    @staticmethod
+    def test_stopped(mocker: MockerFixture) -> None:
+        """Returns True once stopped."""
+        stop = mocker.Mock(wait=mocker.Mock(return_value=True))
+
+        assert wait_to_probe(stop, 30, mocker.Mock(interval=1)) is True
+
+
+class TestSyncOnce:
+    """Tests for the sync_once() function."""
+
+    @staticmethod
+    def test_resets_metrics(mocker: MockerFixture) -> None:
+        """Syncs with fresh metrics."""
+        session = SyncSession(Config(questdrive_url="url"))
+        session.metrics.add(requests=5)
+        sync = mocker.Mock()
+
+        sync_once(session, sync, None)
+
+        sync.assert_called_once_with(session, None)
+        assert session.metrics.requests == 0
+
+    @staticmethod
+    def test_reports_exit(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints the exit code instead of exiting."""
+        sync = mocker.Mock(side_effect=lambda *_: sys.exit(FAILURE_EXIT_CODE))
+
+        sync_once(SyncSession(Config(questdrive_url="url")), sync, None)
+
+        assert (
+            f'Sync of "url" stopped with exit code {FAILURE_EXIT_CODE}'
+            in capsys.readouterr().out
+        )
+
+    @staticmethod
+    def test_reports_http_error(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints HTTP errors instead of raising them."""
+        sync = mocker.Mock(side_effect=httpx.ConnectError("refused"))
+
+        sync_once(SyncSession(Config(questdrive_url="url")), sync, None)
+
+        assert 'Failed to sync "url": refused' in capsys.readouterr().out
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "error",
+        [OSError(errno.ENOSPC, "No space left"), ValueError("unparsable listing")],
+    )
+    def test_reports_unexpected_errors(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+        error: Exception,
+    ) -> None:
+        """Prints unexpected errors with their traceback instead of raising them."""
+        sync = mocker.Mock(side_effect=error)
+
+        sync_once(SyncSession(Config(questdrive_url="url")), sync, None)
+
+        captured = capsys.readouterr()
+        assert 'Failed to sync "url":' in captured.out
+        assert "Traceback" in captured.err
+        assert str(error) in captured.err
+
+
+class TestRunDaemon:
+    """Tests for the run_daemon() function."""
+
+    @staticmethod
+    def make_daemon_mocks(
+        mocker: MockerFixture,
+        *desired: str,
+        is_reachable: list[bool],
+    ) -> Any:  # noqa: ANN401
+        """Run the daemon until every probe result has been used, returning the mocks."""
+        mocker.patch("builtins.print")
+        mocker.patch("random.uniform", return_value=1)
+        mock_is_reachable = mocker.patch(
+            "questdrive_syncer.daemon.is_reachable",
+            side_effect=is_reachable,
+        )
+        mock_sync_once = mocker.patch("questdrive_syncer.daemon.sync_once")
+        mock_stop = mocker.Mock(
+            wait=mocker.Mock(side_effect=[False] * (len(is_reachable) - 1) + [True]),
+        )
+        session = SyncSession(Config(questdrive_url="url"))
+        sync = mocker.Mock()
+
+        run_daemon(
+            session,
+            sync=sync,
+            stop=mock_stop,
+            min_probe_seconds=1,
+            max_probe_seconds=10,
+        )
+
+        return itemgetter(*desired)(
+            {
+                "mock_is_reachable": mock_is_reachable,
+                "mock_sync_once": mock_sync_once,
+                "mock_stop": mock_stop,
+                "session": session,
+                "sync": sync,
+            },
+        )
+
+    @staticmethod
+    def test_backs_off_while_offline(mocker: MockerFixture) -> None:
+        """Probes with increasing delays while offline, without syncing."""
+        mock_sync_once, mock_stop = TestRunDaemon.make_daemon_mocks(
+            mocker,
+            "mock_sync_once",
+            "mock_stop",
+            is_reachable=[False] * 6,
+        )
+
+        mock_sync_once.assert_not_called()
+        assert [call.args[0] for call in mock_stop.wait.mock_calls] == [
+            1,
+            2,
+            4,
+            8,
+            10,
+            10,
+        ]
+
+    @staticmethod
+    def test_syncs_once_online(mocker: MockerFixture) -> None:
+        """Syncs as soon as it's online, then waits the maximum before syncing again."""
+        mock_sync_once, mock_stop, session, sync = TestRunDaemon.make_daemon_mocks(
+            mocker,
+            "mock_sync_once",
+            "mock_stop",
+            "session",
+            "sync",
+            is_reachable=[False, False, True, True],
+        )
+
+        assert mock_sync_once.call_count == 2  # noqa: PLR2004
+        mock_sync_once.assert_called_with(session, sync, None)
+        assert [call.args[0] for call in mock_stop.wait.mock_calls] == [1, 2, 10, 10]
+
+    @staticmethod
+    def test_resets_backoff_after_sync(mocker: MockerFixture) -> None:
+        """Probes quickly again once it goes offline after a sync."""
+        mock_stop = TestRunDaemon.make_daemon_mocks(
+            mocker,
+            "mock_stop",
+            is_reachable=[False, False, True, False, False],
+        )
+
+        assert [call.args[0] for call in mock_stop.wait.mock_calls] == [1, 2, 10, 1, 2]
+
+    @staticmethod
+    def test_creates_stop_event(mocker: MockerFixture) -> None:
+        """Waits on its own stop event if none is provided."""
+        mocker.patch("questdrive_syncer.daemon.is_reachable", return_value=False)
+        mocker.patch("builtins.print")
+        mock_wait = mocker.patch("threading.Event.wait", side_effect=[False, True])
+
+        run_daemon(SyncSession(Config(questdrive_url="url")), sync=mocker.Mock())
+
+        assert mock_wait.call_count == 2  # noqa: PLR2004
@@ -0,0 +1,171 @@
+"""Tests for the discovery module."""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ipaddress import IPv4Network
+from typing import TYPE_CHECKING, Iterator
+
+import httpx
+import pytest
+
+from questdrive_syncer.config import Config
+from questdrive_syncer.constants import DISCOVERY_CACHE_FILENAME
+from questdrive_syncer.discovery import discover, host_urls, is_questdrive, scan
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+HOMEPAGE_HTML = "Battery: <b>50%</b> Free Space: <b>2.345 GB</b>"
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    """Responds to every GET request with the body."""
+
+    body = ""
+
+    def do_GET(self: StaticHandler) -> None:  # noqa: N802
+        """Respond with the body."""
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(self.body.encode())
+
+    def log_message(self: StaticHandler, *_: object) -> None:
+        """Don't log requests."""
+
+
+@contextmanager
+def serve(host: str, body: str, port: int = 0) -> Iterator[int]:
+    """Serve the body from the host, yielding the port."""
+    handler = type("Handler", (StaticHandler,), {"body": body})
+    with ThreadingHTTPServer((host, port), handler) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            yield server.server_address[1]
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+def test_host_urls() -> None:
+    """host_urls() returns each host with the scheme, port & path of the URL."""
+    assert host_urls("http://192.168.0.9:7123/", IPv4Network("192.168.0.0/30")) == [
+        "http://192.168.0.1:7123/",
+        "http://192.168.0.2:7123/",
+    ]
+
+
+@pytest.mark.usefixtures("enable_network")
+class TestIsQuestdrive:
+    """Tests for the is_questdrive() function."""
+
+    @staticmethod
+    def test_homepage() -> None:
+        """Returns True for the QuestDrive homepage."""
+        with serve("127.0.0.1", HOMEPAGE_HTML) as port, httpx.Client() as client:
+            assert is_questdrive(client, f"http://127.0.0.1:{port}/", 1) is True
+
+    @staticmethod
+    def test_other_server() -> None:
+        """Returns False for other servers."""
+        with serve("127.0.0.1", "<html></html>") as port, httpx.Client() as client:
+            assert is_questdrive(client, f"http://127.0.0.1:{port}/", 1) is False
+
+    @staticmethod
+    def test_nothing_listening() -> None:
+        """Returns False when nothing is listening."""
+        with serve("127.0.0.1", "") as port:
+            pass
+
+        with httpx.Client() as client:
+            assert is_questdrive(client, f"http://127.0.0.1:{port}/", 1) is False
+
+
+@pytest.mark.usefixtures("enable_network")
+class TestScan:
+    """Tests for the scan() function."""
+
+    @staticmethod
+    def test_finds_questdrive_among_other_servers() -> None:
+        """Returns the URL serving QuestDrive, ignoring other servers."""
+        with serve("127.0.0.3", HOMEPAGE_HTML) as port, serve(
+            "127.0.0.1",
+            "<html></html>",
+            port,
+        ), httpx.Client() as client:
+            urls = host_urls(f"http://127.0.0.1:{port}/", IPv4Network("127.0.0.0/29"))
+
+            assert scan(client, urls, 1, max_workers=4) == f"http://127.0.0.3:{port}/"
+
+    @staticmethod
+    def test_not_found() -> None:
+        """Returns None when no URL serves QuestDrive."""
+        with serve("127.0.0.1", "") as port:
+            pass
+
+        with httpx.Client() as client:
+            urls = host_urls(f"http://127.0.0.1:{port}/", IPv4Network("127.0.0.0/30"))
+
+            assert scan(client, urls, 1) is None
+
+
+@pytest.mark.usefixtures("enable_network")
+class TestDiscover:
+    """Tests for the discover() function."""
+
+    @staticmethod
+    def test_scans_and_caches(tmp_path: Path) -> None:
+        """Scans the network when the configured URL is stale, caching the found URL."""
+        with serve("127.0.0.2", HOMEPAGE_HTML) as port:
+            config = Config(
+                questdrive_url=f"http://127.0.0.1:{port}/",
+                output_path=f"{tmp_path}/output/",
+            )
+
+            assert (
+                discover(config, IPv4Network("127.0.0.0/29"))
+                == f"http://127.0.0.2:{port}/"
+            )
+
+        assert (
+            tmp_path / "output" / DISCOVERY_CACHE_FILENAME
+        ).read_text() == f"http://127.0.0.2:{port}/"
+
+    @staticmethod
+    def test_tries_cached_url_first(
+        tmp_path: Path,
+        mocker: MockerFixture,
+    ) -> None:
+        """Returns the cached URL without scanning when it's still QuestDrive."""
+        with serve("127.0.0.4", HOMEPAGE_HTML) as port:
+            (tmp_path / DISCOVERY_CACHE_FILENAME).write_text(
+                f"http://127.0.0.4:{port}/\n",
+            )
+            config = Config(
+                questdrive_url=f"http://127.0.0.1:{port}/",
+                output_path=f"{tmp_path}/",
+            )
+            mock_scan = mocker.patch("questdrive_syncer.discovery.scan")
+
+            assert (
+                discover(config, IPv4Network("127.0.0.0/29"))
+                == f"http://127.0.0.4:{port}/"
+            )
+            mock_scan.assert_not_called()
+
+    @staticmethod
+    def test_not_found(tmp_path: Path) -> None:
+        """Returns None without caching when QuestDrive isn't found."""
+        with serve("127.0.0.1", "") as port:
+            pass
+        config = Config(
+            questdrive_url=f"http://127.0.0.1:{port}/",
+            output_path=f"{tmp_path}/",
+        )
+
+        assert discover(config, IPv4Network("127.0.0.0/30")) is None
+        assert not (tmp_path / DISCOVERY_CACHE_FILENAME).exists()
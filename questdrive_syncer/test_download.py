@@ -1,25 +1,42 @@
 """Tests for the download module."""
 from __future__ import annotations
 
+from contextlib import ExitStack, nullcontext
 from datetime import datetime
 from operator import itemgetter
 from pathlib import Path
 from types import SimpleNamespace
-from typing import TYPE_CHECKING, Any, ClassVar
+from typing import TYPE_CHECKING, Any, ClassVar, Iterable, Iterator
 from unittest.mock import mock_open
 
+import httpx
 import pytest
+from pytest_httpx import IteratorStream
 
+from questdrive_syncer.concurrency import AIMDController
+from questdrive_syncer.config import Config
 from questdrive_syncer.download import (
     download_and_delete_video,
     download_and_delete_videos,
+    make_progress,
+    reserve_space,
+    verify_mirrors,
 )
+from questdrive_syncer.events import Event, Kind, Phase
+from questdrive_syncer.helpers import lock_key
+from questdrive_syncer.mirror import MirrorWriter
+from questdrive_syncer.placement import IndexEntry, read_index
+from questdrive_syncer.session import SyncSession
+from questdrive_syncer.staging import Mover
 from questdrive_syncer.structures import Video
+from questdrive_syncer.tracing import TraceLog
 
 if TYPE_CHECKING:  # pragma: no cover
     from pytest_httpx import HTTPXMock
     from pytest_mock import MockerFixture
 
+    from questdrive_syncer.bandwidth import TokenBucket
+
 
 @pytest.fixture()
 def assert_all_responses_were_requested() -> bool:
@@ -27,6 +44,117 @@ def assert_all_responses_were_requested() -> bool:
     return True
 
 
+def make_session(
+    *,
+    limiter: TokenBucket | None = None,
+    **config: Any,  # noqa: ANN401
+) -> SyncSession:
+    """Create a session for the example QuestDrive instance."""
+    return SyncSession(
+        Config(questdrive_url="https://example.com/", **config),
+        limiter=limiter,
+    )
+
+
+def summarize(
+    events: Iterable[Event],
+) -> list[tuple[Kind, Phase | None, float | str]]:
+    """Summarize the events, without their video or timing."""
+    return [(event.kind, event.phase, event.value) for event in events]
+
+
+class TestReserveSpace:
+    """Tests for the reserve_space() function."""
+
+    video = Video(
+        "full%2Fpathtofile.mp4",
+        "filename-20240101-111213.mp4",
+        datetime(2024, 1, 1, 11, 12, 13),
+        datetime(2024, 1, 1, 12, 13, 14),
+        100,
+    )
+
+    @staticmethod
+    def reserve(mocker: MockerFixture, *reserved: bool) -> Any:  # noqa: ANN401
+        """Mock reserving space, with the result of each reservation."""
+        return mocker.patch(
+            "questdrive_syncer.download.SPACE_RESERVATIONS.reserve",
+            side_effect=[nullcontext(result) for result in reserved],
+        )
+
+    @staticmethod
+    def test_chooses_first_root_with_space(mocker: MockerFixture) -> None:
+        """Chooses the first output root with enough space for the video."""
+        session = make_session(output_roots=["/mnt/b/"])
+        mocker.patch.object(
+            session.placement,
+            "candidates",
+            return_value=["output/", "/mnt/b/"],
+        )
+        mock_choose = mocker.patch.object(session.placement, "choose")
+        mock_reserve = TestReserveSpace.reserve(mocker, False, True)  # noqa: FBT003
+
+        with ExitStack() as reservations:
+            assert reserve_space(TestReserveSpace.video, session, reservations)
+
+        assert [call.args[2] for call in mock_reserve.call_args_list] == [
+            "output/",
+            "/mnt/b/",
+        ]
+        mock_choose.assert_called_once_with(TestReserveSpace.video, "/mnt/b/")
+
+    @staticmethod
+    def test_no_root_with_space(mocker: MockerFixture) -> None:
+        """Doesn't choose a root for the video if no output root has enough space."""
+        session = make_session()
+        mock_choose = mocker.patch.object(session.placement, "choose")
+        TestReserveSpace.reserve(mocker, False)  # noqa: FBT003
+
+        with ExitStack() as reservations:
+            assert not reserve_space(TestReserveSpace.video, session, reservations)
+
+        mock_choose.assert_not_called()
+
+    @staticmethod
+    def test_no_mirror_space(mocker: MockerFixture) -> None:
+        """Doesn't reserve output space if there isn't enough space to mirror the video."""
+        session = make_session(mirror_paths=["mirror/"])
+        mock_reserve = TestReserveSpace.reserve(mocker, False)  # noqa: FBT003
+
+        with ExitStack() as reservations:
+            assert not reserve_space(TestReserveSpace.video, session, reservations)
+
+        mock_reserve.assert_called_once_with(100, session.config, "mirror/")
+
+    @staticmethod
+    def test_no_staging_space(mocker: MockerFixture) -> None:
+        """Doesn't reserve output space if there isn't enough space to stage the video."""
+        session = make_session(staging_path="staging/")
+        mock_reserve = TestReserveSpace.reserve(mocker, False)  # noqa: FBT003
+
+        with ExitStack() as reservations:
+            assert not reserve_space(TestReserveSpace.video, session, reservations)
+
+        mock_reserve.assert_called_once_with(100, session.config, "staging/")
+
+    @staticmethod
+    def test_not_downloading(mocker: MockerFixture) -> None:
+        """Neither reserves space nor chooses a root for a video that isn't downloaded."""
+        session = make_session(
+            staging_path="staging/",
+            mirror_paths=["mirror/"],
+            download_videos=False,
+        )
+        mock_choose = mocker.patch.object(session.placement, "choose")
+        mock_reserve = TestReserveSpace.reserve(mocker)
+
+        with ExitStack() as reservations:
+            assert reserve_space(TestReserveSpace.video, session, reservations)
+
+        mock_reserve.assert_not_called()
+        mock_choose.assert_not_called()
+
+
 class TestDownloadAndDeleteVideo:
     """Tests for the download_and_delete_video() function."""
 
@@ -43,6 +171,7 @@ class TestDownloadAndDeleteVideo:
             return_value=SimpleNamespace(st_mode=33204, st_size=st_size),
         )
         mock_utime = mocker.patch("os.utime")
+        mocker.patch("pathlib.Path.mkdir")
         if not desired:
             return None
 
@@ -73,6 +202,7 @@ class TestDownloadAndDeleteVideo:
                     datetime(2024, 1, 1, 12, 13, 14),
                     2345,
                 ),
+                make_session(),
             ),
         )
 
@@ -107,6 +237,7 @@ class TestDownloadAndDeleteVideo:
                     datetime(2024, 1, 1, 12, 13, 14),
                     2345,
                 ),
+                make_session(),
             ),
         )
 
@@ -127,6 +258,7 @@ class TestDownloadAndDeleteVideo:
         mocker: MockerFixture,
     ) -> None:
         """Calls stat() on the written file."""
+        session = make_session()
         mock_stat = TestDownloadAndDeleteVideo.make_download_and_delete_video_mocks(
             mocker,
             "mock_stat",
@@ -143,11 +275,102 @@ class TestDownloadAndDeleteVideo:
                     datetime(2024, 1, 1, 12, 13, 14),
                     2345,
                 ),
+                session,
             ),
         )
 
-        # each httpx call additionally calls stat(), so 3 httpx calls + 1 my call
-        assert mock_stat.call_count == 4  # noqa: PLR2004
+        # the session's client was created beforehand, so only my call remains
+        mock_stat.assert_called_once_with()
+
+    @staticmethod
+    def test_consumes_limiter_per_chunk(
+        httpx_mock: HTTPXMock,
+        mocker: MockerFixture,
+    ) -> None:
+        """Consumes every received chunk from the limiter."""
+        TestDownloadAndDeleteVideo.make_download_and_delete_video_mocks(mocker)
+        limiter = mocker.Mock()
+        httpx_mock.add_response()
+        httpx_mock.add_response(content=b"12345")
+
+        list(
+            download_and_delete_video(
+                Video(
+                    "full%2Fpathtofile.mp4",
+                    "filename-20240101-111213.mp4",
+                    datetime(2024, 1, 1, 11, 12, 13),
+                    datetime(2024, 1, 1, 12, 13, 14),
+                    2345,
+                ),
+                make_session(delete_videos=False, limiter=limiter),
+            ),
+        )
+
+        limiter.consume.assert_called_once_with(5)
+
+    @staticmethod
+    def test_batches_bytes_events(
+        httpx_mock: HTTPXMock,
+        mocker: MockerFixture,
+    ) -> None:
+        """Yields the transferred bytes once at least BYTES_EVENT_SIZE of them were received, and the rest at the end."""
+        TestDownloadAndDeleteVideo.make_download_and_delete_video_mocks(mocker)
+        mocker.patch("questdrive_syncer.download.BYTES_EVENT_SIZE", 4)
+        httpx_mock.add_response()
+        httpx_mock.add_response(stream=IteratorStream([b"12", b"34", b"5"]))
+
+        events = list(
+            download_and_delete_video(
+                Video(
+                    "full%2Fpathtofile.mp4",
+                    "filename-20240101-111213.mp4",
+                    datetime(2024, 1, 1, 11, 12, 13),
+                    datetime(2024, 1, 1, 12, 13, 14),
+                    2345,
+                ),
+                make_session(delete_videos=False),
+            ),
+        )
+
+        assert [event.value for event in events if event.kind is Kind.BYTES] == [4, 1]
+
+    @staticmethod
+    def test_yields_timed_events_of_each_phase(
+        httpx_mock: HTTPXMock,
+        mocker: MockerFixture,
+    ) -> None:
+        """Yields the start & finish of each phase, timed, when the video is synced."""
+        TestDownloadAndDeleteVideo.make_download_and_delete_video_mocks(mocker)
+        mocker.patch("time.monotonic", return_value=12.5)
+        httpx_mock.add_response()
+        httpx_mock.add_response()
+        httpx_mock.add_response()
+
+        events = list(
+            download_and_delete_video(
+                Video(
+                    "full%2Fpathtofile.mp4",
+                    "filename-20240101-111213.mp4",
+                    datetime(2024, 1, 1, 11, 12, 13),
+                    datetime(2024, 1, 1, 12, 13, 14),
+                    2345,
+                ),
+                make_session(),
+            ),
+        )
+
+        assert [
+            (event.kind, event.phase)
+            for event in events
+            if event.kind in (Kind.STARTED, Kind.FINISHED)
+        ] == [
+            (kind, phase) for phase in Phase for kind in (Kind.STARTED, Kind.FINISHED)
+        ]
+        assert all(
+            event.at == 12.5  # noqa: PLR2004
+            for event in events
+            if event.kind in (Kind.STARTED, Kind.FINISHED)
+        )
 
     @staticmethod
     def test_calls_delete_url(
@@ -169,6 +392,7 @@ class TestDownloadAndDeleteVideo:
                     datetime(2024, 1, 1, 12, 13, 14),
                     2345,
                 ),
+                make_session(),
             ),
         )
 
@@ -186,7 +410,7 @@ class TestDownloadAndDeleteVideo:
         httpx_mock.add_response()
         httpx_mock.add_response()
 
-        assert list(
+        assert summarize(
             download_and_delete_video(
                 Video(
                     "full%2Fpathtofile.mp4",
@@ -196,8 +420,20 @@ class TestDownloadAndDeleteVideo:
                     2345,
                     actively_recording=True,
                 ),
+                make_session(),
+            ),
+        ) == [
+            (Kind.STARTED, Phase.HEAD, 0),
+            (Kind.FINISHED, Phase.HEAD, 0),
+            (Kind.STARTED, Phase.TRANSFER, 0),
+            (Kind.TOTAL, Phase.TRANSFER, 0),
+            (Kind.FINISHED, Phase.TRANSFER, 0),
+            (
+                Kind.MESSAGE,
+                None,
+                '"filename-20240101-111213.mp4" is actively recording, not deleting',
             ),
-        ) == [0.0, '"filename-20240101-111213.mp4" is actively recording, not deleting']
+        ]
         assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
 
     @staticmethod
@@ -209,8 +445,9 @@ class TestDownloadAndDeleteVideo:
         TestDownloadAndDeleteVideo.make_download_and_delete_video_mocks(mocker)
         httpx_mock.add_response()
         httpx_mock.add_response(headers={"Content-Length": "5"}, content=b"123")
+        session = make_session()
 
-        assert list(
+        assert summarize(
             download_and_delete_video(
                 Video(
                     "full%2Fpathtofile.mp4",
@@ -219,11 +456,21 @@ class TestDownloadAndDeleteVideo:
                     datetime(2024, 1, 1, 12, 13, 14),
                     2345,
                 ),
+                session,
             ),
         ) == [
-            5.0,
-            3,
-            'Received 2 bytes less than expected during the download of "filename-20240101-111213.mp4"',
+            (Kind.STARTED, Phase.HEAD, 0),
+            (Kind.FINISHED, Phase.HEAD, 0),
+            (Kind.STARTED, Phase.TRANSFER, 0),
+            (Kind.TOTAL, Phase.TRANSFER, 5),
+            (Kind.BYTES, Phase.TRANSFER, 3),
+            (Kind.FINISHED, Phase.TRANSFER, 3),
+            (Kind.STARTED, Phase.VERIFY, 0),
+            (
+                Kind.FAILED,
+                Phase.VERIFY,
+                'Received 2 bytes less than expected during the download of "filename-20240101-111213.mp4"',
+            ),
         ]
         assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
 
@@ -237,7 +484,7 @@ class TestDownloadAndDeleteVideo:
         httpx_mock.add_response()
         httpx_mock.add_response(headers={"Content-Length": "3"}, content=b"12345")
 
-        assert list(
+        assert summarize(
             download_and_delete_video(
                 Video(
                     "full%2Fpathtofile.mp4",
@@ -246,11 +493,21 @@ class TestDownloadAndDeleteVideo:
                     datetime(2024, 1, 1, 12, 13, 14),
                     2345,
                 ),
+                make_session(),
             ),
         ) == [
-            3.0,
-            5,
-            'Received 2 bytes more than expected during the download of "filename-20240101-111213.mp4"',
+            (Kind.STARTED, Phase.HEAD, 0),
+            (Kind.FINISHED, Phase.HEAD, 0),
+            (Kind.STARTED, Phase.TRANSFER, 0),
+            (Kind.TOTAL, Phase.TRANSFER, 3),
+            (Kind.BYTES, Phase.TRANSFER, 5),
+            (Kind.FINISHED, Phase.TRANSFER, 5),
+            (Kind.STARTED, Phase.VERIFY, 0),
+            (
+                Kind.FAILED,
+                Phase.VERIFY,
+                'Received 2 bytes more than expected during the download of "filename-20240101-111213.mp4"',
+            ),
         ]
         assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
 
@@ -266,8 +523,9 @@ class TestDownloadAndDeleteVideo:
         )
         httpx_mock.add_response()
         httpx_mock.add_response(headers={"Content-Length": "5"}, content=b"12345")
+        session = make_session()
 
-        assert list(
+        assert summarize(
             download_and_delete_video(
                 Video(
                     "full%2Fpathtofile.mp4",
@@ -276,11 +534,21 @@ class TestDownloadAndDeleteVideo:
                     datetime(2024, 1, 1, 12, 13, 14),
                     2345,
                 ),
+                session,
             ),
         ) == [
-            5.0,
-            5,
-            'Wrote 2 bytes less than received during the download of "filename-20240101-111213.mp4"',
+            (Kind.STARTED, Phase.HEAD, 0),
+            (Kind.FINISHED, Phase.HEAD, 0),
+            (Kind.STARTED, Phase.TRANSFER, 0),
+            (Kind.TOTAL, Phase.TRANSFER, 5),
+            (Kind.BYTES, Phase.TRANSFER, 5),
+            (Kind.FINISHED, Phase.TRANSFER, 5),
+            (Kind.STARTED, Phase.VERIFY, 0),
+            (
+                Kind.FAILED,
+                Phase.VERIFY,
+                'Wrote 2 bytes less than received during the download of "filename-20240101-111213.mp4"',
+            ),
         ]
         assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
 
@@ -297,7 +565,7 @@ class TestDownloadAndDeleteVideo:
         httpx_mock.add_response()
         httpx_mock.add_response(headers={"Content-Length": "5"}, content=b"12345")
 
-        assert list(
+        assert summarize(
             download_and_delete_video(
                 Video(
                     "full%2Fpathtofile.mp4",
@@ -306,11 +574,21 @@ class TestDownloadAndDeleteVideo:
                     datetime(2024, 1, 1, 12, 13, 14),
                     2345,
                 ),
+                make_session(),
             ),
         ) == [
-            5.0,
-            5,
-            'Wrote 2 bytes more than received during the download of "filename-20240101-111213.mp4"',
+            (Kind.STARTED, Phase.HEAD, 0),
+            (Kind.FINISHED, Phase.HEAD, 0),
+            (Kind.STARTED, Phase.TRANSFER, 0),
+            (Kind.TOTAL, Phase.TRANSFER, 5),
+            (Kind.BYTES, Phase.TRANSFER, 5),
+            (Kind.FINISHED, Phase.TRANSFER, 5),
+            (Kind.STARTED, Phase.VERIFY, 0),
+            (
+                Kind.FAILED,
+                Phase.VERIFY,
+                'Wrote 2 bytes more than received during the download of "filename-20240101-111213.mp4"',
+            ),
         ]
         assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
 
@@ -333,7 +611,7 @@ class TestDownloadAndDeleteVideo:
                     datetime.now(),
                     2345,
                 ),
-                delete=False,
+                make_session(delete_videos=False),
             ),
         )
 
@@ -358,12 +636,290 @@ class TestDownloadAndDeleteVideo:
                     datetime.now(),
                     2345,
                 ),
-                download=False,
+                make_session(download_videos=False),
             ),
         )
 
         assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
 
+    @staticmethod
+    def test_stages_then_moves(httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """Downloads to the staging directory, staging the video once verified & deleting it while it's moved."""
+        session = make_session(
+            output_path=str(tmp_path / "output"),
+            minimum_free_space_mb=0,
+        )
+        httpx_mock.add_response(headers={"Content-Length": "5"})
+        httpx_mock.add_response(content=b"video")
+        httpx_mock.add_response()
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+        )
+
+        with Mover(session, tmp_path / "staging") as mover:
+            list(download_and_delete_video(video, session, mover))
+
+        assert (tmp_path / "output" / video.filename).read_bytes() == b"video"
+        assert list((tmp_path / "staging").iterdir()) == []
+        assert str(httpx_mock.get_requests()[2].url).startswith(
+            "https://example.com/delete/",
+        )
+
+    @staticmethod
+    def test_mirrors_then_deletes(httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """Writes the video to every mirror as it downloads, deleting it once they're complete."""
+        (tmp_path / "output").mkdir()
+        session = make_session(
+            output_path=str(tmp_path / "output"),
+            mirror_paths=[str(tmp_path / "left"), str(tmp_path / "right")],
+        )
+        httpx_mock.add_response(headers={"Content-Length": "5"})
+        httpx_mock.add_response(content=b"video")
+        httpx_mock.add_response()
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+        )
+
+        list(download_and_delete_video(video, session))
+
+        for directory in ("output", "left", "right"):
+            path = tmp_path / directory / video.filename
+            assert path.read_bytes() == b"video"
+            assert path.stat().st_mtime == video.modified_at.timestamp()
+        assert len(httpx_mock.get_requests()) == 3  # noqa: PLR2004
+
+    @staticmethod
+    def test_saves_to_layout(httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """Saves the video & its mirrors to the subdirectory of the layout, creating it."""
+        session = make_session(
+            output_path=f"{tmp_path}/output/",
+            layout="{application_name}/{created_at:%Y}",
+            mirror_paths=[str(tmp_path / "mirror")],
+        )
+        httpx_mock.add_response(headers={"Content-Length": "5"})
+        httpx_mock.add_response(content=b"video")
+        httpx_mock.add_response()
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+        )
+
+        list(download_and_delete_video(video, session))
+
+        for directory in ("output", "mirror"):
+            path = tmp_path / directory / "filename" / "2024" / video.filename
+            assert path.read_bytes() == b"video"
+        assert read_index(f"{tmp_path}/output/") == {
+            video.filename: IndexEntry(f"{tmp_path}/output/", "filename/2024"),
+        }
+
+    @staticmethod
+    def test_indexes_only_verified(httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """Only adds the video to the index of the output roots once it's verified."""
+        (tmp_path / "mirror" / ".filename-20240101-111213.mp4.part").mkdir(parents=True)
+        session = make_session(
+            output_path=f"{tmp_path}/output/",
+            output_roots=[f"{tmp_path}/other/"],
+            mirror_paths=[str(tmp_path / "mirror")],
+            minimum_free_space_mb=0,
+        )
+        httpx_mock.add_response(headers={"Content-Length": "5"})
+        httpx_mock.add_response(content=b"video")
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+        )
+
+        events = list(download_and_delete_video(video, session))
+
+        assert events[-1].kind is Kind.FAILED
+        assert video.filename not in session.placement.placed
+        assert read_index(f"{tmp_path}/output/") == {}
+
+    @staticmethod
+    def test_does_not_place_if_download_is_false(
+        httpx_mock: HTTPXMock,
+        tmp_path: Path,
+    ) -> None:
+        """Doesn't place or index a video it doesn't download."""
+        session = make_session(
+            output_path=f"{tmp_path}/output/",
+            layout="{application_name}",
+            download_videos=False,
+            delete_videos=False,
+        )
+        httpx_mock.add_response()
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+        )
+
+        list(download_and_delete_video(video, session))
+
+        assert video.filename not in session.placement.placed
+        assert read_index(f"{tmp_path}/output/") == {}
+        assert not (tmp_path / "output" / "filename").exists()
+
+    @staticmethod
+    def test_does_not_delete_if_mirror_failed(
+        httpx_mock: HTTPXMock,
+        tmp_path: Path,
+    ) -> None:
+        """Doesn't delete the video if a mirror couldn't be written."""
+        (tmp_path / "output").mkdir()
+        (tmp_path / "mirror" / ".filename-20240101-111213.mp4.part").mkdir(parents=True)
+        session = make_session(
+            output_path=str(tmp_path / "output"),
+            mirror_paths=[str(tmp_path / "mirror")],
+        )
+        httpx_mock.add_response(headers={"Content-Length": "5"})
+        httpx_mock.add_response(content=b"video")
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+        )
+
+        events = list(download_and_delete_video(video, session))
+
+        assert events[-1].kind is Kind.FAILED
+        assert str(events[-1].value).startswith(
+            f'Failed to mirror "filename-20240101-111213.mp4" to "{tmp_path / "mirror" / video.filename}": [Errno 21]',
+        )
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+    @staticmethod
+    def test_removes_mirrors_if_transfer_failed(
+        httpx_mock: HTTPXMock,
+        tmp_path: Path,
+    ) -> None:
+        """Removes what was mirrored if the transfer fails partway through, leaving no copy that looks finished."""
+        (tmp_path / "output").mkdir()
+        session = make_session(
+            output_path=str(tmp_path / "output"),
+            mirror_paths=[str(tmp_path / "mirror")],
+        )
+
+        def stream_then_fail(_: httpx.Request) -> httpx.Response:
+            def chunks() -> Iterator[bytes]:
+                yield b"vid"
+                message = "reset"
+                raise httpx.ReadError(message)
+
+            return httpx.Response(
+                200,
+                headers={"Content-Length": "5"},
+                stream=IteratorStream(chunks()),
+            )
+
+        httpx_mock.add_response(headers={"Content-Length": "5"})
+        httpx_mock.add_callback(stream_then_fail)
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+        )
+
+        with pytest.raises(httpx.ReadError):
+            list(download_and_delete_video(video, session))
+
+        assert list((tmp_path / "mirror").iterdir()) == []
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+    @staticmethod
+    def test_keeps_mirrors_of_actively_recording(
+        httpx_mock: HTTPXMock,
+        tmp_path: Path,
+    ) -> None:
+        """Keeps the complete mirrors of an actively recording video, describing any that aren't."""
+        (tmp_path / "mirror-b" / ".filename-20240101-111213.mp4.part").mkdir(
+            parents=True,
+        )
+        session = make_session(
+            output_path=str(tmp_path / "output"),
+            mirror_paths=[str(tmp_path / "mirror-a")],
+        )
+        httpx_mock.add_response()
+        httpx_mock.add_response(content=b"vid")
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+            actively_recording=True,
+        )
+
+        list(download_and_delete_video(video, session))
+        session.config.mirror_paths = [str(tmp_path / "mirror-b")]
+        httpx_mock.add_response()
+        httpx_mock.add_response(content=b"vid")
+        events = list(download_and_delete_video(video, session))
+
+        assert (tmp_path / "mirror-a" / video.filename).read_bytes() == b"vid"
+        assert [event.kind for event in events[-2:]] == [Kind.MESSAGE, Kind.MESSAGE]
+        assert str(events[-2].value).startswith(
+            f'Failed to mirror "{video.filename}" to "{tmp_path / "mirror-b" / video.filename}"',
+        )
+
+    @staticmethod
+    def test_stages_actively_recording(httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """Moves what was downloaded of an actively recording video, without deleting it."""
+        session = make_session(
+            output_path=str(tmp_path / "output"),
+            minimum_free_space_mb=0,
+        )
+        httpx_mock.add_response()
+        httpx_mock.add_response(content=b"vid")
+        video = Video(
+            "full%2Fpathtofile.mp4",
+            "filename-20240101-111213.mp4",
+            datetime(2024, 1, 1, 11, 12, 13),
+            datetime(2024, 1, 1, 12, 13, 14),
+            5,
+            actively_recording=True,
+        )
+
+        with Mover(session, tmp_path / "staging") as mover:
+            list(download_and_delete_video(video, session, mover))
+
+        assert (tmp_path / "output" / video.filename).read_bytes() == b"vid"
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+
+def test_verify_mirrors_checks_size(tmp_path: Path) -> None:
+    """verify_mirrors() describes a mirror with less bytes than downloaded."""
+    video = TestReserveSpace.video
+    mirrors = [MirrorWriter(tmp_path / video.filename, (1, 2))]
+    mirrors[0].write(b"vid")
+    mirrors[0].close()
+
+    assert verify_mirrors(video, mirrors, 5) == (
+        f'Mirrored 2 bytes less than received during the download of "{video.filename}" to "{tmp_path / video.filename}"'
+    )
+    assert verify_mirrors(video, mirrors, 3) is None
+
 
 class TestDownloadAndDeleteVideos:
     """Tests for the download_and_delete_videos() function."""
@@ -391,23 +947,22 @@ class TestDownloadAndDeleteVideos:
         video_count: int,
         *desired: str,
         has_enough_free_space: bool = True,
-        download_and_delete_video: None | list[list[float | int | str]] = None,
+        download_and_delete_video: None | list[list[Event] | Exception] = None,
     ) -> Any:  # noqa: ANN401
         """Create mocks for download_and_delete_videos()."""
-        tasks = [
-            *(SimpleNamespace() for _ in range(video_count)),
-            SimpleNamespace(),
-        ]
+        tasks = list(range(video_count + 1))
         mock_add_task = mocker.Mock(side_effect=tasks)
         mock_update = mocker.Mock()
+        mock_remove_task = mocker.Mock()
         mock_progress = mocker.patch("rich.progress.Progress")
         mock_progress.return_value.__enter__.return_value = SimpleNamespace(
             add_task=mock_add_task,
             update=mock_update,
+            remove_task=mock_remove_task,
         )
         mocker.patch(
-            "questdrive_syncer.download.has_enough_free_space",
-            return_value=has_enough_free_space,
+            "questdrive_syncer.download.SPACE_RESERVATIONS.reserve",
+            return_value=nullcontext(has_enough_free_space),
         )
         mock_print = mocker.patch("builtins.print")
         mock_download_and_delete_video = mocker.patch(
@@ -420,6 +975,7 @@ class TestDownloadAndDeleteVideos:
                 "tasks": tasks,
                 "mock_add_task": mock_add_task,
                 "mock_update": mock_update,
+                "mock_remove_task": mock_remove_task,
                 "mock_print": mock_print,
                 "mock_progress": mock_progress,
                 "mock_download_and_delete_video": mock_download_and_delete_video,
@@ -438,44 +994,67 @@ class TestDownloadAndDeleteVideos:
             "mock_print",
             "mock_download_and_delete_video",
             has_enough_free_space=True,
-            download_and_delete_video=[["bad thing happened"], [90000000, 110000000]],
+            download_and_delete_video=[
+                [
+                    Event(
+                        Kind.MESSAGE,
+                        TestDownloadAndDeleteVideos.videos[0],
+                        value="bad thing happened",
+                    ),
+                ],
+                [
+                    Event(
+                        Kind.BYTES,
+                        TestDownloadAndDeleteVideos.videos[1],
+                        Phase.TRANSFER,
+                        90000000,
+                    ),
+                ],
+            ],
         )
 
-        download_and_delete_videos(
-            TestDownloadAndDeleteVideos.videos,
-            simple_output=True,
-        )
+        session = make_session(simple_output=True)
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, session)
 
         for video in TestDownloadAndDeleteVideos.videos:
             mock_print.assert_any_call("Starting", video, "...")
             mock_download_and_delete_video.assert_any_call(
                 video,
-                delete=True,
-                download=True,
+                session=session,
+                mover=None,
             )
             mock_print.assert_any_call("Finished", video)
 
         mock_print.assert_any_call("bad thing happened")
 
     @staticmethod
-    def test_creates_initial_tasks(
+    def test_creates_summary_and_active_tasks(
         mocker: MockerFixture,
     ) -> None:
-        """Creates initial tasks with correct size & filenames."""
+        """Creates the summary task, then a task for each video as it starts, removing it once finished."""
         (
             mock_progress,
             mock_add_task,
+            mock_remove_task,
+            tasks,
         ) = TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
             mocker,
             len(TestDownloadAndDeleteVideos.videos),
             "mock_progress",
             "mock_add_task",
+            "mock_remove_task",
+            "tasks",
             has_enough_free_space=True,
         )
 
-        download_and_delete_videos(TestDownloadAndDeleteVideos.videos)
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, make_session())
 
         assert mock_progress.call_count == 1
+        assert mock_add_task.mock_calls[0] == mocker.call(
+            "Total",
+            total=300000000,
+            filename="Total (0/2)",
+        )
         mock_add_task.assert_any_call(
             "Download",
             total=100000000,
@@ -486,7 +1065,7 @@ class TestDownloadAndDeleteVideos:
             total=200000000,
             filename="filename-20240101-111214.mp4",
         )
-        mock_add_task.assert_called_with("Total", total=300000000, filename="Total")
+        assert [call.args[0] for call in mock_remove_task.mock_calls] == tasks[1:]
 
     @staticmethod
     def test_does_not_download_if_not_enough_free_space(
@@ -504,7 +1083,7 @@ class TestDownloadAndDeleteVideos:
             has_enough_free_space=False,
         )
 
-        download_and_delete_videos(TestDownloadAndDeleteVideos.videos)
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, make_session())
 
         mock_print.assert_any_call(
             'Skipping download of "filename-20240101-111213.mp4" because there is not enough free space',
@@ -518,24 +1097,29 @@ class TestDownloadAndDeleteVideos:
     def test_progresses_when_not_downloading(
         mocker: MockerFixture,
     ) -> None:
-        """Progresses when not downloading."""
+        """Progresses the summary without adding tasks when not downloading."""
         (
+            mock_add_task,
             mock_update,
             tasks,
         ) = TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
             mocker,
             len(TestDownloadAndDeleteVideos.videos),
+            "mock_add_task",
             "mock_update",
             "tasks",
             has_enough_free_space=False,
         )
 
-        download_and_delete_videos(TestDownloadAndDeleteVideos.videos)
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, make_session())
 
-        mock_update.assert_any_call(tasks[0], advance=100000000)
-        mock_update.assert_any_call(tasks[1], advance=200000000)
-        mock_update.assert_any_call(tasks[2], advance=100000000)
-        mock_update.assert_any_call(tasks[2], advance=200000000)
+        mock_add_task.assert_called_once()
+        mock_update.assert_called_with(
+            tasks[0],
+            completed=300000000,
+            total=300000000,
+            filename="Total (2/2)",
+        )
 
     @staticmethod
     def test_updates_total_with_float(
@@ -550,15 +1134,40 @@ class TestDownloadAndDeleteVideos:
             len(TestDownloadAndDeleteVideos.videos),
             "mock_update",
             "tasks",
-            download_and_delete_video=[[110000000.0], [220000000.0]],
+            download_and_delete_video=[
+                [
+                    Event(
+                        Kind.TOTAL,
+                        TestDownloadAndDeleteVideos.videos[0],
+                        Phase.TRANSFER,
+                        110000000.0,
+                    ),
+                ],
+                [
+                    Event(
+                        Kind.TOTAL,
+                        TestDownloadAndDeleteVideos.videos[1],
+                        Phase.TRANSFER,
+                        220000000.0,
+                    ),
+                ],
+            ],
         )
 
-        download_and_delete_videos(TestDownloadAndDeleteVideos.videos)
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, make_session())
 
-        mock_update.assert_any_call(tasks[0], total=110000000)
-        mock_update.assert_any_call(tasks[2], total=310000000)
-        mock_update.assert_any_call(tasks[1], total=220000000)
-        mock_update.assert_any_call(tasks[2], total=330000000)
+        mock_update.assert_any_call(
+            tasks[0],
+            completed=110000000,
+            total=310000000,
+            filename="Total (1/2)",
+        )
+        mock_update.assert_called_with(
+            tasks[0],
+            completed=330000000,
+            total=330000000,
+            filename="Total (2/2)",
+        )
 
     @staticmethod
     def test_advanced_by_ints(
@@ -573,17 +1182,41 @@ class TestDownloadAndDeleteVideos:
             len(TestDownloadAndDeleteVideos.videos),
             "mock_update",
             "tasks",
-            download_and_delete_video=[[100000000], [90000000, 110000000]],
+            download_and_delete_video=[
+                [
+                    Event(
+                        Kind.BYTES,
+                        TestDownloadAndDeleteVideos.videos[0],
+                        Phase.TRANSFER,
+                        100000000,
+                    ),
+                ],
+                [
+                    Event(
+                        Kind.BYTES,
+                        TestDownloadAndDeleteVideos.videos[1],
+                        Phase.TRANSFER,
+                        90000000,
+                    ),
+                    Event(
+                        Kind.BYTES,
+                        TestDownloadAndDeleteVideos.videos[1],
+                        Phase.TRANSFER,
+                        110000000,
+                    ),
+                ],
+            ],
         )
 
-        download_and_delete_videos(TestDownloadAndDeleteVideos.videos)
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, make_session())
 
-        mock_update.assert_any_call(tasks[0], advance=100000000)
-        mock_update.assert_any_call(tasks[2], advance=100000000)
-        mock_update.assert_any_call(tasks[1], advance=90000000)
-        mock_update.assert_any_call(tasks[2], advance=90000000)
-        mock_update.assert_any_call(tasks[1], advance=110000000)
-        mock_update.assert_any_call(tasks[2], advance=110000000)
+        mock_update.assert_any_call(tasks[1], completed=100000000, total=100000000)
+        mock_update.assert_called_with(
+            tasks[0],
+            completed=300000000,
+            total=300000000,
+            filename="Total (2/2)",
+        )
 
     @staticmethod
     def test_prints_strs(
@@ -601,15 +1234,261 @@ class TestDownloadAndDeleteVideos:
             "mock_update",
             "tasks",
             download_and_delete_video=[
-                ["bad thing happened"],
-                [90000000, 110000000],
+                [
+                    Event(
+                        Kind.MESSAGE,
+                        TestDownloadAndDeleteVideos.videos[0],
+                        value="bad thing happened",
+                    ),
+                ],
+                [
+                    Event(
+                        Kind.BYTES,
+                        TestDownloadAndDeleteVideos.videos[1],
+                        Phase.TRANSFER,
+                        90000000,
+                    ),
+                    Event(
+                        Kind.BYTES,
+                        TestDownloadAndDeleteVideos.videos[1],
+                        Phase.TRANSFER,
+                        110000000,
+                    ),
+                ],
             ],
         )
 
-        download_and_delete_videos(TestDownloadAndDeleteVideos.videos)
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, make_session())
 
         mock_print.assert_any_call("bad thing happened")
-        mock_update.assert_any_call(tasks[1], advance=90000000)
-        mock_update.assert_any_call(tasks[2], advance=90000000)
-        mock_update.assert_any_call(tasks[1], advance=110000000)
-        mock_update.assert_any_call(tasks[2], advance=110000000)
+        mock_update.assert_called_with(
+            tasks[0],
+            completed=300000000,
+            total=300000000,
+            filename="Total (2/2)",
+        )
+
+    @staticmethod
+    def test_concurrent_simple_output_records_bytes(
+        mocker: MockerFixture,
+    ) -> None:
+        """Syncs every video & records the bytes when downloading concurrently."""
+        mock_download_and_delete_video = (
+            TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+                mocker,
+                len(TestDownloadAndDeleteVideos.videos),
+                "mock_download_and_delete_video",
+                download_and_delete_video=[
+                    [Event(Kind.BYTES, video, Phase.TRANSFER, 5)]
+                    for video in TestDownloadAndDeleteVideos.videos
+                ],
+            )
+        )
+        spy_record_bytes = mocker.spy(AIMDController, "record_bytes")
+
+        download_and_delete_videos(
+            TestDownloadAndDeleteVideos.videos,
+            make_session(
+                simple_output=True,
+                max_concurrency=2,
+                adaptive_concurrency=True,
+            ),
+        )
+
+        assert mock_download_and_delete_video.call_count == 2  # noqa: PLR2004
+        assert [call.args[1] for call in spy_record_bytes.mock_calls] == [5, 5]
+
+    @staticmethod
+    def test_concurrent_progress_records_bytes(
+        mocker: MockerFixture,
+    ) -> None:
+        """Advances the progress & records the bytes when downloading concurrently."""
+        mock_remove_task = (
+            TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+                mocker,
+                len(TestDownloadAndDeleteVideos.videos),
+                "mock_remove_task",
+                download_and_delete_video=[
+                    [Event(Kind.BYTES, video, Phase.TRANSFER, 5)]
+                    for video in TestDownloadAndDeleteVideos.videos
+                ],
+            )
+        )
+        spy_record_bytes = mocker.spy(AIMDController, "record_bytes")
+
+        download_and_delete_videos(
+            TestDownloadAndDeleteVideos.videos,
+            make_session(max_concurrency=2),
+        )
+
+        assert mock_remove_task.call_count == 2  # noqa: PLR2004
+        assert [call.args[1] for call in spy_record_bytes.mock_calls] == [5, 5]
+
+    @staticmethod
+    def test_concurrent_failures_are_recorded(
+        mocker: MockerFixture,
+    ) -> None:
+        """Prints & records failed downloads instead of stopping when downloading concurrently."""
+        mock_print = TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+            mocker,
+            1,
+            "mock_print",
+            download_and_delete_video=[httpx.ConnectError("refused")],
+        )
+        spy_record_error = mocker.spy(AIMDController, "record_error")
+        session = make_session(simple_output=True, max_concurrency=2)
+
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos[:1], session)
+
+        mock_print.assert_any_call(
+            'Failed to sync "filename-20240101-111213.mp4", leaving it on the Quest: refused',
+        )
+        spy_record_error.assert_called_once()
+        assert session.metrics.videos_failed == 1
+
+    @staticmethod
+    def test_serial_failures_stop_the_sync(
+        mocker: MockerFixture,
+    ) -> None:
+        """Raises failed downloads when downloading one at a time, still finishing the video's task."""
+        mock_remove_task = (
+            TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+                mocker,
+                1,
+                "mock_remove_task",
+                download_and_delete_video=[httpx.ConnectError("refused")],
+            )
+        )
+        session = make_session()
+
+        with pytest.raises(httpx.ConnectError):
+            download_and_delete_videos(TestDownloadAndDeleteVideos.videos[:1], session)
+
+        mock_remove_task.assert_called_once()
+        assert session.metrics.videos_failed == 0
+
+    @staticmethod
+    def test_simple_output_does_not_download_if_not_enough_free_space(
+        mocker: MockerFixture,
+    ) -> None:
+        """Doesn't download with simple output if there is not enough free space."""
+        (
+            mock_print,
+            mock_download_and_delete_video,
+        ) = TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+            mocker,
+            len(TestDownloadAndDeleteVideos.videos),
+            "mock_print",
+            "mock_download_and_delete_video",
+            has_enough_free_space=False,
+        )
+
+        download_and_delete_videos(
+            TestDownloadAndDeleteVideos.videos,
+            make_session(simple_output=True),
+        )
+
+        mock_print.assert_any_call(
+            'Skipping download of "filename-20240101-111213.mp4" because there is not enough free space',
+        )
+        mock_download_and_delete_video.assert_not_called()
+
+    @staticmethod
+    def test_traces_each_video(
+        mocker: MockerFixture,
+    ) -> None:
+        """Adds a span of each video to the session's tracer."""
+        TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+            mocker,
+            len(TestDownloadAndDeleteVideos.videos),
+            "mock_print",
+        )
+        log = TraceLog()
+        session = SyncSession(
+            Config(questdrive_url="https://example.com/", simple_output=True),
+            tracer=log.tracer("https://example.com/"),
+        )
+
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, session)
+
+        assert [event["name"] for event in log.events if event["ph"] == "X"] == [
+            video.filename for video in TestDownloadAndDeleteVideos.videos
+        ]
+
+    @staticmethod
+    def test_stages_videos(mocker: MockerFixture) -> None:
+        """Reserves space in both directories, downloading with a mover that's finished before returning."""
+        mock_download_and_delete_video = (
+            TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+                mocker,
+                len(TestDownloadAndDeleteVideos.videos),
+                "mock_download_and_delete_video",
+            )
+        )
+        mock_reserve = mocker.patch(
+            "questdrive_syncer.download.SPACE_RESERVATIONS.reserve",
+            return_value=nullcontext(True),  # noqa: FBT003
+        )
+        mock_mover = mocker.patch("questdrive_syncer.download.Mover")
+        session = make_session(simple_output=True, staging_path="staging/")
+
+        download_and_delete_videos(TestDownloadAndDeleteVideos.videos, session)
+
+        mock_mover.assert_called_once_with(
+            session,
+            Path("staging/") / lock_key(session.config),
+        )
+        mock_mover.return_value.__exit__.assert_called_once()
+        mock_download_and_delete_video.assert_any_call(
+            TestDownloadAndDeleteVideos.videos[0],
+            session=session,
+            mover=mock_mover.return_value,
+        )
+        assert [call.args[2] for call in mock_reserve.call_args_list] == [
+            "staging/",
+            "output/",
+        ] * len(TestDownloadAndDeleteVideos.videos)
+
+    @staticmethod
+    def test_removes_tasks_from_provided_progress(mocker: MockerFixture) -> None:
+        """Leaves no tasks in the provided progress once synced, however often it's reused."""
+        progress = make_progress()
+        TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+            mocker,
+            3 * len(TestDownloadAndDeleteVideos.videos),
+            "mock_progress",
+        )
+        session = make_session()
+
+        for _ in range(3):
+            download_and_delete_videos(
+                TestDownloadAndDeleteVideos.videos,
+                session,
+                progress=progress,
+            )
+
+        assert progress.tasks == []
+
+    @staticmethod
+    def test_uses_provided_progress(
+        mocker: MockerFixture,
+    ) -> None:
+        """Adds tasks to the provided progress instead of displaying its own."""
+        mock_progress = (
+            TestDownloadAndDeleteVideos.make_download_and_delete_videos_mocks(
+                mocker,
+                len(TestDownloadAndDeleteVideos.videos),
+                "mock_progress",
+            )
+        )
+        progress = mocker.MagicMock()
+
+        download_and_delete_videos(
+            TestDownloadAndDeleteVideos.videos,
+            make_session(),
+            progress=progress,
+        )
+
+        mock_progress.assert_not_called()
+        progress.__enter__.assert_not_called()
+        assert progress.add_task.call_count == 3  # noqa: PLR2004
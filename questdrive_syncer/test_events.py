@@ -0,0 +1,233 @@
+"""Tests for the events module."""
+from __future__ import annotations
+
+import dataclasses
+import io
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.events import (
+    ControllerSink,
+    Event,
+    JsonLinesSink,
+    Kind,
+    MetricsSink,
+    Phase,
+    SimpleSink,
+    Sink,
+    event_log_sinks,
+)
+from questdrive_syncer.session import SyncMetrics
+from questdrive_syncer.structures import Video
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    import pytest
+    from pytest_mock import MockerFixture
+
+VIDEO = Video(
+    "full%2Fpathtofile.mp4",
+    "filename-20240101-111213.mp4",
+    datetime(2024, 1, 1, 11, 12, 13),
+    datetime(2024, 1, 1, 12, 13, 14),
+    2345,
+)
+
+
+def test_sink_ignores_events() -> None:
+    """The base sink ignores every event."""
+    Sink().handle(Event(Kind.STARTED, VIDEO))
+
+
+class TestSimpleSink:
+    """Tests for the SimpleSink class."""
+
+    @staticmethod
+    def test_prints_start_finish_and_messages(
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Prints the start & finish of the video, messages & failures."""
+        sink = SimpleSink()
+
+        for event in (
+            Event(Kind.STARTED, VIDEO),
+            Event(Kind.STARTED, VIDEO, Phase.TRANSFER),
+            Event(Kind.BYTES, VIDEO, Phase.TRANSFER, 5),
+            Event(Kind.MESSAGE, VIDEO, value="something happened"),
+            Event(Kind.FINISHED, VIDEO),
+        ):
+            sink.handle(event)
+
+        assert capsys.readouterr().out.splitlines() == [
+            f"Starting {VIDEO} ...",
+            "something happened",
+            f"Finished {VIDEO}",
+        ]
+
+    @staticmethod
+    def test_does_not_finish_failed(capsys: pytest.CaptureFixture[str]) -> None:
+        """Prints the failure of a video instead of finishing it, finishing it again if it's synced again."""
+        sink = SimpleSink()
+
+        for event in (
+            Event(Kind.STARTED, VIDEO),
+            Event(Kind.FAILED, VIDEO, Phase.VERIFY, "something failed"),
+            Event(Kind.FINISHED, VIDEO),
+            Event(Kind.STARTED, VIDEO),
+            Event(Kind.FINISHED, VIDEO),
+        ):
+            sink.handle(event)
+
+        assert capsys.readouterr().out.splitlines() == [
+            f"Starting {VIDEO} ...",
+            "something failed",
+            f"Starting {VIDEO} ...",
+            f"Finished {VIDEO}",
+        ]
+
+    @staticmethod
+    def test_prints_skips(capsys: pytest.CaptureFixture[str]) -> None:
+        """Prints why the video was skipped."""
+        SimpleSink().handle(
+            Event(Kind.SKIPPED, VIDEO, value="there is not enough free space"),
+        )
+
+        assert (
+            capsys.readouterr().out
+            == 'Skipping download of "filename-20240101-111213.mp4" because there is not enough free space\n'
+        )
+
+
+def test_metrics_sink_counts() -> None:
+    """MetricsSink counts verified downloads, finished deletes, skipped & failed videos."""
+    metrics = SyncMetrics()
+    sink = MetricsSink(metrics)
+
+    for event in (
+        Event(Kind.BYTES, VIDEO, Phase.TRANSFER, 5),
+        Event(Kind.FINISHED, VIDEO, Phase.TRANSFER, 5),
+        Event(Kind.FINISHED, VIDEO, Phase.VERIFY),
+        Event(Kind.FINISHED, VIDEO, Phase.DELETE),
+        Event(Kind.SKIPPED, VIDEO, value="reason"),
+        Event(Kind.FAILED, VIDEO, value="reason"),
+        Event(Kind.FINISHED, VIDEO),
+    ):
+        sink.handle(event)
+
+    assert (
+        metrics.videos_downloaded,
+        metrics.bytes_downloaded,
+        metrics.videos_deleted,
+        metrics.videos_skipped,
+        metrics.videos_failed,
+    ) == (1, 5, 1, 1, 1)
+
+
+def test_metrics_sink_counts_only_verified_downloads() -> None:
+    """MetricsSink doesn't count a download that failed or skipped verification, nor a verification without a download."""
+    metrics = SyncMetrics()
+    sink = MetricsSink(metrics)
+
+    for event in (
+        Event(Kind.FINISHED, VIDEO, Phase.TRANSFER, 5),
+        Event(Kind.FAILED, VIDEO, Phase.VERIFY, "short"),
+        Event(Kind.FINISHED, VIDEO),
+        Event(Kind.FINISHED, VIDEO, Phase.TRANSFER, 5),
+        Event(Kind.FINISHED, VIDEO),
+        Event(Kind.FINISHED, VIDEO, Phase.VERIFY),
+    ):
+        sink.handle(event)
+
+    assert (
+        metrics.videos_downloaded,
+        metrics.bytes_downloaded,
+        metrics.videos_failed,
+    ) == (0, 0, 1)
+
+
+def test_metrics_sink_counts_actively_recording_downloads() -> None:
+    """MetricsSink counts the download of an actively recording video once transferred, as it's kept without being verified."""
+    metrics = SyncMetrics()
+    sink = MetricsSink(metrics)
+    video = dataclasses.replace(VIDEO, actively_recording=True)
+
+    for event in (
+        Event(Kind.FINISHED, video, Phase.TRANSFER, 5),
+        Event(Kind.MESSAGE, video, value="actively recording"),
+        Event(Kind.FINISHED, video),
+    ):
+        sink.handle(event)
+
+    assert (metrics.videos_downloaded, metrics.bytes_downloaded) == (1, 5)
+
+
+def test_controller_sink_records(mocker: MockerFixture) -> None:
+    """ControllerSink records transferred bytes & failed videos."""
+    controller = mocker.Mock()
+    sink = ControllerSink(controller)
+
+    for event in (
+        Event(Kind.BYTES, VIDEO, Phase.TRANSFER, 5),
+        Event(Kind.FAILED, VIDEO, value="reason"),
+        Event(Kind.FINISHED, VIDEO),
+    ):
+        sink.handle(event)
+
+    controller.record_bytes.assert_called_once_with(5)
+    controller.record_error.assert_called_once_with()
+
+
+def test_json_lines_sink_writes_events(mocker: MockerFixture) -> None:
+    """JsonLinesSink writes a line for every event except the transferred bytes."""
+    mocker.patch("time.time", return_value=1700000000.5)
+    file = io.StringIO()
+    sink = JsonLinesSink(file)
+
+    for event in (
+        Event(Kind.BYTES, VIDEO, Phase.TRANSFER, 5),
+        Event(Kind.FINISHED, VIDEO, Phase.TRANSFER, 5),
+        Event(Kind.FINISHED, VIDEO),
+    ):
+        sink.handle(event)
+
+    assert [json.loads(line) for line in file.getvalue().splitlines()] == [
+        {
+            "time": 1700000000.5,
+            "kind": "finished",
+            "phase": "transfer",
+            "video": "filename-20240101-111213.mp4",
+            "value": 5,
+        },
+        {
+            "time": 1700000000.5,
+            "kind": "finished",
+            "phase": None,
+            "video": "filename-20240101-111213.mp4",
+            "value": 0,
+        },
+    ]
+
+
+class TestEventLogSinks:
+    """Tests for the event_log_sinks() function."""
+
+    @staticmethod
+    def test_no_path() -> None:
+        """Yields no sinks without a path."""
+        with event_log_sinks(None) as sinks:
+            assert sinks == []
+
+    @staticmethod
+    def test_appends_to_path(tmp_path: Path) -> None:
+        """Yields a JSON lines sink appending to the path, closing it afterwards."""
+        path = tmp_path / "events.jsonl"
+        path.write_text("existing\n")
+
+        with event_log_sinks(str(path)) as sinks:
+            sinks[0].handle(Event(Kind.SKIPPED, VIDEO, value="reason"))
+
+        lines = path.read_text().splitlines()
+        assert lines[0] == "existing"
+        assert json.loads(lines[1])["kind"] == "skipped"
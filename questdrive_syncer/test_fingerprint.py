@@ -0,0 +1,53 @@
+"""Tests for the fingerprint module."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.constants import LISTING_FINGERPRINT_FILENAME
+from questdrive_syncer.fingerprint import (
+    listing_fingerprint,
+    read_fingerprint,
+    write_fingerprint,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+
+def test_listing_fingerprint() -> None:
+    """listing_fingerprint() is a short digest that changes with the HTML."""
+    fingerprint = listing_fingerprint("<tbody></tbody>")
+
+    assert len(fingerprint) == 32  # noqa: PLR2004
+    assert fingerprint == listing_fingerprint("<tbody></tbody>")
+    assert fingerprint != listing_fingerprint("<tbody><tr></tr></tbody>")
+
+
+def test_listing_fingerprint_settings() -> None:
+    """listing_fingerprint() changes with the download & delete settings."""
+    fingerprints = {
+        listing_fingerprint(
+            "<tbody></tbody>",
+            download_videos=download_videos,
+            delete_videos=delete_videos,
+        )
+        for download_videos in (True, False)
+        for delete_videos in (True, False)
+    }
+
+    assert len(fingerprints) == 4  # noqa: PLR2004
+
+
+def test_read_missing_fingerprint(tmp_path: Path) -> None:
+    """read_fingerprint() returns None before a fingerprint has been written."""
+    assert read_fingerprint(f"{tmp_path}/") is None
+
+
+def test_write_and_read_fingerprint(tmp_path: Path) -> None:
+    """write_fingerprint() creates the output directory & saves the fingerprint."""
+    output_path = f"{tmp_path}/output/"
+
+    write_fingerprint(output_path, "abc")
+
+    assert (tmp_path / "output" / LISTING_FINGERPRINT_FILENAME).read_text() == "abc"
+    assert read_fingerprint(output_path) == "abc"
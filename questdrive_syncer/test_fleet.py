@@ -0,0 +1,227 @@
+"""Tests for the fleet module."""
+from __future__ import annotations
+
+import errno
+import os
+import sys
+from typing import TYPE_CHECKING
+
+import httpx
+import pytest
+
+from questdrive_syncer.config import Config
+from questdrive_syncer.constants import FAILURE_EXIT_CODE, TOO_MUCH_SPACE_EXIT_CODE
+from questdrive_syncer.fleet import device_configs, sync_device, sync_fleet
+from questdrive_syncer.helpers import ProcessLock
+from questdrive_syncer.session import SyncSession
+from questdrive_syncer.structures import FleetDevice
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+
+def test_device_configs() -> None:
+    """device_configs() returns a configuration per device, in its own subdirectory."""
+    config = Config(
+        questdrive_url="",
+        output_path="output/",
+        max_concurrency=2,
+        fleet=[
+            FleetDevice("http://left/", "left"),
+            FleetDevice("http://right/", "right"),
+        ],
+    )
+
+    configs = device_configs(config)
+
+    assert [(c.questdrive_url, c.output_path) for c in configs] == [
+        ("http://left/", "output/left/"),
+        ("http://right/", "output/right/"),
+    ]
+    assert all(c.max_concurrency == 2 and c.fleet == [] for c in configs)  # noqa: PLR2004
+    assert all(c.staging_path is None for c in configs)
+
+
+def test_device_configs_stage_to_own_subdirectory() -> None:
+    """device_configs() stages each device's videos to its own subdirectory."""
+    config = Config(
+        questdrive_url="",
+        staging_path="staging/",
+        fleet=[FleetDevice("http://left/", "left")],
+    )
+
+    assert [c.staging_path for c in device_configs(config)] == ["staging/left/"]
+
+
+def test_device_configs_output_to_own_subdirectory_of_each_root() -> None:
+    """device_configs() outputs each device's videos to its own subdirectory of every root."""
+    config = Config(
+        questdrive_url="",
+        output_roots=["/mnt/a/", "/mnt/b/"],
+        fleet=[FleetDevice("http://left/", "left")],
+    )
+
+    assert [c.output_roots for c in device_configs(config)] == [
+        ["/mnt/a/left/", "/mnt/b/left/"],
+    ]
+
+
+def test_device_configs_mirror_to_own_subdirectory_of_each_mirror() -> None:
+    """device_configs() mirrors each device's videos to its own subdirectory of every mirror."""
+    config = Config(
+        questdrive_url="",
+        mirror_paths=["/mnt/mirror/"],
+        fleet=[FleetDevice("http://left/", "left")],
+    )
+
+    assert [c.mirror_paths for c in device_configs(config)] == [
+        ["/mnt/mirror/left/"],
+    ]
+
+
+class TestSyncDevice:
+    """Tests for the sync_device() function."""
+
+    @staticmethod
+    def test_success(mocker: MockerFixture) -> None:
+        """Returns 0 when the sync succeeds, closing the session afterwards."""
+        sync = mocker.Mock()
+        session = SyncSession(Config(questdrive_url="url"))
+
+        assert sync_device(sync, session, None) == 0
+        sync.assert_called_once_with(session, None)
+        assert session.client.is_closed
+
+    @staticmethod
+    def test_exit(mocker: MockerFixture) -> None:
+        """Returns the exit code when the sync exits."""
+        sync = mocker.Mock(side_effect=lambda *_: sys.exit(TOO_MUCH_SPACE_EXIT_CODE))
+
+        assert (
+            sync_device(sync, SyncSession(Config(questdrive_url="url")), None)
+            == TOO_MUCH_SPACE_EXIT_CODE
+        )
+
+    @staticmethod
+    def test_http_error(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Returns the failure exit code when the sync fails to communicate."""
+        sync = mocker.Mock(side_effect=httpx.ConnectError("refused"))
+
+        assert (
+            sync_device(sync, SyncSession(Config(questdrive_url="url")), None)
+            == FAILURE_EXIT_CODE
+        )
+        assert 'Failed to sync "url": refused' in capsys.readouterr().out
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "error",
+        [OSError(errno.ENOSPC, "No space left"), ValueError("unparsable listing")],
+    )
+    def test_unexpected_error(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+        error: Exception,
+    ) -> None:
+        """Returns the failure exit code, printing unexpected errors with their traceback instead of raising them."""
+        sync = mocker.Mock(side_effect=error)
+
+        assert (
+            sync_device(sync, SyncSession(Config(questdrive_url="url")), None)
+            == FAILURE_EXIT_CODE
+        )
+        captured = capsys.readouterr()
+        assert 'Failed to sync "url":' in captured.out
+        assert "Traceback" in captured.err
+        assert str(error) in captured.err
+
+    @staticmethod
+    def test_locked(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+        tmp_path: Path,
+    ) -> None:
+        """Returns the failure exit code without syncing when the device is already being synced."""
+        sync = mocker.Mock()
+        lock_file = tmp_path / "lock"
+
+        with ProcessLock(lock_file):
+            assert (
+                sync_device(
+                    sync,
+                    SyncSession(
+                        Config(questdrive_url="url"),
+                        lock=ProcessLock(lock_file),
+                    ),
+                    None,
+                )
+                == FAILURE_EXIT_CODE
+            )
+
+        sync.assert_not_called()
+        assert (
+            f'Skipped "url": Another process ({os.getpid()}) is already running'
+            in capsys.readouterr().out
+        )
+
+
+class TestSyncFleet:
+    """Tests for the sync_fleet() function."""
+
+    sessions = (
+        SyncSession(Config(questdrive_url="http://left/")),
+        SyncSession(Config(questdrive_url="http://right/")),
+    )
+
+    @staticmethod
+    def test_syncs_each_device_with_simple_output(mocker: MockerFixture) -> None:
+        """Syncs each device without progress when using simple output."""
+        sync = mocker.Mock()
+
+        sync_fleet(list(TestSyncFleet.sessions), sync, simple_output=True)
+
+        sync.assert_any_call(TestSyncFleet.sessions[0], None)
+        sync.assert_any_call(TestSyncFleet.sessions[1], None)
+
+    @staticmethod
+    def test_syncs_each_device_in_own_progress_group(mocker: MockerFixture) -> None:
+        """Syncs each device with its own progress, displayed in a titled panel."""
+        mock_live = mocker.patch("rich.live.Live")
+        mock_panel = mocker.patch("rich.panel.Panel")
+        sync = mocker.Mock()
+
+        sync_fleet(list(TestSyncFleet.sessions), sync)
+
+        mock_live.return_value.__enter__.assert_called_once()
+        progresses = [call.args[1] for call in sync.mock_calls]
+        assert len(progresses) == 2  # noqa: PLR2004
+        assert progresses[0] is not progresses[1]
+        assert sorted(call.kwargs["title"] for call in mock_panel.mock_calls) == [
+            "http://left/",
+            "http://right/",
+        ]
+
+    @staticmethod
+    def test_exits_with_first_failure(
+        mocker: MockerFixture,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Exits with the first failed exit code after syncing every device."""
+        mocker.patch(
+            "questdrive_syncer.fleet.sync_device",
+            side_effect=[0, FAILURE_EXIT_CODE],
+        )
+
+        with pytest.raises(SystemExit) as exc_info:
+            sync_fleet(list(TestSyncFleet.sessions), mocker.Mock(), simple_output=True)
+
+        assert exc_info.value.code == FAILURE_EXIT_CODE
+        assert (
+            f'Sync of "http://right/" stopped with exit code {FAILURE_EXIT_CODE}'
+            in capsys.readouterr().out
+        )
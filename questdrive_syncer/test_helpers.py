@@ -1,13 +1,58 @@
 """Tests for the helpers module."""
+import errno
+import os
+import stat
+import subprocess
 import sys
+import threading
 import time
+from pathlib import Path
 from types import SimpleNamespace
-from unittest.mock import mock_open
 
 import pytest
 from pytest_mock import MockerFixture
 
-from questdrive_syncer.helpers import LockError, has_enough_free_space, lock
+from questdrive_syncer import helpers
+from questdrive_syncer.config import Config
+from questdrive_syncer.helpers import (
+    LockError,
+    ProcessLock,
+    SpaceReservations,
+    has_enough_free_space,
+    is_running,
+    lazy_import,
+    lock_directory,
+    lock_file_path,
+    lock_key,
+)
+
+
+class TestLazyImport:
+    """Tests for the lazy_import() function."""
+
+    @staticmethod
+    def test_returns_imported_module() -> None:
+        """Returns the module if it's already imported."""
+        assert lazy_import("sys") is sys
+
+    @staticmethod
+    def test_executes_on_first_use(mocker: MockerFixture) -> None:
+        """Only executes the module once one of its attributes is used."""
+        mocker.patch.dict(sys.modules)
+        sys.modules.pop("colorsys", None)
+
+        module = lazy_import("colorsys")
+
+        assert sys.modules["colorsys"] is module
+        assert type(module).__name__ == "_LazyModule"
+        assert module.rgb_to_hsv(1, 0, 0) == (0, 1, 1)
+        assert type(module).__name__ == "module"
+
+    @staticmethod
+    def test_missing_module() -> None:
+        """Raises an error if the module can't be found."""
+        with pytest.raises(ModuleNotFoundError):
+            lazy_import("questdrive_syncer.missing")
 
 
 class TestHasEnoughFreeSpace:
@@ -17,8 +62,12 @@ class TestHasEnoughFreeSpace:
     def test_calls_mkdir(mocker: MockerFixture) -> None:
         """Returns True when there is enough free space."""
         mock_mkdir = mocker.patch("pathlib.Path.mkdir")
+        mocker.patch(
+            "os.statvfs",
+            return_value=SimpleNamespace(f_frsize=1, f_bavail=1024**3 * 2),
+        )
 
-        has_enough_free_space(0)
+        has_enough_free_space(0, Config(questdrive_url="url"))
 
         mock_mkdir.assert_called_once_with(parents=True, exist_ok=True)
 
@@ -30,7 +79,7 @@ class TestHasEnoughFreeSpace:
             return_value=SimpleNamespace(f_frsize=1, f_bavail=1024**3 * 2),
         )
 
-        assert has_enough_free_space(1024) is True
+        assert has_enough_free_space(1024, Config(questdrive_url="url")) is True
 
     @staticmethod
     def test_not_enough(mocker: MockerFixture) -> None:
@@ -40,100 +89,278 @@ class TestHasEnoughFreeSpace:
             return_value=SimpleNamespace(f_frsize=1, f_bavail=1024**3 * 2),
         )
 
-        assert has_enough_free_space(1025) is False
+        assert has_enough_free_space(1025, Config(questdrive_url="url")) is False
+
+    @staticmethod
+    def test_provided_path(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Checks the free space of the provided path instead of the output directory."""
+        statvfs = mocker.patch(
+            "os.statvfs",
+            return_value=SimpleNamespace(f_frsize=1, f_bavail=1024**3 * 2),
+        )
+
+        assert has_enough_free_space(1024, Config(questdrive_url="url"), str(tmp_path))
+
+        statvfs.assert_called_once_with(str(tmp_path))
+
+
+class TestSpaceReservations:
+    """Tests for the SpaceReservations class."""
+
+    @staticmethod
+    def make_config(mocker: MockerFixture, output_path: str) -> Config:
+        """Create a configuration with 2 GB free & 1 GB minimum free space."""
+        mocker.patch(
+            "os.statvfs",
+            return_value=SimpleNamespace(f_frsize=1, f_bavail=1024**3 * 2),
+        )
+        return Config(questdrive_url="url", output_path=output_path)
+
+    @staticmethod
+    def test_reserves_when_enough(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Yields True & holds the reservation while there is enough free space."""
+        config = TestSpaceReservations.make_config(mocker, str(tmp_path))
+        reservations = SpaceReservations()
+
+        with reservations.reserve(512, config) as reserved:
+            assert reserved is True
+            assert sum(reservations.reserved_mb.values()) == 512  # noqa: PLR2004
 
+        assert sum(reservations.reserved_mb.values()) == 0
 
-class TestLock:
-    """Tests for the lock() decorator."""
+    @staticmethod
+    def test_includes_other_reservations(
+        mocker: MockerFixture,
+        tmp_path: Path,
+    ) -> None:
+        """Yields False when other reservations on the same device use the space."""
+        config = TestSpaceReservations.make_config(mocker, str(tmp_path / "a"))
+        other_config = Config(questdrive_url="url", output_path=str(tmp_path / "b"))
+        reservations = SpaceReservations()
+
+        with reservations.reserve(768, config) as reserved, reservations.reserve(
+            512,
+            other_config,
+        ) as other_reserved:
+            assert reserved is True
+            assert other_reserved is False
+
+        assert sum(reservations.reserved_mb.values()) == 0
 
     @staticmethod
-    def test_creates_lock_file(mocker: MockerFixture) -> None:
-        """Creates a lock file."""
-        decorated = lock()(lambda: time.sleep(0.01))
-        mocked_open = mocker.patch("pathlib.Path.open", mock_open())
-        mocker.patch("pathlib.Path.unlink")
+    def test_reserves_provided_path(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Reserves space on the device of the provided path instead of the output directory."""
+        config = TestSpaceReservations.make_config(mocker, str(tmp_path / "output"))
+        reservations = SpaceReservations()
 
-        decorated()
+        with reservations.reserve(512, config, str(tmp_path / "staging")) as reserved:
+            assert reserved is True
+            assert (tmp_path / "staging").is_dir()
+            assert not (tmp_path / "output").exists()
+
+    @staticmethod
+    def test_free_mb(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Returns the free space less what's reserved on the device."""
+        config = TestSpaceReservations.make_config(mocker, str(tmp_path))
+        reservations = SpaceReservations()
 
-        mocked_open.assert_called_once_with("w")
+        with reservations.reserve(512, config):
+            assert reservations.free_mb(str(tmp_path)) == 1536  # noqa: PLR2004
 
     @staticmethod
-    def test_deletes_lock_file(mocker: MockerFixture) -> None:
-        """Deletes a lock file."""
-        decorated = lock()(lambda: time.sleep(0.01))
-        mocker.patch("pathlib.Path.open", mock_open())
-        mock_unlink = mocker.patch("pathlib.Path.unlink")
+    def test_releases_on_error(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Releases the reservation even if there's an error."""
+        config = TestSpaceReservations.make_config(mocker, str(tmp_path))
+        reservations = SpaceReservations()
 
-        decorated()
-        time.sleep(0.02)
+        with pytest.raises(ValueError), reservations.reserve(512, config):  # noqa: PT011
+            raise ValueError
 
-        mock_unlink.assert_called_once()
+        assert sum(reservations.reserved_mb.values()) == 0
+
+
+class TestProcessLock:
+    """Tests for the ProcessLock class."""
 
     @staticmethod
-    def test_deletes_lock_file_on_error(mocker: MockerFixture) -> None:
-        """Deletes a lock file even if there's an error."""
+    def test_writes_pid_while_held(tmp_path: Path) -> None:
+        """Writes the PID to the lockfile while held, clearing it on release."""
+        lock_file = tmp_path / "nested" / "lock"
 
-        def raise_exception() -> None:
-            raise Exception  # noqa: TRY002
+        with ProcessLock(lock_file):
+            assert lock_file.read_text() == str(os.getpid())
 
-        decorated = lock()(raise_exception)
-        mocker.patch("pathlib.Path.open", mock_open())
-        mock_unlink = mocker.patch("pathlib.Path.unlink")
+        assert lock_file.read_text() == ""
 
-        with pytest.raises(Exception):  # noqa: B017, PT011
-            decorated()
-        time.sleep(0.02)
+    @staticmethod
+    def test_only_user_can_open(tmp_path: Path) -> None:
+        """Creates the lockfile - and its directory - so only the user can open it, and no one else can hold the lock."""
+        lock_file = tmp_path / "nested" / "lock"
 
-        mock_unlink.assert_called_once()
+        with ProcessLock(lock_file):
+            pass
+
+        assert stat.S_IMODE(lock_file.stat().st_mode) == 0o600  # noqa: PLR2004
+        assert stat.S_IMODE(lock_file.parent.stat().st_mode) == 0o700  # noqa: PLR2004
 
     @staticmethod
-    def test_deletes_lock_file_on_exit(mocker: MockerFixture) -> None:
-        """Deletes a lock file even if the system exits."""
+    def test_releases_on_error(tmp_path: Path) -> None:
+        """Releases the lock even if there's an error."""
+        lock_file = tmp_path / "lock"
 
-        def raise_exception() -> None:
+        with pytest.raises(SystemExit), ProcessLock(lock_file):
             sys.exit()
 
-        decorated = lock()(raise_exception)
-        mocker.patch("pathlib.Path.open", mock_open())
-        mock_unlink = mocker.patch("pathlib.Path.unlink")
+        with ProcessLock(lock_file):
+            pass
 
-        with pytest.raises(SystemExit):
-            decorated()
-        time.sleep(0.02)
+    @staticmethod
+    def test_refuses_symlink(tmp_path: Path) -> None:
+        """Refuses to follow a lockfile that's a symlink."""
+        target = tmp_path / "target"
+        target.write_text("kept")
+        (tmp_path / "lock").symlink_to(target)
 
-        mock_unlink.assert_called_once()
+        with pytest.raises(OSError) as exc_info:  # noqa: PT011
+            ProcessLock(tmp_path / "lock").__enter__()
+
+        assert exc_info.value.errno == errno.ELOOP
+        assert target.read_text() == "kept"
 
     @staticmethod
-    def test_makes_additional_calls_to_wait(mocker: MockerFixture) -> None:
-        """Makes additional calls to wait."""
-        decorated = lock(mode="wait")(lambda: time.sleep(0.01))
-        mocker.patch("pathlib.Path.open", mock_open())
-        mocker.patch("pathlib.Path.unlink")
-        mocker.patch("pathlib.Path.exists", side_effect=[False, True, True, False])
+    def test_release_without_acquiring(tmp_path: Path) -> None:
+        """Does nothing when released without being acquired."""
+        ProcessLock(tmp_path / "lock").__exit__()
 
-        first_started = time.time()
-        decorated()
-        first_finished = time.time()
-        second_started = time.time()
-        decorated()
-        second_finished = time.time()
+    @staticmethod
+    def test_fails_if_held(tmp_path: Path) -> None:
+        """Fails in fail mode if the lock is already held."""
+        lock_file = tmp_path / "lock"
 
-        first_duration = first_finished - first_started
-        assert first_duration < 0.015  # noqa: PLR2004
-        second_duration = second_finished - second_started
-        assert second_duration > 0.015  # noqa: PLR2004
+        with ProcessLock(lock_file), pytest.raises(LockError) as exc_info:
+            ProcessLock(lock_file).__enter__()
+
+        assert str(exc_info.value) == (
+            f'Another process ({os.getpid()}) is already running according to "{lock_file}" lockfile.'
+        )
 
     @staticmethod
-    def test_makes_additional_calls_fail(mocker: MockerFixture) -> None:
-        """Makes additional calls to fail."""
-        decorated = lock(mode="fail")(lambda: time.sleep(0.01))
-        mocker.patch("pathlib.Path.open", mock_open(read_data="123"))
-        mocker.patch("pathlib.Path.unlink")
-        mocker.patch(
-            "pathlib.Path.exists",
-            side_effect=[False, True],
+    def test_waits_if_held(tmp_path: Path) -> None:
+        """Blocks in wait mode until the lock is released."""
+        lock_file = tmp_path / "lock"
+        held = ProcessLock(lock_file).__enter__()
+        releaser = threading.Timer(0.05, held.__exit__)
+        releaser.start()
+
+        started = time.monotonic()
+        with ProcessLock(lock_file, mode="wait"):
+            assert time.monotonic() - started >= 0.05  # noqa: PLR2004
+        releaser.join()
+
+    @staticmethod
+    def test_recovers_from_killed_process(
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Acquires the lock left behind by a killed process, noting its stale PID."""
+        lock_file = tmp_path / "lock"
+        process = subprocess.Popen(
+            [  # noqa: S603
+                sys.executable,
+                "-c",
+                "import os, pathlib;"
+                "from questdrive_syncer.helpers import ProcessLock;"
+                f"ProcessLock(pathlib.Path({str(lock_file)!r})).__enter__();"
+                "os.kill(os.getpid(), 9)",
+            ],
+        )
+        process.wait()
+
+        with ProcessLock(lock_file):
+            pass
+
+        assert (
+            f'Recovered "{lock_file}" lockfile from process {process.pid}, which exited without releasing it'
+            in capsys.readouterr().out
         )
 
-        decorated()
-        with pytest.raises(LockError):
-            decorated()
+
+class TestLockError:
+    """Tests for the LockError class."""
+
+    @staticmethod
+    def test_without_pid() -> None:
+        """Describes another process if there's no PID."""
+        assert str(LockError(None, "lock")).startswith("Another process is")
+
+    @staticmethod
+    def test_exited_pid(mocker: MockerFixture) -> None:
+        """Describes a child of the exited process, which inherited the lock."""
+        mocker.patch("questdrive_syncer.helpers.is_running", return_value=False)
+
+        assert str(LockError(123, "lock")).startswith(
+            "A child of process 123, which is no longer running, is",
+        )
+
+
+class TestIsRunning:
+    """Tests for the is_running() function."""
+
+    @staticmethod
+    def test_running() -> None:
+        """Returns True for a running process."""
+        assert is_running(os.getpid()) is True
+
+    @staticmethod
+    def test_exited(mocker: MockerFixture) -> None:
+        """Returns False for a process that's not running."""
+        mocker.patch("os.kill", side_effect=ProcessLookupError)
+
+        assert is_running(123) is False
+
+    @staticmethod
+    def test_not_permitted(mocker: MockerFixture) -> None:
+        """Returns True for a running process of another user."""
+        mocker.patch("os.kill", side_effect=PermissionError)
+
+        assert is_running(1) is True
+
+
+def test_lock_file_path(mocker: MockerFixture, tmp_path: Path) -> None:
+    """lock_file_path() returns a lockfile in the state directory of the user per QuestDrive & output directory, whether or not there's a runtime directory."""
+    mocker.patch.dict(os.environ, {"HOME": str(tmp_path), "XDG_STATE_HOME": ""})
+    path = lock_file_path(Config(questdrive_url="left", output_path="output/"))
+    mocker.patch.dict(os.environ, {"XDG_RUNTIME_DIR": "/run/user/1000"})
+
+    assert path.parent == tmp_path / ".local" / "state" / "questdrive_syncer"
+    assert path == lock_file_path(Config(questdrive_url="left", output_path="./output"))
+    assert path != lock_file_path(Config(questdrive_url="right", output_path="output/"))
+    assert path != lock_file_path(Config(questdrive_url="left", output_path="other/"))
+
+
+def test_lock_directory_in_state_home(
+    mocker: MockerFixture,
+    tmp_path: Path,
+) -> None:
+    """lock_directory() is in the state home of the user if it's configured."""
+    mocker.patch.dict(os.environ, {"XDG_STATE_HOME": str(tmp_path)})
+
+    assert lock_directory() == tmp_path / "questdrive_syncer"
+
+
+def test_lock_directory_without_home(mocker: MockerFixture) -> None:
+    """lock_directory() is beside the package if the user has no home directory."""
+    mocker.patch.dict(os.environ, {"XDG_STATE_HOME": ""})
+    mocker.patch("pathlib.Path.expanduser", side_effect=RuntimeError)
+
+    assert lock_directory() == Path(helpers.__file__).parent
+
+
+def test_lock_key() -> None:
+    """lock_key() is the key of the lockfile, per QuestDrive & output directory."""
+    config = Config(questdrive_url="left", output_path="output/")
+
+    assert lock_file_path(config).name == f"questdrive_syncer-{lock_key(config)}.lock"
+    assert lock_key(config) != lock_key(
+        Config(questdrive_url="right", output_path="output/"),
+    )
@@ -0,0 +1,31 @@
+"""Tests for the layout module."""
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from questdrive_syncer.layout import render_shard
+from questdrive_syncer.structures import Video
+
+VIDEO = Video(
+    "full%2Fpathtofile.mp4",
+    "Beat-20240102-111213.mp4",
+    datetime(2024, 1, 2, 11, 12, 13),
+    datetime(2024, 1, 2, 12, 13, 14),
+    5,
+)
+
+
+@pytest.mark.parametrize(
+    ("layout", "shard"),
+    [
+        ("", ""),
+        ("{application_name}/{created_at:%Y}/{created_at:%m}", "Beat/2024/01"),
+        ("{created_at:%Y-%m-%d}", "2024-01-02"),
+        ("/{application_name}//./../{mb_size}/", "Beat/5"),
+    ],
+)
+def test_render_shard(layout: str, shard: str) -> None:
+    """render_shard() formats the layout with the video's fields, as a relative path."""
+    assert render_shard(layout, VIDEO) == shard
@@ -2,26 +2,49 @@
 from __future__ import annotations
 
 import dataclasses
+import json
+import sys
+import threading
 from datetime import datetime
+from ipaddress import IPv4Network
 from operator import itemgetter
 from typing import TYPE_CHECKING, Any
 
+import httpx
 import pytest
 
-from questdrive_syncer.config import init_config
+from questdrive_syncer import main as main_module
+from questdrive_syncer.config import Config, init_config
 from questdrive_syncer.constants import (
     ACTIVELY_RECORDING_EXIT_CODE,
     FAILURE_EXIT_CODE,
     NOT_ENOUGH_BATTERY_EXIT_CODE,
     TOO_MUCH_SPACE_EXIT_CODE,
 )
-from questdrive_syncer.main import main
+from questdrive_syncer.fingerprint import listing_fingerprint
+from questdrive_syncer.helpers import LockError, ProcessLock, lock_file_path
+from questdrive_syncer.main import main, sync_and_export
+from questdrive_syncer.session import SyncSession
 from questdrive_syncer.structures import Video
+from questdrive_syncer.transport import RecordingTransport
 
 if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
     from pytest_mock import MockerFixture
 
 
+@pytest.fixture(autouse=True)
+def _lock_directory(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    """Keep the lockfiles of each test in its own directory, so they neither leak nor clash with other runs."""
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+
+
+def make_config(*args: str) -> Config:
+    """Initialize the configuration of the example QuestDrive instance, with simple output."""
+    return init_config("--questdrive-url=url", "--simple-output", *args)
+
+
 def make_main_mocks(
     mocker: MockerFixture,
     *desired: str,
@@ -30,10 +53,9 @@ def make_main_mocks(
     parse_video_list_html: None | list[Video] = None,
     fetch_homepage_html: str = "html",
     parse_homepage_html: tuple[int, float] = (50, 1000.0),
-    args: tuple[str, ...] = (),
+    read_fingerprint: str | None = None,
 ) -> Any:  # noqa: ANN401
     """Create mocks for main()."""
-    init_config("--questdrive-url=url", "--simple-output", *args)
     mock_print = mocker.patch("builtins.print")
     mock_is_online = mocker.patch(
         "questdrive_syncer.main.is_online",
@@ -56,13 +78,16 @@ def make_main_mocks(
         "questdrive_syncer.main.parse_video_list_html",
         return_value=parse_video_list_html or [],
     )
-    mock_update_actively_recording = mocker.patch(
-        "questdrive_syncer.main.update_actively_recording",
-    )
+    mock_detect_recording = mocker.patch("questdrive_syncer.main.detect_recording")
 
     mock_download_and_delete_videos = mocker.patch(
         "questdrive_syncer.main.download_and_delete_videos",
     )
+    mock_read_fingerprint = mocker.patch(
+        "questdrive_syncer.main.read_fingerprint",
+        return_value=read_fingerprint,
+    )
+    mock_write_fingerprint = mocker.patch("questdrive_syncer.main.write_fingerprint")
 
     if not desired:
         return None
@@ -70,13 +95,15 @@ def make_main_mocks(
     return itemgetter(*desired)(
         {
             "mock_is_online": mock_is_online,
+            "mock_read_fingerprint": mock_read_fingerprint,
+            "mock_write_fingerprint": mock_write_fingerprint,
             "mock_sleep": mock_sleep,
             "mock_print": mock_print,
             "mock_fetch_homepage_html": mock_fetch_homepage_html,
             "mock_parse_homepage_html": mock_parse_homepage_html,
             "mock_fetch_video_list_html": mock_fetch_video_list_html,
             "mock_parse_video_list_html": mock_parse_video_list_html,
-            "mock_update_actively_recording": mock_update_actively_recording,
+            "mock_detect_recording": mock_detect_recording,
             "mock_download_and_delete_videos": mock_download_and_delete_videos,
         },
     )
@@ -87,7 +114,7 @@ def test_message_if_not_online(mocker: MockerFixture) -> None:
     mock_print = make_main_mocks(mocker, "mock_print", is_online=False)
 
     with pytest.raises(SystemExit):
-        main()
+        main(make_config())
 
     mock_print.assert_called_once_with(
         'QuestDrive not found at "url/"',
@@ -99,46 +126,157 @@ def test_failed_status_code(mocker: MockerFixture) -> None:
     make_main_mocks(mocker, is_online=False)
 
     with pytest.raises(SystemExit) as exc_info:
-        main()
+        main(make_config())
+
+    assert exc_info.value.code == FAILURE_EXIT_CODE
+
+
+def test_fetches_video_list_while_checking_online(mocker: MockerFixture) -> None:
+    """Main() fetches the video list while checking if QuestDrive is online."""
+    make_main_mocks(mocker)
+    fetching = threading.Event()
+
+    def fetch_video_list_html(_: SyncSession) -> str:
+        fetching.set()
+        return "html"
+
+    mocker.patch(
+        "questdrive_syncer.main.fetch_video_list_html",
+        side_effect=fetch_video_list_html,
+    )
+    mocker.patch(
+        "questdrive_syncer.main.is_online",
+        side_effect=lambda _: fetching.wait(5),
+    )
+
+    main(make_config())
+
+    assert fetching.is_set()
+
+
+def test_discards_video_list_if_not_online(mocker: MockerFixture) -> None:
+    """Main() discards the video list - even if it failed - when QuestDrive isn't online."""
+    mock_parse_video_list_html = make_main_mocks(
+        mocker,
+        "mock_parse_video_list_html",
+        is_online=False,
+    )
+    mocker.patch(
+        "questdrive_syncer.main.fetch_video_list_html",
+        side_effect=httpx.ConnectError("refused"),
+    )
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(make_config())
 
     assert exc_info.value.code == FAILURE_EXIT_CODE
+    mock_parse_video_list_html.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("is_online", "args"),
+    [(False, ()), (True, ("--only-run-if-battery-above=75",))],
+)
+def test_abandons_video_list_on_exit(
+    mocker: MockerFixture,
+    *,
+    is_online: bool,
+    args: tuple[str, ...],
+) -> None:
+    """Main() exits without waiting for the video list when QuestDrive is offline or outside the limits."""
+    make_main_mocks(mocker, is_online=is_online)
+    listed = threading.Event()
+    mocker.patch(
+        "questdrive_syncer.main.fetch_video_list_html",
+        side_effect=lambda _: listed.wait(5),
+    )
+
+    with pytest.raises(SystemExit):
+        main(make_config(*args))
+
+    listing = [thread for thread in threading.enumerate() if thread.name == "listing"]
+    assert not listed.is_set()
+    assert listing
+    assert all(thread.daemon for thread in listing)
+    listed.set()
+    for thread in listing:
+        thread.join()
 
 
 def test_waits_for_questdrive_if_wait_for_questdrive(mocker: MockerFixture) -> None:
-    """Main() waits for QuestDrive if wait_for_questdrive is True."""
-    mock_is_online, mock_print, mock_sleep = make_main_mocks(
+    """Main() waits for QuestDrive with a backoff if wait_for_questdrive is True."""
+    mocker.patch("random.uniform", return_value=1)
+    mock_wait_to_probe = mocker.patch("questdrive_syncer.main.wait_to_probe")
+    mock_is_online, mock_print = make_main_mocks(
         mocker,
         "mock_is_online",
         "mock_print",
-        "mock_sleep",
-        is_online=[False, True],
-        args=("--wait-for-questdrive",),
+        is_online=[False, False, True],
     )
 
-    main()
+    main(make_config("--wait-for-questdrive"))
 
     mock_print.assert_any_call(
         'Waiting for QuestDrive at "url/"...',
     )
+    assert mock_is_online.call_count == 3  # noqa: PLR2004
+    assert [call.args[1:] for call in mock_wait_to_probe.mock_calls] == [
+        (5, None),
+        (10, None),
+    ]
+
+
+def test_probes_once_questdrive_joins_if_wait_for_questdrive(
+    mocker: MockerFixture,
+) -> None:
+    """Main() probes QuestDrive as soon as it joins the network if wait_for_questdrive is True."""
+    watcher = mocker.Mock(
+        ip_address="192.168.0.2",
+        interval=0,
+        joined=mocker.Mock(return_value=True),
+    )
+    mock_make_watcher = mocker.patch(
+        "questdrive_syncer.main.make_watcher",
+        return_value=watcher,
+    )
+    mock_is_online, mock_print = make_main_mocks(
+        mocker,
+        "mock_is_online",
+        "mock_print",
+        is_online=[False, True],
+    )
+
+    main(make_config("--wait-for-questdrive"))
+
+    mock_make_watcher.assert_called_once_with("url/")
+    watcher.joined.assert_called_once_with()
     assert mock_is_online.call_count == 2  # noqa: PLR2004
-    mock_sleep.assert_any_call(5 * 60)
+    mock_print.assert_any_call("192.168.0.2 joined the network, probing now...")
 
 
 def test_exits_if_too_much_free_space(mocker: MockerFixture) -> None:
-    """Main() exits if there is too much free space."""
-    mock_print, mock_fetch_homepage_html, mock_parse_homepage_html = make_main_mocks(
+    """Main() exits - discarding the video list - if there is too much free space."""
+    (
+        mock_print,
+        mock_fetch_homepage_html,
+        mock_parse_homepage_html,
+        mock_parse_video_list_html,
+    ) = make_main_mocks(
         mocker,
         "mock_print",
         "mock_fetch_homepage_html",
         "mock_parse_homepage_html",
-        args=("--only-run-if-space-less=500",),
+        "mock_parse_video_list_html",
     )
 
+    config = make_config("--only-run-if-space-less=500")
+
     with pytest.raises(SystemExit) as exc_info:
-        main()
+        main(config)
 
     assert exc_info.value.code == TOO_MUCH_SPACE_EXIT_CODE
-    mock_fetch_homepage_html.assert_called_once_with()
+    assert mock_fetch_homepage_html.mock_calls[0].args[0].config is config
+    mock_parse_video_list_html.assert_not_called()
     mock_parse_homepage_html.assert_called_once_with("html")
     mock_print.assert_any_call(
         "QuestDrive reports 1,000.0 MB free space, which is more than the configured limit of 500.0 MB. Exiting.",
@@ -152,14 +290,15 @@ def test_exits_if_not_enough_battery(mocker: MockerFixture) -> None:
         "mock_print",
         "mock_fetch_homepage_html",
         "mock_parse_homepage_html",
-        args=("--only-run-if-battery-above=75",),
     )
 
+    config = make_config("--only-run-if-battery-above=75")
+
     with pytest.raises(SystemExit) as exc_info:
-        main()
+        main(config)
 
     assert exc_info.value.code == NOT_ENOUGH_BATTERY_EXIT_CODE
-    mock_fetch_homepage_html.assert_called_once_with()
+    assert mock_fetch_homepage_html.mock_calls[0].args[0].config is config
     mock_parse_homepage_html.assert_called_once_with("html")
     mock_print.assert_any_call(
         "QuestDrive reports 50% battery remaining, which is less than the configured minimum of 75%. Exiting.",
@@ -175,7 +314,7 @@ def test_print_when_successful(mocker: MockerFixture) -> None:
     """Main() prints when successful."""
     mock_print = make_main_mocks(mocker, "mock_print")
 
-    main()
+    main(make_config())
 
     mock_print.assert_any_call(
         'QuestDrive found running at "url/"',
@@ -185,39 +324,79 @@ def test_print_when_successful(mocker: MockerFixture) -> None:
 def test_calls_fetch_video_list_html_and_parse_video_list_html(
     mocker: MockerFixture,
 ) -> None:
-    """Main() calls fetch_video_list_html and parse_video_list_html twice."""
+    """Main() calls fetch_video_list_html and parse_video_list_html once."""
     mock_fetch_video_list_html, mock_parse_video_list_html = make_main_mocks(
         mocker,
         "mock_fetch_video_list_html",
         "mock_parse_video_list_html",
     )
 
-    main()
+    main(make_config())
 
-    assert mock_fetch_video_list_html.call_count == 2  # noqa: PLR2004
-    mock_parse_video_list_html.assert_called_with("html")
+    mock_fetch_video_list_html.assert_called_once()
+    mock_parse_video_list_html.assert_called_once_with("html")
 
 
 def test_proper_grammar_with_one_video(mocker: MockerFixture) -> None:
     """Main() prints "video" if there is only one video."""
     mock_print = make_main_mocks(mocker, "mock_print", parse_video_list_html=[video])
 
-    main()
+    main(make_config())
 
     mock_print.assert_any_call("Found 1 video:")
 
 
-def test_calls_update_actively_recording(mocker: MockerFixture) -> None:
-    """Main() calls update_actively_recording with both video lists."""
-    mock_update_actively_recording = make_main_mocks(
+def test_syncs_older_videos_while_detecting_recording(mocker: MockerFixture) -> None:
+    """Main() syncs the older videos while watching the newest, syncing those in order once watched."""
+    oldest_video = dataclasses.replace(
+        video,
+        modified_at=datetime(2024, 1, 1),
+        mb_size=3.45,
+    )
+    detected = threading.Event()
+    make_main_mocks(
         mocker,
-        "mock_update_actively_recording",
-        parse_video_list_html=[video],
+        parse_video_list_html=[oldest_video, second_video, video],
     )
 
-    main()
+    def detect_recording(*_: object) -> None:
+        assert detected.wait(5), "older videos weren't synced while detecting"
 
-    mock_update_actively_recording.assert_called_with([video], [video])
+    mock_detect_recording = mocker.patch(
+        "questdrive_syncer.main.detect_recording",
+        side_effect=detect_recording,
+    )
+    synced: list[Video] = []
+
+    def download_and_delete_videos(
+        videos: list[Video],
+        _: SyncSession,
+        **kwargs: Any,  # noqa: ANN401
+    ) -> None:
+        for synced_video in kwargs["order"](videos):
+            synced.append(synced_video)
+            detected.set()
+
+    mock_download_and_delete_videos = mocker.patch(
+        "questdrive_syncer.main.download_and_delete_videos",
+        side_effect=download_and_delete_videos,
+    )
+
+    config = make_config("--recording-window=2.5")
+
+    main(config)
+
+    session, candidates, window = mock_detect_recording.mock_calls[0].args
+    assert session.config is config
+    assert candidates == [second_video, video]
+    assert window == 2.5  # noqa: PLR2004
+    mock_download_and_delete_videos.assert_called_once()
+    assert mock_download_and_delete_videos.mock_calls[0].args[0] == [
+        video,
+        second_video,
+        oldest_video,
+    ]
+    assert synced == [oldest_video, video, second_video]
 
 
 def test_dont_continue_if_actively_recording_and_configured(
@@ -226,24 +405,46 @@ def test_dont_continue_if_actively_recording_and_configured(
     """Main() doesn't continue if the Quest is actively recording when the configuration is set accordingly."""
     active_video = dataclasses.replace(video)
     active_video.actively_recording = True
-    mock_print, mock_download_and_delete_videos = make_main_mocks(
+    (
+        mock_print,
+        mock_download_and_delete_videos,
+        mock_detect_recording,
+    ) = make_main_mocks(
         mocker,
         "mock_print",
         "mock_download_and_delete_videos",
+        "mock_detect_recording",
         parse_video_list_html=[active_video],
-        args=("--dont-run-while-actively-recording",),
     )
 
     with pytest.raises(SystemExit) as e:
-        main()
+        main(make_config("--dont-run-while-actively-recording"))
 
     assert e.value.code == ACTIVELY_RECORDING_EXIT_CODE
+    mock_detect_recording.assert_called_once()
     mock_print.assert_called_with(
         "Quest is actively recording, exiting.",
     )
     mock_download_and_delete_videos.assert_not_called()
 
 
+def test_continues_if_not_recording_and_configured(mocker: MockerFixture) -> None:
+    """Main() syncs every video at once when configured to not run while recording, and it isn't."""
+    mock_download_and_delete_videos = make_main_mocks(
+        mocker,
+        "mock_download_and_delete_videos",
+        parse_video_list_html=[second_video, video],
+    )
+
+    main(make_config("--dont-run-while-actively-recording"))
+
+    mock_download_and_delete_videos.assert_called_once()
+    assert mock_download_and_delete_videos.mock_calls[0].args[0] == [
+        video,
+        second_video,
+    ]
+
+
 def test_prints_and_downloads_each_video_from_smallest_to_largest(
     mocker: MockerFixture,
 ) -> None:
@@ -255,11 +456,238 @@ def test_prints_and_downloads_each_video_from_smallest_to_largest(
         parse_video_list_html=[video, second_video],
     )
 
-    main()
+    config = make_config()
+
+    main(config)
+
+    videos, session = mock_download_and_delete_videos.mock_calls[0].args
+    assert videos == [video, second_video]
+    assert session.config is config
+    assert session.limiter is None
+    mock_print.assert_called_with(f'Finished syncing "url/": {session.metrics}')
+
+
+def test_saves_fingerprint_after_complete_sync(mocker: MockerFixture) -> None:
+    """Main() saves the fingerprint of the video list once every video was synced."""
+    mock_write_fingerprint = make_main_mocks(mocker, "mock_write_fingerprint")
+
+    main(make_config())
 
-    mock_download_and_delete_videos.assert_called_with(
-        [video, second_video],
-        delete=True,
-        download=True,
-        simple_output=True,
+    mock_write_fingerprint.assert_called_once_with(
+        "output/",
+        listing_fingerprint("html"),
     )
+
+
+def test_doesnt_save_fingerprint_after_incomplete_sync(mocker: MockerFixture) -> None:
+    """Main() doesn't save the fingerprint when videos were skipped or failed."""
+    for metric in ("videos_skipped", "videos_failed"):
+        mock_write_fingerprint = make_main_mocks(mocker, "mock_write_fingerprint")
+        mocker.patch(
+            "questdrive_syncer.main.download_and_delete_videos",
+            side_effect=lambda _, session, metric=metric, **__: session.metrics.add(
+                **{metric: 1},
+            ),
+        )
+
+        main(make_config())
+
+        mock_write_fingerprint.assert_not_called()
+
+
+def test_exits_if_video_list_unchanged(mocker: MockerFixture) -> None:
+    """Main() exits before parsing when the video list is unchanged since the last complete sync."""
+    mock_print, mock_parse_video_list_html, mock_read_fingerprint = make_main_mocks(
+        mocker,
+        "mock_print",
+        "mock_parse_video_list_html",
+        "mock_read_fingerprint",
+        read_fingerprint=listing_fingerprint("html"),
+    )
+
+    main(make_config())
+
+    mock_read_fingerprint.assert_called_once_with("output/")
+    mock_print.assert_called_with(
+        "Video list unchanged since the last complete sync, exiting.",
+    )
+    mock_parse_video_list_html.assert_not_called()
+
+
+def test_syncs_video_list_unchanged_since_run_without_download_or_delete(
+    mocker: MockerFixture,
+) -> None:
+    """Main() syncs a video list unchanged since a run that didn't download or delete, which saved its own fingerprint."""
+    mock_write_fingerprint = make_main_mocks(mocker, "mock_write_fingerprint")
+    main(make_config("--dont-download", "--dont-delete"))
+    (_, fingerprint), _ = mock_write_fingerprint.call_args
+    mock_download_and_delete_videos = make_main_mocks(
+        mocker,
+        "mock_download_and_delete_videos",
+        read_fingerprint=fingerprint,
+    )
+
+    main(make_config())
+
+    mock_download_and_delete_videos.assert_called_once()
+
+
+def test_syncs_unchanged_video_list_if_forced(mocker: MockerFixture) -> None:
+    """Main() syncs an unchanged video list when forced."""
+    mock_download_and_delete_videos = make_main_mocks(
+        mocker,
+        "mock_download_and_delete_videos",
+        read_fingerprint=listing_fingerprint("html"),
+    )
+
+    main(make_config("--force"))
+
+    mock_download_and_delete_videos.assert_called_once()
+
+
+def test_syncs_fleet(mocker: MockerFixture) -> None:
+    """Main() syncs each fleet device instead of a single QuestDrive."""
+    mock_sync_fleet = mocker.patch("questdrive_syncer.main.sync_fleet")
+
+    main(
+        init_config(
+            "--fleet-device=http://left=left",
+            "--fleet-device=http://right=right",
+            "--simple-output",
+        ),
+    )
+
+    sessions, sync = mock_sync_fleet.mock_calls[0].args
+    assert [session.config.questdrive_url for session in sessions] == [
+        "http://left/",
+        "http://right/",
+    ]
+    assert [session.lock.lock_file for session in sessions] == [
+        lock_file_path(session.config) for session in sessions
+    ]
+    assert sync.func is main_module.sync_and_export
+    assert sync.keywords == {"sessions": sessions}
+    assert mock_sync_fleet.mock_calls[0].kwargs == {"simple_output": True}
+
+
+def test_fails_if_already_syncing(mocker: MockerFixture) -> None:
+    """Main() fails if the QuestDrive is already being synced to the output directory."""
+    mock_is_online = make_main_mocks(mocker, "mock_is_online")
+    config = make_config()
+
+    with ProcessLock(lock_file_path(config)), pytest.raises(LockError):
+        main(config)
+
+    mock_is_online.assert_not_called()
+
+
+def test_writes_trace(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Main() writes a trace of the sync, with a span of the whole sync."""
+    path = tmp_path / "trace.json"
+    make_main_mocks(mocker)
+
+    main(make_config(f"--trace={path}"))
+
+    events = json.loads(path.read_text())["traceEvents"]
+    assert events[0]["args"] == {"name": "url/"}
+    assert "sync" in [event["name"] for event in events]
+
+
+def test_records_traffic(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Main() records the traffic of the session to the cassette."""
+    path = tmp_path / "cassette.json"
+    mock_is_online = make_main_mocks(mocker, "mock_is_online")
+
+    main(make_config(f"--record={path}"))
+
+    session = mock_is_online.call_args.args[0]
+    assert isinstance(session.client._transport, RecordingTransport)  # noqa: SLF001
+    assert json.loads(path.read_text()) == {"interactions": []}
+
+
+def test_runs_daemon(mocker: MockerFixture) -> None:
+    """Main() keeps syncing the QuestDrive instance in daemon mode."""
+    mock_run_daemon = mocker.patch("questdrive_syncer.main.run_daemon")
+    config = make_config("--daemon")
+
+    main(config)
+
+    session = mock_run_daemon.mock_calls[0].args[0]
+    assert session.config is config
+    sync = mock_run_daemon.mock_calls[0].kwargs["sync"]
+    assert sync.func is main_module.sync_and_export
+    assert sync.keywords == {"sessions": [session]}
+
+
+def test_syncs_discovered_questdrive(mocker: MockerFixture) -> None:
+    """Main() syncs QuestDrive at the discovered URL."""
+    mock_discover = mocker.patch(
+        "questdrive_syncer.main.discover",
+        return_value="http://192.168.0.3:7123/",
+    )
+    mock_print, mock_fetch_homepage_html = make_main_mocks(
+        mocker,
+        "mock_print",
+        "mock_fetch_homepage_html",
+    )
+
+    config = make_config("--discover=192.168.0.0/24", "--only-run-if-battery-above=1")
+
+    main(config)
+
+    assert mock_discover.mock_calls[0].args == (config, IPv4Network("192.168.0.0/24"))
+    mock_print.assert_any_call('QuestDrive discovered at "http://192.168.0.3:7123/"')
+    session = mock_fetch_homepage_html.mock_calls[0].args[0]
+    assert session.config.questdrive_url == "http://192.168.0.3:7123/"
+
+
+def test_syncs_configured_questdrive_if_not_discovered(mocker: MockerFixture) -> None:
+    """Main() falls back to the configured URL when QuestDrive isn't discovered."""
+    mocker.patch("questdrive_syncer.main.discover", return_value=None)
+    mock_print, mock_fetch_homepage_html = make_main_mocks(
+        mocker,
+        "mock_print",
+        "mock_fetch_homepage_html",
+    )
+
+    config = make_config("--discover=192.168.0.0/24", "--only-run-if-battery-above=1")
+
+    main(config)
+
+    mock_print.assert_any_call('QuestDrive not found in "192.168.0.0/24"')
+    assert mock_fetch_homepage_html.mock_calls[0].args[0].config is config
+
+
+class TestSyncAndExport:
+    """Tests for the sync_and_export() function."""
+
+    @staticmethod
+    def test_times_sync_without_textfile(mocker: MockerFixture) -> None:
+        """Times the whole sync, without writing a textfile unless configured."""
+        mock_sync = mocker.patch("questdrive_syncer.main.sync")
+        mock_write_textfile = mocker.patch("questdrive_syncer.main.write_textfile")
+        session = SyncSession(Config(questdrive_url="url"))
+
+        sync_and_export(session, sessions=[session])
+
+        mock_sync.assert_called_once_with(session, None)
+        assert session.timings.durations["sync"].count == 1
+        mock_write_textfile.assert_not_called()
+
+    @staticmethod
+    def test_writes_textfile_even_on_exit(mocker: MockerFixture) -> None:
+        """Writes the textfile of every session, even when the sync exits."""
+        mocker.patch(
+            "questdrive_syncer.main.sync",
+            side_effect=lambda *_: sys.exit(FAILURE_EXIT_CODE),
+        )
+        mock_write_textfile = mocker.patch("questdrive_syncer.main.write_textfile")
+        session = SyncSession(
+            Config(questdrive_url="url", metrics_textfile="sync.prom"),
+        )
+        sessions = [session, SyncSession(Config(questdrive_url="other"))]
+
+        with pytest.raises(SystemExit):
+            sync_and_export(session, sessions=sessions)
+
+        mock_write_textfile.assert_called_once_with("sync.prom", sessions)
@@ -0,0 +1,81 @@
+"""Tests for the mirror module."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from questdrive_syncer.mirror import MirrorWriter, mirroring
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+
+class TestMirrorWriter:
+    """Tests for the MirrorWriter class."""
+
+    @staticmethod
+    def test_writes_chunks(tmp_path: Path) -> None:
+        """Writes every chunk to the partial mirror, dating it once closed & renaming it into place once kept."""
+        writer = MirrorWriter(tmp_path / "nested" / "video.mp4", (1, 2))
+
+        writer.write(b"vid")
+        writer.write(b"eo")
+        writer.close()
+
+        assert (tmp_path / "nested" / ".video.mp4.part").read_bytes() == b"video"
+        assert not (tmp_path / "nested" / "video.mp4").exists()
+
+        writer.keep()
+
+        assert list((tmp_path / "nested").iterdir()) == [
+            tmp_path / "nested" / "video.mp4",
+        ]
+        assert (tmp_path / "nested" / "video.mp4").read_bytes() == b"video"
+        assert (tmp_path / "nested" / "video.mp4").stat().st_mtime == 2  # noqa: PLR2004
+        assert writer.byte_count == 5  # noqa: PLR2004
+        assert writer.error is None
+
+    @staticmethod
+    def test_drains_after_error(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Keeps taking chunks after failing to write, so the download isn't blocked."""
+        mocker.patch("questdrive_syncer.mirror.MIRROR_QUEUE_CHUNKS", 1)
+        (tmp_path / ".video.mp4.part").mkdir()
+        writer = MirrorWriter(tmp_path / "video.mp4", (1, 2))
+
+        for _ in range(5):
+            writer.write(b"video")
+        writer.close()
+
+        assert isinstance(writer.error, IsADirectoryError)
+        assert writer.byte_count == 0
+
+
+def test_mirroring_discards_unkept(tmp_path: Path) -> None:
+    """mirroring() only leaves the mirrors that were kept."""
+    with mirroring([tmp_path / "a.mp4", tmp_path / "b.mp4"], (1, 2)) as writers:
+        for writer in writers:
+            writer.write(b"video")
+            writer.close()
+        writers[0].keep()
+
+    assert list(tmp_path.iterdir()) == [tmp_path / "a.mp4"]
+
+
+def test_mirroring_closes_on_error(tmp_path: Path) -> None:
+    """mirroring() closes & removes every writer if there's an error."""
+
+    def write_then_fail(writers: list[MirrorWriter]) -> None:
+        for writer in writers:
+            writer.write(b"vid")
+        raise ValueError
+
+    with pytest.raises(ValueError), mirroring(  # noqa: PT011
+        [tmp_path / "a.mp4", tmp_path / "b.mp4"],
+        (1, 2),
+    ) as writers:
+        write_then_fail(writers)
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,208 @@
+"""Tests for the placement module."""
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.config import Config
+from questdrive_syncer.constants import PLACEMENT_INDEX_FILENAME
+from questdrive_syncer.placement import IndexEntry, Placement, read_index, write_index
+from questdrive_syncer.structures import Video
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_mock import MockerFixture
+
+
+def make_video(filename: str) -> Video:
+    """Create a video recorded in January 2024."""
+    return Video(
+        filename,
+        filename,
+        datetime(2024, 1, 1, 11, 12, 13),
+        datetime(2024, 1, 1, 12, 13, 14),
+        5,
+    )
+
+
+class TestReadIndex:
+    """Tests for the read_index() function."""
+
+    @staticmethod
+    def test_missing(tmp_path: Path) -> None:
+        """Returns an empty index if there's no index."""
+        assert read_index(str(tmp_path)) == {}
+
+    @staticmethod
+    def test_last_entry_wins(tmp_path: Path) -> None:
+        """Returns the last placement of each video, ignoring lines without a root."""
+        (tmp_path / PLACEMENT_INDEX_FILENAME).write_text(
+            "a.mp4\tleft/\nb.mp4\tleft/\tBeat/2024\na.mp4\tright/\nbroken\n",
+        )
+
+        assert read_index(str(tmp_path)) == {
+            "a.mp4": IndexEntry("right/"),
+            "b.mp4": IndexEntry("left/", "Beat/2024"),
+        }
+
+
+def test_write_index(tmp_path: Path) -> None:
+    """write_index() replaces the index with one sorted entry per video."""
+    write_index(
+        str(tmp_path / "output"),
+        {"b.mp4": IndexEntry("right/", "Beat/2024"), "a.mp4": IndexEntry("left/")},
+    )
+
+    assert (tmp_path / "output" / PLACEMENT_INDEX_FILENAME).read_text() == (
+        "a.mp4\tleft/\nb.mp4\tright/\tBeat/2024\n"
+    )
+    assert [path.name for path in (tmp_path / "output").iterdir()] == [
+        PLACEMENT_INDEX_FILENAME,
+    ]
+
+
+class TestPlacement:
+    """Tests for the Placement class."""
+
+    @staticmethod
+    def make_placement(
+        tmp_path: Path,
+        mocker: MockerFixture,
+        **config: str,
+    ) -> Placement:
+        """Create a placement across left, middle & right roots, with 1, 3 & 2 MB free."""
+        reservations = mocker.Mock(
+            free_mb={
+                f"{tmp_path}/left/": 1,
+                f"{tmp_path}/middle/": 3,
+                f"{tmp_path}/right/": 2,
+            }.get,
+        )
+        return Placement(
+            Config(
+                questdrive_url="url",
+                output_path=f"{tmp_path}/left/",
+                output_roots=[f"{tmp_path}/middle/", f"{tmp_path}/right/"],
+                **config,  # type: ignore[arg-type]
+            ),
+            reservations,
+        )
+
+    @staticmethod
+    def test_single_root(tmp_path: Path) -> None:
+        """Places every video in the output directory without an index."""
+        placement = Placement(Config(questdrive_url="url", output_path=str(tmp_path)))
+
+        assert placement.candidates("a.mp4") == [str(tmp_path)]
+        entry = placement.entry(make_video("a.mp4"))
+        placement.record("a.mp4", entry)
+
+        assert entry.path("a.mp4") == tmp_path / "a.mp4"
+        assert placement.placed["a.mp4"].path("a.mp4") == tmp_path / "a.mp4"
+        assert list(tmp_path.iterdir()) == []
+
+    @staticmethod
+    def test_prefers_headroom(tmp_path: Path, mocker: MockerFixture) -> None:
+        """Prefers the roots with the most free space."""
+        placement = TestPlacement.make_placement(tmp_path, mocker)
+
+        assert placement.candidates("a.mp4") == [
+            f"{tmp_path}/middle/",
+            f"{tmp_path}/right/",
+            f"{tmp_path}/left/",
+        ]
+
+    @staticmethod
+    def test_round_robin(tmp_path: Path, mocker: MockerFixture) -> None:
+        """Prefers each root in turn."""
+        placement = TestPlacement.make_placement(
+            tmp_path,
+            mocker,
+            placement="round-robin",
+        )
+
+        assert [placement.entry(make_video(f"{i}.mp4")).root for i in range(4)] == [
+            f"{tmp_path}/left/",
+            f"{tmp_path}/middle/",
+            f"{tmp_path}/right/",
+            f"{tmp_path}/left/",
+        ]
+
+    @staticmethod
+    def test_indexes_once_written(tmp_path: Path, mocker: MockerFixture) -> None:
+        """Only offers the root chosen for a video, adding it to the index once it's written."""
+        placement = TestPlacement.make_placement(tmp_path, mocker)
+
+        entry = placement.choose(make_video("a.mp4"), f"{tmp_path}/right/")
+
+        assert placement.candidates("a.mp4") == [f"{tmp_path}/right/"]
+        assert placement.entry(make_video("a.mp4")) == entry
+        assert "a.mp4" not in placement.placed
+        assert read_index(f"{tmp_path}/left/") == {}
+
+        placement.record("a.mp4", entry)
+        placement.record("a.mp4", entry)
+
+        assert placement.placed["a.mp4"].path("a.mp4") == tmp_path / "right" / "a.mp4"
+        assert read_index(f"{tmp_path}/left/") == {
+            "a.mp4": IndexEntry(f"{tmp_path}/right/"),
+        }
+        assert (tmp_path / "left" / PLACEMENT_INDEX_FILENAME).read_text().count(
+            "a.mp4",
+        ) == 1
+
+    @staticmethod
+    def test_merges_previous_index(tmp_path: Path, mocker: MockerFixture) -> None:
+        """Uses the placements of previous runs on configured roots, compacting the index."""
+        (tmp_path / "left").mkdir()
+        (tmp_path / "left" / PLACEMENT_INDEX_FILENAME).write_text(
+            f"a.mp4\t{tmp_path}/left/\na.mp4\t{tmp_path}/right/\nb.mp4\tgone/\n",
+        )
+        placement = TestPlacement.make_placement(tmp_path, mocker)
+
+        assert placement.entry(make_video("a.mp4")) == IndexEntry(f"{tmp_path}/right/")
+        placement.record("b.mp4", placement.entry(make_video("b.mp4")))
+        assert placement.placed["b.mp4"].path("b.mp4") == tmp_path / "middle" / "b.mp4"
+        assert (tmp_path / "left" / PLACEMENT_INDEX_FILENAME).read_text() == (
+            f"a.mp4\t{tmp_path}/right/\nb.mp4\t{tmp_path}/middle/\n"
+        )
+
+    @staticmethod
+    def test_layout(tmp_path: Path) -> None:
+        """Places videos in the subdirectory of the layout, indexing them even with a single root."""
+        placement = Placement(
+            Config(
+                questdrive_url="url",
+                output_path=f"{tmp_path}/",
+                layout="{application_name}/{created_at:%Y}/{created_at:%m}",
+            ),
+        )
+
+        entry = placement.entry(make_video("Beat-20240101-111213.mp4"))
+        assert "Beat-20240101-111213.mp4" not in placement.placed
+        placement.record("Beat-20240101-111213.mp4", entry)
+
+        assert placement.placed["Beat-20240101-111213.mp4"].path(
+            "Beat-20240101-111213.mp4",
+        ) == (tmp_path / "Beat" / "2024" / "01" / "Beat-20240101-111213.mp4")
+        assert read_index(str(tmp_path)) == {
+            "Beat-20240101-111213.mp4": IndexEntry(f"{tmp_path}/", "Beat/2024/01"),
+        }
+
+    @staticmethod
+    def test_keeps_indexed_shard(tmp_path: Path) -> None:
+        """Saves a video downloaded again to its indexed subdirectory, even if the layout changed."""
+        (tmp_path / PLACEMENT_INDEX_FILENAME).write_text(
+            f"a.mp4\t{tmp_path}/\told\n",
+        )
+        placement = Placement(
+            Config(
+                questdrive_url="url",
+                output_path=f"{tmp_path}/",
+                layout="{application_name}",
+            ),
+        )
+
+        assert placement.entry(make_video("a.mp4")).path("a.mp4") == Path(
+            tmp_path / "old" / "a.mp4",
+        )
@@ -0,0 +1,85 @@
+"""Tests for the presence module."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.presence import NeighborWatcher, make_watcher, read_neighbors
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+HEADER = (
+    "IP address       HW type     Flags       HW address            Mask     Device\n"
+)
+
+
+def write_table(path: Path, *entries: tuple[str, str]) -> Path:
+    """Write a neighbor table of IP addresses & flags."""
+    path.write_text(
+        HEADER
+        + "".join(
+            f"{ip_address}      0x1         {flags}         aa:bb:cc:dd:ee:ff     *        wlan0\n"
+            for ip_address, flags in entries
+        ),
+    )
+    return path
+
+
+def test_read_neighbors(tmp_path: Path) -> None:
+    """read_neighbors() returns only the entries with a resolved hardware address."""
+    table = write_table(
+        tmp_path / "arp",
+        ("192.168.0.2", "0x2"),
+        ("192.168.0.3", "0x0"),
+        ("192.168.0.4", "0x6"),
+    )
+
+    assert read_neighbors(table) == {"192.168.0.2", "192.168.0.4"}
+
+
+class TestNeighborWatcher:
+    """Tests for the NeighborWatcher class."""
+
+    @staticmethod
+    def test_joined(tmp_path: Path) -> None:
+        """joined() is True only once the IP address appears."""
+        table = write_table(tmp_path / "arp", ("192.168.0.2", "0x0"))
+        watcher = NeighborWatcher("192.168.0.2", path=table)
+
+        assert watcher.joined() is False
+        write_table(table, ("192.168.0.2", "0x2"))
+        assert watcher.joined() is True
+        assert watcher.joined() is False
+
+    @staticmethod
+    def test_already_present(tmp_path: Path) -> None:
+        """joined() is False while the IP address was already present."""
+        table = write_table(tmp_path / "arp", ("192.168.0.2", "0x2"))
+
+        assert NeighborWatcher("192.168.0.2", path=table).joined() is False
+
+
+class TestMakeWatcher:
+    """Tests for the make_watcher() function."""
+
+    @staticmethod
+    def test_ip_address(tmp_path: Path) -> None:
+        """Watches the IP address of the URL."""
+        table = write_table(tmp_path / "arp")
+
+        watcher = make_watcher("http://192.168.0.2:7123/", table)
+
+        assert watcher is not None
+        assert watcher.ip_address == "192.168.0.2"
+
+    @staticmethod
+    def test_hostname(tmp_path: Path) -> None:
+        """Returns None for hostnames."""
+        assert (
+            make_watcher("http://quest.local/", write_table(tmp_path / "arp")) is None
+        )
+
+    @staticmethod
+    def test_missing_table(tmp_path: Path) -> None:
+        """Returns None without a neighbor table."""
+        assert make_watcher("http://192.168.0.2/", tmp_path / "arp") is None
@@ -0,0 +1,130 @@
+"""Tests for the profiling module."""
+from __future__ import annotations
+
+import pstats
+import threading
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.profiling import StackSampler, function_name, profiling
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    import pytest
+
+
+def spin(started: threading.Event, stop: threading.Event) -> None:
+    """Wait until stopped, to be sampled."""
+    started.set()
+    stop.wait()
+
+
+def test_function_name() -> None:
+    """function_name() names the function along with where it's defined."""
+    assert (
+        function_name(spin.__code__)
+        == f"spin (test_profiling.py:{spin.__code__.co_firstlineno})"
+    )
+
+
+class TestStackSampler:
+    """Tests for the StackSampler class."""
+
+    @staticmethod
+    def test_samples_other_threads() -> None:
+        """Counts the stacks of every other thread, outermost function first."""
+        started = threading.Event()
+        stop = threading.Event()
+        thread = threading.Thread(target=spin, args=(started, stop))
+        thread.start()
+        started.wait()
+        sampler = StackSampler()
+
+        sampler.sample()
+        stop.set()
+        thread.join()
+
+        stacks = [
+            stack for stack in sampler.stacks if any("spin (" in f for f in stack)
+        ]
+        assert stacks[0][0].startswith("_bootstrap ")
+        assert not any(
+            "test_samples_other_threads" in function
+            for stack in sampler.stacks
+            for function in stack
+        )
+
+    @staticmethod
+    def test_runs_in_background() -> None:
+        """Samples at the interval until stopped."""
+        sampler = StackSampler(0.001)
+
+        sampler.start()
+        threading.Event().wait(0.05)
+        sampler.stop()
+
+        assert sum(sampler.stacks.values())
+
+    @staticmethod
+    def test_top_and_write(tmp_path: Path) -> None:
+        """Ranks functions by samples they ran in, and writes collapsed stacks."""
+        sampler = StackSampler()
+        sampler.stacks.update({("main", "parse"): 3, ("main", "write"): 1})
+        path = tmp_path / "profile.folded"
+
+        sampler.write(str(path))
+
+        assert sampler.top(2) == [("main", 4, 0), ("parse", 3, 3)]
+        assert path.read_text() == "main;parse 3\nmain;write 1\n"
+
+
+class TestProfiling:
+    """Tests for the profiling() function."""
+
+    @staticmethod
+    def test_does_nothing_by_default(capsys: pytest.CaptureFixture[str]) -> None:
+        """Neither profiles nor traces memory without being configured to."""
+        with profiling(None):
+            pass
+
+        assert capsys.readouterr().out == ""
+
+    @staticmethod
+    def test_deterministic(
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Writes pstats of every call, printing the top functions."""
+        path = tmp_path / "profile.pstats"
+
+        with profiling(str(path), count=5):
+            function_name(spin.__code__)
+
+        stats = pstats.Stats(str(path))
+        assert any(
+            function == "function_name"
+            for _, _, function in stats.stats  # type: ignore[attr-defined]
+        )
+        assert "cumulative" in capsys.readouterr().out
+
+    @staticmethod
+    def test_sampling(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Writes collapsed stacks, printing the functions in the most samples."""
+        path = tmp_path / "profile.folded"
+
+        with profiling(str(path), mode="sampling"):
+            threading.Event().wait(0.05)
+
+        assert path.read_text()
+        assert "samples, every 10 ms:" in capsys.readouterr().out
+
+    @staticmethod
+    def test_memory(capsys: pytest.CaptureFixture[str]) -> None:
+        """Prints the peak memory traced, and the lines allocating the most."""
+        with profiling(None, memory=True, count=1):
+            allocated = [bytearray(1000**2)]
+
+        assert allocated
+        out = capsys.readouterr().out
+        assert "Peak traced memory: " in out
+        assert "test_profiling.py" in out
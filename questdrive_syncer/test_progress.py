@@ -0,0 +1,147 @@
+"""Tests for the progress module."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from questdrive_syncer.progress import TransferProgress
+from questdrive_syncer.structures import Video
+
+if TYPE_CHECKING:  # pragma: no cover
+    from unittest.mock import Mock
+
+    from pytest_mock import MockerFixture
+
+video = Video(
+    "full%2Fpathtofile.mp4",
+    "filename-20240101-111213.mp4",
+    datetime(2024, 1, 1, 11, 12, 13),
+    datetime(2024, 1, 1, 12, 13, 14),
+    1,
+)
+
+
+class TestTransferProgress:
+    """Tests for the TransferProgress class."""
+
+    @staticmethod
+    def make_transfer_progress(
+        mocker: MockerFixture,
+    ) -> tuple[TransferProgress, Mock, list[float]]:
+        """Create progress of two videos, with a mocked display & clock."""
+        clock = [100.0]
+        mocker.patch("time.monotonic", side_effect=lambda: clock[0])
+        progress = mocker.Mock(add_task=mocker.Mock(side_effect=range(10)))
+        return (
+            TransferProgress(progress, 3_000_000, 2, refresh_seconds=1),
+            progress,
+            clock,
+        )
+
+    @staticmethod
+    def test_adds_summary_task(mocker: MockerFixture) -> None:
+        """Adds only the summary task initially."""
+        _, progress, _ = TestTransferProgress.make_transfer_progress(mocker)
+
+        progress.add_task.assert_called_once_with(
+            "Total",
+            total=3_000_000,
+            filename="Total (0/2)",
+        )
+
+    @staticmethod
+    def test_start_adds_task(mocker: MockerFixture) -> None:
+        """start() adds a task for the video."""
+        transfers, progress, _ = TestTransferProgress.make_transfer_progress(mocker)
+
+        assert transfers.start(video) == 1
+        progress.add_task.assert_called_with(
+            "Download",
+            total=1_000_000,
+            filename="filename-20240101-111213.mp4",
+        )
+
+    @staticmethod
+    def test_advance_pushes_at_refresh_rate(mocker: MockerFixture) -> None:
+        """advance() only pushes to the display once per refresh."""
+        transfers, progress, clock = TestTransferProgress.make_transfer_progress(mocker)
+        task = transfers.start(video)
+
+        transfers.advance(task, 100)
+        transfers.advance(task, 100)
+        clock[0] += 0.5
+        transfers.advance(task, 100)
+        assert progress.update.call_count == 2  # noqa: PLR2004
+
+        clock[0] += 0.5
+        transfers.advance(task, 100)
+
+        assert progress.update.call_count == 4  # noqa: PLR2004
+        progress.update.assert_any_call(task, completed=400, total=1_000_000)
+        progress.update.assert_called_with(
+            0,
+            completed=400,
+            total=3_000_000,
+            filename="Total (0/2)",
+        )
+
+    @staticmethod
+    def test_set_total_adjusts_summary(mocker: MockerFixture) -> None:
+        """set_total() adjusts the total of the transfer & summary."""
+        transfers, progress, _ = TestTransferProgress.make_transfer_progress(mocker)
+        task = transfers.start(video)
+
+        transfers.set_total(task, 1_500_000)
+        transfers.advance(task, 100)
+
+        progress.update.assert_any_call(task, completed=100, total=1_500_000)
+        progress.update.assert_called_with(
+            0,
+            completed=100,
+            total=3_500_000,
+            filename="Total (0/2)",
+        )
+
+    @staticmethod
+    def test_finish_removes_task(mocker: MockerFixture) -> None:
+        """finish() removes the task, counting its remaining bytes as done."""
+        transfers, progress, _ = TestTransferProgress.make_transfer_progress(mocker)
+        task = transfers.start(video)
+        transfers.advance(task, 100)
+
+        transfers.finish(task)
+
+        progress.remove_task.assert_called_once_with(task)
+        progress.update.assert_called_with(
+            0,
+            completed=1_000_000,
+            total=3_000_000,
+            filename="Total (1/2)",
+        )
+
+    @staticmethod
+    def test_skip(mocker: MockerFixture) -> None:
+        """skip() counts the bytes as done without a task."""
+        transfers, progress, _ = TestTransferProgress.make_transfer_progress(mocker)
+
+        transfers.skip(2_000_000)
+
+        progress.update.assert_called_once_with(
+            0,
+            completed=2_000_000,
+            total=3_000_000,
+            filename="Total (1/2)",
+        )
+
+    @staticmethod
+    def test_close_removes_tasks(mocker: MockerFixture) -> None:
+        """close() removes the summary task & those of unfinished transfers."""
+        transfers, progress, _ = TestTransferProgress.make_transfer_progress(mocker)
+        task = transfers.start(video)
+
+        transfers.close()
+
+        assert [call.args for call in progress.remove_task.call_args_list] == [
+            (task,),
+            (0,),
+        ]
@@ -0,0 +1,165 @@
+"""Tests for the recording module."""
+from __future__ import annotations
+
+import dataclasses
+from concurrent.futures import Future
+from datetime import datetime
+from typing import TYPE_CHECKING, ClassVar
+
+import pytest
+
+from questdrive_syncer.config import Config
+from questdrive_syncer.recording import (
+    detect_recording,
+    hold_back,
+    recording_candidates,
+    video_byte_count,
+)
+from questdrive_syncer.session import SyncSession
+from questdrive_syncer.structures import Video
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pytest_httpx import HTTPXMock
+    from pytest_mock import MockerFixture
+
+video = Video(
+    "full%2Fpathtofile.mp4",
+    "filename-20240101-111213.mp4",
+    datetime(2024, 1, 1, 11, 12, 13),
+    datetime(2024, 1, 1, 12, 13, 14),
+    2,
+)
+
+
+@pytest.fixture()
+def session() -> SyncSession:
+    """Session for the example QuestDrive instance."""
+    return SyncSession(Config(questdrive_url="https://example.com/"))
+
+
+def test_recording_candidates() -> None:
+    """recording_candidates() returns the most recently modified videos."""
+    older = dataclasses.replace(video, modified_at=datetime(2023, 1, 1))
+    newer = dataclasses.replace(video, modified_at=datetime(2025, 1, 1))
+
+    assert recording_candidates([older, newer, video], 2) == [newer, video]
+
+
+def test_video_byte_count(httpx_mock: HTTPXMock, session: SyncSession) -> None:
+    """video_byte_count() returns the Content-Length of a HEAD request of the video."""
+    httpx_mock.add_response(
+        method="HEAD",
+        url="https://example.com/download/full%2Fpathtofile.mp4",
+        headers={"Content-Length": "1234"},
+    )
+
+    assert video_byte_count(session, video) == 1234  # noqa: PLR2004
+
+
+class TestDetectRecording:
+    """Tests for the detect_recording() function."""
+
+    @staticmethod
+    def make_video_byte_count_mock(
+        mocker: MockerFixture,
+        byte_counts: list[int],
+    ) -> None:
+        """Mock the byte counts returned for the video."""
+        mocker.patch(
+            "questdrive_syncer.recording.video_byte_count",
+            side_effect=byte_counts,
+        )
+
+    @staticmethod
+    def test_unchanged(mocker: MockerFixture, session: SyncSession) -> None:
+        """Doesn't mark videos that don't grow, checking throughout the window."""
+        TestDetectRecording.make_video_byte_count_mock(mocker, [2_000_000] * 5)
+        mock_sleep = mocker.patch("time.sleep")
+        unchanged = dataclasses.replace(video)
+
+        detect_recording(session, [unchanged], 2, checks=4)
+
+        assert unchanged.actively_recording is False
+        assert [call.args[0] for call in mock_sleep.mock_calls] == [0.5] * 4
+
+    @staticmethod
+    def test_grows_within_window(mocker: MockerFixture, session: SyncSession) -> None:
+        """Marks videos that grow within the window, stopping once all have grown."""
+        TestDetectRecording.make_video_byte_count_mock(
+            mocker,
+            [2_000_000, 2_000_000, 2_500_000],
+        )
+        mock_sleep = mocker.patch("time.sleep")
+        growing = dataclasses.replace(video)
+
+        detect_recording(session, [growing], 2, checks=4)
+
+        assert growing.actively_recording is True
+        assert mock_sleep.call_count == 2  # noqa: PLR2004
+
+    @staticmethod
+    def test_grew_since_listed(mocker: MockerFixture, session: SyncSession) -> None:
+        """Marks videos that grew since they were listed, without waiting."""
+        TestDetectRecording.make_video_byte_count_mock(mocker, [5_000_000])
+        mock_sleep = mocker.patch("time.sleep")
+        grown = dataclasses.replace(video)
+
+        detect_recording(session, [grown], 2)
+
+        assert grown.actively_recording is True
+        mock_sleep.assert_not_called()
+
+
+class TestHoldBack:
+    """Tests for the hold_back() function."""
+
+    videos: ClassVar[list[Video]] = [
+        dataclasses.replace(video, filepath=filepath)
+        for filepath in ("candidate", "older", "second-candidate", "oldest")
+    ]
+    candidates: ClassVar[list[Video]] = videos[::2]
+
+    @staticmethod
+    def test_holds_back_candidates_while_detecting() -> None:
+        """Holds back the candidates until detection finishes."""
+        detection: Future[None] = Future()
+        videos = hold_back(TestHoldBack.videos, TestHoldBack.candidates, detection)
+
+        assert [next(videos), next(videos)] == TestHoldBack.videos[1::2]
+
+        detection.set_result(None)
+
+        assert list(videos) == TestHoldBack.candidates
+
+    @staticmethod
+    def test_yields_held_back_once_detected() -> None:
+        """Yields the held back candidates before any later video once detection finishes."""
+        detection: Future[None] = Future()
+        videos = hold_back(TestHoldBack.videos, TestHoldBack.candidates, detection)
+
+        assert next(videos) == TestHoldBack.videos[1]
+
+        detection.set_result(None)
+
+        assert list(videos) == [TestHoldBack.videos[0], *TestHoldBack.videos[2:]]
+
+    @staticmethod
+    def test_keeps_order_once_detected() -> None:
+        """Keeps the order of the videos once detection has finished."""
+        detection: Future[None] = Future()
+        detection.set_result(None)
+
+        assert (
+            list(hold_back(TestHoldBack.videos, TestHoldBack.candidates, detection))
+            == TestHoldBack.videos
+        )
+
+    @staticmethod
+    def test_raises_detection_errors() -> None:
+        """Raises the error detection failed with before yielding the held back candidates."""
+        detection: Future[None] = Future()
+        detection.set_exception(ValueError())
+        videos = hold_back(TestHoldBack.videos, TestHoldBack.candidates, detection)
+
+        with pytest.raises(ValueError):  # noqa: PT011
+            list(videos)
@@ -0,0 +1,141 @@
+"""Tests for the session module."""
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import httpx
+
+from questdrive_syncer.cassette import Cassette
+from questdrive_syncer.config import Config
+from questdrive_syncer.helpers import ProcessLock
+from questdrive_syncer.session import SyncMetrics, SyncSession
+from questdrive_syncer.transport import RecordingTransport
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from pytest_httpx import HTTPXMock
+
+
+def make_session(
+    *,
+    lock: ProcessLock | None = None,
+    client: httpx.Client | None = None,
+) -> SyncSession:
+    """Create a session for the example QuestDrive instance."""
+    return SyncSession(
+        Config(questdrive_url="https://example.com/"),
+        lock=lock,
+        client=client,
+    )
+
+
+class TestSyncMetrics:
+    """Tests for the SyncMetrics class."""
+
+    @staticmethod
+    def test_add() -> None:
+        """add() adds to each of the counts."""
+        metrics = SyncMetrics()
+
+        metrics.add(requests=2, videos_downloaded=1)
+        metrics.add(requests=1)
+
+        assert metrics.requests == 3  # noqa: PLR2004
+        assert metrics.videos_downloaded == 1
+
+    @staticmethod
+    def test_str() -> None:
+        """Summarizes the counts."""
+        metrics = SyncMetrics(
+            requests=5,
+            videos_downloaded=2,
+            bytes_downloaded=1_500_000,
+            videos_deleted=1,
+            videos_skipped=3,
+            videos_failed=4,
+        )
+
+        assert (
+            str(metrics)
+            == "Downloaded 2 videos (1.5 MB), deleted 1, skipped 3 & failed 4 using 5 requests"
+        )
+
+
+class TestSyncSession:
+    """Tests for the SyncSession class."""
+
+    @staticmethod
+    def test_closes_own_client() -> None:
+        """Closes the client it created when exited."""
+        with make_session() as session:
+            assert not session.client.is_closed
+
+        assert session.client.is_closed
+
+    @staticmethod
+    def test_reenters_with_new_client() -> None:
+        """Creates a new client when entered again after closing its own."""
+        session = make_session()
+        with session:
+            first_client = session.client
+
+        with session:
+            assert session.client is not first_client
+            assert not session.client.is_closed
+
+        assert session.client.is_closed
+
+    @staticmethod
+    def test_own_client_abandons_stalls() -> None:
+        """Times out reads of the client it created after the stall timeout."""
+        session = SyncSession(Config(questdrive_url="url", stall_timeout=0.5))
+
+        assert session.client.timeout == httpx.Timeout(5, read=0.5)
+
+    @staticmethod
+    def test_own_client_records_to_cassette() -> None:
+        """Records the responses of the client it created to the cassette."""
+        session = SyncSession(Config(questdrive_url="url"), cassette=Cassette())
+
+        assert isinstance(session.client._transport, RecordingTransport)  # noqa: SLF001
+
+    @staticmethod
+    def test_keeps_provided_client_open() -> None:
+        """Leaves a provided client open when exited."""
+        with httpx.Client() as client:
+            with make_session(client=client):
+                pass
+
+            assert not client.is_closed
+
+    @staticmethod
+    def test_holds_lock(tmp_path: Path) -> None:
+        """Holds the lock while entered."""
+        lock_file = tmp_path / "lock"
+
+        with make_session(lock=ProcessLock(lock_file)):
+            assert lock_file.read_text() == str(os.getpid())
+
+        assert lock_file.read_text() == ""
+
+    @staticmethod
+    def test_url() -> None:
+        """url() joins the path onto the QuestDrive URL."""
+        assert make_session().url("list/storage/") == httpx.URL(
+            "https://example.com/list/storage/",
+        )
+
+    @staticmethod
+    def test_counts_requests(httpx_mock: HTTPXMock) -> None:
+        """Counts each request sent."""
+        httpx_mock.add_response(text="body")
+        session = make_session()
+
+        session.get(session.url())
+        session.head(session.url())
+        with session.stream(session.url()) as response:
+            response.read()
+
+        assert session.metrics.requests == 3  # noqa: PLR2004
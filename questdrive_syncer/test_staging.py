@@ -0,0 +1,367 @@
+"""Tests for the staging module."""
+from __future__ import annotations
+
+import errno
+import os
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import pytest
+
+from questdrive_syncer.config import Config
+from questdrive_syncer.constants import PLACEMENT_INDEX_FILENAME
+from questdrive_syncer.helpers import SPACE_RESERVATIONS
+from questdrive_syncer.session import SyncSession
+from questdrive_syncer.staging import Mover, copy_bytes, move_file, same_filesystem
+from questdrive_syncer.structures import Video
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+
+def copy(source: Path, destination: Path, byte_count: int) -> int:
+    """Copy the bytes between the files, returning how many were copied."""
+    with source.open("rb") as source_file, destination.open("wb") as destination_file:
+        return copy_bytes(source_file.fileno(), destination_file.fileno(), byte_count)
+
+
+class TestCopyBytes:
+    """Tests for the copy_bytes() function."""
+
+    @staticmethod
+    def test_copies_in_chunks(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Copies every byte with copy_file_range, a chunk at a time."""
+        mocker.patch("questdrive_syncer.staging.MOVE_CHUNK_SIZE", 4)
+        copy_file_range = mocker.spy(os, "copy_file_range")
+        (tmp_path / "source").write_bytes(b"0123456789")
+
+        assert copy(tmp_path / "source", tmp_path / "destination", 10) == 10  # noqa: PLR2004
+
+        assert (tmp_path / "destination").read_bytes() == b"0123456789"
+        assert copy_file_range.call_count == 3  # noqa: PLR2004
+
+    @staticmethod
+    def test_stops_at_end_of_source(tmp_path: Path) -> None:
+        """Stops once the source has no more bytes."""
+        (tmp_path / "source").write_bytes(b"01234")
+
+        assert copy(tmp_path / "source", tmp_path / "destination", 10) == 5  # noqa: PLR2004
+
+    @staticmethod
+    def test_falls_back_to_sendfile(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Falls back to sendfile when copy_file_range can't copy between the files."""
+        copy_file_range = mocker.patch(
+            "os.copy_file_range",
+            side_effect=OSError(errno.EXDEV, "cross-device"),
+        )
+        sendfile = mocker.spy(os, "sendfile")
+        (tmp_path / "source").write_bytes(b"0123456789")
+
+        assert copy(tmp_path / "source", tmp_path / "destination", 10) == 10  # noqa: PLR2004
+
+        assert (tmp_path / "destination").read_bytes() == b"0123456789"
+        copy_file_range.assert_called_once()
+        sendfile.assert_called_once()
+
+    @staticmethod
+    def test_sendfile_without_copy_file_range(
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        """Uses sendfile where copy_file_range isn't available."""
+        monkeypatch.delattr(os, "copy_file_range")
+        (tmp_path / "source").write_bytes(b"0123456789")
+
+        assert copy(tmp_path / "source", tmp_path / "destination", 10) == 10  # noqa: PLR2004
+
+    @staticmethod
+    def test_raises_other_errors(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Raises errors other than those of files copy_file_range can't copy between."""
+        mocker.patch("os.copy_file_range", side_effect=OSError(errno.EIO, "I/O"))
+        (tmp_path / "source").write_bytes(b"0123456789")
+
+        with pytest.raises(OSError, match="I/O"):
+            copy(tmp_path / "source", tmp_path / "destination", 10)
+
+
+class TestMoveFile:
+    """Tests for the move_file() function."""
+
+    @staticmethod
+    def test_renames_within_filesystem(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Renames the file within a filesystem."""
+        copy_bytes = mocker.patch("questdrive_syncer.staging.copy_bytes")
+        (tmp_path / "source").write_bytes(b"video")
+
+        move_file(tmp_path / "source", tmp_path / "destination")
+
+        assert (tmp_path / "destination").read_bytes() == b"video"
+        assert not (tmp_path / "source").exists()
+        copy_bytes.assert_not_called()
+
+    @staticmethod
+    def test_copies_across_filesystems(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Copies the file across filesystems, keeping its times & removing the source."""
+        mocker.patch("questdrive_syncer.staging.same_filesystem", return_value=False)
+        source = tmp_path / "source"
+        source.write_bytes(b"video")
+        os.utime(source, (1, 2))
+
+        move_file(source, tmp_path / "destination")
+
+        assert (tmp_path / "destination").read_bytes() == b"video"
+        assert (tmp_path / "destination").stat().st_mtime == 2  # noqa: PLR2004
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["destination"]
+
+    @staticmethod
+    def test_keeps_source_if_copy_is_short(
+        mocker: MockerFixture,
+        tmp_path: Path,
+    ) -> None:
+        """Keeps the source, removing the copy, if the copy is smaller."""
+        mocker.patch("questdrive_syncer.staging.same_filesystem", return_value=False)
+        mocker.patch("questdrive_syncer.staging.copy_bytes")
+        (tmp_path / "source").write_bytes(b"video")
+
+        with pytest.raises(OSError, match='Copied 0 of 5 bytes of ".*source"'):
+            move_file(tmp_path / "source", tmp_path / "destination")
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["source"]
+
+    @staticmethod
+    def test_keeps_source_if_copy_fails(
+        mocker: MockerFixture,
+        tmp_path: Path,
+    ) -> None:
+        """Keeps the source, removing the copy, if copying fails."""
+        mocker.patch("questdrive_syncer.staging.same_filesystem", return_value=False)
+        mocker.patch(
+            "questdrive_syncer.staging.copy_bytes",
+            side_effect=OSError(errno.ENOSPC, "No space left"),
+        )
+        (tmp_path / "source").write_bytes(b"video")
+
+        with pytest.raises(OSError, match="No space left"):
+            move_file(tmp_path / "source", tmp_path / "destination")
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["source"]
+
+
+def test_same_filesystem(tmp_path: Path) -> None:
+    """same_filesystem() returns if the file is on the filesystem of the directory."""
+    (tmp_path / "file").touch()
+
+    assert same_filesystem(tmp_path / "file", tmp_path) is True
+
+
+class TestMover:
+    """Tests for the Mover class."""
+
+    video = Video(
+        "full%2Fpathtofile.mp4",
+        "filename-20240101-111213.mp4",
+        datetime(2024, 1, 1, 11, 12, 13),
+        datetime(2024, 1, 1, 12, 13, 14),
+        5,
+    )
+
+    @staticmethod
+    def make_session(tmp_path: Path) -> SyncSession:
+        """Create a session outputting to the temporary directory."""
+        return SyncSession(
+            Config(
+                questdrive_url="https://example.com/",
+                output_path=str(tmp_path / "output"),
+                minimum_free_space_mb=0,
+            ),
+        )
+
+    @staticmethod
+    def test_stages_and_moves(tmp_path: Path) -> None:
+        """Stages the partial download under its name, then moves it to the output directory."""
+        session = TestMover.make_session(tmp_path)
+
+        with Mover(session, tmp_path / "staging") as mover:
+            mover.partial_path(TestMover.video).write_bytes(b"video")
+            mover.stage(TestMover.video, session.placement.entry(TestMover.video))
+
+        assert (tmp_path / "output" / TestMover.video.filename).read_bytes() == b"video"
+        assert list((tmp_path / "staging").iterdir()) == []
+        assert session.timings.durations["move"].count == 1
+        assert sum(SPACE_RESERVATIONS.reserved_mb.values()) == 0
+
+    @staticmethod
+    def test_moves_previously_staged(tmp_path: Path) -> None:
+        """Moves the videos staged by previous runs, but not partial downloads, ignoring where they were placed on roots no longer configured."""
+        (tmp_path / "staging").mkdir()
+        (tmp_path / "staging" / "staged.mp4").write_bytes(b"video")
+        (tmp_path / "staging" / ".staged.mp4.entry").write_text(
+            f"{tmp_path}/removed/\tshard",
+        )
+        (tmp_path / "staging" / ".partial.mp4.part").write_bytes(b"vid")
+
+        with Mover(TestMover.make_session(tmp_path), tmp_path / "staging"):
+            pass
+
+        assert [path.name for path in (tmp_path / "output").iterdir()] == [
+            "staged.mp4",
+        ]
+        assert [path.name for path in (tmp_path / "staging").iterdir()] == [
+            ".partial.mp4.part",
+        ]
+
+    @staticmethod
+    def test_stages_after_previous_move(mocker: MockerFixture, tmp_path: Path) -> None:
+        """Waits for the move of a previously staged copy of the video before staging it again."""
+        (tmp_path / "staging").mkdir()
+        (tmp_path / "staging" / TestMover.video.filename).write_bytes(b"old")
+        release = threading.Event()
+
+        def blocked_move_file(source: Path, destination: Path) -> None:
+            release.wait()
+            move_file(source, destination)
+
+        mocker.patch(
+            "questdrive_syncer.staging.move_file",
+            side_effect=blocked_move_file,
+        )
+        session = TestMover.make_session(tmp_path)
+
+        with Mover(session, tmp_path / "staging") as mover:
+            mover.partial_path(TestMover.video).write_bytes(b"video")
+            staging = threading.Thread(
+                target=mover.stage,
+                args=(TestMover.video, session.placement.entry(TestMover.video)),
+            )
+            staging.start()
+            try:
+                staging.join(0.1)
+                assert staging.is_alive()
+                assert mover.partial_path(TestMover.video).exists()
+            finally:
+                release.set()
+                staging.join()
+
+        assert (tmp_path / "output" / TestMover.video.filename).read_bytes() == b"video"
+        assert list((tmp_path / "staging").iterdir()) == []
+        assert session.metrics.videos_failed == 0
+
+    @staticmethod
+    def test_moves_to_layout(tmp_path: Path) -> None:
+        """Moves staged videos to the subdirectory they were placed in, or else the output directory."""
+        (tmp_path / "output").mkdir()
+        (tmp_path / "output" / PLACEMENT_INDEX_FILENAME).write_text(
+            f"indexed.mp4\t{tmp_path}/output/\told\n",
+        )
+        (tmp_path / "staging").mkdir()
+        (tmp_path / "staging" / "indexed.mp4").write_bytes(b"video")
+        (tmp_path / "staging" / "unindexed.mp4").write_bytes(b"video")
+        session = SyncSession(
+            Config(
+                questdrive_url="https://example.com/",
+                output_path=f"{tmp_path}/output/",
+                layout="{application_name}/{created_at:%Y}",
+                minimum_free_space_mb=0,
+            ),
+        )
+
+        with Mover(session, tmp_path / "staging") as mover:
+            mover.partial_path(TestMover.video).write_bytes(b"video")
+            mover.stage(TestMover.video, session.placement.entry(TestMover.video))
+
+        assert sorted(
+            str(path.relative_to(tmp_path / "output"))
+            for path in (tmp_path / "output").rglob("*.mp4")
+        ) == [
+            f"filename/2024/{TestMover.video.filename}",
+            "old/indexed.mp4",
+            "unindexed.mp4",
+        ]
+        assert session.placement.placed[TestMover.video.filename].path(
+            TestMover.video.filename,
+        ) == (tmp_path / "output" / "filename" / "2024" / TestMover.video.filename)
+
+    @staticmethod
+    def test_moves_previously_staged_to_layout(
+        mocker: MockerFixture,
+        tmp_path: Path,
+    ) -> None:
+        """Moves a video left staged by a previous run to the subdirectory it was placed in when staged."""
+        mock_move_file = mocker.patch(
+            "questdrive_syncer.staging.move_file",
+            side_effect=OSError(errno.EIO, "I/O error"),
+        )
+        config = Config(
+            questdrive_url="https://example.com/",
+            output_path=f"{tmp_path}/output/",
+            layout="{application_name}/{created_at:%Y}",
+            minimum_free_space_mb=0,
+        )
+        session = SyncSession(config)
+        with Mover(session, tmp_path / "staging") as mover:
+            mover.partial_path(TestMover.video).write_bytes(b"video")
+            mover.stage(TestMover.video, session.placement.entry(TestMover.video))
+        mock_move_file.side_effect = move_file
+
+        with Mover(SyncSession(config), tmp_path / "staging"):
+            pass
+
+        assert (
+            tmp_path / "output" / "filename" / "2024" / TestMover.video.filename
+        ).read_bytes() == b"video"
+        assert list((tmp_path / "staging").iterdir()) == []
+
+    @staticmethod
+    def test_leaves_staged_without_space(
+        mocker: MockerFixture,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Leaves the video staged, counting it as skipped, if there isn't enough space to move it."""
+        mocker.patch(
+            "questdrive_syncer.staging.SPACE_RESERVATIONS.reserve",
+            return_value=nullcontext(False),  # noqa: FBT003
+        )
+        mock_move_file = mocker.patch("questdrive_syncer.staging.move_file")
+        session = TestMover.make_session(tmp_path)
+
+        with Mover(session, tmp_path / "staging") as mover:
+            mover.partial_path(TestMover.video).write_bytes(b"video")
+            mover.stage(TestMover.video, session.placement.entry(TestMover.video))
+
+        mock_move_file.assert_not_called()
+        assert (tmp_path / "staging" / TestMover.video.filename).exists()
+        assert session.metrics.videos_skipped == 1
+        assert (
+            f'Not enough free space to move "{tmp_path / "staging" / TestMover.video.filename}" to "{tmp_path / "output" / TestMover.video.filename}", leaving it staged'
+            in capsys.readouterr().out
+        )
+
+    @staticmethod
+    def test_leaves_failed_moves_staged(
+        mocker: MockerFixture,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Leaves the video staged, counting it as failed, if it can't be moved."""
+        mocker.patch(
+            "questdrive_syncer.staging.move_file",
+            side_effect=OSError(errno.ENOSPC, "No space left"),
+        )
+        session = TestMover.make_session(tmp_path)
+
+        with Mover(session, tmp_path / "staging") as mover:
+            mover.partial_path(TestMover.video).write_bytes(b"video")
+            mover.stage(TestMover.video, session.placement.entry(TestMover.video))
+
+        assert (tmp_path / "staging" / TestMover.video.filename).exists()
+        assert TestMover.video.filename not in session.placement.placed
+        assert session.metrics.videos_failed == 1
+        assert (
+            f'Failed to move "{tmp_path / "staging" / TestMover.video.filename}" to "{tmp_path / "output" / TestMover.video.filename}", leaving it staged: [Errno 28] No space left'
+            in capsys.readouterr().out
+        )
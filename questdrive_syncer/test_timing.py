@@ -0,0 +1,251 @@
+"""Tests for the timing module."""
+from __future__ import annotations
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import pytest
+
+from questdrive_syncer.config import Config
+from questdrive_syncer.events import Event, Kind, Phase
+from questdrive_syncer.session import SyncSession
+from questdrive_syncer.structures import Video
+from questdrive_syncer.timing import (
+    Histogram,
+    PhaseSink,
+    PhaseTimings,
+    TimingSink,
+    escape_label,
+    textfile_lines,
+    write_textfile,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+VIDEO = Video(
+    "full%2Fpathtofile.mp4",
+    "filename-20240101-111213.mp4",
+    datetime(2024, 1, 1, 11, 12, 13),
+    datetime(2024, 1, 1, 12, 13, 14),
+    2345,
+)
+
+
+def test_histogram_counts_cumulatively() -> None:
+    """Histograms count each observation in its bucket, cumulating them by bound."""
+    histogram = Histogram((1, 5))
+
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [2, 3]
+    assert histogram.count == 4  # noqa: PLR2004
+    assert histogram.sum == 14.5  # noqa: PLR2004
+
+
+class TestPhaseTimings:
+    """Tests for the PhaseTimings class."""
+
+    @staticmethod
+    def test_observes_durations_and_bytes() -> None:
+        """Records durations of every phase, and bytes of those that have them."""
+        timings = PhaseTimings()
+
+        timings.observe("transfer", 2, 1000)
+        timings.observe("delete", 0.1)
+
+        assert timings.durations["transfer"].sum == 2  # noqa: PLR2004
+        assert timings.byte_counts["transfer"].sum == 1000  # noqa: PLR2004
+        assert timings.durations["delete"].count == 1
+        assert "delete" not in timings.byte_counts
+
+    @staticmethod
+    def test_observes_failed_durations_apart() -> None:
+        """Records durations of failed phases apart from the others."""
+        timings = PhaseTimings()
+
+        timings.observe("verify", 0.2, failed=True)
+
+        assert timings.failed_durations["verify"].sum == 0.2  # noqa: PLR2004
+        assert "verify" not in timings.durations
+
+    @staticmethod
+    def test_times_blocks_that_raise_as_failed(mocker: MockerFixture) -> None:
+        """Records the duration of a block that raises as failed, re-raising."""
+        mocker.patch("time.monotonic", side_effect=[10.0, 12.5])
+        timings = PhaseTimings()
+
+        with pytest.raises(ValueError), timings.time("listing"):  # noqa: PT011
+            raise ValueError
+
+        assert "listing" not in timings.durations
+        assert timings.failed_durations["listing"].sum == 2.5  # noqa: PLR2004
+
+    @staticmethod
+    def test_times_blocks_that_exit_as_succeeded(mocker: MockerFixture) -> None:
+        """Records the duration of a block that exits as succeeded."""
+        mocker.patch("time.monotonic", side_effect=[10.0, 12.5])
+        timings = PhaseTimings()
+
+        with pytest.raises(SystemExit), timings.time("sync"):
+            sys.exit(0)
+
+        assert timings.durations["sync"].sum == 2.5  # noqa: PLR2004
+        assert "sync" not in timings.failed_durations
+
+    @staticmethod
+    def test_traces_blocks(mocker: MockerFixture) -> None:
+        """Adds a span of the block to the tracer, if any."""
+        mocker.patch("time.monotonic", side_effect=[10.0, 12.5])
+        tracer = mocker.Mock()
+
+        with PhaseTimings(tracer).time("probe"):
+            pass
+
+        tracer.span.assert_called_once_with("probe", "run", 10.0, 12.5)
+
+
+def test_timing_sink_records_finished_phases() -> None:
+    """TimingSink records the duration of finished phases, and the bytes of transfers."""
+    timings = PhaseTimings()
+    sink = TimingSink(timings)
+
+    for event in (
+        Event(Kind.STARTED, VIDEO, at=1),
+        Event(Kind.STARTED, VIDEO, Phase.TRANSFER, at=2),
+        Event(Kind.BYTES, VIDEO, Phase.TRANSFER, 5),
+        Event(Kind.FINISHED, VIDEO, Phase.TRANSFER, 5, at=5),
+        Event(Kind.STARTED, VIDEO, Phase.VERIFY, at=5),
+        Event(Kind.FINISHED, VIDEO, Phase.DELETE, at=6),
+        Event(Kind.FINISHED, VIDEO, at=7),
+    ):
+        sink.handle(event)
+
+    assert {phase: h.sum for phase, h in timings.durations.items()} == {
+        "transfer": 3,
+        "video": 6,
+    }
+    assert timings.byte_counts["transfer"].sum == 5  # noqa: PLR2004
+
+
+def test_timing_sink_records_failed_phases() -> None:
+    """TimingSink records the duration of failed phases, including those the failure of the whole video interrupted."""
+    timings = PhaseTimings()
+    sink = TimingSink(timings)
+
+    for event in (
+        Event(Kind.STARTED, VIDEO, at=1),
+        Event(Kind.STARTED, VIDEO, Phase.VERIFY, at=2),
+        Event(Kind.FAILED, VIDEO, Phase.VERIFY, "short", at=3),
+        Event(Kind.STARTED, VIDEO, Phase.TRANSFER, at=4),
+        Event(Kind.FAILED, VIDEO, value="refused", at=7),
+        Event(Kind.FINISHED, VIDEO, at=8),
+    ):
+        sink.handle(event)
+
+    assert {phase: h.sum for phase, h in timings.failed_durations.items()} == {
+        "verify": 1,
+        "transfer": 3,
+    }
+    assert {phase: h.sum for phase, h in timings.durations.items()} == {"video": 7}
+    assert timings.byte_counts == {}
+
+
+def test_timing_sink_is_shared_by_workers() -> None:
+    """Phases of videos failed by one worker while others start theirs are all recorded."""
+    timings = PhaseTimings()
+    sink = TimingSink(timings)
+
+    def sync(worker: int) -> None:
+        for i in range(200):
+            video = replace(VIDEO, filepath=f"{worker}-{i}")
+            for phase in (Phase.HEAD, Phase.TRANSFER, Phase.VERIFY):
+                sink.handle(Event(Kind.STARTED, video, phase, at=1))
+            sink.handle(Event(Kind.FAILED, video, value="refused", at=2))
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(sync, range(8)))
+
+    assert {phase: h.count for phase, h in timings.failed_durations.items()} == {
+        "head": 1600,
+        "transfer": 1600,
+        "verify": 1600,
+    }
+
+
+def test_phase_sink_ignores_finished_phases() -> None:
+    """The base PhaseSink pairs phases without doing anything with them."""
+    sink = PhaseSink()
+
+    sink.handle(Event(Kind.STARTED, VIDEO, Phase.HEAD, at=1))
+    sink.handle(Event(Kind.FINISHED, VIDEO, Phase.HEAD, at=2))
+
+
+def test_escape_label() -> None:
+    """escape_label() escapes backslashes, quotes & newlines."""
+    assert escape_label('a\\b"c\nd') == 'a\\\\b\\"c\\nd'
+
+
+class TestTextfile:
+    """Tests for the textfile_lines() & write_textfile() functions."""
+
+    @staticmethod
+    def make_session() -> SyncSession:
+        """Create a session with a timed transfer & a download."""
+        session = SyncSession(Config(questdrive_url="http://quest/"))
+        session.timings.observe("transfer", 0.3, 2 * 10**8)
+        session.timings.observe("verify", 0.1, failed=True)
+        session.metrics.add(videos_downloaded=1)
+        return session
+
+    @staticmethod
+    def test_lines(mocker: MockerFixture) -> None:
+        """Returns histograms of the durations & bytes, and the counts of each session."""
+        mocker.patch("time.time", return_value=1700000000.0)
+
+        lines = textfile_lines([TestTextfile.make_session()])
+
+        labels = 'questdrive_url="http://quest/",result="success",phase="transfer"'
+        assert "# TYPE questdrive_syncer_phase_duration_seconds histogram" in lines
+        assert (
+            f'questdrive_syncer_phase_duration_seconds_bucket{{{labels},le="0.25"}} 0'
+            in lines
+        )
+        assert (
+            f'questdrive_syncer_phase_duration_seconds_bucket{{{labels},le="0.5"}} 1'
+            in lines
+        )
+        assert (
+            f'questdrive_syncer_phase_duration_seconds_bucket{{{labels},le="+Inf"}} 1'
+            in lines
+        )
+        assert f"questdrive_syncer_phase_duration_seconds_sum{{{labels}}} 0.3" in lines
+        assert (
+            'questdrive_syncer_phase_duration_seconds_count{questdrive_url="http://quest/",result="failed",phase="verify"} 1'
+            in lines
+        )
+        assert (
+            'questdrive_syncer_phase_bytes_count{questdrive_url="http://quest/",phase="transfer"} 1'
+            in lines
+        )
+        assert (
+            'questdrive_syncer_videos_downloaded{questdrive_url="http://quest/"} 1'
+            in lines
+        )
+        assert "questdrive_syncer_last_export_timestamp_seconds 1700000000.0" in lines
+
+    @staticmethod
+    def test_writes_file_atomically(tmp_path: Path) -> None:
+        """Writes the lines to the file, leaving no temporary file behind."""
+        path = tmp_path / "questdrive_syncer.prom"
+
+        write_textfile(str(path), [TestTextfile.make_session()])
+
+        assert "questdrive_syncer_phase_bytes_sum" in path.read_text()
+        assert [p.name for p in tmp_path.iterdir()] == ["questdrive_syncer.prom"]
@@ -0,0 +1,167 @@
+"""Tests for the tracing module."""
+from __future__ import annotations
+
+import json
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import pytest
+
+from questdrive_syncer.events import Event, Kind, Phase
+from questdrive_syncer.structures import Video
+from questdrive_syncer.tracing import TraceLog, TraceSink, tracing
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pathlib import Path
+
+VIDEO = Video(
+    "full%2Fpathtofile.mp4",
+    "filename-20240101-111213.mp4",
+    datetime(2024, 1, 1, 11, 12, 13),
+    datetime(2024, 1, 1, 12, 13, 14),
+    2345,
+)
+
+
+class TestTraceLog:
+    """Tests for the TraceLog & Tracer classes."""
+
+    @staticmethod
+    def test_names_each_process() -> None:
+        """Gives each tracer its own named process."""
+        log = TraceLog()
+
+        tracers = [log.tracer("http://left/"), log.tracer("http://right/")]
+
+        assert [tracer.pid for tracer in tracers] == [1, 2]
+        assert log.events == [
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": 1,
+                "args": {"name": "http://left/"},
+            },
+            {
+                "name": "process_name",
+                "ph": "M",
+                "pid": 2,
+                "args": {"name": "http://right/"},
+            },
+        ]
+
+    @staticmethod
+    def test_spans_in_microseconds() -> None:
+        """Adds complete events in microseconds on the current thread's track."""
+        log = TraceLog()
+        tracer = log.tracer("http://quest/")
+
+        tracer.span("listing", "run", 1.5, 2.0, {"key": "value"})
+
+        assert log.events[-1] == {
+            "name": "listing",
+            "cat": "run",
+            "ph": "X",
+            "ts": 1.5e6,
+            "dur": 0.5e6,
+            "pid": 1,
+            "tid": threading.get_ident(),
+            "args": {"key": "value"},
+        }
+
+    @staticmethod
+    def test_names_each_thread_once() -> None:
+        """Names the track of each thread the first time it has a span."""
+        log = TraceLog()
+        tracer = log.tracer("http://quest/")
+
+        tracer.span("probe", "run", 1, 2)
+        tracer.span("listing", "run", 2, 3)
+        thread = threading.Thread(
+            target=tracer.span,
+            args=("transfer", "video", 2, 4),
+            name="worker",
+        )
+        thread.start()
+        thread.join()
+
+        assert [
+            event["args"]["name"]
+            for event in log.events
+            if event["name"] == "thread_name"
+        ] == [threading.current_thread().name, "worker"]
+
+
+def test_trace_sink_spans_finished_phases() -> None:
+    """TraceSink adds a span for each finished phase, and the whole video."""
+    log = TraceLog()
+    sink = TraceSink(log.tracer("http://quest/"))
+
+    for event in (
+        Event(Kind.STARTED, VIDEO, at=1),
+        Event(Kind.STARTED, VIDEO, Phase.TRANSFER, at=2),
+        Event(Kind.FINISHED, VIDEO, Phase.TRANSFER, 5, at=3),
+        Event(Kind.FINISHED, VIDEO, at=4),
+    ):
+        sink.handle(event)
+
+    assert [
+        (event["name"], event["cat"], event["ts"], event["dur"], event["args"])
+        for event in log.events
+        if event["ph"] == "X"
+    ] == [
+        ("transfer", "video", 2e6, 1e6, {"video": VIDEO.filename, "bytes": 5}),
+        (VIDEO.filename, "video", 1e6, 3e6, {"video": VIDEO.filename}),
+    ]
+
+
+def test_trace_sink_spans_failed_phases() -> None:
+    """TraceSink adds a span for each failed phase, with why it failed."""
+    log = TraceLog()
+    sink = TraceSink(log.tracer("http://quest/"))
+
+    for event in (
+        Event(Kind.STARTED, VIDEO, Phase.TRANSFER, at=2),
+        Event(Kind.FAILED, VIDEO, value="refused", at=3),
+    ):
+        sink.handle(event)
+
+    assert [
+        (event["name"], event["args"]) for event in log.events if event["ph"] == "X"
+    ] == [("transfer", {"video": VIDEO.filename, "failed": "refused"})]
+
+
+class TestTracing:
+    """Tests for the tracing() function."""
+
+    @staticmethod
+    def test_no_path() -> None:
+        """Yields no trace log without a path."""
+        with tracing(None) as log:
+            assert log is None
+
+    @staticmethod
+    def test_writes_even_on_failure(
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Writes the trace event JSON to the path, even when the block fails."""
+        path = tmp_path / "trace.json"
+
+        def write_trace() -> None:
+            with tracing(str(path)) as log:
+                assert log
+                log.tracer("http://quest/").span("probe", "run", 1, 2)
+                raise SystemExit
+
+        with pytest.raises(SystemExit):
+            write_trace()
+
+        trace = json.loads(path.read_text())
+        assert trace["displayTimeUnit"] == "ms"
+        assert [event["name"] for event in trace["traceEvents"]] == [
+            "process_name",
+            "thread_name",
+            "probe",
+        ]
+        assert f'Trace written to "{path}"' in capsys.readouterr().out
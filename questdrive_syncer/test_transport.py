@@ -0,0 +1,131 @@
+"""Tests for the transport module."""
+from __future__ import annotations
+
+import base64
+import gzip
+
+import httpx
+
+from questdrive_syncer.cassette import Cassette
+from questdrive_syncer.transport import RecordingTransport
+
+
+def respond(request: httpx.Request) -> httpx.Response:
+    """Respond with a page, or a video of 1,000 bytes."""
+    if request.url.path.startswith("/download/"):
+        return httpx.Response(
+            200,
+            headers={
+                "Content-Length": "1000",
+                "Content-Type": "video/mp4",
+                "Server": "QuestDrive",
+            },
+            content=b"" if request.method == "HEAD" else bytes(1000),
+        )
+    return httpx.Response(200, headers={"Content-Type": "text/html"}, text="page")
+
+
+class TestRecordingTransport:
+    """Tests for the RecordingTransport class."""
+
+    @staticmethod
+    def test_records_pages_and_videos() -> None:
+        """Records the body of pages, but only the size of videos - and only the stable headers."""
+        cassette = Cassette()
+        transport = RecordingTransport(httpx.MockTransport(respond), cassette)
+
+        with httpx.Client(transport=transport) as client:
+            page = client.get("http://quest/list/")
+            with client.stream("GET", "http://quest/download/full%2Fpath.mp4") as video:
+                body = video.read()
+            client.head("http://quest/download/full%2Fpath.mp4")
+
+        assert page.text == "page"
+        assert body == bytes(1000)
+        assert [
+            (
+                interaction.device,
+                interaction.method,
+                interaction.path,
+                interaction.status,
+                interaction.headers,
+                interaction.byte_count,
+                interaction.body,
+            )
+            for interaction in cassette.interactions
+        ] == [
+            (
+                "http://quest/",
+                "GET",
+                "/list/",
+                200,
+                {"Content-Length": "4", "Content-Type": "text/html"},
+                4,
+                "cGFnZQ==",
+            ),
+            (
+                "http://quest/",
+                "GET",
+                "/download/full%2Fpath.mp4",
+                200,
+                {"Content-Length": "1000", "Content-Type": "video/mp4"},
+                1000,
+                None,
+            ),
+            (
+                "http://quest/",
+                "HEAD",
+                "/download/full%2Fpath.mp4",
+                200,
+                {"Content-Length": "1000", "Content-Type": "video/mp4"},
+                0,
+                None,
+            ),
+        ]
+        assert all(
+            interaction.started >= 0
+            and interaction.first_byte_seconds >= 0
+            and interaction.body_seconds >= 0
+            for interaction in cassette.interactions
+        )
+
+    @staticmethod
+    def test_records_bodies_as_received() -> None:
+        """Records bodies byte for byte as received - before decoding their content encoding - along with the encoding."""
+        compressed = gzip.compress(b"<html>page</html>")
+        cassette = Cassette()
+        transport = RecordingTransport(
+            httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200,
+                    headers={"Content-Encoding": "gzip"},
+                    content=compressed,
+                )
+                if request.url.path == "/"
+                else httpx.Response(200, content=b"caf\xe9"),
+            ),
+            cassette,
+        )
+
+        with httpx.Client(transport=transport) as client:
+            page = client.get("http://quest/")
+            client.get("http://quest/binary")
+
+        assert page.text == "<html>page</html>"
+        recorded_page, recorded_binary = cassette.interactions
+        assert recorded_page.headers == {
+            "Content-Encoding": "gzip",
+            "Content-Length": str(len(compressed)),
+        }
+        assert recorded_page.byte_count == len(compressed)
+        assert base64.b64decode(recorded_page.body or "") == compressed
+        assert base64.b64decode(recorded_binary.body or "") == b"caf\xe9"
+
+    @staticmethod
+    def test_close() -> None:
+        """Closes the transport it wraps."""
+        inner = httpx.HTTPTransport()
+
+        RecordingTransport(inner, Cassette()).close()
+
+        assert inner._pool.connections == []  # noqa: SLF001
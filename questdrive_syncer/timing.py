@@ -0,0 +1,267 @@
+"""Timing of each phase of syncing, exported as a Prometheus textfile."""
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, cast
+
+from questdrive_syncer.events import Event, Kind, Phase, Sink
+
+if TYPE_CHECKING:  # pragma: no cover
+    from questdrive_syncer.session import SyncSession
+    from questdrive_syncer.tracing import Tracer
+
+DURATION_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    300,
+    900,
+)
+BYTE_BUCKETS = (1e6, 1e7, 1e8, 2.5e8, 5e8, 1e9, 2.5e9, 5e9, 1e10)
+METRIC_PREFIX = "questdrive_syncer"
+_TEXTFILE_LOCK = threading.Lock()
+
+
+class Histogram:
+    """Counts of observations within each bucket, along with their sum."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self: Histogram, bounds: tuple[float, ...]) -> None:
+        """Initialize the histogram with no observations."""
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self: Histogram, value: float) -> None:
+        """Count the value in the first bucket it fits in."""
+        i = bisect.bisect_left(self.bounds, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self: Histogram) -> list[int]:
+        """Return the count of observations less than or equal to each bound."""
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class PhaseTimings:
+    """Histograms of the duration - and bytes, for transfers - of each phase of a session.
+
+    Phases of a run are named by what they do, such as "probe" and "listing", while
+    phases of each video are named after their Phase, with "video" for the whole video.
+    Durations of phases that failed are kept apart, so they don't skew the others.
+    """
+
+    def __init__(self: PhaseTimings, tracer: Tracer | None = None) -> None:
+        """Initialize the timings with no observations, tracing timed blocks to the tracer if any."""
+        self.tracer = tracer
+        self.durations: dict[str, Histogram] = {}
+        self.failed_durations: dict[str, Histogram] = {}
+        self.byte_counts: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self: PhaseTimings,
+        phase: str,
+        seconds: float,
+        byte_count: int | None = None,
+        *,
+        failed: bool = False,
+    ) -> None:
+        """Record the duration of the phase - as failed if it did - and its bytes if any."""
+        durations = self.failed_durations if failed else self.durations
+        with self._lock:
+            durations.setdefault(phase, Histogram(DURATION_BUCKETS)).observe(seconds)
+            if byte_count is not None:
+                self.byte_counts.setdefault(phase, Histogram(BYTE_BUCKETS)).observe(
+                    byte_count,
+                )
+
+    @contextmanager
+    def time(self: PhaseTimings, phase: str) -> Iterator[None]:
+        """Record the duration of the block as the phase, as failed if it raises - other than to exit."""
+        started = time.monotonic()
+        failed = False
+        try:
+            yield
+        except BaseException as error:
+            failed = not isinstance(error, SystemExit)
+            raise
+        finally:
+            finished = time.monotonic()
+            self.observe(phase, finished - started, failed=failed)
+            if self.tracer:
+                self.tracer.span(phase, "run", started, finished)
+
+
+class PhaseSink(Sink):
+    """Pairs the started & finished - or failed - events of each phase of every video, ignoring finished phases unless overridden.
+
+    A failure of the whole video fails every phase of it still in progress, such as an
+    interrupted transfer, while the video itself still finishes.
+    """
+
+    def __init__(self: PhaseSink) -> None:
+        """Initialize the sink with no started phases."""
+        self._started: dict[tuple[str, Phase | None], float] = {}
+        self._lock = threading.Lock()
+
+    def handle(self: PhaseSink, event: Event) -> None:
+        """Remember when phases start, passing them on when they finish or fail.
+
+        The sink is shared by every download worker, so the started phases are only
+        touched while holding the lock, which is released before passing them on.
+        """
+        kind = event.kind
+        filepath = event.video.filepath
+        if kind is Kind.STARTED:
+            with self._lock:
+                self._started[(filepath, event.phase)] = event.at
+        elif kind is Kind.FINISHED or (kind is Kind.FAILED and event.phase):
+            with self._lock:
+                started = self._started.pop((filepath, event.phase), None)
+            if started is not None:
+                self.finish(event, started)
+        elif kind is Kind.FAILED:
+            with self._lock:
+                failed = [
+                    (key[1], self._started.pop(key))
+                    for key in [
+                        key for key in self._started if key[0] == filepath and key[1]
+                    ]
+                ]
+            for phase, started in failed:
+                self.finish(event._replace(phase=phase), started)
+
+    def finish(self: PhaseSink, event: Event, started: float) -> None:
+        """Handle the phase finished - or failed - by the event, which started at the time."""
+
+
+class TimingSink(PhaseSink):
+    """Records the duration of each phase of every video from its started & finished events."""
+
+    def __init__(self: TimingSink, timings: PhaseTimings) -> None:
+        """Initialize the sink."""
+        super().__init__()
+        self.timings = timings
+
+    def finish(self: TimingSink, event: Event, started: float) -> None:
+        """Record the duration of the phase, and the bytes of finished transfers."""
+        phase = event.phase
+        failed = event.kind is Kind.FAILED
+        self.timings.observe(
+            "video" if phase is None else phase.value,
+            event.at - started,
+            int(cast(float, event.value))
+            if phase is Phase.TRANSFER and not failed
+            else None,
+            failed=failed,
+        )
+
+
+def escape_label(value: str) -> str:
+    """Escape the value of a Prometheus label."""
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def histogram_lines(
+    name: str,
+    help_text: str,
+    histograms: list[tuple[dict[str, str], dict[str, Histogram]]],
+) -> list[str]:
+    """Return the Prometheus text lines of the histograms of each phase, with the labels of their group."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for group_labels, phases in histograms:
+        for phase, histogram in sorted(phases.items()):
+            labels = ",".join(
+                f'{label}="{escape_label(value)}"'
+                for label, value in {**group_labels, "phase": phase}.items()
+            )
+            for bound, count in zip(histogram.bounds, histogram.cumulative_counts()):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+def textfile_lines(sessions: list[SyncSession]) -> list[str]:
+    """Return the Prometheus text lines of the timings & metrics of the sessions."""
+    lines = histogram_lines(
+        f"{METRIC_PREFIX}_phase_duration_seconds",
+        "Duration of each phase of syncing, by whether it succeeded or failed.",
+        [
+            ({"questdrive_url": s.config.questdrive_url, "result": result}, phases)
+            for s in sessions
+            for result, phases in (
+                ("success", dict(s.timings.durations)),
+                ("failed", dict(s.timings.failed_durations)),
+            )
+        ],
+    )
+    lines += histogram_lines(
+        f"{METRIC_PREFIX}_phase_bytes",
+        "Bytes transferred by each phase of syncing a video.",
+        [
+            ({"questdrive_url": s.config.questdrive_url}, dict(s.timings.byte_counts))
+            for s in sessions
+        ],
+    )
+    for counter in (
+        "requests",
+        "videos_downloaded",
+        "bytes_downloaded",
+        "videos_deleted",
+        "videos_skipped",
+        "videos_failed",
+    ):
+        name = f"{METRIC_PREFIX}_{counter}"
+        lines += [
+            f"# HELP {name} {counter.replace('_', ' ').capitalize()} of the last sync.",
+            f"# TYPE {name} gauge",
+        ]
+        lines += [
+            f'{name}{{questdrive_url="{escape_label(s.config.questdrive_url)}"}} {getattr(s.metrics, counter)}'
+            for s in sessions
+        ]
+    name = f"{METRIC_PREFIX}_last_export_timestamp_seconds"
+    lines += [
+        f"# HELP {name} Time the metrics were exported.",
+        f"# TYPE {name} gauge",
+        f"{name} {time.time()}",
+    ]
+    return lines
+
+
+def write_textfile(path: str, sessions: list[SyncSession]) -> None:
+    """Write the timings & metrics of the sessions as a Prometheus node-exporter textfile.
+
+    The file is replaced atomically, so the exporter never reads it half-written.
+    """
+    with _TEXTFILE_LOCK:
+        temporary_path = Path(f"{path}.{os.getpid()}.tmp")
+        temporary_path.write_text("\n".join(textfile_lines(sessions)) + "\n")
+        temporary_path.replace(path)
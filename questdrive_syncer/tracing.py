@@ -0,0 +1,138 @@
+"""Timelines of syncs, written as Chrome trace events."""
+from __future__ import annotations
+
+import json
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+from questdrive_syncer.events import Kind, Phase
+from questdrive_syncer.timing import PhaseSink
+
+if TYPE_CHECKING:  # pragma: no cover
+    from questdrive_syncer.events import Event
+
+
+class TraceLog:
+    """Trace events of every traced session, each session being its own process.
+
+    The events can be opened in chrome://tracing or https://ui.perfetto.dev, where
+    each thread of each session gets its own track.
+    """
+
+    def __init__(self: TraceLog) -> None:
+        """Initialize the log with no events."""
+        self.events: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._threads: set[tuple[int, int]] = set()
+        self._process_count = 0
+
+    def tracer(self: TraceLog, name: str) -> Tracer:
+        """Return a tracer of a new process with the name."""
+        with self._lock:
+            self._process_count += 1
+            pid = self._process_count
+            self.events.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "args": {"name": name},
+                },
+            )
+        return Tracer(self, pid)
+
+    def add(self: TraceLog, event: dict[str, Any]) -> None:
+        """Add the event, naming the track of its thread the first time it's seen."""
+        thread = (event["pid"], event["tid"])
+        with self._lock:
+            if thread not in self._threads:
+                self._threads.add(thread)
+                self.events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": event["pid"],
+                        "tid": event["tid"],
+                        "args": {"name": threading.current_thread().name},
+                    },
+                )
+            self.events.append(event)
+
+    def write(self: TraceLog, path: str) -> None:
+        """Write the events as trace event JSON."""
+        with self._lock:
+            trace = {"traceEvents": self.events, "displayTimeUnit": "ms"}
+            Path(path).write_text(json.dumps(trace))
+
+
+class Tracer:
+    """Adds spans of the current thread to a process of the trace log."""
+
+    def __init__(self: Tracer, log: TraceLog, pid: int) -> None:
+        """Initialize the tracer."""
+        self.log = log
+        self.pid = pid
+
+    def span(
+        self: Tracer,
+        name: str,
+        category: str,
+        started: float,
+        finished: float,
+        args: dict[str, Any] | None = None,
+    ) -> None:
+        """Add a span of the current thread between the monotonic times."""
+        self.log.add(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": started * 1e6,
+                "dur": (finished - started) * 1e6,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": args or {},
+            },
+        )
+
+
+class TraceSink(PhaseSink):
+    """Traces each phase of every video, within a span of the whole video."""
+
+    def __init__(self: TraceSink, tracer: Tracer) -> None:
+        """Initialize the sink."""
+        super().__init__()
+        self.tracer = tracer
+
+    def finish(self: TraceSink, event: Event, started: float) -> None:
+        """Add a span of the phase, with the bytes of finished transfers, or why it failed."""
+        phase = event.phase
+        args: dict[str, Any] = {"video": event.video.filename}
+        if event.kind is Kind.FAILED:
+            args["failed"] = event.value
+        elif phase is Phase.TRANSFER:
+            args["bytes"] = event.value
+        self.tracer.span(
+            event.video.filename if phase is None else phase.value,
+            "video",
+            started,
+            event.at,
+            args,
+        )
+
+
+@contextmanager
+def tracing(path: str | None) -> Iterator[TraceLog | None]:
+    """Yield a trace log if there's a path, writing it there afterwards - even on failure."""
+    if path is None:
+        yield None
+        return
+
+    log = TraceLog()
+    try:
+        yield log
+    finally:
+        log.write(path)
+        print(f'Trace written to "{path}"')
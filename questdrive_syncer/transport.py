@@ -0,0 +1,114 @@
+"""HTTP transport recording every response to a cassette."""
+from __future__ import annotations
+
+import base64
+import time
+from typing import TYPE_CHECKING, Iterator
+
+import httpx
+
+from questdrive_syncer.cassette import Interaction
+
+if TYPE_CHECKING:  # pragma: no cover
+    from typing import Callable
+
+    from questdrive_syncer.cassette import Cassette
+
+RECORDED_HEADERS = ("Content-Encoding", "Content-Length", "Content-Type")
+
+
+class RecordingStream(httpx.SyncByteStream):
+    """Body of a response as received - before any content decoding - calling back with what was received once closed."""
+
+    def __init__(
+        self: RecordingStream,
+        stream: httpx.SyncByteStream,
+        *,
+        keep_body: bool,
+        on_close: Callable[[int, str | None], None],
+    ) -> None:
+        """Initialize the stream, keeping the body if configured."""
+        self.stream = stream
+        self.keep_body = keep_body
+        self.on_close = on_close
+        self.byte_count = 0
+        self.chunks: list[bytes] = []
+
+    def __iter__(self: RecordingStream) -> Iterator[bytes]:
+        """Yield the chunks of the body, counting them."""
+        for chunk in self.stream:
+            self.byte_count += len(chunk)
+            if self.keep_body:
+                self.chunks.append(chunk)
+            yield chunk
+
+    def close(self: RecordingStream) -> None:
+        """Close the body, calling back with its size & bytes - base64-encoded, so any body is kept as it was."""
+        self.stream.close()
+        body = (
+            base64.b64encode(b"".join(self.chunks)).decode() if self.keep_body else None
+        )
+        self.on_close(self.byte_count, body)
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Records every response of the transport to the cassette.
+
+    The bodies of downloads aren't kept, so videos are recorded as their size & timing.
+    Other bodies are kept as received, along with their content encoding, so they're
+    replayed byte for byte.
+    """
+
+    def __init__(
+        self: RecordingTransport,
+        transport: httpx.BaseTransport,
+        cassette: Cassette,
+    ) -> None:
+        """Initialize the transport."""
+        self.transport = transport
+        self.cassette = cassette
+
+    def handle_request(
+        self: RecordingTransport,
+        request: httpx.Request,
+    ) -> httpx.Response:
+        """Send the request, recording its response once the body is closed."""
+        started = time.monotonic()
+        response = self.transport.handle_request(request)
+        first_byte_at = time.monotonic()
+        headers = {
+            name: response.headers[name]
+            for name in RECORDED_HEADERS
+            if name in response.headers
+        }
+
+        def record(byte_count: int, body: str | None) -> None:
+            self.cassette.add(
+                Interaction(
+                    str(request.url.join("/")),
+                    request.method,
+                    request.url.raw_path.decode(),
+                    response.status_code,
+                    headers,
+                    started - self.cassette.started,
+                    first_byte_at - started,
+                    time.monotonic() - first_byte_at,
+                    byte_count,
+                    body,
+                ),
+            )
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=RecordingStream(
+                response.stream,  # type: ignore[arg-type]
+                keep_body=not request.url.path.startswith("/download/"),
+                on_close=record,
+            ),
+            extensions=response.extensions,
+        )
+
+    def close(self: RecordingTransport) -> None:
+        """Close the transport."""
+        self.transport.close()
@@ -1,10 +1,18 @@
 """Whitelist for vulture."""
+from benchmarks.fake_questdrive import FakeQuestDrive, FakeQuestDriveHandler
 from questdrive_syncer.test_api import assert_all_responses_were_requested
-from questdrive_syncer.test_config import _reset_config
+from questdrive_syncer.test_discovery import StaticHandler
 from questdrive_syncer.test_download import (
     assert_all_responses_were_requested as assert_all_responses_were_requested2,
 )
+from questdrive_syncer.test_main import _lock_directory
 
 assert_all_responses_were_requested  # noqa: B018 unused function (questdrive_syncer/test_api.py:22)
-_reset_config  # noqa: B018 unused function (questdrive_syncer/test_config.py:11)
 assert_all_responses_were_requested2  # noqa: B018 unused function (questdrive_syncer/test_download.py:20)
+_lock_directory  # noqa: B018 unused function (questdrive_syncer/test_main.py:38)
+StaticHandler.do_GET  # noqa: B018 unused method (questdrive_syncer/test_discovery.py:30)
+StaticHandler.log_message  # noqa: B018 unused method (questdrive_syncer/test_discovery.py:36)
+FakeQuestDriveHandler.protocol_version  # noqa: B018 unused variable (benchmarks/fake_questdrive.py:52)
+FakeQuestDriveHandler.do_HEAD  # noqa: B018 unused method (benchmarks/fake_questdrive.py:55)
+FakeQuestDrive.daemon_threads  # noqa: B018 unused variable (benchmarks/fake_questdrive.py:124)
+FakeQuestDriveHandler.close_connection  # noqa: B018 unused attribute (benchmarks/fake_questdrive.py:148)